@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends,UploadFile, File,HTTPException,Form
+import json
+from fastapi import APIRouter, Depends,UploadFile, File,HTTPException,Form,Header
+from fastapi.responses import StreamingResponse
 from typing import List,Dict, Optional
 from app.auth.dependencies import get_current_user
 from app.chat.session_store import get_session, cleanup_session
-from app.chat.chat_orchestrator import run_chat_turn
+from app.chat.chat_orchestrator import run_chat_turn, run_chat_turn_stream
+from app.llm.groq_client import LLMServiceError
 from app.schemas.api import ChatResponse, EndSessionResponse
+from app.utils.deadline import Deadline
+from app.config import settings
 
 router = APIRouter()
 
@@ -13,6 +18,8 @@ async def chat(
     image: Optional[UploadFile] = File(None),
     audio: Optional[UploadFile] = File(None),
     session_id: Optional[str] = Form(None),
+    use_cache: bool = Form(True),
+    request_timeout: Optional[str] = Header(None, alias="X-Request-Timeout"),
     user = Depends(get_current_user),
 ) -> ChatResponse:
     """
@@ -25,10 +32,13 @@ async def chat(
         image: Image file (PNG, JPEG, GIF, WebP)
         audio: Audio file (MP3, WAV, M4A, etc.)
         session_id: Optional session ID for multi-turn chat
+        use_cache: false forces a fresh LLM answer (skips the completion cache)
+        request_timeout: X-Request-Timeout header, end-to-end budget in seconds
+            (default CHAT_DEADLINE_SECONDS)
         user: Authenticated user
         
     Returns:
-        ChatResponse with answer and citations
+        ChatResponse with answer, citations and the stages cut by the deadline
         
     Raises:
         HTTPException 400: No input provided
@@ -44,11 +54,67 @@ async def chat(
         message=message,
         image=image,
         audio=audio,
+        use_cache=use_cache,
+        deadline=Deadline.from_header(request_timeout, settings.CHAT_DEADLINE_SECONDS),
     )
 
     return response
 
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("/api/chat/stream")
+async def chat_stream(
+    message: Optional[str] = Form(None),
+    image: Optional[UploadFile] = File(None),
+    audio: Optional[UploadFile] = File(None),
+    session_id: Optional[str] = Form(None),
+    use_cache: bool = Form(True),
+    request_timeout: Optional[str] = Header(None, alias="X-Request-Timeout"),
+    user = Depends(get_current_user),
+) -> StreamingResponse:
+    """
+    Same as /api/chat, but streams the answer as Server-Sent Events.
+
+    Events (in order):
+        meta       {"session_id"}
+        citations  {"citations"}                      sent before the first token
+        token      {"text"}                           one per LLM delta
+        done       {"session_id", "answer", "citations", "degraded_stages"}
+        error      {"message"}                        replaces done if the LLM fails
+
+    Raises:
+        HTTPException 400/413/415: Same input validation as /api/chat
+    """
+    if not message and not image and not audio:
+        raise HTTPException(status_code=400, detail="At least one of message, image, or audio must be provided.")
+
+    events = await run_chat_turn_stream(
+        owner_id=user.id,
+        session_id=session_id,
+        message=message,
+        image=image,
+        audio=audio,
+        use_cache=use_cache,
+        deadline=Deadline.from_header(request_timeout, settings.CHAT_STREAM_DEADLINE_SECONDS),
+    )
+
+    async def event_source():
+        try:
+            async for item in events:
+                yield _sse(item["event"], item["data"])
+        except LLMServiceError as e:
+            yield _sse("error", {"message": str(e)})
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/api/chat/end", response_model=EndSessionResponse)
 async def end_chat(
     session_id: str = Form(...),
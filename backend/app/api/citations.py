@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException, Depends
-from app.chat.session_store import _CHAT_SESSIONS
+from app.chat.session_store import load_session
 from app.auth.dependencies import get_current_user
 
 router = APIRouter(prefix="/api/citations", tags=["Citations"])
@@ -11,7 +11,7 @@ def resolve_citation(
     citation_id: int,
     current_user = Depends(get_current_user),
 ):
-    session = _CHAT_SESSIONS.get(session_id)
+    session = load_session(session_id)
 
     if not session:
         raise HTTPException(404, "Session not found")
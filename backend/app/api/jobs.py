@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException, Depends
+from app.auth.dependencies import get_current_user
+from app.jobs.queue import get_job_queue
+from app.schemas.api import JobStatusResponse
+
+router = APIRouter(prefix="/api/jobs", tags=["Ingestion Jobs"])
+
+
+@router.get("/{job_id}", response_model=JobStatusResponse)
+def get_job_status(
+    job_id: str,
+    current_user = Depends(get_current_user),
+):
+    """
+    Poll an ingestion job enqueued by /api/upload-admin or /api/audio/upload.
+
+    Returns:
+        JobStatusResponse: status, current stage, progress counters
+        (pages / chunks / segments / vectors), error and final result
+
+    Raises:
+        HTTPException 404: Job not found
+        HTTPException 403: Job belongs to another user
+    """
+    job = get_job_queue().get(job_id)
+
+    if not job:
+        raise HTTPException(404, "Job not found")
+
+    if job["owner_id"] != current_user.id:
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+    return JobStatusResponse(
+        job_id=job["job_id"],
+        kind=job["kind"],
+        status=job["status"],
+        stage=job["stage"],
+        progress=job["progress"],
+        attempts=job["attempts"],
+        max_attempts=job["max_attempts"],
+        error=job["error"],
+        result=job["result"],
+        created_at=datetime.utcfromtimestamp(job["created_at"]).isoformat(),
+        updated_at=datetime.utcfromtimestamp(job["updated_at"]).isoformat(),
+    )
@@ -5,12 +5,16 @@ from app.embeddings.hf_bge_m3 import HFBgeM3Embedder
 from app.retrieval.text_retriever import retrieve_text_chunks  
 from app.rag.text_rag import generate_rag_answer 
 from app.schemas.api import AskRequest
+from app.config import settings
 
 router = APIRouter(prefix="/api",tags=['Search'])
 
 class SearchRequest(BaseModel):
     query: str
     top_k: int = 5
+    use_mmr: bool = False
+    mmr_lambda: float = settings.MMR_LAMBDA
+    expand_neighbors: int = 0
 
 @router.post("/search/text")
 def search_text(
@@ -24,6 +28,9 @@ def search_text(
         owner_id=current_user.id,
         embedder=embedder,
         top_k=req.top_k,
+        use_mmr=req.use_mmr,
+        mmr_lambda=req.mmr_lambda,
+        expand_neighbors=req.expand_neighbors,
     )
 
     return {
@@ -42,11 +49,15 @@ def ask_question(payload: AskRequest):
     
         embedder=embedder,
         top_k=5,
+        use_mmr=settings.ASK_USE_MMR,
+        mmr_lambda=settings.MMR_LAMBDA,
+        expand_neighbors=settings.ASK_NEIGHBOR_WINDOW,
     )
 
     rag_result = generate_rag_answer(
         query=payload.query,
         chunks=chunks,
+        use_cache=payload.use_cache,
     )
 
     return {
@@ -6,6 +6,7 @@ from app.retrieval.audio_to_audio_retriever import retrieve_similar_audio
 from app.retrieval.audio_to_text_retriever import retrieve_text_from_audio
 from app.retrieval.audio_to_image_retriever import retrieve_image_from_audio
 from app.utils.cloudinary_audio import upload_audio
+from app.chat.media_analysis import analyze_audio, upload_and_analyze
 
 router = APIRouter(prefix="/api/search/audio", tags=["Audio Search"])
 
@@ -61,27 +62,14 @@ async def search_similar_audio(
     Find similar audio files by uploading an audio sample.
     Transcribes the query audio and matches against indexed transcripts.
     """
-    if file.content_type not in ALLOWED_AUDIO_TYPES:
-        raise HTTPException(status_code=415, detail="Unsupported audio type")
-
-    audio_bytes = await file.read()
-    if len(audio_bytes) > MAX_AUDIO_SIZE:
-        raise HTTPException(status_code=413, detail="Audio file too large")
-    if not audio_bytes:
-        raise HTTPException(status_code=400, detail="Empty file")
-
-    # Upload to temporary storage for processing
-    audio_url = upload_audio(
-        file_bytes=audio_bytes,
-        filename=file.filename,
-        owner_id=user.id,
-        temp=True,  # Temporary upload for search
-    )
+    # Upload to temporary storage while transcribing the in-memory bytes
+    audio_url, transcription = await _validate_and_upload_audio(file, user.id)
 
     results = retrieve_similar_audio(
         audio_url=audio_url,
         owner_id=user.id,
         top_k=top_k,
+        transcription=transcription,
     )
 
     # Filter by threshold
@@ -105,27 +93,14 @@ async def search_text_from_audio(
     Search text documents using audio query.
     Transcribes audio and searches text collection.
     """
-    if file.content_type not in ALLOWED_AUDIO_TYPES:
-        raise HTTPException(status_code=415, detail="Unsupported audio type")
-
-    audio_bytes = await file.read()
-    if len(audio_bytes) > MAX_AUDIO_SIZE:
-        raise HTTPException(status_code=413, detail="Audio file too large")
-    if not audio_bytes:
-        raise HTTPException(status_code=400, detail="Empty file")
-
-    # Upload to temporary storage
-    audio_url = upload_audio(
-        file_bytes=audio_bytes,
-        filename=file.filename,
-        owner_id=user.id,
-        temp=True,
-    )
+    # Upload to temporary storage while transcribing the in-memory bytes
+    audio_url, transcription = await _validate_and_upload_audio(file, user.id)
 
     results = retrieve_text_from_audio(
         audio_url=audio_url,
         owner_id=user.id,
         top_k=top_k,
+        transcription=transcription,
     )
 
     # Filter by threshold
@@ -147,27 +122,14 @@ async def search_image_from_audio(
     """
     Search image documents using audio query. 
     """
-    if file.content_type not in ALLOWED_AUDIO_TYPES:
-        raise HTTPException(status_code=415, detail="Unsupported audio type")
-
-    audio_bytes = await file.read()
-    if len(audio_bytes) > MAX_AUDIO_SIZE:
-        raise HTTPException(status_code=413, detail="Audio file too large")
-    if not audio_bytes:
-        raise HTTPException(status_code=400, detail="Empty file")
-
-    # Upload to temporary storage
-    audio_url = upload_audio(
-        file_bytes=audio_bytes,
-        filename=file.filename,
-        owner_id=user.id,
-        temp=True,
-    )
+    # Upload to temporary storage while transcribing the in-memory bytes
+    audio_url, transcription = await _validate_and_upload_audio(file, user.id)
 
     results = retrieve_image_from_audio(
         audio_url=audio_url,
         owner_id=user.id,
         top_k=top_k,
+        transcription=transcription,
     )
 
     # Filter by threshold
@@ -178,4 +140,35 @@ async def search_image_from_audio(
         "query_type": "audio_to_image",
         "query_audio": audio_url,
         "results": filtered or results,
-    }
\ No newline at end of file
+    }
+
+
+async def _validate_and_upload_audio(file: UploadFile, owner_id: str) -> tuple[str, dict]:
+    """
+    Validate, then upload to Cloudinary while Whisper transcribes the
+    in-memory bytes. Returns (audio_url, transcription).
+    """
+    if file.content_type not in ALLOWED_AUDIO_TYPES:
+        raise HTTPException(status_code=415, detail="Unsupported audio type")
+
+    audio_bytes = await file.read()
+    if len(audio_bytes) > MAX_AUDIO_SIZE:
+        raise HTTPException(status_code=413, detail="Audio file too large")
+    if not audio_bytes:
+        raise HTTPException(status_code=400, detail="Empty file")
+
+    upload, transcription, error = await upload_and_analyze(
+        upload=lambda: upload_audio(
+            file_bytes=audio_bytes,
+            filename=file.filename,
+            owner_id=owner_id,
+            temp=True,  # Temporary upload for search
+        ),
+        analyze=lambda url: analyze_audio(url, audio_bytes),
+        url_key="audio_url",
+    )
+    if error is not None:
+        raise error
+    # The response carries the CDN URL, so search waits for the upload here
+    audio_url = await upload.wait()
+    return audio_url, transcription
@@ -6,6 +6,8 @@ from app.retrieval.image_to_image_retriever import retrieve_similar_images
 from app.retrieval.image_to_text_retriever import retrieve_text_from_image
 from app.retrieval.image_to_audio_retriever import retrieve_audio_from_image
 from app.utils.cloudinary import upload_temp_image
+from app.chat.media_analysis import analyze_image, upload_and_analyze
+from app.embeddings.image.orchestrator import requires_image_url
 
 router = APIRouter(prefix = "/api/search/image", tags = ["Image Search"])
 
@@ -44,12 +46,13 @@ async def image_to_image_search(
     top_k: int = Form(5),
     user=Depends(get_current_user),
 ):
-    image_url = await _validate_and_upload_image(file)
+    image_url, analysis = await _validate_and_upload_image(file)
 
     results = retrieve_similar_images(
         image_url = image_url,
         owner_id = user.id,
         top_k = top_k,
+        embedding = analysis,
     )
 
     return {
@@ -65,12 +68,13 @@ async def image_to_text_search(
     top_k: int = Form(5),
     user=Depends(get_current_user),
 ):
-    image_url = await _validate_and_upload_image(file)
+    image_url, analysis = await _validate_and_upload_image(file)
 
     results = retrieve_text_from_image(
         image_url = image_url,
         owner_id = user.id,
         top_k = top_k,
+        embedding = analysis,
     )
     if not results:
         return {
@@ -93,12 +97,13 @@ async def image_to_audio_search(
     top_k: int = Form(5),
     user=Depends(get_current_user),
 ):
-    image_url = await _validate_and_upload_image(file)
+    image_url, analysis = await _validate_and_upload_image(file)
 
     results = retrieve_audio_from_image(
         image_url = image_url,
         owner_id = user.id,
         top_k = top_k,
+        embedding = analysis,
     )
 
     # Filter by score threshold (consistent with audio search endpoints)
@@ -114,7 +119,11 @@ async def image_to_audio_search(
 
 
 
-async def _validate_and_upload_image(file: UploadFile) -> str:
+async def _validate_and_upload_image(file: UploadFile) -> tuple[str, dict]:
+    """
+    Validate, then upload to Cloudinary while OCR/CLIP run on the in-memory
+    bytes. Returns (image_url, embed_image-style analysis).
+    """
     if file.content_type not in ALLOWED_CONTENT_TYPES:
         raise HTTPException(415, "Unsupported file type")
 
@@ -125,8 +134,18 @@ async def _validate_and_upload_image(file: UploadFile) -> str:
         raise HTTPException(400, "Empty file")
 
     # Upload once after validation to avoid double reads.
-    return upload_temp_image(
-        file_bytes=image_bytes,
-        filename=file.filename,
+    upload, analysis, error = await upload_and_analyze(
+        upload=lambda: upload_temp_image(
+            file_bytes=image_bytes,
+            filename=file.filename,
+        ),
+        analyze=lambda url: analyze_image(url, image_bytes),
+        needs_url=requires_image_url(),
+        url_key="image_url",
     )
+    if error is not None:
+        raise error
+    # The response carries the CDN URL, so search waits for the upload here
+    image_url = await upload.wait()
+    return image_url, analysis
 
@@ -100,26 +100,26 @@
 #         if temp_path:
 #             cleanup_temp_file(temp_path)
 
-from fastapi import APIRouter,UploadFile,File,HTTPException,Depends
+from fastapi import APIRouter,UploadFile,File,HTTPException,Depends,Response
 
 from pathlib import Path
+from app.config import settings
 from app.utils.file_utils import save_temp_file, cleanup_temp_file
-from app.ingestion.text_ingest import extract_raw_text
-from app.utils.upload_validation import validate_document_upload
+from app.utils.upload_validation import validate_document_file
 
 
 ###################### Import Auth Dependencies ######################
 from app.auth.dependencies  import get_current_user # New Change
 from app.auth.models import User
 
-###################### Import Preprocessing Functions ######################
-from app.preprocessing.text_preprocess import preprocess_text
-from app.chunking.text_chunker import build_chunks 
+###################### Import Ingestion Pipeline ######################
+from app.ingestion.document_pipeline import NoReadableTextError, ingest_document_file
+from app.jobs.handlers import DOCUMENT_JOB
+from app.jobs.queue import get_job_queue, save_job_file
 
 ########################### Import  HF BGE Embedder ##########################
 
 from app.embeddings.hf_bge_m3 import HFBgeM3Embedder
-from app.ingestion.text_indexer import index_text_chunks
 
 embedder = HFBgeM3Embedder()
 
@@ -128,6 +128,7 @@ route = APIRouter(prefix='/api',tags=["Admin Upload"])
 
 @route.post("/upload-admin")
 def upload_document(
+    response: Response,
     file:UploadFile=File(...), 
     current_user: User = Depends(get_current_user) # New Change
     ):
@@ -139,21 +140,30 @@ def upload_document(
     - File size (max 200 MB)
     - File not empty
     - File magic bytes (not corrupted)
-    - Has readable text content
     
-    Then:
+    The upload is streamed to disk, never read into memory as a whole.
+    Then (JOBS_ENABLED, default) parks the file and enqueues an ingestion
+    job, answering 202 with its job_id; poll GET /api/jobs/{job_id} for
+    progress (pages, chunks, vectors) and the indexing summary.
+
+    With JOBS_ENABLED=false the document is indexed inside the request,
+    page by page (app/ingestion/document_pipeline.py):
     - Extracts text
     - Preprocesses text
     - Chunks into overlapping segments
-    - Generates embeddings
+    - Generates embeddings (batches, overlapping extraction)
     - Indexes into Qdrant
+
+    Re-uploading a filename re-indexes it incrementally: unchanged chunks
+    are skipped, changed / new ones embedded, chunks of removed pages
+    deleted (counts in the summary: chunks_skipped / _updated / _added / _removed).
     
     Args:
         file: PDF or DOCX file to upload
         current_user: Authenticated user
         
     Returns:
-        dict: Indexing summary
+        dict: Job id + status URL, or the indexing summary (JOBS_ENABLED=false)
         
     Raises:
         HTTPException 400: Invalid/empty file, no readable text
@@ -172,80 +182,45 @@ def upload_document(
             detail=f"Unsupported file type: {suffix}. Allowed types: {', '.join(allowed)}"
         )
     
-    temp_path = None
+    # Stream the upload to disk once (jobs: straight into the job files dir);
+    # validation only reads its size and magic bytes
+    if settings.JOBS_ENABLED:
+        saved_path = Path(save_job_file(file.file, suffix))
+    else:
+        saved_path = save_temp_file(file)
 
     try:
-        # Read file bytes first for validation
-        file_bytes = file.file.read()
-        
         # Validate document
-        validation = validate_document_upload(file_bytes, file.content_type, file.filename)
-        
-        # Reset file pointer to beginning before saving (was at EOF after read)
-        file.file.seek(0)
-        
-        # Save validated file to temporary location
-        temp_path = save_temp_file(file)
-        
-        # Extract text from saved file
-        raw_text = extract_raw_text(temp_path)
-
-        if not raw_text.strip():
-            raise HTTPException(status_code= 400, detail= "No readable text found in document")
-        
-        preprocessed_text = preprocess_text(raw_text)
-        
-        ############## Debugging Info ################
-
-        # print("=== PREPROCESSED TEXT START ===")
-        # print(preprocessed_text[:1000])
-        # print("=== PREPROCESSED TEXT END ===")
-        
-        chunks = build_chunks(
-            filename=file.filename, 
-            preprocessed_text=preprocessed_text,
-
-            owner_id = current_user.id ####### New Change ########
-
+        validation = validate_document_file(saved_path, file.content_type, file.filename)
+
+        if settings.JOBS_ENABLED:
+            job_id = get_job_queue().enqueue(
+                DOCUMENT_JOB,
+                owner_id=current_user.id,
+                payload={"path": str(saved_path), "filename": file.filename},
+                max_attempts=settings.JOB_MAX_ATTEMPTS,
             )
-        inserted = index_text_chunks(chunks, embedder)
-        ############## Debuging Info ################
-    #     pages_covered = set()
-    #     for ch in chunks:
-    #         pages_covered.update(extract_pages_from_text(ch["text"]))
-
-    #     return {
-    # "status": "success",
-    # "filename": file.filename,
-    # "total_chunks": len(chunks),
-    # "pages_covered": sorted(pages_covered),
-    # "sample_chunk": chunks[22] if chunks else None
-    #           }    
-
-        return {
-            "status": "success",
-            "filename": file.filename,
-            "total_chunks": len(chunks),
-            "vectors_inserted": inserted,
-            "pages_in_chunks": list(
-        sorted(set(ch["metadata"]["page"] for ch in chunks))
-    ),
-            "sample_chunk": chunks[0] if chunks else None,
-            #"text_preview": preprocessed_text[:100000]
-        }
-        
-    
-    finally:
-        if temp_path:
-            cleanup_temp_file(temp_path)
-
-    
-    
-
-
-   
-    
-    
+            saved_path = None  # the job owns the file now
+            response.status_code = 202
+            return {
+                "status": "queued",
+                "job_id": job_id,
+                "status_url": f"/api/jobs/{job_id}",
+                "filename": file.filename,
+                "size_mb": validation["size_mb"],
+            }
+
+        return ingest_document_file(
+            saved_path,
+            filename=file.filename,
+            owner_id=current_user.id,
+            embedder=embedder,
+            batch_size=settings.JOB_EMBED_BATCH_SIZE,
+        )
 
+    except NoReadableTextError as e:
+        raise HTTPException(status_code= 400, detail= str(e))
 
-   
\ No newline at end of file
+    finally:
+        if saved_path:
+            cleanup_temp_file(saved_path)
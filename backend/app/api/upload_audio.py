@@ -1,19 +1,23 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, BackgroundTasks
+from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, BackgroundTasks, Response
+from pathlib import Path
+from app.config import settings
 from app.utils.cloudinary_audio import upload_audio
 from app.auth.dependencies import get_current_user
 from app.asr.orchestrator import transcribe_audio
 from app.ingestion.audio_indexer import index_audio
 from app.utils.upload_validation import validate_audio_upload
+from app.jobs.handlers import AUDIO_JOB
+from app.jobs.queue import get_job_queue, save_job_file
 import uuid 
 from datetime import datetime
 
 router =  APIRouter(prefix = "/api/audio",tags = ["Upload Audio"])
 
 # Implementation 3: Background processing helper
-def process_audio_background(audio_url: str, owner_id: str, file_id: str):
-    """Transcribe and index audio in the background."""
+def process_audio_background(audio_url: str, owner_id: str, file_id: str, audio_bytes: bytes | None = None):
+    """Transcribe (from the uploaded bytes when given) and index audio in the background."""
     try:
-        transcription_result = transcribe_audio(audio_url)
+        transcription_result = transcribe_audio(audio_url, audio_bytes)
         transcript = transcription_result.get("transcript", "")
         segments = transcription_result.get("segments", [])
 
@@ -31,6 +35,7 @@ def process_audio_background(audio_url: str, owner_id: str, file_id: str):
 @router.post("/upload")
 async def upload_audio_file(
     background_tasks: BackgroundTasks,
+    response: Response,
     file: UploadFile = File(...),
     user = Depends(get_current_user)
 ):
@@ -44,11 +49,14 @@ async def upload_audio_file(
     - Minimum file size (10 KB)
     
     Then:
-    - Transcribes audio (background task)
-    - Indexes transcript into Qdrant
+    - Uploads the audio to Cloudinary
+    - Enqueues an ingestion job (JOBS_ENABLED, default) that transcribes the
+      audio and indexes the transcript into Qdrant; poll GET /api/jobs/{job_id}.
+      With JOBS_ENABLED=false this runs as a FastAPI background task instead.
     
     Args:
         background_tasks: FastAPI background task handler
+        response: Used to answer 202 when a job was enqueued
         file: Audio file to upload
         user: Authenticated user
         
@@ -107,13 +115,39 @@ async def upload_audio_file(
     #     "created_at": datetime.utcnow().isoformat(),
     # }
 
-    # Schedule background processing
     file_id = str(uuid.uuid4())
+
+    if settings.JOBS_ENABLED:
+        # Park the bytes so a retry does not download the audio back from Cloudinary
+        job_id = get_job_queue().enqueue(
+            AUDIO_JOB,
+            owner_id=user.id,
+            payload={
+                "audio_url": audio_url,
+                "file_id": file_id,
+                "path": save_job_file(audio_bytes, Path(file.filename or "").suffix.lower()),
+            },
+            max_attempts=settings.JOB_MAX_ATTEMPTS,
+        )
+        response.status_code = 202
+        return {
+            "audio_url": audio_url,
+            "filename": file.filename,
+            "file_id": file_id,
+            "job_id": job_id,
+            "status_url": f"/api/jobs/{job_id}",
+            "status": "queued",
+            "message": "Audio uploaded successfully. Transcription and indexing are queued.",
+            "created_at": datetime.utcnow().isoformat(),
+        }
+
+    # Schedule background processing
     background_tasks.add_task(
         process_audio_background,
         audio_url=audio_url,
         owner_id=user.id,
         file_id=file_id,
+        audio_bytes=audio_bytes,
     )
 
     # Return early with processing status
@@ -54,6 +54,7 @@ async def upload_image_api(
         image_url=image_url,
         owner_id=current_user.id,
         file_id=file_id,
+        image_bytes=file_bytes,
     )
     except Exception as e:
         raise HTTPException(status_code=500,detail="Failed to index image")
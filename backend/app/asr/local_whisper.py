@@ -15,9 +15,10 @@ def _get_model():
         _model = whisper.load_model("base", download_root=whisper_cache)
     return _model
 
-def transcribe_local(audio_url:str) ->dict:
+def transcribe_local(audio_url: str | None, audio_bytes: bytes | None = None) ->dict:
 
-    audio_bytes = requests.get(audio_url).content
+    if audio_bytes is None:
+        audio_bytes = requests.get(audio_url, timeout=settings.MEDIA_DOWNLOAD_TIMEOUT_SECONDS).content
 
     with tempfile.NamedTemporaryFile(suffix = ".mp3") as f: # Note this line does not mean that only mp3 files are supported
         f.write(audio_bytes)
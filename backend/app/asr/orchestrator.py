@@ -1,11 +1,15 @@
 from app.config import settings
 from app.asr.local_whisper import transcribe_local
 from app.asr.remote_whisper import transcribe_remote    
+from app.utils.metrics import MODEL_SECONDS, timed
 
-def transcribe_audio(audio_url: str) -> dict:
+def transcribe_audio(audio_url: str | None, audio_bytes: bytes | None = None) -> dict:
         """
     Unified ASR entrypoint.
 
+    `audio_bytes` (the uploaded file, when available) is transcribed directly
+    instead of downloading `audio_url` again.
+
     Returns:
     {
       transcript: str,
@@ -20,13 +24,15 @@ def transcribe_audio(audio_url: str) -> dict:
         # Remote ASR
         if mode in ["auto", "remote"] and has_remote_key:
             try:
-                return transcribe_remote(audio_url)
+                with timed(MODEL_SECONDS, model="asr", backend="remote"):
+                    return transcribe_remote(audio_url, audio_bytes)
             except Exception as e:
                 if mode == "remote":
                     raise RuntimeError(f"Remote ASR failed: {e}")
                 
         # Fallback to local
-        return transcribe_local(audio_url)
+        with timed(MODEL_SECONDS, model="asr", backend="local"):
+            return transcribe_local(audio_url, audio_bytes)
 
 
 
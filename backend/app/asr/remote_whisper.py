@@ -3,12 +3,13 @@ import requests
 from app.config import settings
 
 
-def transcribe_remote(audio_url: str) -> dict:
+def transcribe_remote(audio_url: str | None, audio_bytes: bytes | None = None) -> dict:
     headers = {
-        "Authorization": f"Bearer {settings.OPENAI_API_KEY}"
+        "Authorization": f"Bearer {settings.ASR_REMOTE_API_KEY}"
     }
 
-    audio_bytes = requests.get(audio_url).content
+    if audio_bytes is None:
+        audio_bytes = requests.get(audio_url, timeout=settings.MEDIA_DOWNLOAD_TIMEOUT_SECONDS).content
 
     files = {
         "file": ("audio.mp3", audio_bytes),
@@ -1,7 +1,7 @@
 # from app.chat.session_store import get_session
 # from app.chat.input_normalizer import normalize_chat_input
 # from app.chat.router import route_query
-# from app.chat.context_builder import build_context
+# from app.chat.context_builder import assemble_context
 # from app.llm.groq_client import call_llm
 
 
@@ -67,92 +67,216 @@
 #     }
 
 
-from app.chat.session_store import get_session, MAX_TURNS
+from app.chat.session_store import get_session, save_session
+from app.chat.history_manager import build_history_window, record_turn, schedule_summary_refresh
 from app.chat.input_normalizer import normalize_chat_input
-from app.chat.router import route_query
-from app.chat.context_builder import build_context
-from app.llm.groq_client import call_llm
+from app.chat.router import merge_retrieval_results, route_query, typed_text_query
+from app.chat.context_builder import assemble_context
+from app.chat.intent import classify_intent, has_audio_input, has_image_input, TEXT_RETRIEVERS
+from app.chat.semantic_cache import semantic_cache
+from app.chat.followup_pool import followup_pool
+from app.db.corpus_version import get_corpus_version
+from app.embeddings.hf_bge_m3 import get_local_bge_m3_embedder
+from app.llm.async_client import call_llm_async, stream_llm_async
+from app.llm.groq_client import LLMServiceError
+from app.utils.deadline import Deadline
+from app.utils.metrics import CHAT_TURNS_IN_FLIGHT, MODEL_SECONDS, STAGE_SECONDS, timed, turn_modality
 from app.config import settings
+from typing import AsyncIterator, Dict
+import asyncio
 import time
 
+OUT_OF_TIME_ANSWER = (
+    "I ran out of time before I could finish an answer. "
+    "Please try again, or ask a more specific question."
+)
 
-async def run_chat_turn(
+
+def _is_text_retrieval_turn(normalized: dict) -> bool:
+    """
+    Plain text knowledge question: the only turns the semantic cache and the
+    follow-up pool serve (uploads and chitchat/meta never hit them).
+    """
+    if has_image_input(normalized) or has_audio_input(normalized):
+        return False
+    return classify_intent(normalized) not in {"chitchat", "meta"}
+
+
+# Helper: assess retrieval confidence (simple heuristic)
+def _is_low_confidence(results: dict) -> bool:
+    total_considered = 0
+    max_score = 0.0
+    for items in results.values():
+        if not isinstance(items, list):
+            continue
+        for item in items:
+            # Ignore synthetic upload markers that are not DB-grounding
+            if item.get("filename") in ["[Uploaded Audio]", "[Uploaded Image]"]:
+                continue
+            total_considered += 1
+            s = item.get("score")
+            if isinstance(s, (int, float)):
+                try:
+                    max_score = max(max_score, float(s))
+                except Exception:
+                    pass
+    if total_considered == 0:
+        # Results exist but none are DB-grounded → treat as low confidence
+        return True
+    return total_considered < 2 or max_score < 0.20
+
+
+async def _prepare_turn(
     owner_id: str,
     session_id: str | None,
     message: str | None,
     image,
     audio,
-):
+    use_cache: bool = True,
+    deadline: Deadline | None = None,
+) -> Dict:
+    """
+    Everything before the LLM call: session, normalization, retrieval,
+    context and citations.
+
+    Returns a turn dict consumed by run_chat_turn / run_chat_turn_stream.
+    `turn["answer"]` is already set when no LLM call is needed (empty input,
+    cached answer).
+    """
+    deadline = deadline or Deadline(settings.CHAT_DEADLINE_SECONDS)
     # Start timing
     start_time = time.time()
+    modality = turn_modality(image, audio)
     
     # 1️⃣ Session
     session_id, session = get_session(owner_id, session_id)
+    STAGE_SECONDS.observe(time.time() - start_time, stage="session", modality=modality)
     if settings.LOG_LATENCY:
         print(f"[TIMING] Session retrieval: {time.time() - start_time:.2f}s")
 
-    # 2️⃣ Normalize input
+    # 2️⃣ Normalize input. With typed text + an upload, the text path searches
+    # the typed message while OCR / ASR are still running.
     normalize_start = time.time()
-    normalized = await normalize_chat_input(
-        message=message,
-        image=image,
-        audio=audio,
-        owner_id=owner_id,
-        session=session,
-    )
-    if settings.LOG_LATENCY:
-        print(f"[TIMING] Input normalization: {time.time() - normalize_start:.2f}s")
+    speculative = None
+    if settings.SPECULATIVE_RETRIEVAL_ENABLED and (message or "").strip() and (image or audio):
+        speculative = asyncio.create_task(
+            route_query(typed_text_query(message, owner_id), deadline=deadline)
+        )
+    # Every exit that does not consume the speculative search (validation
+    # error, empty input, follow-up / cache hit, failed upload search) cancels it
+    try:
+        normalized = await normalize_chat_input(
+            message=message,
+            image=image,
+            audio=audio,
+            owner_id=owner_id,
+            session=session,
+            deadline=deadline,
+        )
+        STAGE_SECONDS.observe(time.time() - normalize_start, stage="normalize", modality=modality)
+        if settings.LOG_LATENCY:
+            print(f"[TIMING] Input normalization: {time.time() - normalize_start:.2f}s")
 
-    if not normalized.get("text"):
-        return {
+        turn = {
+            "owner_id": owner_id,
             "session_id": session_id,
-            "answer": "I couldn’t understand your query. Please try again.",
+            "session": session,
+            "modality": modality,
+            "deadline": deadline,
+            "normalized": normalized,
+            "context": None,
             "citations": [],
+            "low_confidence": False,
+            "answer": None,
+            "record_history": True,
+            "first_turn": not session["history"],
+            "cacheable": False,
+            "cache_entry": None,
+            "corpus_version": None,
+            "retrieval_results": None,
+            # False bypasses the LLM completion cache and cached-answer reuse
+            "use_cache": use_cache,
+            "llm_timeout": None,
+            # Retrieval results are the previous turn's pool, re-ranked
+            "followup_reused": False,
         }
 
-    # 3️⃣ Follow-up awareness (one-time context reuse)
-    text_lower = normalized["text"].strip().lower()
-    reuse_followup = (
-        "explain more" in text_lower
-        and session.get("last_context")
-        and session.get("last_context_reuse_count", 0) < 1
-    )
-
-    # Helper: assess retrieval confidence (simple heuristic)
-    def _is_low_confidence(results: dict) -> bool:
-        total_considered = 0
-        max_score = 0.0
-        for items in results.values():
-            if not isinstance(items, list):
-                continue
-            for item in items:
-                # Ignore synthetic upload markers that are not DB-grounding
-                if item.get("filename") in ["[Uploaded Audio]", "[Uploaded Image]"]:
-                    continue
-                total_considered += 1
-                s = item.get("score")
-                if isinstance(s, (int, float)):
-                    try:
-                        max_score = max(max_score, float(s))
-                    except Exception:
-                        pass
-        if total_considered == 0:
-            # Results exist but none are DB-grounded → treat as low confidence
-            return True
-        return total_considered < 2 or max_score < 0.20
-
-    if reuse_followup:
-        # Reuse previous context (no re-retrieval)
-        context = session.get("last_context", "")
-        citations = session.get("citations", [])
-        session["last_context_reuse_count"] = session.get("last_context_reuse_count", 0) + 1
-        low_confidence = len(citations) < 2
-    else:
-        # 4️⃣ Retrieval (with timeouts inside router)
+        if not normalized.get("text"):
+            turn["answer"] = "I couldn’t understand your query. Please try again."
+            turn["record_history"] = False
+            save_session(session_id, session)  # temp uploads are tracked even on empty turns
+            return turn
+
+        # 3️⃣ Query embedding (once, shared by the follow-up pool, the semantic cache and the router)
         retrieval_start = time.time()
-        retrieval_results = await route_query(normalized)
+        text_turn = _is_text_retrieval_turn(normalized)
+        turn["cacheable"] = text_turn and settings.SEMANTIC_CACHE_ENABLED
+        check_followup = text_turn and settings.FOLLOWUP_REUSE_ENABLED and followup_pool.has_pool(session_id)
+        query_vector = None
+        if text_turn and (turn["cacheable"] or settings.FOLLOWUP_REUSE_ENABLED):
+            with timed(STAGE_SECONDS, stage="embed", modality=modality), \
+                    timed(MODEL_SECONDS, model="bge_m3", backend="local"):
+                query_vector = await asyncio.to_thread(
+                    get_local_bge_m3_embedder().embed_query, normalized["text"]
+                )
+            normalized["query_vector"] = query_vector
+        turn["corpus_version"] = get_corpus_version(owner_id)
+
+        cache_entry = None
+        retrieval_results = None
+
+        # 4️⃣ Follow-up: re-rank the previous turn's candidate pool instead of searching again
+        if check_followup:
+            match = followup_pool.match(
+                session_id, owner_id, normalized["message"], query_vector, turn["corpus_version"]
+            )
+            if match:
+                reranked = await asyncio.to_thread(
+                    followup_pool.rerank, match, query_vector, get_local_bge_m3_embedder()
+                )
+                if followup_pool.accept(match, reranked) and not _is_low_confidence(reranked):
+                    saved = followup_pool.record_hit(match, time.time() - retrieval_start)
+                    retrieval_results = reranked
+                    turn["followup_reused"] = True
+                    if settings.LOG_RETRIEVAL:
+                        why = "cue" if match["cue"] else f"sim={match['similarity']:.3f}"
+                        print(f"[RETRIEVAL] ♻️ Follow-up reused previous pool ({why}, ~{saved:.2f}s saved)")
+                else:
+                    followup_pool.record_fallback()
+                    if settings.LOG_RETRIEVAL:
+                        print("[RETRIEVAL] ↩️ Follow-up pool low-confidence after re-rank; retrieving fresh")
+
+        if retrieval_results is None:
+            # Semantic cache: reuse results of a near-duplicate question
+            if turn["cacheable"]:
+                cache_entry = semantic_cache.lookup(owner_id, query_vector, turn["corpus_version"])
+
+            if cache_entry:
+                retrieval_results = cache_entry["results"]
+                if settings.LOG_RETRIEVAL:
+                    print(f"[RETRIEVAL] ♻️ Semantic cache hit (sim={cache_entry['similarity']:.3f}): '{cache_entry['query'][:50]}'")
+            elif speculative:
+                # Upload paths (OCR / transcript searches) now that analysis is done,
+                # merged after the typed-text results
+                upload_results = await route_query(normalized, deadline=deadline, skip=TEXT_RETRIEVERS)
+                retrieval_results = merge_retrieval_results(await speculative, upload_results)
+            else:
+                # Retrieval (with timeouts inside router)
+                retrieval_results = await route_query(normalized, deadline=deadline)
+
         retrieval_time = time.time() - retrieval_start
-        
+        STAGE_SECONDS.observe(retrieval_time, stage="retrieval", modality=modality)
+
+        # Chitchat / meta turns in between leave the pool alone
+        retrieved = text_turn or has_image_input(normalized) or has_audio_input(normalized)
+        if settings.FOLLOWUP_REUSE_ENABLED and retrieved and not turn["followup_reused"]:
+            if deadline.degraded_stages:
+                followup_pool.invalidate_session(session_id)  # never reuse a cut-short pool
+            else:
+                followup_pool.store(
+                    session_id, owner_id, query_vector, retrieval_results, turn["corpus_version"], retrieval_time,
+                )
+
         if settings.LOG_RETRIEVAL:
             print(f"[RETRIEVAL] Text results: {len(retrieval_results.get('text', []))}")
             print(f"[RETRIEVAL] Image results: {len(retrieval_results.get('image', []))}")
@@ -161,55 +285,258 @@ async def run_chat_turn(
             print(f"[TIMING] Retrieval: {retrieval_time:.2f}s")
 
         # 5️⃣ Context + citations
-        context, citations = build_context(retrieval_results)
-        
+        with timed(STAGE_SECONDS, stage="context_build", modality=modality):
+            packed = assemble_context(retrieval_results)
+        context, citations = packed["context"], packed["citations"]
+
         if settings.LOG_CONTEXT_SIZE:
-            print(f"[CONTEXT] Size: {len(context)} chars, Citations: {len(citations)}")
+            print(
+                f"[CONTEXT] {packed['tokens_used']} tokens, {len(citations)}/{packed['candidates']} sources "
+                f"(dropped {packed['dropped_duplicates']} duplicate, {packed['dropped_budget']} over budget)"
+            )
 
         # Confidence flag for disclaimer logic
         low_confidence = _is_low_confidence(retrieval_results)
 
-        # Save for single follow-up reuse
-        session["last_context"] = context
-        session["last_context_reuse_count"] = 0
-
         # 👇 REQUIRED for citation resolver
         session["citations"] = citations
 
-    # 6️⃣ LLM with fallback strategy (VERY IMPORTANT)
-    llm_start = time.time()
-    if not context or not context.strip():
-        # No grounding → let LLM answer without fake citations
-        answer = call_llm(
-            question=normalized["text"],
-            context=None,
-            history=session["history"],
-            low_confidence=False,
-        )
-        citations = []  # avoid fake citations
-    else:
-        answer = call_llm(
-            question=normalized["text"],
+        turn["retrieval_results"] = retrieval_results
+
+        # 6️⃣ LLM fallback strategy (VERY IMPORTANT)
+        if not context or not context.strip():
+            # No grounding → let LLM answer without fake citations
+            context = None
+            citations = []  # avoid fake citations
+            low_confidence = False
+
+        turn.update(
             context=context,
-            history=session["history"],
+            citations=citations,
             low_confidence=low_confidence,
+            cache_entry=cache_entry,
+        )
+
+        if (
+            cache_entry
+            and cache_entry.get("answer")
+            and turn["first_turn"]
+            and settings.SEMANTIC_CACHE_REUSE_ANSWER
+            and use_cache
+        ):
+            # Same question, same corpus, no history that could change the answer
+            turn["answer"] = cache_entry["answer"]
+
+        # Citations must be resolvable (on any worker) while the answer streams
+        save_session(session_id, session)
+
+        return turn
+    finally:
+        if speculative is not None and not speculative.done():
+            speculative.cancel()
+
+
+def _llm_args(turn: Dict) -> Dict:
+    return {
+        "question": turn["normalized"]["text"],
+        "context": turn["context"],
+        "history": build_history_window(turn["session"]),
+        "low_confidence": turn["low_confidence"],
+        # Set by route_query; None when retrieval came from a cache (knowledge turns)
+        "intent": turn["normalized"].get("intent"),
+        "use_cache": turn["use_cache"],
+        "timeout": turn["llm_timeout"],
+    }
+
+
+def _reserve_llm_time(turn: Dict) -> bool:
+    """
+    Give the LLM call whatever is left of the deadline (at most
+    LLM_TIMEOUT_SECONDS). Returns False, with the fallback answer set, when
+    less than DEADLINE_MIN_LLM_SECONDS remain.
+    """
+    deadline = turn["deadline"]
+    timeout = deadline.stage_timeout(cap=settings.LLM_TIMEOUT_SECONDS)
+    if timeout < settings.DEADLINE_MIN_LLM_SECONDS:
+        deadline.skip("llm")
+        turn["answer"] = OUT_OF_TIME_ANSWER
+        turn["record_history"] = False
+        return False
+    turn["llm_timeout"] = timeout
+    return True
+
+
+async def _settle_uploads(turn: Dict) -> None:
+    """
+    Wait for CDN uploads still running in the background (they were kept off
+    the retrieval / LLM path), so their temp assets are tracked in the
+    session saved by _finish_turn. Failures are already recorded and logged.
+    """
+    for upload in turn["normalized"].get("uploads") or ():
+        try:
+            await upload.wait()
+        except Exception:
+            pass
+
+
+def _finish_turn(turn: Dict) -> Dict:
+    """Cache + history bookkeeping once the final answer is known."""
+    session = turn["session"]
+    normalized = turn["normalized"]
+    answer = turn["answer"]
+
+    # Results or answers cut short by the deadline are never cached
+    if (
+        turn["cacheable"]
+        and not turn["cache_entry"]
+        and not turn["followup_reused"]
+        and not turn["deadline"].degraded_stages
+    ):
+        semantic_cache.store(
+            turn["owner_id"],
+            normalized["query_vector"],
+            query=normalized["text"],
+            results=turn["retrieval_results"],
+            corpus_version=turn["corpus_version"],
+            # Answers given with history depend on it; never reuse those
+            answer=answer if turn["first_turn"] else None,
         )
-    if settings.LOG_LATENCY:
-        print(f"[TIMING] LLM call: {time.time() - llm_start:.2f}s")
 
     # 7️⃣ History
-    session["history"].extend([
-        {"role": "user", "content": normalized["text"]},
-        {"role": "assistant", "content": answer},
-    ])
-    session["history"] = session["history"][-MAX_TURNS:]
+    if turn["record_history"]:
+        record_turn(session, normalized["text"], answer)
+    if turn["record_history"] or normalized.get("uploads"):
+        save_session(turn["session_id"], session)
     
     # session["temp_assets"]["images"].append(image_url)
     # session["temp_assets"]["audio"].append(audio_url)
 
-
     return {
-        "session_id": session_id,
+        "session_id": turn["session_id"],
         "answer": answer,
-        "citations": citations,
+        "citations": turn["citations"],
+        "degraded_stages": list(turn["deadline"].degraded_stages),
     }
+
+
+async def run_chat_turn(
+    owner_id: str,
+    session_id: str | None,
+    message: str | None,
+    image,
+    audio,
+    use_cache: bool = True,
+    deadline: Deadline | None = None,
+):
+    """
+    One chat turn. `deadline` bounds the whole turn (CHAT_DEADLINE_SECONDS
+    when not given); stages it cut are listed in the response's
+    "degraded_stages".
+    """
+    modality = turn_modality(image, audio)
+    deadline = deadline or Deadline(settings.CHAT_DEADLINE_SECONDS)
+    CHAT_TURNS_IN_FLIGHT.inc(endpoint="chat", modality=modality)
+    try:
+        turn = await _prepare_turn(owner_id, session_id, message, image, audio, use_cache, deadline)
+
+        if turn["answer"] is None and _reserve_llm_time(turn):
+            llm_start = time.time()
+            try:
+                turn["answer"] = await asyncio.wait_for(call_llm_async(**_llm_args(turn)), turn["llm_timeout"])
+            except (asyncio.TimeoutError, LLMServiceError):
+                if not deadline.expired:
+                    raise  # a real provider error, not our deadline
+                deadline.skip("llm")
+                turn["answer"] = OUT_OF_TIME_ANSWER
+                turn["record_history"] = False
+            STAGE_SECONDS.observe(time.time() - llm_start, stage="llm", modality=modality)
+            if settings.LOG_LATENCY:
+                print(f"[TIMING] LLM call: {time.time() - llm_start:.2f}s")
+    finally:
+        CHAT_TURNS_IN_FLIGHT.dec(endpoint="chat", modality=modality)
+
+    await _settle_uploads(turn)
+    response = _finish_turn(turn)
+    # Runs after the response is returned; never adds latency to this turn
+    schedule_summary_refresh(turn["session_id"], turn["session"])
+    return response
+
+
+async def run_chat_turn_stream(
+    owner_id: str,
+    session_id: str | None,
+    message: str | None,
+    image,
+    audio,
+    use_cache: bool = True,
+    deadline: Deadline | None = None,
+) -> AsyncIterator[Dict]:
+    """
+    Streaming variant of run_chat_turn.
+
+    Session, normalization and retrieval run when this is awaited, so upload
+    validation errors still surface as HTTP errors. The returned async
+    iterator yields events:
+        {"event": "meta",      "data": {"session_id"}}
+        {"event": "citations", "data": {"citations"}}   (right after assemble_context)
+        {"event": "token",     "data": {"text"}}        (one per LLM delta)
+        {"event": "done",      "data": {"session_id", "answer", "citations", "degraded_stages"}}
+
+    The answer is written to the session history only once the stream
+    completes; an aborted stream leaves the history untouched. When the
+    deadline (CHAT_STREAM_DEADLINE_SECONDS by default) runs out mid-answer
+    the stream stops there and "llm" is listed in degraded_stages.
+    """
+    modality = turn_modality(image, audio)
+    deadline = deadline or Deadline(settings.CHAT_STREAM_DEADLINE_SECONDS)
+    # In flight until the stream finishes (or is aborted)
+    CHAT_TURNS_IN_FLIGHT.inc(endpoint="chat_stream", modality=modality)
+    try:
+        turn = await _prepare_turn(owner_id, session_id, message, image, audio, use_cache, deadline)
+    except BaseException:
+        CHAT_TURNS_IN_FLIGHT.dec(endpoint="chat_stream", modality=modality)
+        raise
+
+    async def events() -> AsyncIterator[Dict]:
+        try:
+            yield {"event": "meta", "data": {"session_id": turn["session_id"]}}
+            yield {"event": "citations", "data": {"citations": turn["citations"]}}
+
+            if turn["answer"] is None:
+                _reserve_llm_time(turn)  # out of time → fallback answer, sent as one token
+            if turn["answer"] is not None:
+                yield {"event": "token", "data": {"text": turn["answer"]}}
+            else:
+                llm_start = time.time()
+                parts = []
+                stream = stream_llm_async(**_llm_args(turn))
+                try:
+                    async for delta in stream:
+                        if not parts:
+                            STAGE_SECONDS.observe(time.time() - llm_start, stage="llm_first_token", modality=modality)
+                            if settings.LOG_LATENCY:
+                                print(f"[TIMING] LLM first token: {time.time() - llm_start:.2f}s")
+                        parts.append(delta)
+                        yield {"event": "token", "data": {"text": delta}}
+                        if deadline.expired:
+                            deadline.skip("llm")  # stop here; what was sent is the answer
+                            break
+                except LLMServiceError:
+                    if not (parts and deadline.expired):
+                        raise
+                    deadline.skip("llm")
+                finally:
+                    await stream.aclose()  # release the LLM concurrency slot now
+                turn["answer"] = "".join(parts)
+                STAGE_SECONDS.observe(time.time() - llm_start, stage="llm", modality=modality)
+                if settings.LOG_LATENCY:
+                    print(f"[TIMING] LLM stream: {time.time() - llm_start:.2f}s")
+
+            await _settle_uploads(turn)
+            done = _finish_turn(turn)
+            schedule_summary_refresh(turn["session_id"], turn["session"])
+            yield {"event": "done", "data": done}
+        finally:
+            CHAT_TURNS_IN_FLIGHT.dec(endpoint="chat_stream", modality=modality)
+
+    return events()
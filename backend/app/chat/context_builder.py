@@ -1,3 +1,9 @@
+import re
+from typing import Dict, List, Tuple
+
+from app.config import settings
+from app.utils.tokens import CL100K_TOKENIZER, count_tokens, get_encoding, truncate_to_tokens
+
 
 
 # def build_context(results):
@@ -43,67 +49,236 @@
 
 #     return "\n\n".join(context_blocks), citations
 
-def build_context(results):
-    context_blocks = []
-    citations = []
-    idx = 1
 
-    # Enforce modality priority + include extracted text from temp uploads
-    # image_text = OCR from uploaded image, audio_text = transcript from uploaded audio
-    modality_order = ["image_text", "audio_text", "text", "image", "audio"]
+# ============================================================
+# TOKEN-BUDGETED CONTEXT ASSEMBLY
+# ============================================================
+# Candidates from every modality are ranked together, near-duplicates and
+# the overlap between neighbouring chunks are dropped, and whole sentences
+# are packed until CONTEXT_TOKEN_BUDGET is reached. Token counts come from
+# the stored chunk `token_count` when a chunk is taken whole and was counted
+# in cl100k, otherwise from the cached cl100k tokenizer (app/utils/tokens.py).
+
+# Enforce modality priority + include extracted text from temp uploads
+# image_text = OCR from uploaded image, audio_text = transcript from uploaded audio
+MODALITY_ORDER = ["image_text", "audio_text", "text", "image", "audio"]
+
+# Scores are not comparable across modalities (BGE-M3 cosine vs CLIP cosine),
+# so candidates are ranked by score relative to the best hit of their own
+# modality, scaled by these weights.
+MODALITY_WEIGHTS = {"image_text": 1.0, "audio_text": 1.0, "text": 1.0, "image": 0.9, "audio": 0.9}
+
+# OCR text / transcript of the user's own upload (prepended by the image/audio→text retrievers)
+_QUERY_ITEM_FILENAMES = {"[Uploaded Image]", "[Uploaded Audio]"}
+
+# "[n] " label + blank line between blocks
+BLOCK_OVERHEAD_TOKENS = 4
+# Don't open a new source block with less room than this
+MIN_BLOCK_TOKENS = 24
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?।])\s+|\n\s*\n")
+_WORD = re.compile(r"\w+")
+
+
+def item_text(item: Dict) -> str:
+    """Text of a retrieval hit, whatever the modality (chunk text, OCR text or transcript)."""
+    return (item.get("text") or item.get("ocr_text") or item.get("transcript") or "").strip()
+
 
-    for modality in modality_order:
-        items = results.get(modality, [])
+def is_query_item(item: Dict) -> bool:
+    """OCR text / transcript of the user's own upload, not a corpus hit."""
+    return (item.get("filename") or "") in _QUERY_ITEM_FILENAMES
+
+
+def _stored_token_count(item: Dict) -> int | None:
+    """
+    Chunker token_count, only valid while the hit is still a single chunk
+    and the count is in cl100k tokens (BGE-M3 counts undercount the LLM's
+    tokens several-fold on non-Latin scripts).
+    """
+    span = item.get("chunk_span")
+    if span and span[0] != span[1]:
+        return None  # neighbour-expanded passage
+    metadata = item.get("metadata") or {}
+    if metadata.get("token_count_tokenizer") != CL100K_TOKENIZER:
+        return None
+    return metadata.get("token_count")
+
+
+def _citation(idx: int, modality: str, item: Dict) -> Dict:
+    # --- Citation metadata normalization ---
+    metadata = item.get("metadata") or {}
+    return {
+        "id": idx,
+        # Map modality names for citations (image_text → image, audio_text → audio)
+        "modality": modality.replace("_text", "") if "_text" in modality else modality,
+        "file_id": (
+            item.get("file_id")
+            or item.get("filename")
+            or metadata.get("filename")
+            or item.get("audio_url")
+        ),
+        "page": item.get("page") or metadata.get("page"),
+        "timestamp": item.get("timestamp") or item.get("timestamps"),
+    }
+
+
+def _rank_candidates(results: Dict) -> List[Tuple[str, Dict, str]]:
+    """Merge every modality into one list of (modality, item, text), best first."""
+    ranked = []
+    for m_order, modality in enumerate(MODALITY_ORDER):
+        items = [(item, item_text(item)) for item in results.get(modality) or []]
+        items = [(item, text) for item, text in items if text]
         if not items:
             continue
 
-        for item in items[:3]:
-            # Unified content extraction
-            text_content = (
-                item.get("text")
-                or item.get("ocr_text")
-                or item.get("transcript")
-            )
-            if not text_content:
-                continue
-
-            # Cap context length (VERY IMPORTANT)
-            snippet = text_content[:400]
-
-            # Context block (citation-friendly)
-            context_blocks.append(
-                f"[{idx}] {snippet}"
-            )
-
-            # --- Citation metadata normalization ---
-            file_id = (
-                item.get("file_id")
-                or item.get("filename")
-                or item.get("metadata", {}).get("filename")
-                or item.get("audio_url")
-            )
-
-            page = (
-                item.get("page")
-                or item.get("metadata", {}).get("page")
-            )
-
-            timestamp = (
-                item.get("timestamp")
-                or item.get("timestamps")
-            )
-            
-            # Map modality names for citations (image_text → image, audio_text → audio)
-            citation_modality = modality.replace("_text", "") if "_text" in modality else modality
+        # The upload's own text carries a fixed score of 1.0; keep it out of the scale
+        top = max(
+            [(item.get("score") or 0.0) for item, _ in items if not is_query_item(item)],
+            default=0.0,
+        )
+        weight = MODALITY_WEIGHTS.get(modality, 1.0)
+        for position, (item, text) in enumerate(items):
+            if is_query_item(item):
+                rank_score = float("inf")  # the upload itself always leads
+            else:
+                rank_score = weight * (item.get("score") or 0.0) / top if top > 0 else 0.0
+            ranked.append((-rank_score, m_order, position, modality, item, text))
+
+    ranked.sort(key=lambda c: c[:3])
+    return [(modality, item, text) for *_, modality, item, text in ranked]
+
+
+def _sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_SPLIT.split(text) if s and s.strip()]
+
 
-            citations.append({
-                "id": idx,
-                "modality": citation_modality,
-                "file_id": file_id,
-                "page": page,
-                "timestamp": timestamp,
-            })
+def _normalize(sentence: str) -> str:
+    return " ".join(_WORD.findall(sentence.lower()))
 
-            idx += 1
 
-    return "\n\n".join(context_blocks), citations
+def _shingles(text: str) -> set:
+    words = _WORD.findall(text.lower())
+    if len(words) < 3:
+        return set(words)
+    return {" ".join(words[i:i + 3]) for i in range(len(words) - 2)}
+
+
+def _covered(shingles: set, selected: List[set]) -> float:
+    """Largest fraction of `shingles` already present in one selected passage."""
+    if not shingles:
+        return 1.0
+    return max((len(shingles & prev) / len(shingles) for prev in selected), default=0.0)
+
+
+def assemble_context(
+        results: Dict,
+        token_budget: int | None = None,
+        max_tokens_per_source: int | None = None,
+        max_sources: int | None = None,
+        dedup_threshold: float | None = None,
+) -> Dict:
+    """
+    Build the LLM context from multimodal retrieval results within a token budget.
+
+    Args:
+        results: route_query output ({"text": [...], "image": [...], "audio": [...]})
+        token_budget: Max context tokens (default CONTEXT_TOKEN_BUDGET)
+        max_tokens_per_source: Cap for a single source block (default CONTEXT_MAX_TOKENS_PER_SOURCE)
+        max_sources: Max number of source blocks / citations (default CONTEXT_MAX_SOURCES)
+        dedup_threshold: Drop a candidate when this fraction of its word
+            3-grams is already in one selected passage (default CONTEXT_DEDUP_THRESHOLD)
+
+    Returns:
+        {
+          "context": "[1] ...\\n\\n[2] ...",
+          "citations": [{id, modality, file_id, page, timestamp}],
+          "tokens_used": int,         # exact cl100k count of "context"
+          "candidates": int,
+          "dropped_duplicates": int,
+          "dropped_budget": int,
+        }
+    """
+    token_budget = token_budget if token_budget is not None else settings.CONTEXT_TOKEN_BUDGET
+    max_tokens_per_source = max_tokens_per_source or settings.CONTEXT_MAX_TOKENS_PER_SOURCE
+    max_sources = max_sources or settings.CONTEXT_MAX_SOURCES
+    dedup_threshold = dedup_threshold if dedup_threshold is not None else settings.CONTEXT_DEDUP_THRESHOLD
+
+    candidates = _rank_candidates(results)
+    context_blocks: List[str] = []
+    citations: List[Dict] = []
+    selected_shingles: List[set] = []
+    seen_sentences: set = set()
+    used = 0
+    dropped_duplicates = 0
+    dropped_budget = 0
+
+    for modality, item, text in candidates:
+        if len(context_blocks) >= max_sources:
+            dropped_budget += 1
+            continue
+
+        shingles = _shingles(text)
+        if _covered(shingles, selected_shingles) >= dedup_threshold:
+            dropped_duplicates += 1
+            continue
+
+        # Sentences already sent (overlap between neighbouring chunks) are skipped
+        all_sentences = _sentences(text)
+        sentences = [s for s in all_sentences if _normalize(s) not in seen_sentences]
+        if not sentences:
+            dropped_duplicates += 1
+            continue
+
+        room = min(max_tokens_per_source, token_budget - used - BLOCK_OVERHEAD_TOKENS)
+        if room < MIN_BLOCK_TOKENS:
+            dropped_budget += 1
+            continue
+
+        stored = _stored_token_count(item)
+        if len(sentences) == len(all_sentences) and stored and stored <= room:
+            # Whole chunk fits: no tokenizer call needed
+            body, cost = text, stored
+        else:
+            packed, cost = [], 0
+            for sentence in sentences:
+                n = count_tokens(sentence)
+                if cost + n > room:
+                    break
+                packed.append(sentence)
+                cost += n
+            if packed:
+                body = " ".join(packed)
+            else:
+                # Single sentence longer than the room (e.g. unpunctuated OCR)
+                body = truncate_to_tokens(sentences[0], room)
+                cost = count_tokens(body)
+            sentences = packed or [body]
+
+        idx = len(context_blocks) + 1
+        context_blocks.append(f"[{idx}] {body}")
+        citations.append(_citation(idx, modality, item))
+        used += cost + BLOCK_OVERHEAD_TOKENS
+        selected_shingles.append(shingles if body is text else _shingles(body))
+        seen_sentences.update(_normalize(s) for s in sentences)
+
+    context = "\n\n".join(context_blocks)
+    return {
+        "context": context,
+        "citations": citations,
+        "tokens_used": len(get_encoding().encode(context)) if context else 0,
+        "candidates": len(candidates),
+        "dropped_duplicates": dropped_duplicates,
+        "dropped_budget": dropped_budget,
+    }
+
+
+def build_context(results):
+    """
+    Context + citations for the chat LLM call (see assemble_context).
+
+    Returns:
+        (context, citations)
+    """
+    packed = assemble_context(results)
+    return packed["context"], packed["citations"]
@@ -0,0 +1,235 @@
+"""
+Session-level retrieval pool for follow-up questions.
+
+Follow-ups ("why does that happen?", "and in plants?") usually need the
+same documents as the question before them. The previous turn's retrieval
+results (its candidate pool) and query vector are kept per chat session,
+and a follow-up re-ranks that pool against its own query vector instead of
+running every retriever again:
+
+- a text question whose cosine similarity to the pool's query is at least
+  FOLLOWUP_REUSE_THRESHOLD reuses the pool, re-scored with BGE-M3 (the
+  candidates are embedded once per pool);
+- "explain more" / "tell me more"-style cues reuse the pool as it is, since
+  their own embedding says nothing about the topic.
+
+The caller falls back to fresh retrieval when the re-ranked pool looks
+low-confidence (see accept()). A pool is dropped after FOLLOWUP_MAX_REUSES
+reuses, after the TTL, or when the owner's corpus version changes.
+
+Pools live in process memory like the semantic cache: with several workers,
+a follow-up served by another worker simply retrieves fresh.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.chat.context_builder import is_query_item, item_text
+from app.chat.intent import is_followup_cue
+from app.utils.metrics import CACHE_REQUESTS, RETRIEVAL_SECONDS_SAVED
+
+
+def _unit(vector) -> np.ndarray:
+    vec = np.asarray(vector, dtype=np.float32).reshape(-1)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else vec
+
+
+class FollowupPoolCache:
+    def __init__(
+            self,
+            threshold: float = 0.8,
+            min_score: float = 0.35,
+            max_reuses: int = 3,
+            ttl_seconds: float = 900,
+            max_sessions: int = 2048,
+    ):
+        self.threshold = threshold
+        self.min_score = min_score
+        self.max_reuses = max_reuses
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+
+        # session_id → pool dict (LRU order)
+        self._pools: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+        self.seconds_saved = 0.0
+
+    def _miss(self, result: str = "miss"):
+        with self._lock:
+            self.misses += 1
+            if result == "fallback":
+                self.fallbacks += 1
+        CACHE_REQUESTS.inc(cache="followup", result=result)
+
+    def has_pool(self, session_id: str) -> bool:
+        return session_id in self._pools
+
+    def store(
+            self,
+            session_id: str,
+            owner_id: str,
+            query_vector,
+            results: Dict,
+            corpus_version: int,
+            retrieval_seconds: float,
+    ):
+        """Keep a fresh retrieval as the session's pool (replaces the previous one)."""
+        if not any(results.get(key) for key in results):
+            self.invalidate_session(session_id)
+            return
+        pool = {
+            "owner_id": owner_id,
+            # None for upload turns: only cue follow-ups can reuse those
+            "query_vector": _unit(query_vector) if query_vector is not None else None,
+            "results": results,
+            "corpus_version": corpus_version,
+            "retrieval_seconds": retrieval_seconds,
+            "created_at": time.time(),
+            "reuses": 0,
+            "vectors": None,  # candidate vectors, embedded on first re-rank
+        }
+        with self._lock:
+            self._pools[session_id] = pool
+            self._pools.move_to_end(session_id)
+            while len(self._pools) > self.max_sessions:
+                self._pools.popitem(last=False)
+
+    def match(
+            self,
+            session_id: str,
+            owner_id: str,
+            message: str,
+            query_vector,
+            corpus_version: int,
+    ) -> Dict | None:
+        """
+        The session's pool if this turn may reuse it, else None (counted as a miss).
+
+        Returns:
+            {"pool": pool dict, "cue": bool, "similarity": float | None}
+        """
+        with self._lock:
+            pool = self._pools.get(session_id)
+            if pool is not None and (
+                pool["owner_id"] != owner_id
+                or pool["corpus_version"] != corpus_version
+                or time.time() - pool["created_at"] > self.ttl_seconds
+                or pool["reuses"] >= self.max_reuses
+            ):
+                self._pools.pop(session_id, None)
+                pool = None
+        if pool is None:
+            self._miss()
+            return None
+
+        if is_followup_cue(message):
+            return {"pool": pool, "cue": True, "similarity": None}
+
+        if pool["query_vector"] is None or query_vector is None:
+            self._miss()
+            return None
+        similarity = float(pool["query_vector"] @ _unit(query_vector))
+        if similarity < self.threshold:
+            self._miss()
+            return None
+        return {"pool": pool, "cue": False, "similarity": similarity}
+
+    def _candidate_vectors(self, pool: Dict, embedder) -> Dict[Tuple[str, int], np.ndarray]:
+        if pool["vectors"] is None:
+            keys: List[Tuple[str, int]] = []
+            texts: List[str] = []
+            for modality, items in pool["results"].items():
+                for position, item in enumerate(items):
+                    text = item_text(item)
+                    if text and not is_query_item(item):
+                        keys.append((modality, position))
+                        texts.append(text)
+            vectors = embedder.embed_documents(texts) if texts else []
+            pool["vectors"] = {key: _unit(vec) for key, vec in zip(keys, vectors)}
+        return pool["vectors"]
+
+    def rerank(self, match: Dict, query_vector, embedder) -> Dict:
+        """
+        Copy of the pool's results, re-scored against `query_vector` (cosine
+        with each candidate's text) and sorted best first. Cue follow-ups keep
+        the original scores. Upload text (OCR / transcript) keeps its place.
+        """
+        pool = match["pool"]
+        if match["cue"]:
+            return {modality: list(items) for modality, items in pool["results"].items()}
+
+        query = _unit(query_vector)
+        vectors = self._candidate_vectors(pool, embedder)
+        reranked = {}
+        for modality, items in pool["results"].items():
+            rescored = []
+            for position, item in enumerate(items):
+                vec = vectors.get((modality, position))
+                if vec is None:
+                    rescored.append(item)
+                else:
+                    rescored.append({**item, "score": float(vec @ query)})
+            rescored.sort(key=lambda item: (not is_query_item(item), -(item.get("score") or 0.0)))
+            reranked[modality] = rescored
+        return reranked
+
+    def accept(self, match: Dict, reranked: Dict) -> bool:
+        """Re-ranked pool still answers the question (best re-scored hit >= min_score)."""
+        if match["cue"]:
+            return True
+        best = max(
+            (item.get("score") or 0.0 for items in reranked.values() for item in items if not is_query_item(item)),
+            default=0.0,
+        )
+        return best >= self.min_score
+
+    def record_hit(self, match: Dict, elapsed: float):
+        """Count a reuse; saved = the pool's fresh retrieval time - `elapsed` (this turn's retrieval stage)."""
+        saved = max(0.0, match["pool"]["retrieval_seconds"] - elapsed)
+        with self._lock:
+            match["pool"]["reuses"] += 1
+            self.hits += 1
+            self.seconds_saved += saved
+        CACHE_REQUESTS.inc(cache="followup", result="hit")
+        RETRIEVAL_SECONDS_SAVED.inc(saved, cache="followup")
+        return saved
+
+    def record_fallback(self):
+        """Pool matched but re-ranked to low confidence: fresh retrieval instead."""
+        self._miss("fallback")
+
+    def invalidate_session(self, session_id: str):
+        with self._lock:
+            self._pools.pop(session_id, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "fallbacks": self.fallbacks,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "seconds_saved": round(self.seconds_saved, 3),
+                "avg_seconds_saved_per_hit": round(self.seconds_saved / self.hits, 3) if self.hits else 0.0,
+                "sessions": len(self._pools),
+            }
+
+
+followup_pool = FollowupPoolCache(
+    threshold=settings.FOLLOWUP_REUSE_THRESHOLD,
+    min_score=settings.FOLLOWUP_MIN_SCORE,
+    max_reuses=settings.FOLLOWUP_MAX_REUSES,
+    ttl_seconds=settings.FOLLOWUP_TTL_SECONDS,
+    max_sessions=settings.FOLLOWUP_MAX_SESSIONS,
+)
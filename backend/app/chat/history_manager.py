@@ -0,0 +1,179 @@
+"""
+Conversation history management for chat prompts.
+
+A session keeps:
+- "history": the last HISTORY_RECENT_MESSAGES raw messages (sent verbatim,
+  each capped at HISTORY_MESSAGE_MAX_TOKENS)
+- "summary": a compact rolling summary of everything older
+- "summary_backlog": messages that left the recent window but are not yet
+  folded into the summary
+
+The summary is refreshed by a background task scheduled after the turn's
+response is produced (asyncio.create_task), so the extra LLM call never adds
+latency to the turn itself. Until it lands, backlog messages are used as
+low-priority history instead.
+"""
+
+import asyncio
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.chat.session_store import MAX_TURNS, load_session, save_session
+from app.llm.async_client import generate_completion_async
+from app.utils.tokens import count_tokens, truncate_to_tokens
+
+# Running refresh per session (also keeps a reference so the task isn't GC'd)
+_refresh_tasks: Dict[str, asyncio.Task] = {}
+
+
+def _clip(message: Dict) -> Dict:
+    content = message.get("content") or ""
+    clipped = truncate_to_tokens(content, settings.HISTORY_MESSAGE_MAX_TOKENS)
+    if clipped != content:
+        clipped += " …"
+    return {"role": message["role"], "content": clipped}
+
+
+def record_turn(session: Dict, user_text: str, answer: str) -> None:
+    """
+    Append a finished turn; messages that leave the recent window move to the
+    summary backlog (bounded by MAX_TURNS if summarization keeps failing).
+    """
+    history = session.setdefault("history", [])
+    history.extend([
+        {"role": "user", "content": user_text},
+        {"role": "assistant", "content": answer},
+    ])
+
+    recent = max(2, settings.HISTORY_RECENT_MESSAGES)
+    if len(history) > recent:
+        backlog = session.setdefault("summary_backlog", [])
+        backlog.extend(_clip(m) for m in history[:-recent])
+        session["summary_backlog"] = backlog[-MAX_TURNS:]
+        session["history"] = history[-recent:]
+
+
+def build_history_window(session: Dict) -> List[Dict]:
+    """
+    History to put in the prompt, oldest first, within HISTORY_TOKEN_BUDGET.
+
+    Priority when over budget: recent messages, then the summary, then
+    not-yet-summarized backlog messages (dropped first, oldest first).
+    """
+    budget = settings.HISTORY_TOKEN_BUDGET
+    recent = [_clip(m) for m in session.get("history") or []]
+    summary = session.get("summary")
+    backlog = session.get("summary_backlog") or []
+
+    window: List[Dict] = []
+    used = 0
+
+    # Newest recent messages first; always keep the last one
+    kept_recent: List[Dict] = []
+    for message in reversed(recent):
+        cost = count_tokens(message["content"])
+        if kept_recent and used + cost > budget:
+            break
+        kept_recent.append(message)
+        used += cost
+    kept_recent.reverse()
+
+    if summary:
+        summary_message = {"role": "summary", "content": summary}
+        cost = count_tokens(summary)
+        if used + cost <= budget:
+            window.append(summary_message)
+            used += cost
+
+    kept_backlog: List[Dict] = []
+    for message in reversed(backlog):
+        cost = count_tokens(message["content"])
+        if used + cost > budget:
+            break
+        kept_backlog.append(message)
+        used += cost
+    kept_backlog.reverse()
+
+    return window + kept_backlog + kept_recent
+
+
+def build_summary_prompt(previous_summary: Optional[str], messages: List[Dict]) -> str:
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    return f"""Update the running summary of a study chat between a student and an assistant.
+
+CURRENT SUMMARY:
+{previous_summary or "(none yet)"}
+
+NEW MESSAGES TO FOLD IN:
+{transcript}
+
+INSTRUCTIONS:
+- Keep the topics asked about, key facts given in answers, and any open follow-ups
+- Drop greetings, pasted raw text and repetition
+- Plain sentences, at most {settings.HISTORY_SUMMARY_MAX_TOKENS // 2} words
+- Output only the updated summary
+
+Updated summary:"""
+
+
+async def refresh_summary(session_id: str) -> Optional[str]:
+    """Fold the session's backlog into its rolling summary and persist it."""
+    session = load_session(session_id)
+    if not session or not session.get("summary_backlog"):
+        return None
+
+    messages = list(session["summary_backlog"])
+    previous = session.get("summary")
+    prompt = build_summary_prompt(previous, messages)
+    try:
+        summary = await generate_completion_async(
+            prompt,
+            temperature=0.0,
+            max_token=settings.HISTORY_SUMMARY_MAX_TOKENS,
+        )
+    except Exception as e:
+        # Backlog stays; the next turn retries
+        print(f"[WARN] History summary refresh failed for {session_id}: {e}")
+        return None
+
+    # Re-read: a turn may have finished (and saved) while the LLM was busy
+    session = load_session(session_id)
+    if not session:
+        return None
+    backlog = session.get("summary_backlog") or []
+    if backlog[:len(messages)] != messages or session.get("summary") != previous:
+        # The backlog was trimmed (MAX_TURNS) or another refresh landed first:
+        # the summary could no longer be stored together with exactly the
+        # messages it folded, and would count some of them twice. Drop it;
+        # the next turn retries.
+        print(f"[WARN] History summary for {session_id} is stale (session changed meanwhile); discarded")
+        return None
+    session["summary"] = truncate_to_tokens(summary.strip(), settings.HISTORY_SUMMARY_MAX_TOKENS)
+    session["summary_backlog"] = backlog[len(messages):]
+    save_session(session_id, session)
+
+    if settings.LOG_CONTEXT_SIZE:
+        print(f"[CONTEXT] History summary refreshed for {session_id}: {count_tokens(session['summary'])} tokens")
+    return session["summary"]
+
+
+def schedule_summary_refresh(session_id: str, session: Dict) -> Optional[asyncio.Task]:
+    """
+    Start a background summary refresh if the session has a backlog.
+
+    Must be called from the event loop once the turn's answer is final.
+    Returns the task (tests await it) or None when nothing was scheduled.
+    """
+    if not settings.HISTORY_SUMMARY_ENABLED or not session.get("summary_backlog"):
+        return None
+
+    running = _refresh_tasks.get(session_id)
+    if running and not running.done():
+        return None  # the next turn picks up whatever this one misses
+
+    task = asyncio.create_task(refresh_summary(session_id))
+    _refresh_tasks[session_id] = task
+    task.add_done_callback(
+        lambda t: _refresh_tasks.pop(session_id, None) if _refresh_tasks.get(session_id) is t else None
+    )
+    return task
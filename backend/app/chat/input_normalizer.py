@@ -1,17 +1,34 @@
+import asyncio
+
 from app.utils.cloudinary import upload_temp_image
 from app.utils.cloudinary_audio import upload_temp_audio
-from app.asr.orchestrator import transcribe_audio
-from app.embeddings.image.orchestrator import embed_image
+from app.config import settings
+from app.chat.media_analysis import (
+    analyze_audio,
+    analyze_image,
+    empty_audio_analysis,
+    empty_image_analysis,
+    upload_and_analyze,
+)
+from app.embeddings.image.orchestrator import requires_image_url
 from app.utils.upload_validation import validate_chat_upload
 from fastapi import HTTPException
 
 
+def _analysis_timeout(deadline) -> float | None:
+    # OCR / ASR leave DEADLINE_LLM_RESERVE_SECONDS for the LLM call
+    if deadline is None:
+        return None
+    return max(0.0, deadline.stage_timeout(reserve=settings.DEADLINE_LLM_RESERVE_SECONDS))
+
+
 async def normalize_chat_input(
         message: str | None,
         image,
         audio,
         owner_id: str,
         session: dict | None = None,
+        deadline=None,
 ):
     """
     Normalize and validate chat input.
@@ -25,6 +42,7 @@ async def normalize_chat_input(
         audio: Audio file (optional)
         owner_id: User ID for tracking
         session: Chat session dict for temp asset tracking
+        deadline: Request Deadline; OCR/ASR are cut when it runs out
         
     Returns:
         dict: Normalized input with extracted text
@@ -35,6 +53,9 @@ async def normalize_chat_input(
     text = message or ""
     image_url = None
     audio_url = None
+    audio_analysis = None
+    image_analysis = None
+    uploads = []
 
     if image:
         image_bytes = await image.read()
@@ -47,21 +68,34 @@ async def normalize_chat_input(
             print(f"[ERROR] Image validation failed: {e.detail}")
             raise
         
-        image_url = upload_temp_image(image_bytes, image.filename)
+        # OCR/CLIP run on the in-memory bytes (once per turn; retrievers reuse
+        # the analysis) while the Cloudinary upload finishes in the background
+        upload, image_analysis, error = await upload_and_analyze(
+            upload=lambda: upload_temp_image(image_bytes, image.filename),
+            analyze=lambda url: analyze_image(url, image_bytes),
+            needs_url=requires_image_url(),
+            url_key="image_url",
+            timeout=_analysis_timeout(deadline),
+        )
+        uploads.append(upload)
+        image_url = upload.url  # None while the upload is still running
         # Track temp image in session
         if session:
-            session["temp_assets"]["images"].append(image_url)
+            upload.on_done(session["temp_assets"]["images"].append)
         
         # Generate OCR immediately so the uploaded image contributes to context
-        try:
-            emb = embed_image(image_url)
-            ocr_text = emb.get("ocr_text")
+        if isinstance(error, asyncio.TimeoutError) and deadline:
+            deadline.skip("ocr")
+            image_analysis = empty_image_analysis(image_url)
+        elif error is not None:
+            # Fail-safe: don't block chat turn if OCR fails (and don't retry it in route_query)
+            print(f"[WARN] OCR extraction failed for {image_url}: {error}")
+            image_analysis = empty_image_analysis(image_url)
+        else:
+            ocr_text = image_analysis.get("ocr_text")
             if ocr_text and len(ocr_text.strip()) > 0:
                 text += " " + ocr_text
                 print(f"[DEBUG] OCR extracted {len(ocr_text)} chars")
-        except Exception as e:
-            # Fail-safe: don't block chat turn if OCR fails
-            print(f"[WARN] OCR extraction failed for {image_url}: {e}")
 
     if audio:
         audio_bytes = await audio.read()
@@ -74,27 +108,44 @@ async def normalize_chat_input(
             print(f"[ERROR] Audio validation failed: {e.detail}")
             raise
         
-        audio_url = upload_temp_audio(audio_bytes, audio.filename)
+        # Whisper runs on the in-memory bytes (once per turn; retrievers reuse
+        # the analysis) while the Cloudinary upload finishes in the background
+        upload, audio_analysis, error = await upload_and_analyze(
+            upload=lambda: upload_temp_audio(audio_bytes, audio.filename),
+            analyze=lambda url: analyze_audio(url, audio_bytes),
+            url_key="audio_url",
+            timeout=_analysis_timeout(deadline),
+        )
+        uploads.append(upload)
+        audio_url = upload.url  # None while the upload is still running
         # Track temp audio in session
         if session:
-            session["temp_assets"]["audio"].append(audio_url)
+            upload.on_done(session["temp_assets"]["audio"].append)
         
         # Transcribe audio
-        try:
-            transcription_result = transcribe_audio(audio_url)
-            transcript = transcription_result.get("transcript", "")
-            if transcript:
-                text += " " + transcript
-                print(f"[DEBUG] Audio transcribed: {len(transcript)} chars")
-        except Exception as e:
-            print(f"[WARN] Audio transcription failed for {audio_url}: {e}")
+        if isinstance(error, asyncio.TimeoutError) and deadline:
+            deadline.skip("asr")
+            audio_analysis = empty_audio_analysis(audio_url)
+        elif error is not None:
+            print(f"[WARN] Audio transcription failed for {audio_url}: {error}")
             raise HTTPException(status_code=500, detail="Audio transcription failed")
+        transcript = audio_analysis["transcript"]
+        if transcript:
+            text += " " + transcript
+            print(f"[DEBUG] Audio transcribed: {len(transcript)} chars")
 
     return {
         "text": text.strip(),
+        # What the user typed, without OCR / transcript (drives intent + text path)
+        "message": (message or "").strip(),
         "image_url": image_url,
         "audio_url": audio_url,
         "owner_id": owner_id,
+        "audio_analysis": audio_analysis,
+        "image_analysis": image_analysis,
+        # Background CDN uploads (media_analysis.BackgroundUpload); the
+        # orchestrator waits for them before it saves the session
+        "uploads": uploads,
     }
 
 
@@ -1,40 +1,292 @@
-def classify_intent(normalized: dict) -> str:
+"""
+Intent classification and retrieval planning for chat turns.
+
+Two cheap stages:
+1. Compiled token-boundary patterns: a message is chitchat only when EVERY
+   word is small talk ("hi", "thanks a lot"), never because "hi" occurs
+   inside "which" / "this" / "history". Meta questions and image cues
+   ("diagram", "figure", "photo") are matched on word boundaries too.
+2. Embedding prototypes: a handful of example phrases per class, embedded
+   once per embedder and compared with the query vector the router already
+   computed, so classification adds no model inference per turn.
+
+plan_retrieval() turns the result into the set of retrievers route_query
+should run, so e.g. a plain text question does not wake up CLIP, and an
+upload-only turn does not repeat the upload's own searches through the
+text path.
+"""
+
+import re
+import threading
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from app.config import settings
+
+# ============================================================
+# RETRIEVER NAMES (one per route_query call site)
+# ============================================================
+TEXT_TO_TEXT = "text_to_text"
+TEXT_TO_IMAGE = "text_to_image"
+TEXT_TO_AUDIO = "text_to_audio"
+IMAGE_TO_IMAGE = "image_to_image"
+IMAGE_TO_TEXT = "image_to_text"
+IMAGE_TO_AUDIO = "image_to_audio"
+AUDIO_TO_AUDIO = "audio_to_audio"
+AUDIO_TO_TEXT = "audio_to_text"
+AUDIO_TO_IMAGE = "audio_to_image"
+
+TEXT_RETRIEVERS = (TEXT_TO_TEXT, TEXT_TO_IMAGE, TEXT_TO_AUDIO)
+IMAGE_RETRIEVERS = (IMAGE_TO_IMAGE, IMAGE_TO_TEXT, IMAGE_TO_AUDIO)
+AUDIO_RETRIEVERS = (AUDIO_TO_AUDIO, AUDIO_TO_TEXT, AUDIO_TO_IMAGE)
+
+NO_RETRIEVAL_INTENTS = {"chitchat", "meta"}
+
+# ============================================================
+# STAGE 1: TOKEN-BOUNDARY PATTERNS
+# ============================================================
+_WORD = re.compile(r"[a-z']+")
+
+# Chitchat = the whole message is made of these words (and has a greeting/thanks/bye)
+_CHITCHAT_TRIGGERS = {
+    "hi", "hii", "hello", "hey", "heya", "yo", "thanks", "thank", "thx", "ty",
+    "bye", "goodbye", "ok", "okay", "cool", "great", "nice", "awesome", "welcome",
+    "morning", "evening", "afternoon", "night",
+}
+_CHITCHAT_FILLER = {
+    "you", "so", "much", "a", "lot", "there", "again", "good", "all", "very",
+    "buddy", "bro", "sir", "mam", "ma'am", "see", "ya",
+}
+
+_META = re.compile(
+    r"\b(?:"
+    r"what (?:have|did) we (?:discuss(?:ed)?|talk(?:ed)? about)"
+    r"|tell me about our (?:conversation|chat)"
+    r"|summari[sz]e (?:our|this|the) (?:chat|conversation|discussion)"
+    r"|recap (?:of )?(?:our|this|the) (?:chat|conversation|discussion)"
+    r"|what have you told me"
+    r"|remind me what we discussed"
+    r"|our (?:conversation|chat) so far"
+    r")\b"
+)
+
+_IMAGE_CUES = re.compile(
+    r"\b(?:image|picture|photo|diagram|figure|chart|graph|screenshot|slide|illustration|drawing|map|infographic)s?\b"
+)
+
+
+# "Tell me more"-style follow-ups: about the previous answer, whatever their embedding says
+_FOLLOWUP_CUE = re.compile(
+    r"\b(?:"
+    r"explain (?:it |that |this )?(?:more|further|again|in (?:more )?detail)"
+    r"|tell me more|say more|more details?|elaborate|go on|keep going|continue"
+    r"|expand on (?:it|that|this)|what else"
+    r")\b"
+)
+FOLLOWUP_CUE_MAX_WORDS = 8
+
+
+def _is_chitchat_text(text: str) -> bool:
+    words = _WORD.findall(text)
+    if not words or len(words) > 6:
+        return False
+    allowed = _CHITCHAT_TRIGGERS | _CHITCHAT_FILLER
+    return all(w in allowed for w in words) and any(w in _CHITCHAT_TRIGGERS for w in words)
+
+
+# ============================================================
+# STAGE 2: EMBEDDING PROTOTYPES
+# ============================================================
+PROTOTYPES: Dict[str, List[str]] = {
+    "chitchat": [
+        "hi how are you",
+        "good morning, how are you doing today",
+        "thanks a lot, that was helpful",
+        "nice talking to you, see you later",
+        "who are you",
+    ],
+    "meta": [
+        "what have we discussed so far",
+        "summarize our conversation",
+        "what did I ask you before",
+        "remind me of the topics we covered",
+    ],
+    "knowledge": [
+        "explain the process of photosynthesis",
+        "what is ohm's law",
+        "define mitosis and meiosis",
+        "what are the causes of the french revolution",
+        "how does a router forward packets",
+    ],
+    "visual": [
+        "show me the diagram of the heart",
+        "what does the figure on this page look like",
+        "find the picture of the circuit",
+    ],
+}
+
+# Prototype classification only for short messages (long ones are questions)
+PROTOTYPE_MAX_WORDS = 8
+
+_prototype_cache: Dict[int, Dict[str, np.ndarray]] = {}
+_prototype_lock = threading.Lock()
+
+
+def _unit_rows(vectors: Sequence[Sequence[float]]) -> np.ndarray:
+    mat = np.asarray(vectors, dtype=np.float32)
+    if mat.ndim == 1:
+        mat = mat.reshape(1, -1)
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+def _prototype_matrices(embedder) -> Dict[str, np.ndarray]:
+    """Embed the prototype phrases once per embedder instance."""
+    key = id(embedder)
+    cached = _prototype_cache.get(key)
+    if cached is not None:
+        return cached
+    with _prototype_lock:
+        if key not in _prototype_cache:
+            _prototype_cache[key] = {
+                label: _unit_rows(embedder.embed_documents(phrases))
+                for label, phrases in PROTOTYPES.items()
+            }
+    return _prototype_cache[key]
+
+
+def prototype_scores(query_vector: Sequence[float], embedder) -> Dict[str, float]:
+    """Max cosine similarity of the query to each prototype class."""
+    query = _unit_rows(query_vector)[0]
+    return {
+        label: float(np.max(mat @ query))
+        for label, mat in _prototype_matrices(embedder).items()
+    }
+
+
+# ============================================================
+# PUBLIC API
+# ============================================================
+
+def _typed_text(normalized: dict) -> str:
+    # "message" is what the user typed; "text" also contains OCR/transcripts
+    message = normalized.get("message")
+    if message is None:
+        message = normalized.get("text")
+    return (message or "").strip().lower()
+
+
+def has_image_input(normalized: dict) -> bool:
+    """An image was uploaded this turn (its CDN upload may still be running)."""
+    return bool(normalized.get("image_url") or normalized.get("image_analysis"))
+
+
+def has_audio_input(normalized: dict) -> bool:
+    """An audio file was uploaded this turn (its CDN upload may still be running)."""
+    return bool(normalized.get("audio_url") or normalized.get("audio_analysis"))
+
+
+def plan_retrieval(normalized: dict, query_vector=None, embedder=None) -> Dict:
+    """
+    Classify the turn and decide which retrievers to run.
+
+    Args:
+        normalized: normalize_chat_input output
+        query_vector: Embedding of normalized["text"], if already computed
+        embedder: The embedder that produced query_vector (enables prototypes)
+
+    Returns:
+        {
+          "intent": "chitchat" | "meta" | "multimodal" | "short_query" | "knowledge",
+          "retrievers": set of retriever names (empty → skip retrieval),
+          "reason": short explanation for logs,
+        }
+    """
+    has_image = has_image_input(normalized)
+    has_audio = has_audio_input(normalized)
+    typed = _typed_text(normalized)
+    scores = None
+
+    # --- Intent ---
+    if has_image or has_audio:
+        intent, reason = "multimodal", "upload"
+    elif _is_chitchat_text(typed):
+        intent, reason = "chitchat", "pattern"
+    elif _META.search(typed):
+        intent, reason = "meta", "pattern"
+    else:
+        intent, reason = ("short_query" if len(typed.split()) <= 4 else "knowledge"), "default"
+        if query_vector is not None and embedder is not None and len(typed.split()) <= PROTOTYPE_MAX_WORDS:
+            scores = prototype_scores(query_vector, embedder)
+            best = max(("chitchat", "meta"), key=lambda label: scores[label])
+            if (
+                scores[best] >= settings.INTENT_PROTOTYPE_THRESHOLD
+                and scores[best] - scores["knowledge"] >= settings.INTENT_PROTOTYPE_MARGIN
+            ):
+                intent, reason = best, f"prototype {scores[best]:.2f}"
+
+    if intent in NO_RETRIEVAL_INTENTS:
+        return {"intent": intent, "retrievers": set(), "reason": reason}
+
+    # --- Retrievers ---
+    if not settings.INTENT_ROUTING_ENABLED:
+        # Legacy fan-out: every retriever for every input present
+        retrievers = set()
+        if normalized.get("text"):
+            retrievers.update(TEXT_RETRIEVERS)
+        if has_image:
+            retrievers.update(IMAGE_RETRIEVERS)
+        if has_audio:
+            retrievers.update(AUDIO_RETRIEVERS)
+        return {"intent": intent, "retrievers": retrievers, "reason": reason}
+
+    retrievers = set()
+    if has_image:
+        retrievers.update(IMAGE_RETRIEVERS)
+        image_analysis = normalized.get("image_analysis")
+        ocr_text = ((image_analysis or {}).get("ocr_text") or "").strip()
+        if not ocr_text:
+            # OCR-driven searches have nothing to search with
+            retrievers -= {IMAGE_TO_TEXT, IMAGE_TO_AUDIO}
+        if image_analysis and "vector" in image_analysis and image_analysis["vector"] is None:
+            # Analysis was cut by the request deadline: no CLIP vector either
+            retrievers.discard(IMAGE_TO_IMAGE)
+    if has_audio:
+        transcript = ((normalized.get("audio_analysis") or {}).get("transcript") or "").strip()
+        if transcript:
+            retrievers.update(AUDIO_RETRIEVERS)
+
+    # Text path only for what the user typed. On upload-only turns the text is
+    # the OCR/transcript itself, which the upload paths above already search.
+    run_text_path = bool(normalized.get("message")) if (has_image or has_audio) else bool(typed)
+    if run_text_path:
+        retrievers.update({TEXT_TO_TEXT, TEXT_TO_AUDIO})  # both reuse the BGE-M3 query vector
+        wants_image = bool(_IMAGE_CUES.search(typed))
+        if not wants_image and query_vector is not None and embedder is not None:
+            scores = scores or prototype_scores(query_vector, embedder)
+            wants_image = scores["visual"] >= settings.INTENT_PROTOTYPE_THRESHOLD
+        if wants_image:
+            retrievers.add(TEXT_TO_IMAGE)  # CLIP text tower only when images are asked for
+
+    return {"intent": intent, "retrievers": retrievers, "reason": reason}
+
+
+def is_followup_cue(message: str) -> bool:
+    """Short "explain more" / "tell me more" follow-up to the previous answer."""
+    text = (message or "").strip().lower()
+    return len(text.split()) <= FOLLOWUP_CUE_MAX_WORDS and bool(_FOLLOWUP_CUE.search(text))
+
+
+def classify_intent(normalized: dict, query_vector=None, embedder=None) -> str:
     """Classify user intent from normalized input.
-    
+
     Returns:
         'chitchat' - greetings, small talk (no retrieval needed)
         'meta' - questions about chat history (use session history, no retrieval)
         'multimodal' - has image or audio upload
+        'short_query' - up to 4 words
         'knowledge' - needs database retrieval
     """
-    if normalized.get("image_url") or normalized.get("audio_url"):
-        return "multimodal"
-
-    text = (normalized.get("text") or "").strip().lower()
-
-    # Chitchat patterns (no retrieval needed)
-    chitchat_patterns = [
-        "hi", "hello", "hey", "thanks", "thank you", 
-        "bye", "goodbye", "ok", "okay"
-    ]
-    if any(pattern in text for pattern in chitchat_patterns):
-        return "chitchat"
-
-    # Meta-questions about conversation (use history, no retrieval)
-    meta_patterns = [
-        "what have we discussed",
-        "what did we talk about",
-        "tell me about our conversation",
-        "summarize our chat",
-        "recap of our discussion",
-        "what have you told me",
-        "remind me what we discussed",
-        "our conversation",
-    ]
-    if any(pattern in text for pattern in meta_patterns):
-        return "meta"
-
-    if len(text.split()) <= 4:
-        return "short_query"
-
-    return "knowledge"
+    return plan_retrieval(normalized, query_vector, embedder)["intent"]
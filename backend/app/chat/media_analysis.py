@@ -0,0 +1,169 @@
+"""
+Per-turn media analysis memo.
+
+An uploaded file is analysed ONCE per chat turn (in normalize_chat_input)
+and the result travels in `normalized` through route_query into every
+retriever, instead of each retriever re-downloading and re-analysing it.
+
+    normalized["audio_analysis"] = {
+        "audio_url": str,
+        "transcript": str,
+        "segments": [{text, start, end}],
+        "source": "remote" | "local",
+        "query_vector": [float] | None,   # BGE-M3 of transcript, filled lazily
+    }
+
+    normalized["image_analysis"] = {
+        "image_url": str,
+        "vector": [float],                # CLIP (or OCR-text fallback) vector
+        "source": "remote" | "local" | "ocr" | "ocr_fallback",
+        "ocr_text": str | None,
+        "ocr_blocks": [dict] | None,
+        "ocr_vector": [float] | None,     # BGE-M3 of ocr_text, filled lazily
+    }
+
+Each analysis dict is a superset of transcribe_audio's / embed_image's
+result, so it can be passed wherever those results are expected.
+"""
+
+import asyncio
+from typing import Callable, Dict, List, Tuple
+
+from app.asr.orchestrator import transcribe_audio
+from app.embeddings.image.orchestrator import embed_image
+from app.utils.metrics import MODEL_SECONDS, timed
+
+# Transcripts shorter than this are not used as retrieval queries
+MIN_QUERY_CHARS = 5
+
+
+def analyze_audio(audio_url: str | None, audio_bytes: bytes | None = None) -> Dict:
+    """Transcribe an uploaded audio file once (from `audio_bytes` when available)."""
+    result = transcribe_audio(audio_url, audio_bytes) or {}
+    return {
+        "audio_url": audio_url,
+        "transcript": result.get("transcript", "") or "",
+        "segments": result.get("segments", []) or [],
+        "source": result.get("source"),
+        "query_vector": None,
+    }
+
+
+def empty_audio_analysis(audio_url: str | None = None) -> Dict:
+    """Stand-in when transcription was cut by the deadline (no audio retrieval)."""
+    return {"audio_url": audio_url, "transcript": "", "segments": [], "source": None, "query_vector": None}
+
+
+def empty_image_analysis(image_url: str | None = None) -> Dict:
+    """Stand-in when OCR/CLIP failed or was cut by the deadline (no image retrieval)."""
+    return {
+        "image_url": image_url,
+        "vector": None,
+        "source": None,
+        "ocr_text": None,
+        "ocr_blocks": None,
+        "ocr_vector": None,
+    }
+
+
+def analyze_image(image_url: str | None, image_bytes: bytes | None = None) -> Dict:
+    """OCR + CLIP an uploaded image once (from `image_bytes` when available)."""
+    emb = embed_image(image_url, image_bytes)
+    analysis = {"image_url": image_url, **emb, "ocr_vector": None}
+    if emb.get("source") in ("ocr", "ocr_fallback"):
+        # Fallback vector already IS the BGE-M3 embedding of the OCR text
+        analysis["ocr_vector"] = emb.get("vector")
+    return analysis
+
+
+class BackgroundUpload:
+    """
+    CDN upload of a chat / search upload, possibly still running.
+
+    `url` and `error` are recorded when it finishes. on_done(callback) calls
+    callback(url) once it has succeeded; wait() returns the URL (or raises
+    the upload error) for callers that need it in their response.
+    """
+
+    def __init__(self, task: "asyncio.Future[str]"):
+        self._task = task
+        self.url: str | None = None
+        self.error: BaseException | None = None
+        task.add_done_callback(self._record)
+
+    def _record(self, task: "asyncio.Future[str]") -> None:
+        if task.cancelled():
+            self.error = asyncio.CancelledError()
+        elif task.exception() is not None:
+            self.error = task.exception()
+            print(f"[WARN] Background upload failed: {self.error}")
+        else:
+            self.url = task.result()
+
+    def done(self) -> bool:
+        return self._task.done()
+
+    def on_done(self, callback: Callable[[str], None]) -> None:
+        def _call(_task) -> None:
+            if self.url is not None:
+                callback(self.url)
+
+        if self._task.done():
+            _call(self._task)
+        else:
+            self._task.add_done_callback(_call)
+
+    async def wait(self) -> str:
+        return await asyncio.shield(self._task)
+
+
+async def upload_and_analyze(
+        upload: Callable[[], str],
+        analyze: Callable[[str | None], Dict],
+        needs_url: bool = False,
+        url_key: str = "url",
+        timeout: float | None = None,
+) -> Tuple[BackgroundUpload, Dict | None, Exception | None]:
+    """
+    Analyse an uploaded file from its in-memory bytes while its CDN upload
+    runs in the background, and return as soon as the analysis is done: the
+    upload is off the critical path. When `needs_url` is set (e.g. remote
+    CLIP embeds by URL) the upload has to finish first.
+
+    `timeout` bounds the analysis (the request deadline); when it runs out
+    the error is an asyncio.TimeoutError and the worker thread is abandoned.
+
+    Returns (upload, analysis, analysis_error). analysis[url_key] is filled
+    in when the upload finishes; upload errors are recorded on `upload`
+    (raised by upload.wait()), except with `needs_url` where they are raised.
+    """
+    upload_task = asyncio.ensure_future(asyncio.to_thread(upload))
+    pending = BackgroundUpload(upload_task)
+    if needs_url:
+        url = await upload_task
+        try:
+            analysis = await asyncio.wait_for(asyncio.to_thread(analyze, url), timeout=timeout)
+        except Exception as e:
+            return pending, None, e
+    else:
+        try:
+            analysis = await asyncio.wait_for(asyncio.to_thread(analyze, None), timeout=timeout)
+        except Exception as e:
+            return pending, None, e
+
+    def _record_url(url: str) -> None:
+        analysis[url_key] = url
+
+    pending.on_done(_record_url)
+    return pending, analysis, None
+
+
+def ensure_query_vector(analysis: Dict, text_key: str, vector_key: str, embedder) -> List[float] | None:
+    """Embed analysis[text_key] with `embedder` once and memoize it under `vector_key`."""
+    if analysis.get(vector_key) is None:
+        text = (analysis.get(text_key) or "").strip()
+        if len(text) < MIN_QUERY_CHARS:
+            return None
+        with timed(MODEL_SECONDS, model="bge_m3", backend="local"):
+            analysis[vector_key] = embedder.embed_query(text)
+    return analysis[vector_key]
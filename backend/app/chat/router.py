@@ -57,9 +57,23 @@
 #     return results
  
 import asyncio
+import functools
 import time
 
-from app.chat.intent import classify_intent
+from app.chat.intent import (
+    has_audio_input,
+    has_image_input,
+    plan_retrieval,
+    TEXT_RETRIEVERS,
+    TEXT_TO_TEXT, TEXT_TO_IMAGE, TEXT_TO_AUDIO,
+    IMAGE_TO_IMAGE, IMAGE_TO_TEXT, IMAGE_TO_AUDIO,
+    AUDIO_TO_AUDIO, AUDIO_TO_TEXT, AUDIO_TO_IMAGE,
+)
+from app.chat.media_analysis import analyze_audio, analyze_image, ensure_query_vector
+from app.db.modality_inventory import (
+    available_collections,
+    TEXT_COLLECTION, IMAGE_COLLECTION, AUDIO_COLLECTION,
+)
 
 # Text-based
 from app.retrieval.text_retriever import retrieve_text_chunks
@@ -76,25 +90,90 @@ from app.retrieval.audio_to_audio_retriever import retrieve_similar_audio
 from app.retrieval.audio_to_text_retriever import retrieve_text_from_audio
 from app.retrieval.audio_to_image_retriever import retrieve_image_from_audio
 
-from app.embeddings.hf_bge_m3 import HFBgeM3Embedder
+from app.embeddings.hf_bge_m3 import get_local_bge_m3_embedder
+from app.utils.metrics import MODEL_SECONDS, RETRIEVER_SECONDS, timed
 
 
 TIMEOUT_SECONDS = 30
 
+# Collection each retriever searches (skipped when the owner has none there)
+RETRIEVER_COLLECTIONS = {
+    TEXT_TO_TEXT: TEXT_COLLECTION,
+    TEXT_TO_IMAGE: IMAGE_COLLECTION,
+    TEXT_TO_AUDIO: AUDIO_COLLECTION,
+    IMAGE_TO_IMAGE: IMAGE_COLLECTION,
+    IMAGE_TO_TEXT: TEXT_COLLECTION,
+    IMAGE_TO_AUDIO: AUDIO_COLLECTION,
+    AUDIO_TO_AUDIO: AUDIO_COLLECTION,
+    AUDIO_TO_TEXT: TEXT_COLLECTION,
+    AUDIO_TO_IMAGE: IMAGE_COLLECTION,
+}
+
+
+async def _with_timeout(
+        func,
+        *args,
+        timeout: float = TIMEOUT_SECONDS,
+        retriever: str = "",
+        deadline=None,
+        **kwargs,
+):
+    """
+    Run sync retrieval in a thread with a hard timeout, returning [] on timeout.
+
+    With a request `deadline` the timeout shrinks to what is left after the
+    LLM reserve; a retriever with no time left is skipped (and reported).
+    """
+    from app.config import settings
 
-async def _with_timeout(func, *args, timeout: float = TIMEOUT_SECONDS):
-    """Run sync retrieval in a thread with a hard timeout, returning [] on timeout."""
+    name = retriever or func.__name__
+    if deadline is not None:
+        timeout = deadline.stage_timeout(cap=timeout, reserve=settings.DEADLINE_LLM_RESERVE_SECONDS)
+        if timeout <= 0:
+            deadline.skip(name)
+            return []
     try:
-        result = await asyncio.wait_for(asyncio.to_thread(func, *args), timeout=timeout)
+        with timed(RETRIEVER_SECONDS, retriever=name):
+            result = await asyncio.wait_for(
+                asyncio.to_thread(functools.partial(func, *args, **kwargs)),
+                timeout=timeout,
+            )
         return result if result else []
     except asyncio.TimeoutError:
-        from app.config import settings
+        if deadline is not None:
+            deadline.skip(name)
         if settings.LOG_RETRIEVAL:
-            print(f"[RETRIEVAL] ⏱️ TIMEOUT ({timeout}s): {func.__name__}")
+            print(f"[RETRIEVAL] ⏱️ TIMEOUT ({timeout:.2f}s): {name}")
         return []
 
 
-async def route_query(normalized: dict) -> dict:
+def typed_text_query(message: str, owner_id: str) -> dict:
+    """
+    Normalized input for the typed message alone, so the text path can run
+    before an upload's OCR / transcript is available.
+    """
+    message = (message or "").strip()
+    return {
+        "text": message,
+        "message": message,
+        "image_url": None,
+        "audio_url": None,
+        "owner_id": owner_id,
+        "audio_analysis": None,
+        "image_analysis": None,
+    }
+
+
+def merge_retrieval_results(*partials: dict) -> dict:
+    """Concatenate route_query results in order (duplicates are dropped by the context builder)."""
+    merged = {"text": [], "image": [], "audio": []}
+    for partial in partials:
+        for key, items in partial.items():
+            merged.setdefault(key, []).extend(items)
+    return merged
+
+
+async def route_query(normalized: dict, deadline=None, skip=frozenset()) -> dict:
     """
     Multimodal retrieval router.
 
@@ -102,6 +181,11 @@ async def route_query(normalized: dict) -> dict:
     - Same-modality retrieval ALWAYS runs first
     - Cross-modal retrieval ALWAYS runs second
     - Text is semantic bridge, not a replacement
+
+    Every retriever runs with a timeout bounded by the request `deadline`
+    (when given); retrievers cut by it are recorded in deadline.degraded_stages.
+    Retrievers in `skip` are not run (e.g. the text path, when it already ran
+    speculatively on the typed message).
     """
     from app.config import settings
     
@@ -116,76 +200,165 @@ async def route_query(normalized: dict) -> dict:
     image_url = normalized.get("image_url")
     audio_url = normalized.get("audio_url")
 
-    # 🧠 Intent gating
-    intent = classify_intent(normalized)
-    if intent in {"chitchat", "meta"}:
+    # 🧠 Intent gating (patterns only; no embedding needed to skip chitchat/meta)
+    plan = plan_retrieval(normalized)
+    # The orchestrator picks the LLM prompt from it (meta → history summary)
+    normalized["intent"] = plan["intent"]
+    plan["retrievers"] -= set(skip)
+    if not plan["retrievers"]:
+        if settings.LOG_RETRIEVAL:
+            print(f"[RETRIEVAL] ⏭️ Skipped (intent={plan['intent']}, {plan['reason']})")
+        return results
+
+    # 📦 Modality inventory: never search collections this owner has no points in
+    populated = await asyncio.to_thread(available_collections, owner_id)
+    if not any(RETRIEVER_COLLECTIONS[r] in populated for r in plan["retrievers"]):
         if settings.LOG_RETRIEVAL:
-            print(f"[RETRIEVAL] ⏭️ Skipped (intent={intent})")
+            print(f"[RETRIEVAL] ⏭️ Skipped (owner has nothing indexed for {sorted(plan['retrievers'])})")
         return results
 
-    embedder = HFBgeM3Embedder()
+    embedder = get_local_bge_m3_embedder()
+    # Set by the orchestrator when it already embedded the query (semantic cache);
+    # otherwise embed once here for both text→text and text→audio
+    query_vector = normalized.get("query_vector")
+    text_path = bool(plan["retrievers"] & set(TEXT_RETRIEVERS))
+    if text and text_path and query_vector is None:
+        with timed(MODEL_SECONDS, model="bge_m3", backend="local"):
+            query_vector = await asyncio.to_thread(embedder.embed_query, text)
+
+    # 🧭 Full plan: prototype check against the same query vector (no extra inference)
+    plan = plan_retrieval(normalized, query_vector=query_vector, embedder=embedder)
+    normalized["intent"] = plan["intent"]
+    plan["retrievers"] -= set(skip)
+    run = {r for r in plan["retrievers"] if RETRIEVER_COLLECTIONS[r] in populated}
+    if settings.LOG_RETRIEVAL:
+        skipped = plan["retrievers"] - run
+        print(
+            f"[RETRIEVAL] 🧭 intent={plan['intent']} ({plan['reason']}), retrievers={sorted(run)}"
+            + (f", empty collections skipped={sorted(skipped)}" if skipped else "")
+        )
+    if not run:
+        return results
 
     # ==========================================================
     # 📝 TEXT QUERY PATH
     # ==========================================================
-    if text:
+    if text and run & {TEXT_TO_TEXT, TEXT_TO_IMAGE, TEXT_TO_AUDIO}:
         if settings.LOG_RETRIEVAL:
             print(f"[RETRIEVAL] 📝 Text query: '{text[:50]}...'")
         # Text → Text
-        results["text"].extend(
-            retrieve_text_chunks(text, owner_id, embedder)
-        )
+        if TEXT_TO_TEXT in run:
+            results["text"].extend(
+                await _with_timeout(
+                    retrieve_text_chunks,
+                    text,
+                    owner_id,
+                    embedder,
+                    retriever=TEXT_TO_TEXT,
+                    deadline=deadline,
+                    use_mmr=settings.CHAT_USE_MMR,
+                    mmr_lambda=settings.MMR_LAMBDA,
+                    expand_neighbors=settings.CHAT_NEIGHBOR_WINDOW,
+                    query_vector=query_vector,
+                )
+            )
 
         # Text → Image
-        results["image"].extend(
-            retrieve_images_from_text(text, owner_id)
-        )
+        if TEXT_TO_IMAGE in run:
+            results["image"].extend(
+                await _with_timeout(
+                    retrieve_images_from_text, text, owner_id, retriever=TEXT_TO_IMAGE, deadline=deadline,
+                )
+            )
 
         # Text → Audio
-        results["audio"].extend(
-            retrieve_audio_from_text(text, owner_id)
-        )
+        if TEXT_TO_AUDIO in run:
+            results["audio"].extend(
+                await _with_timeout(
+                    retrieve_audio_from_text, text, owner_id,
+                    retriever=TEXT_TO_AUDIO, deadline=deadline, query_vector=query_vector,
+                )
+            )
 
     # ==========================================================
     # 🖼 IMAGE QUERY PATH
     # ==========================================================
-    if image_url:
+    if has_image_input(normalized) and run & {IMAGE_TO_IMAGE, IMAGE_TO_TEXT, IMAGE_TO_AUDIO}:
         if settings.LOG_RETRIEVAL:
             print(f"[RETRIEVAL] 🖼️ Image query")
+
+        # OCR + CLIP + OCR embedding computed once, shared by all image retrievers.
+        # An analysis that failed or was cut by the deadline arrives as
+        # empty_image_analysis and is final: only analyse here when the
+        # caller never tried (no re-download / second OCR run).
+        image_analysis = normalized.get("image_analysis")
+        if image_analysis is None:
+            image_analysis = await asyncio.to_thread(analyze_image, image_url)
+        if image_analysis.get("vector") is None:
+            run = run - {IMAGE_TO_IMAGE}
+        if image_analysis["ocr_vector"] is None and (image_analysis.get("ocr_text") or "").strip() == text:
+            # Image-only turn: the text query IS the OCR text
+            image_analysis["ocr_vector"] = query_vector
+        await asyncio.to_thread(ensure_query_vector, image_analysis, "ocr_text", "ocr_vector", embedder)
+        image_kwargs = {
+            "embedding": image_analysis,
+            "ocr_vector": image_analysis["ocr_vector"],
+        }
+
         # Image → Image (PRIMARY)
-        results["image"].extend(
-            await _with_timeout(retrieve_similar_images, image_url, owner_id)
-        )
+        if IMAGE_TO_IMAGE in run:
+            results["image"].extend(
+                await _with_timeout(retrieve_similar_images, image_url, owner_id, retriever=IMAGE_TO_IMAGE, deadline=deadline, **image_kwargs)
+            )
 
         # Image → Text (OCR → text)
-        results["text"].extend(
-            await _with_timeout(retrieve_text_from_image, image_url, owner_id)
-        )
+        if IMAGE_TO_TEXT in run:
+            results["text"].extend(
+                await _with_timeout(retrieve_text_from_image, image_url, owner_id, retriever=IMAGE_TO_TEXT, deadline=deadline, **image_kwargs)
+            )
 
         # Image → Audio (OCR → transcript)
-        results["audio"].extend(
-            await _with_timeout(retrieve_audio_from_image, image_url, owner_id)
-        )
+        if IMAGE_TO_AUDIO in run:
+            results["audio"].extend(
+                await _with_timeout(retrieve_audio_from_image, image_url, owner_id, retriever=IMAGE_TO_AUDIO, deadline=deadline, **image_kwargs)
+            )
 
     # ==========================================================
     # 🔊 AUDIO QUERY PATH
     # ==========================================================
-    if audio_url:
+    if has_audio_input(normalized) and run & {AUDIO_TO_AUDIO, AUDIO_TO_TEXT, AUDIO_TO_IMAGE}:
         if settings.LOG_RETRIEVAL:
             print(f"[RETRIEVAL] 🔊 Audio query")
+
+        # Transcript + its embedding computed once, shared by all audio retrievers
+        audio_analysis = normalized.get("audio_analysis")
+        if audio_analysis is None:
+            audio_analysis = await asyncio.to_thread(analyze_audio, audio_url)
+        if audio_analysis["query_vector"] is None and audio_analysis["transcript"].strip() == text:
+            # Audio-only turn: the text query IS the transcript
+            audio_analysis["query_vector"] = query_vector
+        await asyncio.to_thread(ensure_query_vector, audio_analysis, "transcript", "query_vector", embedder)
+        audio_kwargs = {
+            "transcription": audio_analysis,
+            "query_vector": audio_analysis["query_vector"],
+        }
+
         # Audio → Audio (PRIMARY)
-        results["audio"].extend(
-            await _with_timeout(retrieve_similar_audio, audio_url, owner_id)
-        )
+        if AUDIO_TO_AUDIO in run:
+            results["audio"].extend(
+                await _with_timeout(retrieve_similar_audio, audio_url, owner_id, retriever=AUDIO_TO_AUDIO, deadline=deadline, **audio_kwargs)
+            )
 
         # Audio → Text (transcript)
-        results["text"].extend(
-            await _with_timeout(retrieve_text_from_audio, audio_url, owner_id)
-        )
+        if AUDIO_TO_TEXT in run:
+            results["text"].extend(
+                await _with_timeout(retrieve_text_from_audio, audio_url, owner_id, retriever=AUDIO_TO_TEXT, deadline=deadline, **audio_kwargs)
+            )
 
         # Audio → Image (transcript → OCR)
-        results["image"].extend(
-            await _with_timeout(retrieve_image_from_audio, audio_url, owner_id)
-        )
+        if AUDIO_TO_IMAGE in run:
+            results["image"].extend(
+                await _with_timeout(retrieve_image_from_audio, audio_url, owner_id, retriever=AUDIO_TO_IMAGE, deadline=deadline, **audio_kwargs)
+            )
 
     return results
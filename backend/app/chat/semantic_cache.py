@@ -0,0 +1,156 @@
+"""
+Semantic near-duplicate query cache.
+
+Students in a class ask the same question phrased slightly differently.
+Recent query vectors are kept per owner in a small NumPy matrix; a new
+query whose cosine similarity to a cached one is above the threshold
+reuses that entry's retrieval results (and optionally its answer),
+skipping the Qdrant searches and possibly the LLM call.
+
+An entry is only valid while:
+- it is younger than the TTL, and
+- the owner's corpus version is unchanged (nothing was indexed since).
+"""
+
+import threading
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.config import settings
+from app.utils.metrics import CACHE_REQUESTS
+
+
+class SemanticQueryCache:
+    def __init__(
+            self,
+            threshold: float = 0.95,
+            ttl_seconds: float = 600,
+            max_entries_per_owner: int = 256,
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_owner = max_entries_per_owner
+
+        # owner_id → {"vectors": (n, d) float32 matrix, "entries": [entry dict]}
+        self._owners: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        vec = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
+    def _prune(self, bucket: Dict, corpus_version: int, now: float):
+        """Drop expired / stale-version entries (caller holds the lock)."""
+        entries = bucket["entries"]
+        keep = [
+            i for i, e in enumerate(entries)
+            if now - e["created_at"] <= self.ttl_seconds and e["corpus_version"] == corpus_version
+        ]
+        if len(keep) != len(entries):
+            self.expirations += len(entries) - len(keep)
+            bucket["entries"] = [entries[i] for i in keep]
+            bucket["vectors"] = bucket["vectors"][keep]
+
+    def lookup(self, owner_id: str, query_vector, corpus_version: int) -> Dict | None:
+        """
+        Return the cached entry closest to `query_vector` if above the threshold.
+
+        Entry dict: {query, results, answer, similarity, corpus_version, created_at}
+        """
+        query = self._unit(query_vector)
+        now = time.time()
+
+        with self._lock:
+            bucket = self._owners.get(owner_id)
+            if bucket is not None:
+                self._prune(bucket, corpus_version, now)
+
+            if bucket is None or not bucket["entries"]:
+                self.misses += 1
+                CACHE_REQUESTS.inc(cache="semantic", result="miss")
+                return None
+
+            sims = bucket["vectors"] @ query
+            best = int(np.argmax(sims))
+            if float(sims[best]) < self.threshold:
+                self.misses += 1
+                CACHE_REQUESTS.inc(cache="semantic", result="miss")
+                return None
+
+            entry = bucket["entries"][best]
+            entry["last_hit_at"] = now
+            self.hits += 1
+            CACHE_REQUESTS.inc(cache="semantic", result="hit")
+            return {**entry, "similarity": float(sims[best])}
+
+    def store(
+            self,
+            owner_id: str,
+            query_vector,
+            query: str,
+            results: Dict,
+            corpus_version: int,
+            answer: str | None = None,
+    ):
+        vec = self._unit(query_vector)
+        now = time.time()
+        entry = {
+            "query": query,
+            "results": results,
+            "answer": answer,
+            "corpus_version": corpus_version,
+            "created_at": now,
+            "last_hit_at": now,
+        }
+
+        with self._lock:
+            bucket = self._owners.get(owner_id)
+            if bucket is None or bucket["vectors"].shape[1] != vec.shape[0]:
+                bucket = {"vectors": np.empty((0, vec.shape[0]), dtype=np.float32), "entries": []}
+                self._owners[owner_id] = bucket
+
+            self._prune(bucket, corpus_version, now)
+            bucket["entries"].append(entry)
+            bucket["vectors"] = np.vstack([bucket["vectors"], vec])
+
+            overflow = len(bucket["entries"]) - self.max_entries_per_owner
+            if overflow > 0:
+                # Evict least recently used
+                order = sorted(range(len(bucket["entries"])), key=lambda i: bucket["entries"][i]["last_hit_at"])
+                keep = sorted(order[overflow:])
+                bucket["entries"] = [bucket["entries"][i] for i in keep]
+                bucket["vectors"] = bucket["vectors"][keep]
+                self.evictions += overflow
+
+    def invalidate_owner(self, owner_id: str):
+        with self._lock:
+            self._owners.pop(owner_id, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "owners": len(self._owners),
+                "entries": sum(len(b["entries"]) for b in self._owners.values()),
+            }
+
+
+semantic_cache = SemanticQueryCache(
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS,
+    max_entries_per_owner=settings.SEMANTIC_CACHE_MAX_PER_OWNER,
+)
@@ -1,27 +1,397 @@
+"""
+Chat session storage.
+
+A session holds the chat history, the last citations (for the citation
+resolver) and the temp Cloudinary assets uploaded during the chat. Backends (SESSION_STORE_BACKEND):
+
+- memory: per-process LRU with an idle TTL. Only correct with ONE worker.
+- sqlite: WAL-mode file shared by every uvicorn worker on the host.
+- redis:  any Redis-compatible server, shared across hosts (needs `redis`).
+
+Shared backends store sessions as zlib-compressed compact JSON and hand out
+decoded copies, so callers must save_session() after mutating a session.
+
+Sessions that expire or fall out of the LRU have their temp assets deleted
+(cleanup_temp_assets) on a background thread.
+"""
+
+import json
+import sqlite3
+import threading
+import time
 import uuid
-from app.chat.cleanup import cleanup_temp_assets
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
 
-_CHAT_SESSIONS = {}
+from app.config import settings
+from app.chat.cleanup import cleanup_temp_assets
 
 MAX_TURNS = 7
 
-def get_session(
-        owner_id: str,
-        session_id: str | None,
-):
+# Shared backends look for expired sessions at most this often (seconds)
+SWEEP_INTERVAL_SECONDS = 60.0
+
+EvictCallback = Callable[[str, dict], None]
+
+
+# ============================================================
+# SERIALIZATION
+# ============================================================
+
+def _json_default(value):
+    # NumPy scalars/arrays can sneak into citation scores
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_session(session: dict) -> bytes:
+    """Compact JSON (no whitespace) + zlib; history-heavy sessions shrink ~3-4x."""
+    raw = json.dumps(session, separators=(",", ":"), ensure_ascii=False, default=_json_default)
+    return zlib.compress(raw.encode("utf-8"), 6)
+
+
+def loads_session(blob: bytes) -> dict:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+# ============================================================
+# BACKENDS
+# ============================================================
+
+class SessionStore(ABC):
     """
-    Retrieve an existing chat session or create a new one.
-    
-    If session_id is provided but a different session exists, clean up old session first.
-    
-    Returns a tuple of (session_id, session_dict) so callers can persist the ID.
+    Interface for session backends.
+
+    Args:
+        ttl_seconds: Idle time (since the last save) after which a session expires
+        on_evict: Called as on_evict(session_id, session) for every session that
+            expires or is evicted, never for explicit delete()
     """
-    if session_id and session_id in _CHAT_SESSIONS:
-        return session_id, _CHAT_SESSIONS[session_id]
 
-    # New session requested → create fresh one
-    session_id = session_id or str(uuid.uuid4())
-    _CHAT_SESSIONS[session_id] = {
+    def __init__(self, ttl_seconds: float, on_evict: Optional[EvictCallback] = None):
+        self.ttl_seconds = ttl_seconds
+        self.on_evict = on_evict
+
+    @abstractmethod
+    def load(self, session_id: str) -> Optional[dict]:
+        """The session, or None if it does not exist or has expired."""
+
+    @abstractmethod
+    def save(self, session_id: str, session: dict) -> None:
+        """Store the session and restart its idle TTL."""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> Optional[dict]:
+        """Remove a session and return it (None if it did not exist)."""
+
+    def _notify_evicted(self, evicted: List[Tuple[str, dict]]) -> None:
+        if not self.on_evict:
+            return
+        for session_id, session in evicted:
+            try:
+                self.on_evict(session_id, session)
+            except Exception as e:
+                print(f"[WARN] Session eviction hook failed for {session_id}: {e}")
+
+
+class MemorySessionStore(SessionStore):
+    """
+    In-process LRU + idle TTL.
+
+    The OrderedDict is kept in access order, so the least recently used
+    session is also the one idle the longest: expiry and capacity eviction
+    both only ever pop from the front.
+    """
+
+    def __init__(
+            self,
+            max_sessions: int,
+            ttl_seconds: float,
+            on_evict: Optional[EvictCallback] = None,
+    ):
+        super().__init__(ttl_seconds, on_evict)
+        self.max_sessions = max(1, max_sessions)
+        self._sessions: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict_locked(self, now: float) -> List[Tuple[str, dict]]:
+        evicted = []
+        while self._sessions:
+            session_id, (last_access, session) = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and now - last_access <= self.ttl_seconds:
+                break
+            self._sessions.popitem(last=False)
+            evicted.append((session_id, session))
+        return evicted
+
+    def load(self, session_id: str) -> Optional[dict]:
+        now = time.monotonic()
+        with self._lock:
+            evicted = self._evict_locked(now)
+            item = self._sessions.get(session_id)
+            if item is not None:
+                self._sessions[session_id] = (now, item[1])
+                self._sessions.move_to_end(session_id)
+        self._notify_evicted(evicted)
+
+        return item[1] if item is not None else None
+
+    def save(self, session_id: str, session: dict) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[session_id] = (now, session)
+            self._sessions.move_to_end(session_id)
+            evicted = self._evict_locked(now)
+        self._notify_evicted(evicted)
+
+    def delete(self, session_id: str) -> Optional[dict]:
+        with self._lock:
+            item = self._sessions.pop(session_id, None)
+        return item[1] if item else None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessions in a WAL-mode SQLite file.
+
+    WAL lets every worker read while one writes, so all uvicorn workers on a
+    host can share one file. Expired rows are claimed with a conditional
+    DELETE, so exactly one worker runs the cleanup hook for each of them.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            ttl_seconds: float,
+            on_evict: Optional[EvictCallback] = None,
+            sweep_interval: float = SWEEP_INTERVAL_SECONDS,
+    ):
+        super().__init__(ttl_seconds, on_evict)
+        self.path = path
+        self.sweep_interval = sweep_interval
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+
+        # Autocommit; each statement is its own short transaction
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chat_sessions ("
+            " session_id TEXT PRIMARY KEY,"
+            " data BLOB NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_chat_sessions_last_access ON chat_sessions(last_access)"
+        )
+
+    def load(self, session_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, last_access FROM chat_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        if time.time() - row[1] > self.ttl_seconds:
+            self._sweep(force=True)
+            return None
+        return loads_session(row[0])
+
+    def save(self, session_id: str, session: dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO chat_sessions (session_id, data, last_access) VALUES (?, ?, ?)"
+                " ON CONFLICT(session_id) DO UPDATE SET data = excluded.data, last_access = excluded.last_access",
+                (session_id, dumps_session(session), time.time()),
+            )
+        self._sweep()
+
+    def delete(self, session_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM chat_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            self._conn.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+        return loads_session(row[0]) if row else None
+
+    def _sweep(self, force: bool = False) -> None:
+        now = time.time()
+        if not force and now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        cutoff = now - self.ttl_seconds
+
+        evicted = []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT session_id, data FROM chat_sessions WHERE last_access < ?", (cutoff,)
+            ).fetchall()
+            for session_id, data in rows:
+                # Another worker may have swept or refreshed it in the meantime
+                claimed = self._conn.execute(
+                    "DELETE FROM chat_sessions WHERE session_id = ? AND last_access < ?",
+                    (session_id, cutoff),
+                ).rowcount
+                if claimed:
+                    evicted.append((session_id, loads_session(data)))
+        self._notify_evicted(evicted)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Sessions on a Redis-compatible server.
+
+    Each session is one string key; a sorted set (session_id → last save
+    time) drives expiry so the cleanup hook can still see the expired
+    session. ZREM is the claim: only the worker whose ZREM succeeds cleans up.
+    Keys also carry a generous native TTL as a backstop if nobody sweeps.
+    """
+
+    KEY_PREFIX = "documind:session:"
+    INDEX_KEY = "documind:sessions"
+
+    def __init__(
+            self,
+            url: str,
+            ttl_seconds: float,
+            on_evict: Optional[EvictCallback] = None,
+            sweep_interval: float = SWEEP_INTERVAL_SECONDS,
+    ):
+        super().__init__(ttl_seconds, on_evict)
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("SESSION_STORE_BACKEND=redis requires the `redis` package") from e
+
+        self._redis = redis.Redis.from_url(url)
+        self.sweep_interval = sweep_interval
+        self._last_sweep = 0.0
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.KEY_PREFIX}{session_id}"
+
+    def load(self, session_id: str) -> Optional[dict]:
+        pipe = self._redis.pipeline()
+        pipe.get(self._key(session_id))
+        pipe.zscore(self.INDEX_KEY, session_id)
+        blob, last_save = pipe.execute()
+        if not blob:
+            return None
+        # The native key TTL is only a backstop; the index score is the idle clock.
+        # No score means another worker already claimed it for cleanup.
+        if last_save is None or time.time() - float(last_save) > self.ttl_seconds:
+            self._sweep(force=True)
+            return None
+        return loads_session(blob)
+
+    def save(self, session_id: str, session: dict) -> None:
+        pipe = self._redis.pipeline()
+        pipe.set(self._key(session_id), dumps_session(session), ex=int(2 * self.ttl_seconds + self.sweep_interval))
+        pipe.zadd(self.INDEX_KEY, {session_id: time.time()})
+        pipe.execute()
+        self._sweep()
+
+    def delete(self, session_id: str) -> Optional[dict]:
+        pipe = self._redis.pipeline()
+        pipe.get(self._key(session_id))
+        pipe.delete(self._key(session_id))
+        pipe.zrem(self.INDEX_KEY, session_id)
+        blob, _, _ = pipe.execute()
+        return loads_session(blob) if blob else None
+
+    def _sweep(self, force: bool = False) -> None:
+        now = time.time()
+        if not force and now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+
+        evicted = []
+        for raw_id in self._redis.zrangebyscore(self.INDEX_KEY, "-inf", now - self.ttl_seconds):
+            session_id = raw_id.decode() if isinstance(raw_id, bytes) else raw_id
+            if not self._redis.zrem(self.INDEX_KEY, session_id):
+                continue
+            pipe = self._redis.pipeline()
+            pipe.get(self._key(session_id))
+            pipe.delete(self._key(session_id))
+            blob, _ = pipe.execute()
+            if blob:
+                evicted.append((session_id, loads_session(blob)))
+        self._notify_evicted(evicted)
+
+
+# ============================================================
+# MODULE API
+# ============================================================
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def _cleanup_evicted_session(session_id: str, session: dict) -> None:
+    """Delete an evicted session's temp uploads without blocking the request."""
+    def _run():
+        try:
+            cleanup_temp_assets(session)
+            print(f"[INFO] Session {session_id} expired; temp assets cleaned up")
+        except Exception as e:
+            print(f"[WARN] Temp asset cleanup failed for expired session {session_id}: {e}")
+
+    threading.Thread(target=_run, daemon=True).start()
+
+
+def _build_store() -> SessionStore:
+    backend = settings.SESSION_STORE_BACKEND
+    if backend == "sqlite":
+        return SQLiteSessionStore(
+            settings.SESSION_SQLITE_PATH,
+            ttl_seconds=settings.SESSION_TTL_SECONDS,
+            on_evict=_cleanup_evicted_session,
+        )
+    if backend == "redis":
+        return RedisSessionStore(
+            settings.SESSION_REDIS_URL,
+            ttl_seconds=settings.SESSION_TTL_SECONDS,
+            on_evict=_cleanup_evicted_session,
+        )
+    if backend != "memory":
+        print(f"[WARN] Unknown SESSION_STORE_BACKEND '{backend}', using memory")
+    return MemorySessionStore(
+        max_sessions=settings.SESSION_MAX_SESSIONS,
+        ttl_seconds=settings.SESSION_TTL_SECONDS,
+        on_evict=_cleanup_evicted_session,
+    )
+
+
+def get_session_store() -> SessionStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _build_store()
+                print(f"[INFO] Chat session store: {type(_store).__name__}")
+    return _store
+
+
+def reset_session_store(store: Optional[SessionStore] = None) -> None:
+    """Swap the process-wide store (tests) or force a rebuild from settings."""
+    global _store
+    with _store_lock:
+        _store = store
+
+
+def _new_session(owner_id: str) -> Dict:
+    return {
         "owner_id": owner_id,
         "history": [],
         "citations": [],
@@ -31,20 +401,53 @@ def get_session(
         }
     }
 
-    return session_id, _CHAT_SESSIONS[session_id]
+
+def get_session(
+        owner_id: str,
+        session_id: str | None,
+):
+    """
+    Retrieve an existing chat session or create a new one.
+
+    Unknown or expired session ids start a fresh session under the same id.
+
+    Returns a tuple of (session_id, session_dict) so callers can persist the ID.
+    Call save_session() after mutating the dict.
+    """
+    store = get_session_store()
+    if session_id:
+        session = store.load(session_id)
+        if session is not None:
+            return session_id, session
+
+    # New session requested → create fresh one
+    session_id = session_id or str(uuid.uuid4())
+    session = _new_session(owner_id)
+    store.save(session_id, session)
+
+    return session_id, session
+
+
+def load_session(session_id: str) -> Optional[Dict]:
+    """Read-only lookup (e.g. citation resolver); None if missing or expired."""
+    return get_session_store().load(session_id)
+
+
+def save_session(session_id: str, session: Dict) -> None:
+    """Persist a mutated session and refresh its idle TTL."""
+    get_session_store().save(session_id, session)
 
 
 def cleanup_session(session_id: str):
     """
-    Explicitly cleanup a session's temporary assets and remove from memory.
-    
+    Explicitly cleanup a session's temporary assets and remove it from the store.
+
     Called when user ends chat or starts a new conversation.
-    
+
     Args:
         session_id: Session ID to cleanup
     """
-    if session_id in _CHAT_SESSIONS:
-        session = _CHAT_SESSIONS[session_id]
+    session = get_session_store().delete(session_id)
+    if session is not None:
         cleanup_temp_assets(session)
-        del _CHAT_SESSIONS[session_id]
-        print(f"[INFO] Session {session_id} cleaned up and removed")
\ No newline at end of file
+        print(f"[INFO] Session {session_id} cleaned up and removed")
@@ -4,9 +4,17 @@ import tiktoken
 import hashlib
 import uuid
 
+from app.utils.tokens import BGE_M3_TOKENIZER, CL100K_TOKENIZER, get_chunk_tokenizer, get_encoding
+
 #PAGE_PATTERN =  re.compile(r"\[\PAGE (\d+)\]") # Too Rigid Regex Pattern
 PAGE_PATTERN = re.compile(r"\[\s*PAGE\s+(\d+)\s*\]", re.IGNORECASE)
 
+# Default window size / overlap in tokens (embedding model tokens, see
+# get_chunk_tokenizer). Retrieval-side neighbour stitching relies on these to
+# know how much text consecutive chunks share.
+CHUNK_SIZE = 600
+CHUNK_OVERLAP = 150
+
 
 ############################### Splitting text into pages ###########################
 def split_by_page(text:str) -> Dict[int, str]:
@@ -68,14 +76,23 @@ def split_by_page(text:str) -> Dict[int, str]:
 def chunk_page_text(
         page_text:str,
         page_number:int,
-        chunk_size:int = 600,
-        overlap:int = 150,
+        chunk_size:int = CHUNK_SIZE,
+        overlap:int = CHUNK_OVERLAP,
 )->List[Dict]:
     """
     Chunk a single page into token-aware chunks.
     Returns list of chunk dicts with metadata.
+
+    With the embedding model's fast tokenizer the page is tokenized once and
+    windows are cut with its offset mapping: chunk text is a slice of the
+    page (no decode) and each chunk carries the `token_ids` the embedder can
+    consume directly. Without it, cl100k windows are decoded back to text.
     """
-    enc =  tiktoken.get_encoding("cl100k_base") # this tell tiktoken kaunsa encoding use kare
+    tokenizer = get_chunk_tokenizer()
+    if tokenizer is not None:
+        return _chunk_with_offsets(tokenizer, page_text, page_number, chunk_size, overlap)
+
+    enc =  get_encoding() # cl100k_base, loaded once per process
     tokens = enc.encode(page_text) # text ko tokens me convert karo
 
     chunks = []
@@ -105,6 +122,7 @@ def chunk_page_text(
             "chunk_index": chunk_index,
             "text": chunk_text.strip(),
             "token_count": len(chunk_tokens),
+            "tokenizer": CL100K_TOKENIZER,
         })
 
         start +=chunk_size -overlap
@@ -115,12 +133,48 @@ def chunk_page_text(
 
 
 
+def _chunk_with_offsets(
+        tokenizer,
+        page_text:str,
+        page_number:int,
+        chunk_size:int,
+        overlap:int,
+)->List[Dict]:
+    encoding = tokenizer(
+        page_text,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        return_attention_mask=False,
+        verbose=False,  # pages are longer than the model's max length; windows are not
+    )
+    ids = encoding["input_ids"]
+    offsets = encoding["offset_mapping"]
+
+    chunks = []
+    start = 0
+    chunk_index = 0
+    while start < len(ids):
+        end = min(start + chunk_size, len(ids))
+        chunks.append({
+            "page": page_number,
+            "chunk_index": chunk_index,
+            "text": page_text[offsets[start][0]:offsets[end - 1][1]].strip(),
+            "token_count": end - start,
+            "tokenizer": BGE_M3_TOKENIZER,
+            "token_ids": ids[start:end],
+        })
+        start += chunk_size - overlap
+        chunk_index += 1
+
+    return chunks
+
+
 ############################## Makes Chunks of text in a full document ###########################
 
 def chunk_document(
         preprocessd_text:str,
-        chunk_size:int=600,
-        overlap:int=150
+        chunk_size:int=CHUNK_SIZE,
+        overlap:int=CHUNK_OVERLAP
 )->List[Dict]:
   """
     Split full document into page-aware chunks.
@@ -185,29 +239,58 @@ def build_chunks(
 )-> List[Dict]:
     chunks  = chunk_document(preprocessed_text) # pura document chunks me tod do and chunks is a list of dicts
 
-    final_chunks = []
-
-    for ch in chunks:
-        final_chunks.append({
-            "id": generate_chunk_id(
-                owner_id= owner_id, # New Change
-                filename= filename,
-                page= ch["page"],
-                chunk_index= ch["chunk_index"]
-            ),
-            "text": ch["text"],
-            "metadata":{
-                "owner_id": owner_id, # New Change
-                "filename": filename,
-                "page": ch["page"],
-                "chunk_index": ch["chunk_index"],
-                "token_count": ch["token_count"],
-                "source":"text",
-            },
-            
-        })
-
-    return final_chunks
-
+    return [_chunk_record(owner_id, filename, ch) for ch in chunks]
 
 
+def build_page_chunks(
+        owner_id:str,
+        filename:str,
+        page_number:int,
+        page_text:str,
+)-> List[Dict]:
+    """
+    build_chunks for a single page (streaming ingestion). Chunks never span
+    pages, so a document chunked page by page gives the same chunks and ids.
+    """
+    if not page_text.strip():
+        return []
+    chunks = chunk_page_text(page_text=page_text, page_number=page_number)
+    return [_chunk_record(owner_id, filename, ch) for ch in chunks]
+
+
+def content_hash(text:str)-> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunker_signature()-> str:
+    """Changes whenever the same text would be chunked differently."""
+    tokenizer = BGE_M3_TOKENIZER if get_chunk_tokenizer() is not None else CL100K_TOKENIZER
+    return f"{tokenizer}:{CHUNK_SIZE}:{CHUNK_OVERLAP}"
+
+
+def _chunk_record(owner_id:str, filename:str, ch:Dict)-> Dict:
+    record = {
+        "id": generate_chunk_id(
+            owner_id= owner_id, # New Change
+            filename= filename,
+            page= ch["page"],
+            chunk_index= ch["chunk_index"]
+        ),
+        "text": ch["text"],
+        "metadata":{
+            "owner_id": owner_id, # New Change
+            "filename": filename,
+            "page": ch["page"],
+            "chunk_index": ch["chunk_index"],
+            "token_count": ch["token_count"],
+            # Only cl100k counts can stand in for the LLM's tokens (context budget)
+            "token_count_tokenizer": ch["tokenizer"],
+            "source":"text",
+            # Re-uploads skip chunks whose text is unchanged (incremental re-indexing)
+            "content_hash": content_hash(ch["text"]),
+        },
+    }
+    if "token_ids" in ch:
+        # Embedding model token ids (not stored in Qdrant)
+        record["token_ids"] = ch["token_ids"]
+    return record
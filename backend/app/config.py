@@ -6,7 +6,30 @@ load_dotenv()
 class Settings:
     QDRANT_URL: str = os.getenv("QDRANT_URL")
     QDRANT_API_KEY: str = os.getenv("QDRANT_API_KEY")
+    # Vector store backend: server | memory | local
+    # - server: remote Qdrant at QDRANT_URL (default)
+    # - memory: qdrant-client in-process store, lost on restart (tests/benchmarks)
+    # - local:  qdrant-client embedded on-disk store at QDRANT_PATH (single-node installs)
+    QDRANT_MODE: str = os.getenv("QDRANT_MODE", "server").lower()
+    QDRANT_PATH: str = os.getenv("QDRANT_PATH", "./qdrant_data")
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY")
+    # Optional override of the Groq API host (self-hosted proxy, local fake server in tests)
+    GROQ_BASE_URL: str = os.getenv("GROQ_BASE_URL")
+
+    # ============================================================
+    # ASYNC LLM CLIENT (chat)
+    # ============================================================
+    # groq: AsyncGroq (GROQ_API_KEY / GROQ_BASE_URL)
+    # openai: any OpenAI-compatible endpoint at LLM_BASE_URL (e.g. http://localhost:8001/v1)
+    LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "groq").lower()
+    LLM_BASE_URL: str = os.getenv("LLM_BASE_URL")
+    LLM_API_KEY: str = os.getenv("LLM_API_KEY")
+    LLM_MODEL: str = os.getenv("LLM_MODEL", "llama-3.1-8b-instant")
+    # Per-call timeout (seconds)
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+    # Max in-flight LLM calls per worker; pooled keep-alive connections per worker
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+    LLM_MAX_CONNECTIONS: int = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
     ENV: str = os.getenv("ENV", "development")
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY")
     JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
@@ -33,6 +56,152 @@ class Settings:
     IMAGE_EMBEDDING_API_URL: str = os.getenv("IMAGE_EMBEDDING_API_URL")
     IMAGE_EMBEDDING_API_KEY: str = os.getenv("IMAGE_EMBEDDING_API_KEY")
 
+    # ============================================================
+    # RETRIEVAL DIVERSIFICATION (MMR)
+    # ============================================================
+    # Per-endpoint switches for Maximal Marginal Relevance on text retrieval
+    # (opt-in: enabling it changes the ranking existing deployments see).
+    # /api/search/text takes `use_mmr` in the request body instead.
+    CHAT_USE_MMR: bool = os.getenv("CHAT_USE_MMR", "false").lower() == "true"
+    ASK_USE_MMR: bool = os.getenv("ASK_USE_MMR", "false").lower() == "true"
+    # 1.0 = pure relevance, 0.0 = pure diversity (also mmr_select's default)
+    MMR_LAMBDA: float = float(os.getenv("MMR_LAMBDA", "0.6"))
+
+    # Neighbour-chunk expansion: pull ±N adjacent chunks of each text hit
+    # (single batched point lookup). 0 disables.
+    CHAT_NEIGHBOR_WINDOW: int = int(os.getenv("CHAT_NEIGHBOR_WINDOW", "0"))
+    ASK_NEIGHBOR_WINDOW: int = int(os.getenv("ASK_NEIGHBOR_WINDOW", "0"))
+
+    # ============================================================
+    # INTENT ROUTING (chat)
+    # ============================================================
+    # true: run only the retrievers the turn needs (see app/chat/intent.py)
+    # false: legacy fan-out to every retriever for every input present
+    INTENT_ROUTING_ENABLED: bool = os.getenv("INTENT_ROUTING_ENABLED", "true").lower() == "true"
+    # Embedding-prototype match: min cosine, and min lead over the "knowledge" prototypes
+    INTENT_PROTOTYPE_THRESHOLD: float = float(os.getenv("INTENT_PROTOTYPE_THRESHOLD", "0.75"))
+    INTENT_PROTOTYPE_MARGIN: float = float(os.getenv("INTENT_PROTOTYPE_MARGIN", "0.05"))
+
+    # ============================================================
+    # SPECULATIVE RETRIEVAL (chat)
+    # ============================================================
+    # Turns with typed text AND an upload: search the typed text while OCR /
+    # ASR are still running, then merge in the upload searches
+    SPECULATIVE_RETRIEVAL_ENABLED: bool = os.getenv("SPECULATIVE_RETRIEVAL_ENABLED", "true").lower() == "true"
+
+    # ============================================================
+    # MODALITY INVENTORY (chat)
+    # ============================================================
+    # Per-owner point counts per collection; the router skips collections an
+    # owner has never populated (see app/db/modality_inventory.py)
+    MODALITY_INVENTORY_ENABLED: bool = os.getenv("MODALITY_INVENTORY_ENABLED", "true").lower() == "true"
+    # Re-count from Qdrant after this long (picks up uploads handled by other workers)
+    MODALITY_INVENTORY_TTL_SECONDS: float = float(os.getenv("MODALITY_INVENTORY_TTL_SECONDS", "300"))
+
+    # ============================================================
+    # SEMANTIC QUERY CACHE (chat)
+    # ============================================================
+    # Reuse retrieval results of a near-duplicate earlier question (same owner,
+    # cosine >= threshold, corpus unchanged since it was cached).
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+    SEMANTIC_CACHE_TTL_SECONDS: float = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "600"))
+    SEMANTIC_CACHE_MAX_PER_OWNER: int = int(os.getenv("SEMANTIC_CACHE_MAX_PER_OWNER", "256"))
+    # Also reuse the cached answer (only for first turns, where history cannot change it)
+    SEMANTIC_CACHE_REUSE_ANSWER: bool = os.getenv("SEMANTIC_CACHE_REUSE_ANSWER", "false").lower() == "true"
+
+    # ============================================================
+    # FOLLOW-UP CONTEXT REUSE (chat)
+    # ============================================================
+    # Re-rank the previous turn's retrieval pool for a follow-up on the same
+    # topic instead of searching again (see app/chat/followup_pool.py)
+    FOLLOWUP_REUSE_ENABLED: bool = os.getenv("FOLLOWUP_REUSE_ENABLED", "true").lower() == "true"
+    # Min cosine between the follow-up and the pool's query
+    FOLLOWUP_REUSE_THRESHOLD: float = float(os.getenv("FOLLOWUP_REUSE_THRESHOLD", "0.8"))
+    # Fall back to fresh retrieval when the best re-ranked hit scores below this
+    FOLLOWUP_MIN_SCORE: float = float(os.getenv("FOLLOWUP_MIN_SCORE", "0.35"))
+    FOLLOWUP_MAX_REUSES: int = int(os.getenv("FOLLOWUP_MAX_REUSES", "3"))
+    FOLLOWUP_TTL_SECONDS: float = float(os.getenv("FOLLOWUP_TTL_SECONDS", "900"))
+    FOLLOWUP_MAX_SESSIONS: int = int(os.getenv("FOLLOWUP_MAX_SESSIONS", "2048"))
+
+    # ============================================================
+    # LLM COMPLETION CACHE
+    # ============================================================
+    # Exact-prompt cache (model + temperature + max tokens + prompt hash).
+    # Chat prompts are only cached on a session's first turn (empty history).
+    COMPLETION_CACHE_ENABLED: bool = os.getenv("COMPLETION_CACHE_ENABLED", "true").lower() == "true"
+    COMPLETION_CACHE_TTL_SECONDS: float = float(os.getenv("COMPLETION_CACHE_TTL_SECONDS", "3600"))
+    COMPLETION_CACHE_MAX_ENTRIES: int = int(os.getenv("COMPLETION_CACHE_MAX_ENTRIES", "1024"))
+
+    # ============================================================
+    # CHAT CONTEXT ASSEMBLY
+    # ============================================================
+    # Token budget (cl100k) for the retrieved context sent to the LLM
+    CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1000"))
+    CONTEXT_MAX_TOKENS_PER_SOURCE: int = int(os.getenv("CONTEXT_MAX_TOKENS_PER_SOURCE", "300"))
+    CONTEXT_MAX_SOURCES: int = int(os.getenv("CONTEXT_MAX_SOURCES", "8"))
+    # Drop a candidate when this share of its word 3-grams is already in the context
+    CONTEXT_DEDUP_THRESHOLD: float = float(os.getenv("CONTEXT_DEDUP_THRESHOLD", "0.8"))
+
+    # ============================================================
+    # CHAT HISTORY (rolling summary + recent turns)
+    # ============================================================
+    # Raw messages kept verbatim; older ones are folded into a rolling summary
+    HISTORY_RECENT_MESSAGES: int = int(os.getenv("HISTORY_RECENT_MESSAGES", "4"))
+    # Token caps (cl100k) for the whole history section and for one message in it
+    HISTORY_TOKEN_BUDGET: int = int(os.getenv("HISTORY_TOKEN_BUDGET", "600"))
+    HISTORY_MESSAGE_MAX_TOKENS: int = int(os.getenv("HISTORY_MESSAGE_MAX_TOKENS", "200"))
+    # Background LLM refresh of the summary after each turn
+    HISTORY_SUMMARY_ENABLED: bool = os.getenv("HISTORY_SUMMARY_ENABLED", "true").lower() == "true"
+    HISTORY_SUMMARY_MAX_TOKENS: int = int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", "200"))
+
+    # ============================================================
+    # CHAT SESSION STORE
+    # ============================================================
+    # memory: per-process LRU (single worker only)
+    # sqlite: WAL-mode file shared by all workers on one host
+    # redis: any Redis-compatible server at SESSION_REDIS_URL (needs `redis`)
+    SESSION_STORE_BACKEND: str = os.getenv("SESSION_STORE_BACKEND", "memory").lower()
+    # Idle time after which a session expires and its temp assets are deleted
+    SESSION_TTL_SECONDS: float = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+    # memory backend only: least-recently-used sessions beyond this are evicted
+    SESSION_MAX_SESSIONS: int = int(os.getenv("SESSION_MAX_SESSIONS", "1000"))
+    SESSION_SQLITE_PATH: str = os.getenv("SESSION_SQLITE_PATH", "./chat_sessions.db")
+    SESSION_REDIS_URL: str = os.getenv("SESSION_REDIS_URL", "redis://localhost:6379/0")
+
+    # ============================================================
+    # INGESTION JOBS
+    # ============================================================
+    # true: upload endpoints enqueue a job and return its id (poll /api/jobs/{id});
+    # false: documents are indexed inside the request, audio via BackgroundTasks
+    JOBS_ENABLED: bool = os.getenv("JOBS_ENABLED", "true").lower() == "true"
+    # WAL-mode SQLite queue shared by every worker on the host
+    JOB_QUEUE_SQLITE_PATH: str = os.getenv("JOB_QUEUE_SQLITE_PATH", "./ingestion_jobs.db")
+    # Uploads are parked here until their job has finished
+    JOB_FILES_DIR: str = os.getenv("JOB_FILES_DIR", "./job_files")
+    # Worker threads per process, and per-stage limits within them
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_STAGE_CONCURRENCY: str = os.getenv("JOB_STAGE_CONCURRENCY", "extract=2,chunk=2,embed=1,upsert=2,transcribe=1")
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    # Retry backoff: base * 2^(attempt-1) seconds
+    JOB_RETRY_BASE_SECONDS: float = float(os.getenv("JOB_RETRY_BASE_SECONDS", "5"))
+    # A running job whose worker stops renewing its lease this long is claimed again
+    JOB_LEASE_SECONDS: float = float(os.getenv("JOB_LEASE_SECONDS", "600"))
+    JOB_POLL_INTERVAL_SECONDS: float = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1"))
+    # Chunks embedded + upserted per batch (progress is reported per batch)
+    JOB_EMBED_BATCH_SIZE: int = int(os.getenv("JOB_EMBED_BATCH_SIZE", "64"))
+    # Chunk batches extracted ahead of the embedder (bounds ingestion memory)
+    INGEST_QUEUE_BATCHES: int = int(os.getenv("INGEST_QUEUE_BATCHES", "2"))
+    # PDF text extraction processes (0 = min(4, CPU count), 1 = in-process)
+    PDF_EXTRACT_WORKERS: int = int(os.getenv("PDF_EXTRACT_WORKERS", "0"))
+    # Smaller PDFs are extracted in-process (process start-up is not worth it)
+    PDF_PARALLEL_MIN_PAGES: int = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "64"))
+    # Pages per task sent to an extraction process
+    PDF_EXTRACT_RANGE_PAGES: int = int(os.getenv("PDF_EXTRACT_RANGE_PAGES", "25"))
+    # Chunk window tokenizer: bge-m3 (embedding model's, falls back to
+    # cl100k when transformers / the tokenizer files are missing) | cl100k
+    CHUNK_TOKENIZER: str = os.getenv("CHUNK_TOKENIZER", "bge-m3")
+
     # ============================================================
     # LOGGING FLAGS (for demo debugging)
     # ============================================================
@@ -45,6 +214,28 @@ class Settings:
     # Enable latency profiling (how long each step took)
     LOG_LATENCY: bool = os.getenv("LOG_LATENCY", "false").lower() == "true"
 
+    # ============================================================
+    # REQUEST DEADLINES (chat)
+    # ============================================================
+    # End-to-end budget per turn (overridable per request with X-Request-Timeout,
+    # up to DEADLINE_MAX_SECONDS); stages that run out are listed in degraded_stages
+    CHAT_DEADLINE_SECONDS: float = float(os.getenv("CHAT_DEADLINE_SECONDS", "25"))
+    CHAT_STREAM_DEADLINE_SECONDS: float = float(os.getenv("CHAT_STREAM_DEADLINE_SECONDS", "30"))
+    DEADLINE_MAX_SECONDS: float = float(os.getenv("DEADLINE_MAX_SECONDS", "60"))
+    # Time retrieval leaves for the LLM call; below DEADLINE_MIN_LLM_SECONDS the LLM is skipped
+    DEADLINE_LLM_RESERVE_SECONDS: float = float(os.getenv("DEADLINE_LLM_RESERVE_SECONDS", "8"))
+    DEADLINE_MIN_LLM_SECONDS: float = float(os.getenv("DEADLINE_MIN_LLM_SECONDS", "2"))
+    # Download timeout when ASR has to fetch an uploaded file by URL
+    MEDIA_DOWNLOAD_TIMEOUT_SECONDS: float = float(os.getenv("MEDIA_DOWNLOAD_TIMEOUT_SECONDS", "20"))
+
+    # ============================================================
+    # METRICS (Prometheus)
+    # ============================================================
+    # Per-stage / per-retriever / model latency histograms, cache counters and
+    # in-flight gauges (see app/utils/metrics.py); false makes every update a no-op
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_PATH: str = os.getenv("METRICS_PATH", "/metrics")
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,25 @@
+"""
+Per-owner corpus version counter.
+
+Indexers bump the owner's version after every successful upsert; caches
+that hold retrieval results (e.g. the semantic query cache) store the
+version they were computed against and treat a mismatch as a miss.
+
+Versions live in process memory: with several workers, a cache on another
+worker only notices new documents once its entries expire (TTL).
+"""
+
+import threading
+
+_versions: dict[str, int] = {}
+_lock = threading.Lock()
+
+
+def get_corpus_version(owner_id: str) -> int:
+    return _versions.get(owner_id, 0)
+
+
+def bump_corpus_version(owner_id: str) -> int:
+    with _lock:
+        _versions[owner_id] = _versions.get(owner_id, 0) + 1
+        return _versions[owner_id]
@@ -0,0 +1,137 @@
+"""
+Per-owner modality inventory: point counts per collection and source.
+
+The router asks which collections an owner has ever populated and skips the
+rest, so a PDF-only owner never pays for image/audio searches (or the CLIP
+text encoding behind text→image).
+
+Counts are loaded from Qdrant on first use (count + facet on "source"),
+cached in process memory and kept current by the indexers via
+record_points(). Like corpus_version, the cache is per worker: an upload
+handled by another worker is picked up when the entry expires
+(MODALITY_INVENTORY_TTL_SECONDS). Deleting points should call
+invalidate_inventory().
+"""
+
+import threading
+import time
+from typing import Dict, Optional, Set
+
+from qdrant_client.models import Filter, FieldCondition, MatchValue
+
+from app.config import settings
+from app.db.corpus_version import get_corpus_version
+from app.db.qdrant_client import get_qdrant_client
+
+TEXT_COLLECTION = "text_collection"
+IMAGE_COLLECTION = "image_collection"
+AUDIO_COLLECTION = "audio_collection"
+COLLECTIONS = (TEXT_COLLECTION, IMAGE_COLLECTION, AUDIO_COLLECTION)
+
+# Source bucket for points counted before their source was known (no facet support)
+UNATTRIBUTED = "*"
+
+# owner_id -> {"counts": {collection: {source: n}}, "loaded_at": monotonic seconds}
+_inventory: Dict[str, Dict] = {}
+_lock = threading.Lock()
+
+
+def _owner_filter(owner_id: str) -> Filter:
+    return Filter(must=[FieldCondition(key="owner_id", match=MatchValue(value=owner_id))])
+
+
+def _count_collection(client, collection: str, owner_id: str) -> Dict[str, int]:
+    owner_filter = _owner_filter(owner_id)
+    total = client.count(collection_name=collection, count_filter=owner_filter, exact=True).count
+    if not total:
+        return {}
+
+    try:
+        hits = client.facet(
+            collection_name=collection,
+            key="source",
+            facet_filter=owner_filter,
+            exact=True,
+        ).hits
+        by_source = {str(h.value): h.count for h in hits}
+    except Exception:
+        # Older client/server, or no payload index on "source"
+        by_source = {}
+
+    unattributed = total - sum(by_source.values())  # points without a "source"
+    if unattributed > 0:
+        by_source[UNATTRIBUTED] = unattributed
+    return by_source
+
+
+def _load(owner_id: str) -> Optional[Dict[str, Dict[str, int]]]:
+    client = get_qdrant_client()
+    counts = {}
+    for collection in COLLECTIONS:
+        try:
+            counts[collection] = _count_collection(client, collection, owner_id)
+        except Exception as e:
+            # Unknown ≠ empty: don't cache, let the router search as before
+            print(f"[WARN] Modality inventory count failed ({collection}, {owner_id}): {e}")
+            return None
+    return counts
+
+
+def get_modality_inventory(owner_id: str) -> Optional[Dict[str, Dict[str, int]]]:
+    """
+    {collection: {source: point_count}} for an owner, or None if Qdrant
+    could not be counted (callers should then assume everything exists).
+    """
+    now = time.monotonic()
+    entry = _inventory.get(owner_id)
+    if entry is not None and now - entry["loaded_at"] <= settings.MODALITY_INVENTORY_TTL_SECONDS:
+        return entry["counts"]
+
+    version = get_corpus_version(owner_id)
+    counts = _load(owner_id)
+    if counts is None:
+        return None
+    with _lock:
+        # An upsert landing mid-count may be missing from `counts` (its
+        # record_points saw no entry); use the result but don't cache it
+        if get_corpus_version(owner_id) == version:
+            _inventory[owner_id] = {"counts": counts, "loaded_at": now}
+    return counts
+
+
+def available_collections(owner_id: str) -> Set[str]:
+    """Collections holding at least one of the owner's points (all if unknown)."""
+    if not settings.MODALITY_INVENTORY_ENABLED:
+        return set(COLLECTIONS)
+    counts = get_modality_inventory(owner_id)
+    if counts is None:
+        return set(COLLECTIONS)
+    return {collection for collection, by_source in counts.items() if sum(by_source.values()) > 0}
+
+
+def record_points(owner_id: str, collection: str, source: Optional[str], count: int = 1) -> None:
+    """
+    Called by indexers after a successful upsert.
+
+    Owners not loaded yet are left alone: their first lookup counts from
+    Qdrant, which already includes these points. Re-upserting existing ids
+    overcounts; routing only looks at zero vs non-zero.
+    """
+    if not count:
+        return
+    with _lock:
+        entry = _inventory.get(owner_id)
+        if entry is None:
+            return
+        by_source = entry["counts"].setdefault(collection, {})
+        key = source or UNATTRIBUTED
+        by_source[key] = by_source.get(key, 0) + count
+
+
+def invalidate_inventory(owner_id: Optional[str] = None) -> None:
+    """Drop cached counts for one owner (or everyone); next lookup re-counts."""
+    with _lock:
+        if owner_id is None:
+            _inventory.clear()
+        else:
+            _inventory.pop(owner_id, None)
@@ -1,10 +1,49 @@
+import threading
 from qdrant_client import QdrantClient
 from app.config import settings
 
+# Embedded stores (memory / on-disk) must be shared: every new ":memory:"
+# client is an empty store, and an on-disk path can only be opened once.
+_embedded_client: QdrantClient | None = None
+_embedded_lock = threading.Lock()
+
+
+def _create_embedded_client(mode: str) -> QdrantClient:
+    if mode == "memory":
+        return QdrantClient(location=":memory:")
+    if mode == "local":
+        return QdrantClient(path=settings.QDRANT_PATH)
+    raise ValueError(f"Unsupported QDRANT_MODE: {mode}. Use server | memory | local")
+
+
 def get_qdrant_client() -> QdrantClient:
-    client = QdrantClient(
-        url=settings.QDRANT_URL,
-        api_key = settings.QDRANT_API_KEY
-    )
+    mode = settings.QDRANT_MODE
+
+    if mode == "server":
+        client = QdrantClient(
+            url=settings.QDRANT_URL,
+            api_key = settings.QDRANT_API_KEY
+        )
+        return client
+
+    global _embedded_client
+    if _embedded_client is None:
+        with _embedded_lock:
+            if _embedded_client is None:
+                _embedded_client = _create_embedded_client(mode)
+    return _embedded_client
+
 
-    return client
\ No newline at end of file
+def reset_qdrant_client():
+    """
+    Close and drop the shared embedded client.
+    Used by tests / benchmarks to start from an empty store or switch QDRANT_MODE.
+    """
+    global _embedded_client
+    with _embedded_lock:
+        if _embedded_client is not None:
+            try:
+                _embedded_client.close()
+            except Exception:
+                pass
+        _embedded_client = None
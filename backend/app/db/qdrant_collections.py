@@ -34,6 +34,14 @@ def create_collections():
             field_name = "owner_id",
             field_schema = PayloadSchemaType.KEYWORD,
         )
+
+    # Filename index for per-document lookups / filtered deletes (incremental
+    # re-indexing); idempotent, so collections created before it get it too
+    client.create_payload_index(
+        collection_name="text_collection",
+        field_name="filename",
+        field_schema=PayloadSchemaType.KEYWORD,
+    )
     
     if "image_collection" not in existing:
         # Named vectors to separate modalities and avoid dimension conflicts:
@@ -7,6 +7,7 @@ Replaces the previous HuggingFace API-based implementation.
 import os
 import math
 from typing import List
+import torch
 from sentence_transformers import SentenceTransformer
 from app.embeddings.base import EmbeddingModel
 from app.config import settings
@@ -80,6 +81,47 @@ class HFBgeM3Embedder(EmbeddingModel):
         # Convert to list of lists if needed
         return [emb.tolist() if hasattr(emb, 'tolist') else emb for emb in embeddings]
     
+    def embed_token_ids(self, token_ids: List[List[int]], batch_size: int = 32) -> List[List[float]]:
+        """
+        Embed chunks that are already tokenized (chunker with the BGE-m3
+        tokenizer, see app.utils.tokens.get_chunk_tokenizer), skipping the
+        tokenizer pass of encode().
+        
+        Args:
+            token_ids: Token ids per chunk, without special tokens
+            batch_size: Chunks per forward pass
+            
+        Returns:
+            List of normalized embedding vectors, in input order
+        """
+        if not token_ids:
+            return []
+        
+        tokenizer = self.model.tokenizer
+        max_ids = self.model.max_seq_length - 2  # room for <s> ... </s>
+        vectors: List[List[float]] = [None] * len(token_ids)
+        
+        # Similar lengths per batch keep padding small (like encode() does)
+        order = sorted(range(len(token_ids)), key=lambda i: len(token_ids[i]))
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            sequences = [tokenizer.build_inputs_with_special_tokens(list(token_ids[i][:max_ids])) for i in batch]
+            width = max(len(seq) for seq in sequences)
+            input_ids = torch.full((len(sequences), width), tokenizer.pad_token_id, dtype=torch.long)
+            attention_mask = torch.zeros((len(sequences), width), dtype=torch.long)
+            for row, seq in enumerate(sequences):
+                input_ids[row, :len(seq)] = torch.tensor(seq, dtype=torch.long)
+                attention_mask[row, :len(seq)] = 1
+            
+            features = {"input_ids": input_ids.to(self.device), "attention_mask": attention_mask.to(self.device)}
+            with torch.inference_mode():
+                embeddings = self.model(features)["sentence_embedding"]
+            embeddings = torch.nn.functional.normalize(embeddings, p=2, dim=1).cpu().tolist()
+            for i, embedding in zip(batch, embeddings):
+                vectors[i] = embedding
+        
+        return vectors
+    
     def embed_query(self, text: str) -> List[float]:
         """
         Generate embedding for a single query.
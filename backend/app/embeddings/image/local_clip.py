@@ -27,11 +27,16 @@ def _load():
             )
         _model.eval()
     
-def embed_image_local(image_url:str)-> list[float]:
-    """Fetch an image, process it with local CLIP model, and return image embedding."""
+def embed_image_local(image_url: str | None, image_bytes: bytes | None = None)-> list[float]:
+    """
+    Process an image with the local CLIP model and return its embedding.
+    Uses `image_bytes` when the caller already has them, otherwise fetches `image_url`.
+    """
     _load()
     
-    image = Image.open(BytesIO(requests.get(image_url, timeout=20).content)).convert("RGB")
+    if image_bytes is None:
+        image_bytes = requests.get(image_url, timeout=20).content
+    image = Image.open(BytesIO(image_bytes)).convert("RGB")
     
                 #     requests.get(image_url, timeout=20) → downloads image
 
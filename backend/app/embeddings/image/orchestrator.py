@@ -3,6 +3,7 @@ from app.embeddings.image.local_clip import embed_image_local
 from app.embeddings.image.remote_clip import embed_image_remote
 from app.ocr.google_vision import extract_text_from_image
 from app.embeddings.hf_bge_m3 import HFBgeM3Embedder
+from app.utils.metrics import MODEL_SECONDS, timed
 
 # Initialize text embedder
 _text_embedder = None
@@ -13,8 +14,16 @@ def _get_text_embedder():
         _text_embedder = HFBgeM3Embedder()
     return _text_embedder
 
-def embed_image(image_url: str) -> dict:
+def requires_image_url() -> bool:
+    """Remote CLIP embeds by URL, so the upload must finish before embed_image runs."""
+    return settings.IMAGE_EMBEDDING_MODE in ("auto", "remote") and bool(settings.IMAGE_EMBEDDING_API_URL)
+
+
+def embed_image(image_url: str | None, image_bytes: bytes | None = None) -> dict:
     """
+    `image_bytes` (the uploaded file, when available) is used for OCR and
+    local CLIP instead of downloading `image_url` again.
+
     Returns:
     {
       vector: List[float],
@@ -31,14 +40,16 @@ def embed_image(image_url: str) -> dict:
     # compute an embedding purely from OCR-extracted text. This avoids any
     # model downloads and can be useful in constrained environments.
     if mode == "ocr":
-        ocr_blocks = extract_text_from_image(image_url)  # list of {text, bounding_box}
+        with timed(MODEL_SECONDS, model="ocr", backend="google_vision"):
+            ocr_blocks = extract_text_from_image(image_url, image_bytes)  # list of {text, bounding_box}
         text_content = " ".join([
             block.get("text", "") 
             for block in ocr_blocks 
             if isinstance(block, dict)])
         
         text_embedder = _get_text_embedder()
-        vec = text_embedder.embed_query(text_content)
+        with timed(MODEL_SECONDS, model="bge_m3", backend="local"):
+            vec = text_embedder.embed_query(text_content)
         return {
             "vector": vec,
             "source": "ocr",
@@ -49,13 +60,15 @@ def embed_image(image_url: str) -> dict:
 
     # Extract OCR once and reuse for all branches to avoid repeated calls
     # This provides searchable text alongside visual embeddings
-    ocr_blocks = extract_text_from_image(image_url)  # list of {text, bounding_box}
+    with timed(MODEL_SECONDS, model="ocr", backend="google_vision"):
+        ocr_blocks = extract_text_from_image(image_url, image_bytes)  # list of {text, bounding_box}
     ocr_text = " ".join([block.get("text", "") for block in ocr_blocks if isinstance(block, dict)])
 
     # ---------- REMOTE ----------
-    if mode in ("auto", "remote"):
+    if mode in ("auto", "remote") and image_url:
         try:
-            vec = embed_image_remote(image_url)
+            with timed(MODEL_SECONDS, model="clip", backend="remote"):
+                vec = embed_image_remote(image_url)
             if vec:
                 return {
                     "vector": vec,
@@ -70,7 +83,8 @@ def embed_image(image_url: str) -> dict:
     # ---------- LOCAL ----------
     if mode in ("auto", "local"):
         try:
-            vec = embed_image_local(image_url)
+            with timed(MODEL_SECONDS, model="clip", backend="local"):
+                vec = embed_image_local(image_url, image_bytes)
             return {
                 "vector": vec,
                 "source": "local",
@@ -86,7 +100,8 @@ def embed_image(image_url: str) -> dict:
     text_content = ocr_text
     
     text_embedder = _get_text_embedder()
-    vec = text_embedder.embed_query(text_content)
+    with timed(MODEL_SECONDS, model="bge_m3", backend="local"):
+        vec = text_embedder.embed_query(text_content)
 
     return {
         "vector": vec,
@@ -0,0 +1,142 @@
+"""
+Local fake of Groq's OpenAI-compatible chat completions endpoint.
+
+Serves POST .../chat/completions on 127.0.0.1 (Groq's /openai/v1 prefix as
+well as plain OpenAI-style /v1) with a fixed answer generated at a fixed
+per-token delay, so LLM latency (time-to-first-token vs full generation) and
+concurrency can be measured without network access or an API key.
+
+    with FakeLLMServer(token_delay=0.05) as server:
+        settings.GROQ_BASE_URL = server.base_url
+        ...
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # default backlog of 5 drops bursts of concurrent calls
+
+DEFAULT_ANSWER = (
+    "Photosynthesis converts sunlight, water and carbon dioxide into glucose "
+    "and oxygen inside the chloroplasts of the leaf [1]."
+)
+
+
+def _tokens(text: str) -> List[str]:
+    words = text.split(" ")
+    return [w + " " for w in words[:-1]] + [words[-1]]
+
+
+class FakeLLMServer:
+    def __init__(self, answer: str = DEFAULT_ANSWER, token_delay: float = 0.05):
+        self.answer = answer
+        self.token_delay = token_delay
+        self.requests: List[dict] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                if not self.path.endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                with server._lock:
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    self._complete()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client gave up (timeout test, cancelled stream)
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+            def _complete(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                server.requests.append(body)
+                model = body.get("model", "fake-model")
+                tokens = _tokens(server.answer)
+
+                if body.get("stream"):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.end_headers()
+                    for i, token in enumerate(tokens):
+                        time.sleep(server.token_delay)
+                        chunk = {
+                            "id": "chatcmpl-fake",
+                            "object": "chat.completion.chunk",
+                            "created": int(time.time()),
+                            "model": model,
+                            "choices": [{
+                                "index": 0,
+                                "delta": {"role": "assistant", "content": token} if i == 0 else {"content": token},
+                                "finish_reason": None,
+                            }],
+                        }
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                        self.wfile.flush()
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                    return
+
+                # Blocking completion: the whole generation time before the first byte
+                time.sleep(server.token_delay * len(tokens))
+                payload = json.dumps({
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": server.answer},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+    def start(self) -> "FakeLLMServer":
+        self._httpd = _Server(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self) -> "FakeLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
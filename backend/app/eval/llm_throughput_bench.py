@@ -0,0 +1,105 @@
+"""
+Concurrent chat throughput per worker: sync vs async LLM client.
+
+Runs N chat-turn LLM calls concurrently on ONE event loop (= one uvicorn
+worker) against the local fake LLM server:
+- sync:  call_llm (sync Groq client) awaited inline, as run_chat_turn did
+- async: call_llm_async (pooled AsyncLLMClient)
+
+Reports wall time, turns/s, p50/p95 turn latency and the worst event-loop
+stall seen by a 10 ms heartbeat task.
+
+Usage (from backend/):
+    python -m app.eval.llm_throughput_bench
+    python -m app.eval.llm_throughput_bench --concurrency 32 --token-delay 0.02
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict
+
+from app.config import settings
+from app.eval.fake_llm_server import FakeLLMServer
+from app.eval.retrieval_eval import _percentile
+
+QUESTION = "Explain how photosynthesis works"
+CONTEXT = "[SOURCE 1 | TEXT]\nPhotosynthesis happens in chloroplasts."
+
+
+async def _heartbeat(stop: asyncio.Event, interval: float = 0.01) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def _run(mode: str, concurrency: int) -> Dict:
+    from app.llm.groq_client import call_llm
+    from app.llm.async_client import call_llm_async, close_async_llm_client
+
+    async def turn() -> float:
+        start = time.perf_counter()
+        if mode == "sync":
+            call_llm(QUESTION, CONTEXT, history=[])
+        else:
+            await call_llm_async(QUESTION, CONTEXT, history=[])
+        return time.perf_counter() - start
+
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(stop))
+    await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(turn() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+
+    stop.set()
+    worst_stall = await heartbeat
+    await close_async_llm_client()
+
+    return {
+        "turns": concurrency,
+        "wall_s": round(wall, 3),
+        "turns_per_s": round(concurrency / wall, 2),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+        "max_loop_stall_ms": round(worst_stall * 1000, 1),
+    }
+
+
+def run_benchmark(concurrency: int = 16, token_delay: float = 0.02) -> Dict[str, Dict]:
+    from app.llm import groq_client
+
+    with FakeLLMServer(token_delay=token_delay) as server:
+        settings.GROQ_BASE_URL = server.base_url
+        settings.GROQ_API_KEY = settings.GROQ_API_KEY or "fake-key"
+        settings.LLM_PROVIDER = "groq"
+        groq_client._client = None
+
+        report = {
+            "sync": asyncio.run(_run("sync", concurrency)),
+            "async": asyncio.run(_run("async", concurrency)),
+        }
+        report["async"]["server_max_in_flight"] = server.max_in_flight
+
+    groq_client._client = None
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent chat LLM throughput per worker")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--token-delay", type=float, default=0.02, help="Fake LLM seconds per token")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.concurrency, args.token_delay)
+    for mode, metrics in report.items():
+        cells = "  ".join(f"{k}={v}" for k, v in metrics.items())
+        print(f"{mode:<6} {cells}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+PDF text extraction: in-process vs process pool.
+
+Generates a large text PDF (default 1,000 dense pages) and extracts it with
+iter_pdf_pages twice:
+- serial:   workers=1, pages extracted one by one in this process
+- parallel: page ranges spread over the extraction process pool
+
+Checks both produce the same pages in the same order and reports wall time,
+pages/s, p50/p95/max per-page extraction time and the speed-up. The first
+parallel run pays for spawning the pool; it is warmed up before timing.
+
+Usage (from backend/):
+    python -m app.eval.pdf_extract_bench
+    python -m app.eval.pdf_extract_bench --pages 2000 --workers 8 --range-pages 50
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+import fitz  # PyMuPDF
+
+from app.config import settings
+from app.eval.retrieval_eval import _percentile
+from app.ingestion.text_ingest import iter_pdf_pages, shutdown_pdf_pool
+
+PARAGRAPH = (
+    "Photosynthesis converts light energy into chemical energy. Chlorophyll in the "
+    "thylakoid membranes absorbs red and blue light, and the Calvin cycle in the "
+    "stroma fixes carbon dioxide into three-carbon sugars. "
+)
+
+
+def generate_pdf(path: Path, pages: int) -> Path:
+    """A `pages`-page PDF with two columns of small text and a running header per page."""
+    doc = fitz.open()
+    for n in range(1, pages + 1):
+        page = doc.new_page()
+        page.insert_text((72, 40), f"Plant Biology Manual  |  page {n}", fontsize=8)
+        body = f"Section {n}. " + PARAGRAPH * 6
+        page.insert_textbox(fitz.Rect(40, 60, 300, 800), body, fontsize=6)
+        page.insert_textbox(fitz.Rect(310, 60, 570, 800), body, fontsize=6)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def _run(path: Path, workers: int) -> Dict:
+    page_seconds: Dict[int, float] = {}
+    start = time.perf_counter()
+    pages = list(iter_pdf_pages(path, workers=workers, page_seconds=page_seconds))
+    wall = time.perf_counter() - start
+    per_page = list(page_seconds.values())
+    return {
+        "pages": len(pages),
+        "wall_s": round(wall, 3),
+        "pages_per_s": round(len(pages) / wall, 1),
+        "page_p50_ms": round(_percentile(per_page, 50) * 1000, 2),
+        "page_p95_ms": round(_percentile(per_page, 95) * 1000, 2),
+        "page_max_ms": round(max(per_page) * 1000, 2),
+        "_pages": pages,
+    }
+
+
+def run_benchmark(pages: int = 1000, workers: int = 0, range_pages: int = 25) -> Dict[str, Dict]:
+    workers = workers or min(4, os.cpu_count() or 1)
+    settings.PDF_EXTRACT_WORKERS = workers
+    settings.PDF_EXTRACT_RANGE_PAGES = range_pages
+    settings.PDF_PARALLEL_MIN_PAGES = 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = generate_pdf(Path(tmp) / "manual.pdf", pages)
+        size_mb = round(path.stat().st_size / 1024 / 1024, 1)
+
+        serial = _run(path, workers=1)
+        if workers > 1:
+            list(iter_pdf_pages(path, workers=workers))  # spawn + warm up the pool
+        parallel = _run(path, workers=workers)
+        shutdown_pdf_pool()
+
+    if serial.pop("_pages") != parallel.pop("_pages"):
+        raise AssertionError("parallel extraction returned different pages than serial")
+    parallel["workers"] = workers
+    parallel["speedup"] = round(serial["wall_s"] / parallel["wall_s"], 2)
+    return {"pdf": {"pages": pages, "size_mb": size_mb, "cpus": os.cpu_count()}, "serial": serial, "parallel": parallel}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF text extraction: serial vs process pool")
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=0, help="Extraction processes (0 = min(4, CPUs))")
+    parser.add_argument("--range-pages", type=int, default=25, help="Pages per task")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.pages, args.workers, args.range_pages)
+    for mode, metrics in report.items():
+        cells = "  ".join(f"{k}={v}" for k, v in metrics.items())
+        print(f"{mode:<8} {cells}")
+
+
+if __name__ == "__main__":
+    main()
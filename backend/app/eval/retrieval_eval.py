@@ -0,0 +1,308 @@
+"""
+Offline retrieval quality + latency evaluation.
+
+Seeds an in-memory vector store with the synthetic labelled corpus
+(app/eval/synthetic_corpus.py), runs the labelled queries through each
+retriever under several configurations of the hand-tuned constants, and
+reports recall@k, MRR, nDCG@k and p50/p95 latency per configuration.
+
+Usage (from backend/):
+    python -m app.eval.retrieval_eval
+    python -m app.eval.retrieval_eval --top-k 10 --json eval_report.json
+    python -m app.eval.retrieval_eval --embedder bge   # real BGE-M3 instead of hashing
+
+Relevance is topic-level: an item is relevant to a query when it was generated
+from the query's topic. Recall is capped at k (|relevant ∩ top-k| / min(k, |relevant|))
+because every topic has more relevant chunks than a single top-k can hold.
+
+Note: RRF_K is not swept — the active hybrid path rescores prefetch
+candidates with the dense query and never calls _reciprocal_rank_fusion.
+"""
+
+import argparse
+import importlib
+import json
+import math
+import statistics
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+from app.config import settings
+from app.db.qdrant_client import reset_qdrant_client
+from app.db.qdrant_collections import create_collections, IMAGE_VECTOR_SIZE
+from app.eval.synthetic_corpus import HashingEmbedder, generate_corpus, seed_synthetic_corpus
+
+EVAL_OWNER_ID = "eval-owner"
+
+
+# ============================================================
+# METRICS
+# ============================================================
+
+def recall_at_k(ranked: List[bool], num_relevant: int, k: int) -> float:
+    if num_relevant == 0:
+        return 0.0
+    return sum(ranked[:k]) / min(k, num_relevant)
+
+
+def reciprocal_rank(ranked: List[bool]) -> float:
+    for i, rel in enumerate(ranked, start=1):
+        if rel:
+            return 1.0 / i
+    return 0.0
+
+
+def ndcg_at_k(ranked: List[bool], num_relevant: int, k: int) -> float:
+    dcg = sum(1.0 / math.log2(i + 2) for i, rel in enumerate(ranked[:k]) if rel)
+    ideal = sum(1.0 / math.log2(i + 2) for i in range(min(k, num_relevant)))
+    return dcg / ideal if ideal else 0.0
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+# ============================================================
+# CONFIG OVERRIDES
+# ============================================================
+
+@contextmanager
+def _overrides(values: Dict[str, object]):
+    """Temporarily set module attributes, e.g. {"app.retrieval.text_retriever.MIN_SCORE_LONG": 0.3}"""
+    saved = []
+    try:
+        for dotted, value in values.items():
+            module_name, attr = dotted.rsplit(".", 1)
+            module = importlib.import_module(module_name)
+            saved.append((module, attr, getattr(module, attr)))
+            setattr(module, attr, value)
+        yield
+    finally:
+        for module, attr, value in reversed(saved):
+            setattr(module, attr, value)
+
+
+# Each configuration: name, module overrides, extra retriever kwargs
+TEXT_CONFIGS = [
+    {"name": "baseline", "overrides": {}, "kwargs": {}},
+    {"name": "prefetch_x4", "overrides": {"app.retrieval.text_retriever.PREFETCH_MULTIPLIER": 4}, "kwargs": {}},
+    {"name": "min_score_0.35", "overrides": {
+        "app.retrieval.text_retriever.MIN_SCORE_SHORT": 0.35,
+        "app.retrieval.text_retriever.MIN_SCORE_LONG": 0.35,
+    }, "kwargs": {}},
+    {"name": "mmr_0.6", "overrides": {}, "kwargs": {"use_mmr": True, "mmr_lambda": 0.6}},
+    {"name": "mmr_0.6+neighbors_1", "overrides": {}, "kwargs": {"use_mmr": True, "mmr_lambda": 0.6, "expand_neighbors": 1}},
+]
+
+IMAGE_RERANK_CONFIGS = [
+    {"name": f"image_{w:.2f}/ocr_{1 - w:.2f}", "overrides": {
+        "app.retrieval.image_to_image_retriever.IMAGE_SCORE_WEIGHT": w,
+        "app.retrieval.image_to_image_retriever.OCR_SCORE_WEIGHT": round(1 - w, 2),
+    }, "kwargs": {}}
+    for w in (1.0, 0.75, 0.5)
+]
+
+
+# ============================================================
+# EVALUATION LOOP
+# ============================================================
+
+def _evaluate(
+        run_query: Callable[[str, dict], List[str]],
+        queries: List[Dict],
+        relevant_for: Callable[[Dict], set],
+        top_k: int,
+) -> Dict:
+    recalls, rrs, ndcgs, latencies = [], [], [], []
+    for q in queries:
+        relevant = relevant_for(q)
+        start = time.perf_counter()
+        ranked_keys = run_query(q["query"], q)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        ranked = [key in relevant for key in ranked_keys[:top_k]]
+        recalls.append(recall_at_k(ranked, len(relevant), top_k))
+        rrs.append(reciprocal_rank(ranked))
+        ndcgs.append(ndcg_at_k(ranked, len(relevant), top_k))
+
+    return {
+        "queries": len(queries),
+        f"recall@{top_k}": round(statistics.fmean(recalls), 4) if recalls else 0.0,
+        "mrr": round(statistics.fmean(rrs), 4) if rrs else 0.0,
+        f"ndcg@{top_k}": round(statistics.fmean(ndcgs), 4) if ndcgs else 0.0,
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+    }
+
+
+def run_evaluation(
+        top_k: int = 5,
+        embedder=None,
+        image_embedder=None,
+        corpus: Dict | None = None,
+) -> Dict[str, Dict[str, Dict]]:
+    """
+    Seed a fresh in-memory store and evaluate every retriever/configuration.
+
+    The caller's QDRANT_MODE and shared embedded client are restored on exit.
+
+    Returns {retriever: {config_name: metrics}}; retrievers whose optional
+    dependencies cannot be imported are reported as {"skipped": reason}.
+    """
+    previous_mode = settings.QDRANT_MODE
+    settings.QDRANT_MODE = "memory"
+    try:
+        # Park the caller's client (unclosed) so the eval gets its own empty store
+        with _overrides({"app.db.qdrant_client._embedded_client": None}):
+            try:
+                return _run_evaluation(top_k, embedder, image_embedder, corpus)
+            finally:
+                reset_qdrant_client()
+    finally:
+        settings.QDRANT_MODE = previous_mode
+
+
+def _run_evaluation(top_k: int, embedder, image_embedder, corpus: Dict | None) -> Dict[str, Dict[str, Dict]]:
+    create_collections()
+
+    embedder = embedder or HashingEmbedder()
+    image_embedder = image_embedder or HashingEmbedder(dim=IMAGE_VECTOR_SIZE)
+    corpus = seed_synthetic_corpus(
+        owner_id=EVAL_OWNER_ID,
+        embedder=embedder,
+        image_embedder=image_embedder,
+        corpus=corpus or generate_corpus(),
+    )
+    queries = corpus["queries"]
+    report: Dict[str, Dict[str, Dict]] = {}
+
+    # ---------- Text → Text ----------
+    from app.retrieval.text_retriever import retrieve_text_chunks
+
+    chunk_topics = corpus["chunk_topics"]
+    topic_chunks: Dict[str, set] = {}
+    for chunk_id, topic in chunk_topics.items():
+        topic_chunks.setdefault(topic, set()).add(chunk_id)
+
+    report["text"] = {}
+    for config in TEXT_CONFIGS:
+        def run_text(query, _q, kwargs=config["kwargs"]):
+            hits = retrieve_text_chunks(query, EVAL_OWNER_ID, embedder, top_k=top_k, **kwargs)
+            return [str(h["id"]) for h in hits]
+
+        with _overrides(config["overrides"]):
+            report["text"][config["name"]] = _evaluate(
+                run_text, queries, lambda q: topic_chunks.get(q["topic"], set()), top_k,
+            )
+
+    # ---------- Text → Audio ----------
+    audio_topics = {a["audio_url"]: a["topic"] for a in corpus["audio"]}
+    try:
+        from app.retrieval import text_to_audio_retriever
+    except Exception as e:  # missing optional deps (torch, google-cloud-vision, ...)
+        report["text_to_audio"] = {"baseline": {"skipped": str(e)}}
+    else:
+        def run_audio(query, _q):
+            hits = text_to_audio_retriever.retrieve_audio_from_text(query, EVAL_OWNER_ID, top_k=top_k)
+            return [h["audio_url"] for h in hits]
+
+        with _overrides({"app.retrieval.text_to_audio_retriever._embedder": embedder}):
+            report["text_to_audio"] = {"baseline": _evaluate(
+                run_audio, queries,
+                lambda q: {url for url, t in audio_topics.items() if t == q["topic"]}, top_k,
+            )}
+
+    # ---------- Text → Image (CLIP text tower stand-in) ----------
+    image_topics = {i["image_url"]: i["topic"] for i in corpus["images"]}
+    try:
+        from app.retrieval import image_retriever
+    except Exception as e:  # missing optional deps (torch, google-cloud-vision, ...)
+        report["text_to_image"] = {"baseline": {"skipped": str(e)}}
+    else:
+        def run_text_to_image(query, _q):
+            hits = image_retriever.retrieve_images_from_text(query, EVAL_OWNER_ID, top_k=top_k)
+            return [h["image_url"] for h in hits]
+
+        with _overrides({"app.retrieval.image_retriever.embed_text_clip": image_embedder.embed_query}):
+            report["text_to_image"] = {"baseline": _evaluate(
+                run_text_to_image, queries,
+                lambda q: {url for url, t in image_topics.items() if t == q["topic"]}, top_k,
+            )}
+
+    # ---------- Image → Image (rerank weights) ----------
+    try:
+        from app.retrieval import image_to_image_retriever
+    except Exception as e:  # missing optional deps (torch, google-cloud-vision, ...)
+        report["image_to_image"] = {c["name"]: {"skipped": str(e)} for c in IMAGE_RERANK_CONFIGS}
+    else:
+        # Each indexed image is used as a query; relevant = other images of its topic
+        image_queries = [
+            {"query": img["image_url"], "topic": img["topic"], "caption": img["caption"]}
+            for img in corpus["images"]
+        ]
+        captions = {img["image_url"]: img["caption"] for img in corpus["images"]}
+
+        def fake_embed_image(image_url):
+            caption = captions[image_url]
+            return {"vector": image_embedder.embed_query(caption), "source": "local", "ocr_text": caption}
+
+        def run_image(query, _q):
+            hits = image_to_image_retriever.retrieve_similar_images(query, EVAL_OWNER_ID, top_k=top_k + 1)
+            return [h["image_url"] for h in hits if h["image_url"] != query][:top_k]
+
+        report["image_to_image"] = {}
+        for config in IMAGE_RERANK_CONFIGS:
+            with _overrides({
+                **config["overrides"],
+                "app.retrieval.image_to_image_retriever.embed_image": fake_embed_image,
+                "app.retrieval.image_to_image_retriever._text_embedder": embedder,
+            }):
+                report["image_to_image"][config["name"]] = _evaluate(
+                    run_image, image_queries,
+                    lambda q: {url for url, t in image_topics.items() if t == q["topic"] and url != q["query"]},
+                    top_k,
+                )
+
+    return report
+
+
+def format_report(report: Dict[str, Dict[str, Dict]]) -> str:
+    lines = []
+    for retriever, configs in report.items():
+        lines.append(f"\n== {retriever} ==")
+        for name, metrics in configs.items():
+            if "skipped" in metrics:
+                lines.append(f"  {name:<28} skipped ({metrics['skipped']})")
+                continue
+            cells = "  ".join(f"{k}={v}" for k, v in metrics.items())
+            lines.append(f"  {name:<28} {cells}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline retrieval quality/latency evaluation")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--embedder", choices=["hashing", "bge"], default="hashing")
+    parser.add_argument("--json", dest="json_path", help="Also write the report as JSON to this path")
+    args = parser.parse_args()
+
+    embedder = None
+    if args.embedder == "bge":
+        from app.embeddings.hf_bge_m3 import get_local_bge_m3_embedder
+        embedder = get_local_bge_m3_embedder()
+
+    report = run_evaluation(top_k=args.top_k, embedder=embedder)
+    print(format_report(report))
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
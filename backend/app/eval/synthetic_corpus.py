@@ -0,0 +1,237 @@
+"""
+Synthetic labelled corpus for hermetic retrieval tests and benchmarks.
+
+Everything here runs without network access or model downloads:
+- HashingEmbedder: deterministic bag-of-words embedder (feature hashing),
+  so texts sharing vocabulary get high cosine similarity.
+- generate_corpus: documents / audio transcripts / image captions about a
+  fixed set of topics, plus labelled queries (topic → relevant items).
+- seed_synthetic_corpus: pushes the corpus through the real ingestion path
+  (build_chunks → index_text_chunks) and writes image/audio points with the
+  same named-vector schema as create_collections.
+
+Pair with QDRANT_MODE=memory (see tests/conftest.py).
+"""
+
+import hashlib
+import random
+import re
+import uuid
+from typing import Dict, List
+
+import numpy as np
+from qdrant_client.models import PointStruct
+
+from app.embeddings.base import EmbeddingModel
+from app.db.qdrant_client import get_qdrant_client
+from app.db.qdrant_collections import TEXT_VECTOR_SIZE, IMAGE_VECTOR_SIZE
+from app.db.modality_inventory import record_points
+from app.chunking.text_chunker import build_chunks
+from app.ingestion.text_indexer import index_text_chunks
+
+_TOKEN = re.compile(r"\w+")
+
+
+class HashingEmbedder(EmbeddingModel):
+    """
+    Deterministic feature-hashing embedder (unigrams + bigrams).
+    Stand-in for BGE-M3 / CLIP when models are not available.
+    """
+
+    def __init__(self, dim: int = TEXT_VECTOR_SIZE):
+        self.dim = dim
+
+    def _bucket(self, token: str) -> tuple[int, float]:
+        digest = hashlib.md5(token.encode("utf-8")).digest()
+        index = int.from_bytes(digest[:4], "little") % self.dim
+        sign = 1.0 if digest[4] & 1 else -1.0
+        return index, sign
+
+    def _embed(self, text: str) -> List[float]:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        tokens = _TOKEN.findall((text or "").lower())
+        features = tokens + [f"{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            index, sign = self._bucket(feature)
+            vec[index] += sign
+        norm = np.linalg.norm(vec)
+        if norm > 0:
+            vec /= norm
+        return vec.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    def dimension(self) -> int:
+        return self.dim
+
+
+TOPICS: Dict[str, List[str]] = {
+    "photosynthesis": ["chlorophyll", "sunlight", "glucose", "stomata", "chloroplast", "carbon", "leaf", "oxygen"],
+    "electricity": ["current", "voltage", "resistance", "circuit", "ohm", "conductor", "ampere", "battery"],
+    "french_revolution": ["bastille", "monarchy", "robespierre", "estates", "guillotine", "republic", "louis", "paris"],
+    "cell_division": ["mitosis", "meiosis", "chromosome", "spindle", "prophase", "anaphase", "nucleus", "centromere"],
+    "trigonometry": ["sine", "cosine", "tangent", "angle", "hypotenuse", "triangle", "radian", "identity"],
+    "water_cycle": ["evaporation", "condensation", "precipitation", "cloud", "vapour", "runoff", "humidity", "rainfall"],
+    "newton_laws": ["force", "mass", "acceleration", "inertia", "momentum", "friction", "reaction", "velocity"],
+    "acids_bases": ["acid", "base", "ph", "neutralisation", "litmus", "hydroxide", "salt", "indicator"],
+    "indian_constitution": ["preamble", "fundamental", "rights", "parliament", "amendment", "judiciary", "directive", "citizen"],
+    "computer_networks": ["router", "packet", "protocol", "bandwidth", "latency", "ethernet", "ip", "switch"],
+}
+
+_FILLER = [
+    "the", "a", "of", "and", "in", "is", "this", "chapter", "students", "explains",
+    "important", "concept", "example", "process", "which", "these", "describes", "shows",
+]
+
+
+def _sentence(rng: random.Random, words: List[str], length: int) -> str:
+    body = [rng.choice(words) if rng.random() < 0.45 else rng.choice(_FILLER) for _ in range(length)]
+    return " ".join(body).capitalize() + "."
+
+
+def _passage(rng: random.Random, words: List[str], sentences: int) -> str:
+    return " ".join(_sentence(rng, words, rng.randint(8, 16)) for _ in range(sentences))
+
+
+def generate_corpus(
+        num_docs: int = 6,
+        pages_per_doc: int = 4,
+        sentences_per_page: int = 40,
+        num_audio: int = 10,
+        num_images: int = 10,
+        queries_per_topic: int = 3,
+        seed: int = 7,
+) -> Dict:
+    """
+    Build a deterministic labelled corpus.
+
+    Returns:
+    {
+      documents: [{filename, text, page_topics: {page: topic}}],
+      audio:     [{file_id, transcript, topic}],
+      images:    [{file_id, caption, topic}],
+      queries:   [{query, topic}]
+    }
+    """
+    rng = random.Random(seed)
+    topics = list(TOPICS)
+
+    documents = []
+    for d in range(num_docs):
+        pages = []
+        page_topics = {}
+        for page in range(1, pages_per_doc + 1):
+            topic = topics[(d * pages_per_doc + page) % len(topics)]
+            page_topics[page] = topic
+            pages.append(f"[PAGE {page}]\n{_passage(rng, TOPICS[topic], sentences_per_page)}")
+        documents.append({
+            "filename": f"synthetic_{d:02d}.pdf",
+            "text": "\n".join(pages),
+            "page_topics": page_topics,
+        })
+
+    audio = []
+    for i in range(num_audio):
+        topic = topics[i % len(topics)]
+        audio.append({
+            "file_id": f"audio_{i:02d}",
+            "transcript": _passage(rng, TOPICS[topic], 6),
+            "topic": topic,
+        })
+
+    images = []
+    for i in range(num_images):
+        topic = topics[(i * 3) % len(topics)]
+        images.append({
+            "file_id": f"image_{i:02d}",
+            "caption": _passage(rng, TOPICS[topic], 2),
+            "topic": topic,
+        })
+
+    queries = []
+    for topic in topics:
+        for _ in range(queries_per_topic):
+            terms = rng.sample(TOPICS[topic], k=rng.randint(2, 4))
+            queries.append({"query": "explain " + " and ".join(terms), "topic": topic})
+
+    return {"documents": documents, "audio": audio, "images": images, "queries": queries}
+
+
+def seed_synthetic_corpus(
+        owner_id: str,
+        embedder: EmbeddingModel | None = None,
+        image_embedder: EmbeddingModel | None = None,
+        corpus: Dict | None = None,
+) -> Dict:
+    """
+    Index a synthetic corpus into the configured vector store.
+
+    Text goes through the real build_chunks → index_text_chunks path; audio
+    and image points are written with the same payload/vector layout as
+    index_audio / index_image (minus ASR/CLIP/OCR inference).
+
+    Returns the corpus dict, with "chunk_topics": {chunk_id: topic} added so
+    retrieval results can be labelled.
+    """
+    embedder = embedder or HashingEmbedder()
+    image_embedder = image_embedder or HashingEmbedder(dim=IMAGE_VECTOR_SIZE)
+    corpus = corpus or generate_corpus()
+    client = get_qdrant_client()
+
+    chunk_topics = {}
+    for doc in corpus["documents"]:
+        chunks = build_chunks(owner_id=owner_id, filename=doc["filename"], preprocessed_text=doc["text"])
+        index_text_chunks(chunks, embedder)
+        for ch in chunks:
+            chunk_topics[ch["id"]] = doc["page_topics"][ch["metadata"]["page"]]
+
+    audio_points = []
+    for item in corpus["audio"]:
+        audio_url = f"https://synthetic.local/audio/{item['file_id']}.mp3"
+        item["audio_url"] = audio_url
+        audio_points.append(PointStruct(
+            id=str(uuid.uuid5(uuid.NAMESPACE_URL, f"{owner_id}:{audio_url}")),
+            vector={"transcript": embedder.embed_query(item["transcript"])},
+            payload={
+                "owner_id": owner_id,
+                "audio_url": audio_url,
+                "file_id": item["file_id"],
+                "transcript": item["transcript"],
+                "timestamps": [],
+                "source": "audio",
+            },
+        ))
+    if audio_points:
+        client.upsert("audio_collection", audio_points)
+        record_points(owner_id, "audio_collection", "audio", len(audio_points))
+
+    image_points = []
+    for item in corpus["images"]:
+        image_url = f"https://synthetic.local/images/{item['file_id']}.png"
+        item["image_url"] = image_url
+        image_points.append(PointStruct(
+            id=str(uuid.uuid5(uuid.NAMESPACE_URL, f"{owner_id}:{image_url}")),
+            vector={
+                "image": image_embedder.embed_query(item["caption"]),
+                "ocr": embedder.embed_query(item["caption"]),
+            },
+            payload={
+                "owner_id": owner_id,
+                "image_url": image_url,
+                "file_id": item["file_id"],
+                "ocr_text": item["caption"],
+                "ocr_blocks": None,
+                "bbox": None,
+                "source": "local",
+            },
+        ))
+    if image_points:
+        client.upsert("image_collection", image_points)
+        record_points(owner_id, "image_collection", "local", len(image_points))
+
+    corpus["chunk_topics"] = chunk_topics
+    return corpus
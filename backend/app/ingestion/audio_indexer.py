@@ -2,6 +2,8 @@ import uuid
 from datetime import datetime
 from qdrant_client.models import PointStruct
 from app.db.qdrant_client import get_qdrant_client
+from app.db.corpus_version import bump_corpus_version
+from app.db.modality_inventory import record_points
 from app.embeddings.hf_bge_m3 import HFBgeM3Embedder
 
 AUDIO_COLLECTION = "audio_collection"
@@ -42,5 +44,7 @@ def index_audio(
 
     client = get_qdrant_client()
     client.upsert(AUDIO_COLLECTION, [point])
+    bump_corpus_version(owner_id)
+    record_points(owner_id, AUDIO_COLLECTION, "audio")
 
 
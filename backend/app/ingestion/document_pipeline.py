@@ -0,0 +1,303 @@
+"""
+Document ingestion pipeline: extract → preprocess → chunk → embed → upsert.
+
+Shared by the ingestion job handler (app/jobs/handlers.py) and the
+synchronous /api/upload-admin fallback (JOBS_ENABLED=false).
+
+The document is streamed page by page and never held in memory as a whole:
+
+    [producer thread]  extract page → preprocess → chunk → batch of chunks
+          │  bounded queue (INGEST_QUEUE_BATCHES batches)
+    [caller thread]    embed batch
+          │  at most one batch in flight
+    [upsert thread]    upsert batch into Qdrant
+
+Embedding overlaps extraction of the following pages and the previous
+batch's upsert, and peak memory is a few batches + the page window used for
+header/footer detection, whatever the page count. `stage` wraps each step in
+a caller-provided context manager (the job worker uses it for per-stage
+concurrency limits).
+
+Re-uploads (same owner + filename) are indexed incrementally: a byte-identical
+file is skipped outright, otherwise only new / changed chunks are embedded and
+chunks of pages that are gone are deleted (see text_indexer).
+"""
+
+import hashlib
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List
+
+from app.config import settings
+from app.chunking.text_chunker import build_page_chunks, chunker_signature
+from app.embeddings.base import EmbeddingModel
+from app.ingestion.text_indexer import (
+    delete_stale_chunks,
+    existing_document_chunks,
+    index_text_chunks,
+    mark_document_chunks,
+)
+from app.ingestion.text_ingest import iter_pages
+from app.preprocessing.text_preprocess import preprocess_pages
+
+
+class NoReadableTextError(ValueError):
+    """The document has no extractable text (scanned PDF without OCR, empty DOCX)."""
+
+
+def _no_stage(name: str):
+    return nullcontext()
+
+
+def _no_progress(stage: str | None = None, **counts) -> None:
+    return None
+
+
+def _embed_batch(embedder: EmbeddingModel, batch: List[Dict]) -> List[List[float]]:
+    """Embed from the chunker's token ids when the embedder takes them (no re-tokenization)."""
+    if hasattr(embedder, "embed_token_ids") and all("token_ids" in c for c in batch):
+        return embedder.embed_token_ids([c["token_ids"] for c in batch])
+    return embedder.embed_documents([c["text"] for c in batch])
+
+
+def _document_hash(path: Path) -> str:
+    """File content + chunker settings: equal hashes give identical chunks."""
+    digest = hashlib.sha256(chunker_signature().encode("utf-8"))
+    with Path(path).open("rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+_DONE = object()
+
+
+def _prefetch(items: Iterable, depth: int) -> Iterator:
+    """
+    Run `items` in a background thread, handing them over through a queue of
+    at most `depth` items (the producer blocks when the consumer falls
+    behind). Producer errors are re-raised in the consumer; a consumer that
+    stops early makes the producer stop at its next item.
+    """
+    buffer: "queue.Queue" = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+
+    def _put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce():
+        try:
+            for item in items:
+                if not _put(item):
+                    return
+        except BaseException as e:  # handed to the consumer
+            _put(e)
+            return
+        _put(_DONE)
+
+    thread = threading.Thread(target=_produce, name="ingest-extract", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _chunk_batches(
+        path: Path,
+        filename: str,
+        owner_id: str,
+        batch_size: int,
+        stage: Callable,
+        progress: Callable,
+) -> Iterator[List[Dict]]:
+    """Pages → chunks, grouped into batches of `batch_size` (producer side)."""
+    pages = 0
+
+    def _extracted():
+        nonlocal pages
+        source = iter_pages(Path(path))
+        while True:
+            with stage("extract"):
+                page = next(source, None)
+            if page is None:
+                return
+            pages += 1
+            progress(pages=pages)
+            yield page
+
+    chunks = 0
+    batch: List[Dict] = []
+    for page_number, page_text in preprocess_pages(_extracted()):
+        with stage("chunk"):
+            page_chunks = build_page_chunks(
+                owner_id=owner_id,
+                filename=filename,
+                page_number=page_number,
+                page_text=page_text,
+            )
+        chunks += len(page_chunks)
+        progress(chunks=chunks)
+        batch.extend(page_chunks)
+        while len(batch) >= batch_size:
+            yield batch[:batch_size]
+            batch = batch[batch_size:]
+    if batch:
+        yield batch
+
+
+def ingest_document_file(
+        path: Path,
+        filename: str,
+        owner_id: str,
+        embedder: EmbeddingModel,
+        batch_size: int = 64,
+        stage: Callable = _no_stage,
+        progress: Callable = _no_progress,
+) -> Dict:
+    """
+    Index one PDF / DOCX file for `owner_id`, streaming it page by page.
+
+    A document already indexed under the same filename is diffed against
+    the upload: unchanged chunks are skipped (not embedded), changed and
+    new ones are upserted, and chunks that no longer exist are deleted.
+
+    Args:
+        path: File on disk
+        filename: Original upload name (stored in every chunk's payload)
+        owner_id: Owner of the document
+        embedder: Dense text embedder (BGE-M3)
+        batch_size: Chunks embedded + upserted per batch
+        stage: stage(name) → context manager around each step
+        progress: progress(stage=None, **counts) callback (pages, chunks, vectors, skipped)
+
+    Returns:
+        dict: Indexing summary, with chunks_added / chunks_updated /
+        chunks_skipped / chunks_removed
+
+    Raises:
+        NoReadableTextError: No text could be extracted
+    """
+    doc_hash = _document_hash(path)
+    existing = existing_document_chunks(owner_id, filename)
+
+    if existing and all(p.get("doc_hash") == doc_hash for p in existing.values()):
+        # Same bytes, same chunker: nothing to extract or embed
+        progress(chunks=len(existing), vectors=0, skipped=len(existing))
+        print(f"[INFO] {filename}: unchanged, {len(existing)} chunks already indexed")
+        return {
+            "status": "unchanged",
+            "filename": filename,
+            "total_chunks": len(existing),
+            "vectors_inserted": 0,
+            "chunks_added": 0,
+            "chunks_updated": 0,
+            "chunks_skipped": len(existing),
+            "chunks_removed": 0,
+            "pages_in_chunks": sorted({p["page"] for p in existing.values() if "page" in p}),
+            "sample_chunk": None,
+        }
+
+    batches = _prefetch(
+        _chunk_batches(path, filename, owner_id, batch_size, stage, progress),
+        depth=settings.INGEST_QUEUE_BATCHES,
+    )
+
+    def _write(changed: List[Dict], dense_vectors, unchanged_ids: List[str]) -> int:
+        with stage("upsert"):
+            mark_document_chunks(unchanged_ids, doc_hash)
+            if not changed:
+                return 0
+            return index_text_chunks(changed, embedder, dense_vectors=dense_vectors)
+
+    total_chunks = 0
+    inserted = 0
+    added = updated = skipped = 0
+    seen_ids = set()
+    pages_in_chunks = set()
+    sample_chunk = None
+    pending = None
+
+    progress(vectors=0, skipped=0)
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-upsert") as upserter:
+        try:
+            for batch in batches:
+                if sample_chunk is None:
+                    sample_chunk = {k: v for k, v in batch[0].items() if k != "token_ids"}
+                total_chunks += len(batch)
+                pages_in_chunks.update(ch["metadata"]["page"] for ch in batch)
+                seen_ids.update(ch["id"] for ch in batch)
+
+                changed, unchanged_ids = [], []
+                for ch in batch:
+                    previous = existing.get(ch["id"])
+                    if previous is not None and previous.get("content_hash") == ch["metadata"]["content_hash"]:
+                        unchanged_ids.append(ch["id"])
+                        continue
+                    ch["metadata"]["doc_hash"] = doc_hash
+                    changed.append(ch)
+                    if previous is None:
+                        added += 1
+                    else:
+                        updated += 1
+                skipped += len(unchanged_ids)
+
+                dense_vectors = None
+                if changed:
+                    with stage("embed"):
+                        dense_vectors = _embed_batch(embedder, changed)
+
+                # One write in flight: wait for the previous batch before queueing this one
+                if pending is not None:
+                    inserted += pending.result()
+                    progress(vectors=inserted, skipped=skipped)
+                pending = upserter.submit(_write, changed, dense_vectors, unchanged_ids)
+
+            if pending is not None:
+                inserted += pending.result()
+                progress(vectors=inserted, skipped=skipped)
+        finally:
+            batches.close()
+
+    if not total_chunks:
+        raise NoReadableTextError("No readable text found in document")
+
+    removed = len(existing.keys() - seen_ids)
+    if removed:
+        with stage("upsert"):
+            delete_stale_chunks(owner_id, filename, doc_hash)
+
+    if existing:
+        print(
+            f"[INFO] {filename}: re-indexed incrementally | added {added}, updated {updated}, "
+            f"skipped {skipped}, removed {removed}"
+        )
+
+    return {
+        "status": "success",
+        "filename": filename,
+        "total_chunks": total_chunks,
+        "vectors_inserted": inserted,
+        "chunks_added": added,
+        "chunks_updated": updated,
+        "chunks_skipped": skipped,
+        "chunks_removed": removed,
+        "pages_in_chunks": sorted(pages_in_chunks),
+        "sample_chunk": sample_chunk,
+    }
@@ -2,6 +2,8 @@ import uuid
 from datetime import datetime
 from qdrant_client.models import PointStruct
 from app.db.qdrant_client import get_qdrant_client
+from app.db.corpus_version import bump_corpus_version
+from app.db.modality_inventory import record_points
 from app.embeddings.hf_bge_m3 import HFBgeM3Embedder
 from app.embeddings.image.orchestrator import embed_image
 
@@ -12,14 +14,16 @@ def index_image(
         owner_id:str,
         file_id:str,
         bbox:list | None = None,
+        image_bytes: bytes | None = None,
 ):
     """
     Index a single image into Qdrant with both image and OCR text vectors.
+    `image_bytes` (the just-uploaded file) avoids downloading `image_url` again.
     """
 
     client = get_qdrant_client()
 
-    embedding_result = embed_image(image_url)   
+    embedding_result = embed_image(image_url, image_bytes)   
 
     vector = embedding_result.get("vector")
     source = embedding_result.get("source")
@@ -72,5 +76,7 @@ def index_image(
         collection_name=IMAGE_COLLECTION,
         points=[point],
     )
+    bump_corpus_version(owner_id)
+    record_points(owner_id, IMAGE_COLLECTION, source)
 
 
@@ -87,9 +87,12 @@
 
 ############## A different approach to handle sparse vectors ##############
 
+from collections import Counter
 from typing import List, Dict
-from qdrant_client.models import PointStruct,Filter, FieldCondition, MatchValue, Prefetch
+from qdrant_client.models import PointStruct,Filter, FieldCondition, MatchValue, Prefetch, FilterSelector
 from app.db.qdrant_client import get_qdrant_client
+from app.db.corpus_version import bump_corpus_version
+from app.db.modality_inventory import invalidate_inventory, record_points
 from app.embeddings.base import EmbeddingModel
 from app.embeddings.sparse.tfidf import TfidfSparseEncoder
 
@@ -99,12 +102,20 @@ COLLECTION = "text_collection"
 def index_text_chunks(
     chunks: List[dict],
     embedder: EmbeddingModel,
+    dense_vectors: List[List[float]] | None = None,
 ) -> int:
+    """
+    Upsert chunks (dense + optional TF-IDF sparse vectors) into text_collection.
+
+    `dense_vectors` lets callers that embedded the chunks themselves (e.g. the
+    batched ingestion pipeline) skip the embedding step here.
+    """
     client = get_qdrant_client()
     tfidf = TfidfSparseEncoder()
 
-    texts = [c["text"] for c in chunks]
-    dense_vectors = embedder.embed_documents(texts)
+    if dense_vectors is None:
+        texts = [c["text"] for c in chunks]
+        dense_vectors = embedder.embed_documents(texts)
 
     if len(dense_vectors) != len(chunks):
         raise RuntimeError("Embedding count mismatch")
@@ -130,9 +141,75 @@ def index_text_chunks(
         )
 
     client.upsert(collection_name=COLLECTION, points=points, wait=True)
+    for owner_id in {ch["metadata"].get("owner_id") for ch in chunks}:
+        bump_corpus_version(owner_id)
+    for (owner_id, source), n in Counter(
+        (ch["metadata"].get("owner_id"), ch["metadata"].get("source")) for ch in chunks
+    ).items():
+        record_points(owner_id, COLLECTION, source, n)
     return len(points)
 
 
+# ============================================================
+# INCREMENTAL RE-INDEXING
+# ============================================================
+# Every chunk stores its content_hash (chunker) and the doc_hash of the
+# upload it came from. Re-uploading a document (same owner + filename) only
+# embeds chunks whose id is new or whose content_hash changed; unchanged
+# chunks are re-stamped with the new doc_hash, and whatever still carries an
+# older doc_hash afterwards (pages that are gone) is deleted.
+
+def _document_filter(owner_id: str, filename: str) -> Filter:
+    return Filter(must=[
+        FieldCondition(key="owner_id", match=MatchValue(value=owner_id)),
+        FieldCondition(key="filename", match=MatchValue(value=filename)),
+    ])
+
+
+def existing_document_chunks(owner_id: str, filename: str) -> Dict[str, Dict]:
+    """{point id: {"content_hash", "doc_hash", "page"}} of a document's indexed chunks (no vectors, no text)."""
+    client = get_qdrant_client()
+    found = {}
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=COLLECTION,
+            scroll_filter=_document_filter(owner_id, filename),
+            limit=512,
+            offset=offset,
+            with_payload=["content_hash", "doc_hash", "page"],
+            with_vectors=False,
+        )
+        for point in points:
+            found[str(point.id)] = point.payload or {}
+        if offset is None:
+            return found
+
+
+def mark_document_chunks(chunk_ids: List[str], doc_hash: str) -> None:
+    """Re-stamp unchanged chunks with the current upload's doc_hash."""
+    if chunk_ids:
+        get_qdrant_client().set_payload(
+            collection_name=COLLECTION,
+            payload={"doc_hash": doc_hash},
+            points=chunk_ids,
+            wait=True,
+        )
+
+
+def delete_stale_chunks(owner_id: str, filename: str, doc_hash: str) -> None:
+    """Filtered delete of the document's chunks not stamped with `doc_hash`."""
+    stale = _document_filter(owner_id, filename)
+    stale.must_not = [FieldCondition(key="doc_hash", match=MatchValue(value=doc_hash))]
+    get_qdrant_client().delete(
+        collection_name=COLLECTION,
+        points_selector=FilterSelector(filter=stale),
+        wait=True,
+    )
+    bump_corpus_version(owner_id)
+    invalidate_inventory(owner_id)
+
+
 
 
 # def retrieve_text_chunks(
@@ -1,7 +1,18 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
 import fitz  # PyMuPDF
 import docx
 
+from app.config import settings
+from app.utils.metrics import PDF_PAGE_SECONDS
+
 def extract_raw_text(file_path:Path)->str:
 
     suffix = file_path.suffix.lower()
@@ -17,12 +28,10 @@ def extract_raw_text(file_path:Path)->str:
 
 def _extract_pdf(path:Path)-> str:
     text=[]
-    doc = fitz.open(path)
     
-    for page_number , page in enumerate(doc,start=1):
-        page_text = page.get_text()
-        if page_text.strip():
-            text.append(f"[PAGE {page_number}]\n{page_text}")
+    # Pages come back in order, extracted in parallel for large PDFs
+    for page_number , page_text in iter_pdf_pages(path):
+        text.append(f"[PAGE {page_number}]\n{page_text}")
         
     return "\n".join(text)
 
@@ -35,4 +44,152 @@ def _extract_docx(path:Path)->str:
        if para.text.strip():
             paragraphs.append(para.text)
     
-   return "\n".join(paragraphs)
\ No newline at end of file
+   return "\n".join(paragraphs)
+
+
+def iter_pages(file_path: Path) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page_number, page_text) one page at a time, for pages with text.
+
+    PDF pages are loaded and released one by one (see iter_pdf_pages), so
+    memory does not grow with the page count. DOCX has no pages: python-docx parses the whole
+    file anyway, and its text comes out as page 1 (like extract_raw_text).
+    """
+    suffix = file_path.suffix.lower()
+    if suffix == ".pdf":
+        yield from iter_pdf_pages(file_path)
+    elif suffix == ".docx":
+        text = _extract_docx(file_path)
+        if text.strip():
+            yield 1, text
+    else:
+        raise ValueError(f"Unsupported file format: {suffix}")
+
+
+# ============================================================
+# PARALLEL PDF EXTRACTION
+# ============================================================
+# PyMuPDF extracts text while holding the GIL, so large PDFs are split into
+# page ranges extracted by worker processes; each worker opens the document
+# itself. The pool is shared by every upload in the process (the
+# "extract" job stage limit bounds how many documents use it at once).
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_lock = threading.Lock()
+
+
+def _pdf_workers() -> int:
+    return settings.PDF_EXTRACT_WORKERS or min(4, os.cpu_count() or 1)
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # spawn: forking a process that runs threads (uvicorn, job workers) is unsafe
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=_pdf_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pdf_pool
+
+
+def shutdown_pdf_pool() -> None:
+    """Stop the extraction processes (app shutdown, tests)."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        pool, _pdf_pool = _pdf_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _extract_page_range(path: str, start: int, end: int) -> List[Tuple[int, str, float]]:
+    """(page_number, text, seconds) for 0-based pages start..end-1. Runs in a worker process."""
+    pages = []
+    with fitz.open(path) as doc:
+        for index in range(start, end):
+            page_start = time.perf_counter()
+            page_text = doc.load_page(index).get_text()
+            pages.append((index + 1, page_text, time.perf_counter() - page_start))
+    return pages
+
+
+def iter_pdf_pages(
+        file_path: Path,
+        workers: Optional[int] = None,
+        page_seconds: Optional[Dict[int, float]] = None,
+) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page_number, page_text) in page order, for pages with text.
+
+    PDFs with at least PDF_PARALLEL_MIN_PAGES pages are extracted by the
+    process pool in ranges of PDF_EXTRACT_RANGE_PAGES; at most 2 ranges per
+    worker are in flight, so memory stays bounded for any page count.
+    Smaller PDFs (or workers=1) are extracted in this process.
+
+    Args:
+        file_path: PDF on disk
+        workers: Process count (default PDF_EXTRACT_WORKERS; 1 = in-process)
+        page_seconds: Filled with each page's extraction time
+
+    Per-page times also go to the documind_pdf_page_extract_seconds
+    histogram, and a [TIMING] summary line is printed per document.
+    """
+    with fitz.open(file_path) as doc:
+        page_count = doc.page_count
+    workers = _pdf_workers() if workers is None else workers
+    parallel = workers > 1 and page_count >= settings.PDF_PARALLEL_MIN_PAGES
+    mode = "parallel" if parallel else "serial"
+    range_size = max(1, settings.PDF_EXTRACT_RANGE_PAGES)
+    ranges = deque((start, min(start + range_size, page_count)) for start in range(0, page_count, range_size))
+
+    started = time.perf_counter()
+    timings: Dict[int, float] = {}
+
+    def _pages(extracted):
+        for page_number, page_text, seconds in extracted:
+            timings[page_number] = seconds
+            PDF_PAGE_SECONDS.observe(seconds, mode=mode)
+            if page_text.strip():
+                yield page_number, page_text
+
+    if parallel:
+        pool = _get_pdf_pool()
+        in_flight = deque()
+        try:
+            while ranges or in_flight:
+                while ranges and len(in_flight) < 2 * workers:
+                    start, end = ranges.popleft()
+                    in_flight.append(((start, end), pool.submit(_extract_page_range, str(file_path), start, end)))
+                page_range, future = in_flight.popleft()
+                try:
+                    extracted = future.result()
+                except BrokenProcessPool:
+                    # A worker died (out of memory...): finish this document in-process
+                    print(f"[WARN] PDF extraction pool broke; extracting {file_path.name} in-process")
+                    shutdown_pdf_pool()
+                    ranges.extendleft(reversed([page_range] + [r for r, _ in in_flight]))
+                    in_flight.clear()
+                    parallel, mode = False, "serial"
+                    break
+                yield from _pages(extracted)
+        finally:
+            for _, future in in_flight:
+                future.cancel()
+
+    if not parallel:
+        while ranges:
+            start, end = ranges.popleft()
+            yield from _pages(_extract_page_range(str(file_path), start, end))
+
+    if page_seconds is not None:
+        page_seconds.update(timings)
+    if timings:
+        slowest = max(timings, key=timings.get)
+        print(
+            f"[TIMING] PDF {Path(file_path).name}: {len(timings)} pages in {time.perf_counter() - started:.2f}s "
+            f"({mode}, {workers if mode == 'parallel' else 1} proc) | "
+            f"avg {sum(timings.values()) / len(timings) * 1000:.1f} ms/page, "
+            f"slowest p{slowest} {timings[slowest] * 1000:.1f} ms"
+        )
+
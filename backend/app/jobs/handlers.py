@@ -0,0 +1,85 @@
+"""
+Ingestion job handlers (one per job kind), run by the worker pool.
+
+- document: PDF / DOCX parked by /api/upload-admin → extract, chunk,
+  embed + upsert in batches. Progress: pages, chunks, vectors.
+- audio: file already on Cloudinary (/api/audio/upload) → transcribe from
+  the parked bytes, index the transcript. Progress: segments, vectors.
+"""
+
+from pathlib import Path
+from typing import Dict
+
+from app.config import settings
+from app.asr.orchestrator import transcribe_audio
+from app.embeddings.hf_bge_m3 import HFBgeM3Embedder
+from app.ingestion.audio_indexer import index_audio
+from app.ingestion.document_pipeline import NoReadableTextError, ingest_document_file
+from app.jobs.worker import JobContext, JobError, register_handler
+
+DOCUMENT_JOB = "document"
+AUDIO_JOB = "audio"
+
+_embedder = None
+
+
+def _get_embedder():
+    global _embedder
+    if _embedder is None:
+        _embedder = HFBgeM3Embedder()
+    return _embedder
+
+
+@register_handler(DOCUMENT_JOB)
+def run_document_job(job: Dict, ctx: JobContext) -> Dict:
+    payload = job["payload"]
+    path = Path(payload["path"])
+    if not path.exists():
+        raise JobError(f"Uploaded file is gone: {path.name}", retryable=False)
+    try:
+        return ingest_document_file(
+            path,
+            filename=payload["filename"],
+            owner_id=job["owner_id"],
+            embedder=_get_embedder(),
+            batch_size=settings.JOB_EMBED_BATCH_SIZE,
+            stage=ctx.stage,
+            progress=ctx.progress,
+        )
+    except NoReadableTextError as e:
+        raise JobError(str(e), retryable=False)
+
+
+@register_handler(AUDIO_JOB)
+def run_audio_job(job: Dict, ctx: JobContext) -> Dict:
+    payload = job["payload"]
+    path = Path(payload["path"]) if payload.get("path") else None
+    # Without the parked bytes the transcriber downloads audio_url itself
+    audio_bytes = path.read_bytes() if path and path.exists() else None
+
+    with ctx.stage("transcribe"):
+        transcription = transcribe_audio(payload["audio_url"], audio_bytes)
+    transcript = transcription.get("transcript", "")
+    segments = transcription.get("segments", [])
+    ctx.progress(segments=len(segments), vectors=0)
+
+    with ctx.stage("embed"):
+        index_audio(
+            audio_url=payload["audio_url"],
+            owner_id=job["owner_id"],
+            file_id=payload["file_id"],
+            transcript=transcript,
+            timestamps=segments,
+        )
+    # index_audio skips transcripts shorter than 10 characters
+    vectors = 1 if len(transcript.strip()) >= 10 else 0
+    ctx.progress(vectors=vectors)
+
+    return {
+        "status": "indexed" if vectors else "skipped",
+        "audio_url": payload["audio_url"],
+        "file_id": payload["file_id"],
+        "transcript_chars": len(transcript),
+        "segments": len(segments),
+        "vectors_inserted": vectors,
+    }
@@ -0,0 +1,266 @@
+"""
+Durable ingestion job queue (WAL-mode SQLite).
+
+Upload endpoints validate the file, park it on disk and enqueue a job; the
+worker pool (app/jobs/worker.py) does the slow part (extract, chunk, embed,
+upsert / transcribe, index) outside the HTTP request.
+
+Jobs survive restarts: a worker claims a job with a lease
+(JOB_LEASE_SECONDS) and keeps renewing it while the job runs. A job whose
+worker died is claimed again once its lease runs out, or failed if that was
+its last attempt. Failed attempts go back to the queue with exponential
+backoff until max_attempts.
+
+WAL lets every uvicorn worker on the host share one file; claiming is a
+single conditional UPDATE, so a job is never run by two workers at once.
+
+Job states: queued → running → succeeded | failed
+"""
+
+import json
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, List, Optional
+
+from app.config import settings
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class SQLiteJobQueue:
+    def __init__(self, path: str, lease_seconds: float = 300.0):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+
+        # Autocommit; each statement is its own short transaction
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ingestion_jobs ("
+            " job_id TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " owner_id TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " stage TEXT,"
+            " payload TEXT NOT NULL,"
+            " progress TEXT NOT NULL DEFAULT '{}',"
+            " result TEXT,"
+            " error TEXT,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " max_attempts INTEGER NOT NULL,"
+            " available_at REAL NOT NULL,"
+            " lease_expires_at REAL,"
+            " worker_id TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_claim ON ingestion_jobs(status, available_at)"
+        )
+
+    @staticmethod
+    def _row(row: Optional[sqlite3.Row]) -> Optional[Dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["progress"] = json.loads(job["progress"] or "{}")
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def enqueue(
+            self,
+            kind: str,
+            owner_id: str,
+            payload: Dict,
+            max_attempts: int = 3,
+            job_id: str | None = None,
+    ) -> str:
+        job_id = job_id or str(uuid.uuid4())
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO ingestion_jobs"
+                " (job_id, kind, owner_id, status, payload, max_attempts, available_at, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, owner_id, QUEUED, json.dumps(payload), max_attempts, now, now, now),
+            )
+        return job_id
+
+    def claim(self, worker_id: str, kinds: Iterable[str]) -> Optional[Dict]:
+        """
+        Take the oldest runnable job of one of `kinds`: queued and due, or
+        running with an expired lease (its worker died). None when idle.
+
+        An expired job that has used up its attempts is failed instead of
+        handed out again, so a job that kills its worker (OOM on a huge
+        file) cannot take down every worker in turn.
+        """
+        kinds = list(kinds)
+        if not kinds:
+            return None
+        now = time.time()
+        marks = ",".join("?" for _ in kinds)
+        with self._lock:
+            abandoned = self._conn.execute(
+                "UPDATE ingestion_jobs SET status = ?, stage = NULL,"
+                " error = 'Lease expired: worker died (attempt ' || attempts || '/' || max_attempts || ')',"
+                " lease_expires_at = NULL, updated_at = ?"
+                " WHERE status = ? AND lease_expires_at < ? AND attempts >= max_attempts"
+                " RETURNING *",
+                (FAILED, now, RUNNING, now),
+            ).fetchall()
+            row = self._conn.execute(
+                "UPDATE ingestion_jobs SET status = ?, worker_id = ?, attempts = attempts + 1,"
+                " lease_expires_at = ?, updated_at = ?"
+                " WHERE job_id = ("
+                "  SELECT job_id FROM ingestion_jobs"
+                f"  WHERE kind IN ({marks}) AND ("
+                "   (status = ? AND available_at <= ?)"
+                "   OR (status = ? AND lease_expires_at < ? AND attempts < max_attempts))"
+                "  ORDER BY available_at LIMIT 1)"
+                " RETURNING *",
+                (RUNNING, worker_id, now + self.lease_seconds, now, *kinds, QUEUED, now, RUNNING, now),
+            ).fetchone()
+
+        for job in abandoned:
+            print(f"[JOBS] {job['job_id']} ({job['kind']}) failed: {job['error']}")
+            discard_job_file(self._row(job))
+        return self._row(row)
+
+    def heartbeat(self, job_id: str, worker_id: str, stage: str | None = None, **progress) -> bool:
+        """
+        Renew the lease and merge `progress` counters (pages, chunks, vectors...).
+        False when the job is no longer ours (lease lost to another worker).
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT progress, stage FROM ingestion_jobs WHERE job_id = ? AND worker_id = ? AND status = ?",
+                (job_id, worker_id, RUNNING),
+            ).fetchone()
+            if row is None:
+                return False
+            merged = {**json.loads(row["progress"] or "{}"), **progress}
+            self._conn.execute(
+                "UPDATE ingestion_jobs SET progress = ?, stage = ?, lease_expires_at = ?, updated_at = ?"
+                " WHERE job_id = ?",
+                (json.dumps(merged), stage or row["stage"], now + self.lease_seconds, now, job_id),
+            )
+        return True
+
+    def complete(self, job_id: str, worker_id: str, result: Dict) -> bool:
+        """Mark the job succeeded; False when it is no longer ours (lease lost)."""
+        with self._lock:
+            updated = self._conn.execute(
+                "UPDATE ingestion_jobs SET status = ?, stage = NULL, result = ?, error = NULL,"
+                " lease_expires_at = NULL, updated_at = ? WHERE job_id = ? AND worker_id = ? AND status = ?",
+                (SUCCEEDED, json.dumps(result), time.time(), job_id, worker_id, RUNNING),
+            ).rowcount
+        return bool(updated)
+
+    def fail(self, job_id: str, worker_id: str, error: str, retry_in: float | None) -> str:
+        """
+        Record a failed attempt: back to the queue after `retry_in` seconds
+        while attempts remain, otherwise failed for good. Returns the new
+        status, or RUNNING when another worker has taken the job over.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT attempts, max_attempts FROM ingestion_jobs WHERE job_id = ? AND worker_id = ? AND status = ?",
+                (job_id, worker_id, RUNNING),
+            ).fetchone()
+            if row is None:
+                return RUNNING
+            retry = retry_in is not None and row["attempts"] < row["max_attempts"]
+            status = QUEUED if retry else FAILED
+            self._conn.execute(
+                "UPDATE ingestion_jobs SET status = ?, error = ?, available_at = ?,"
+                " lease_expires_at = NULL, updated_at = ? WHERE job_id = ?",
+                (status, error, now + retry_in if retry else now, now, job_id),
+            )
+        return status
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM ingestion_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row(row)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) AS n FROM ingestion_jobs GROUP BY status"
+            ).fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def list_for_owner(self, owner_id: str, limit: int = 50) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM ingestion_jobs WHERE owner_id = ? ORDER BY created_at DESC LIMIT ?",
+                (owner_id, limit),
+            ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# ============================================================
+# JOB FILES
+# ============================================================
+# Uploads are parked under JOB_FILES_DIR until their job has finished (a
+# retry, or a restart, needs the file again), then deleted.
+
+def save_job_file(data: bytes | BinaryIO, suffix: str = "") -> str:
+    """Park `data` (bytes, or a file object copied in blocks) and return its path."""
+    directory = Path(settings.JOB_FILES_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{uuid.uuid4().hex}{suffix}"
+    if isinstance(data, (bytes, bytearray)):
+        path.write_bytes(data)
+    else:
+        with path.open("wb") as out:
+            shutil.copyfileobj(data, out)
+    return str(path)
+
+
+def discard_job_file(job: Dict) -> None:
+    path = (job.get("payload") or {}).get("path")
+    if path:
+        Path(path).unlink(missing_ok=True)
+
+
+# ============================================================
+# SINGLETON
+# ============================================================
+
+_queue: Optional[SQLiteJobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> SQLiteJobQueue:
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = SQLiteJobQueue(settings.JOB_QUEUE_SQLITE_PATH, lease_seconds=settings.JOB_LEASE_SECONDS)
+    return _queue
+
+
+def reset_job_queue(queue: Optional[SQLiteJobQueue] = None) -> None:
+    """Swap the queue (tests) or drop it so the next call reopens JOB_QUEUE_SQLITE_PATH."""
+    global _queue
+    with _queue_lock:
+        _queue = queue
@@ -0,0 +1,212 @@
+"""
+Ingestion worker pool.
+
+JOB_WORKERS threads per process poll the job queue and run the handler
+registered for each job kind (app/jobs/handlers.py). Handlers wrap their
+heavy steps in ctx.stage("embed") etc.; each stage has its own concurrency
+limit (JOB_STAGE_CONCURRENCY), so e.g. two PDFs can be extracted while only
+one batch at a time goes through the embedding model.
+
+Errors:
+- JobError(retryable=False): bad input (no readable text...), failed at once
+- anything else: retried with exponential backoff
+  (JOB_RETRY_BASE_SECONDS * 2^(attempt-1)) up to the job's max_attempts
+
+Limits are per process: with several uvicorn workers each one runs its own
+pool against the shared queue.
+"""
+
+import socket
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from app.config import settings
+from app.jobs.queue import FAILED, QUEUED, SQLiteJobQueue, discard_job_file, get_job_queue
+
+# kind → handler(job, ctx) → result dict
+_HANDLERS: Dict[str, Callable] = {}
+
+
+class JobError(Exception):
+    """Handler failure; retryable=False fails the job without further attempts."""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def register_handler(kind: str):
+    def decorator(func):
+        _HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def parse_stage_limits(spec: str) -> Dict[str, int]:
+    """'extract=2,embed=1' → {"extract": 2, "embed": 1}"""
+    limits = {}
+    for part in (spec or "").split(","):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            limits[name.strip()] = max(1, int(value))
+    return limits
+
+
+class JobContext:
+    """Passed to handlers: progress reporting and per-stage concurrency slots."""
+
+    def __init__(self, pool: "JobWorkerPool", job: Dict, worker_id: str):
+        self._pool = pool
+        self.job = job
+        self.worker_id = worker_id
+
+    def progress(self, stage: str | None = None, **counts) -> None:
+        """Merge progress counters (pages, chunks, vectors...) and renew the lease."""
+        if not self._pool.queue.heartbeat(self.job["job_id"], self.worker_id, stage=stage, **counts):
+            raise JobError("Job lease lost to another worker", retryable=False)
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Hold one of the stage's concurrency slots for the block. The lease is
+        renewed while waiting for a slot, so a job queued behind a long embed
+        is not taken over by another worker.
+        """
+        self.progress(stage=name)
+        semaphore = self._pool.stage_semaphore(name)
+        renew_every = max(0.05, self._pool.queue.lease_seconds / 3)
+        while not semaphore.acquire(timeout=renew_every):
+            self.progress()
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+class JobWorkerPool:
+    def __init__(
+            self,
+            queue: SQLiteJobQueue,
+            workers: int = 2,
+            stage_limits: Optional[Dict[str, int]] = None,
+            poll_interval: float = 1.0,
+            retry_base_seconds: float = 5.0,
+            handlers: Optional[Dict[str, Callable]] = None,
+    ):
+        self.queue = queue
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.retry_base_seconds = retry_base_seconds
+        self.handlers = handlers if handlers is not None else _HANDLERS
+        self._stage_limits = stage_limits or {}
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._semaphores_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._name = f"{socket.gethostname()}-{uuid.uuid4().hex[:6]}"
+
+    def stage_semaphore(self, name: str) -> threading.BoundedSemaphore:
+        with self._semaphores_lock:
+            if name not in self._semaphores:
+                # Stages without a configured limit may use every worker
+                limit = self._stage_limits.get(name, self.workers)
+                self._semaphores[name] = threading.BoundedSemaphore(limit)
+            return self._semaphores[name]
+
+    def run_one(self, worker_id: str) -> bool:
+        """Claim and run one job. False when there was nothing to do."""
+        job = self.queue.claim(worker_id, self.handlers.keys())
+        if job is None:
+            return False
+
+        job_id, kind = job["job_id"], job["kind"]
+        print(f"[JOBS] ▶️ {kind} {job_id} (attempt {job['attempts']}/{job['max_attempts']})")
+        try:
+            result = self.handlers[kind](job, JobContext(self, job, worker_id))
+        except Exception as e:
+            retryable = getattr(e, "retryable", True)
+            retry_in = self.retry_base_seconds * 2 ** (job["attempts"] - 1) if retryable else None
+            status = self.queue.fail(job_id, worker_id, f"{type(e).__name__}: {e}", retry_in)
+            if status == FAILED:
+                print(f"[JOBS] ❌ {kind} {job_id} failed: {e}")
+                if retryable:
+                    traceback.print_exc()
+                discard_job_file(job)
+            elif status == QUEUED:
+                print(f"[JOBS] ↩️ {kind} {job_id} failed ({e}); retry in {retry_in:.0f}s")
+            else:
+                print(f"[JOBS] ⚠️ {kind} {job_id}: lease lost, another worker owns it now")
+            return True
+
+        if self.queue.complete(job_id, worker_id, result or {}):
+            discard_job_file(job)
+            print(f"[JOBS] ✅ {kind} {job_id}")
+        else:
+            print(f"[JOBS] ⚠️ {kind} {job_id} finished after its lease was lost; result dropped")
+        return True
+
+    def _loop(self, worker_id: str) -> None:
+        while not self._stop.is_set():
+            try:
+                busy = self.run_one(worker_id)
+            except Exception as e:  # queue unavailable: keep the thread alive
+                print(f"[WARN] Job worker {worker_id}: {e}")
+                busy = False
+            if not busy:
+                self._stop.wait(self.poll_interval)
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.workers):
+            worker_id = f"{self._name}-{i}"
+            thread = threading.Thread(target=self._loop, args=(worker_id,), name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop polling; a job still running past `timeout` is re-claimed after its lease."""
+        self._stop.set()
+        deadline = time.time() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.time()))
+        self._threads = []
+
+
+# ============================================================
+# PROCESS-WIDE POOL
+# ============================================================
+
+_pool: Optional[JobWorkerPool] = None
+
+
+def start_job_workers() -> Optional[JobWorkerPool]:
+    """Start this process's pool (app startup). No-op when JOBS_ENABLED is off."""
+    global _pool
+    if not settings.JOBS_ENABLED or _pool is not None:
+        return _pool
+    # Registers the handlers
+    import app.jobs.handlers  # noqa: F401
+
+    _pool = JobWorkerPool(
+        get_job_queue(),
+        workers=settings.JOB_WORKERS,
+        stage_limits=parse_stage_limits(settings.JOB_STAGE_CONCURRENCY),
+        poll_interval=settings.JOB_POLL_INTERVAL_SECONDS,
+        retry_base_seconds=settings.JOB_RETRY_BASE_SECONDS,
+    )
+    _pool.start()
+    print(f"[JOBS] {settings.JOB_WORKERS} ingestion workers started ({settings.JOB_STAGE_CONCURRENCY})")
+    return _pool
+
+
+def stop_job_workers() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.stop()
+        _pool = None
@@ -0,0 +1,284 @@
+"""
+Async LLM client layer.
+
+The sync Groq client in groq_client.py blocks whatever thread calls it; on
+the event loop that freezes every other request on the worker for the whole
+completion. This module provides the awaitable equivalents used by chat:
+
+- one pooled httpx.AsyncClient per event loop (keep-alive connections reused
+  across calls)
+- per-call timeout (LLM_TIMEOUT_SECONDS, overridable per call)
+- a semaphore capping in-flight LLM calls per worker (LLM_MAX_CONCURRENCY)
+
+Providers (LLM_PROVIDER):
+- groq:   AsyncGroq at GROQ_BASE_URL (default api.groq.com)
+- openai: any OpenAI-compatible /chat/completions endpoint at LLM_BASE_URL
+          (vLLM, Ollama, a local fake server in tests, ...)
+
+Errors are raised as LLMServiceError, same as the sync client.
+"""
+
+import asyncio
+import json
+from typing import AsyncIterator, Optional
+
+import httpx
+from groq import AsyncGroq
+
+from app.config import settings
+from app.llm.groq_client import LLMServiceError, build_chat_prompt
+from app.llm.completion_cache import cache_key_if_enabled, completion_cache
+
+SYSTEM_PROMPT = "You are a helpful AI assistant."
+
+
+def _messages(prompt: str) -> list:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+
+
+class AsyncLLMClient:
+    """Pooled, concurrency-limited async chat completion client (one per event loop)."""
+
+    def __init__(
+            self,
+            provider: str | None = None,
+            base_url: str | None = None,
+            api_key: str | None = None,
+            timeout: float | None = None,
+            max_concurrency: int | None = None,
+            max_connections: int | None = None,
+    ):
+        self.provider = (provider or settings.LLM_PROVIDER).lower()
+        self.timeout = timeout or settings.LLM_TIMEOUT_SECONDS
+        self._semaphore = asyncio.Semaphore(max_concurrency or settings.LLM_MAX_CONCURRENCY)
+
+        max_connections = max_connections or settings.LLM_MAX_CONNECTIONS
+        self._http = httpx.AsyncClient(
+            timeout=httpx.Timeout(self.timeout, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+
+        if self.provider == "groq":
+            self._groq = AsyncGroq(
+                api_key=api_key or settings.GROQ_API_KEY,
+                base_url=base_url or settings.GROQ_BASE_URL or None,
+                timeout=self.timeout,
+                http_client=self._http,
+            )
+        elif self.provider == "openai":
+            self._base_url = (base_url or settings.LLM_BASE_URL or "").rstrip("/")
+            if not self._base_url:
+                raise ValueError("LLM_BASE_URL must be set when LLM_PROVIDER=openai")
+            self._headers = {"Authorization": f"Bearer {api_key or settings.LLM_API_KEY or ''}"}
+        else:
+            raise ValueError(f"Unknown LLM_PROVIDER: {self.provider}")
+
+    async def complete(
+            self,
+            prompt: str,
+            model: str | None = None,
+            temperature: float = 0.2,
+            max_token: int = 512,
+            timeout: float | None = None,
+    ) -> str:
+        model = model or settings.LLM_MODEL
+        timeout = timeout or self.timeout
+        async with self._semaphore:
+            try:
+                if self.provider == "groq":
+                    response = await self._groq.chat.completions.create(
+                        model=model,
+                        messages=_messages(prompt),
+                        temperature=temperature,
+                        max_tokens=max_token,
+                        timeout=timeout,
+                    )
+                    return response.choices[0].message.content
+
+                response = await self._http.post(
+                    f"{self._base_url}/chat/completions",
+                    headers=self._headers,
+                    json={
+                        "model": model,
+                        "messages": _messages(prompt),
+                        "temperature": temperature,
+                        "max_tokens": max_token,
+                    },
+                    timeout=timeout,
+                )
+                response.raise_for_status()
+                return response.json()["choices"][0]["message"]["content"]
+            except Exception as e:
+                raise LLMServiceError(f"LLM Error: {str(e)}")
+
+    async def stream(
+            self,
+            prompt: str,
+            model: str | None = None,
+            temperature: float = 0.2,
+            max_token: int = 512,
+            timeout: float | None = None,
+    ) -> AsyncIterator[str]:
+        """Yield content deltas; the concurrency slot is held until the stream ends."""
+        model = model or settings.LLM_MODEL
+        timeout = timeout or self.timeout
+        async with self._semaphore:
+            try:
+                if self.provider == "groq":
+                    stream = await self._groq.chat.completions.create(
+                        model=model,
+                        messages=_messages(prompt),
+                        temperature=temperature,
+                        max_tokens=max_token,
+                        timeout=timeout,
+                        stream=True,
+                    )
+                    try:
+                        async for chunk in stream:
+                            if chunk.choices and chunk.choices[0].delta.content:
+                                yield chunk.choices[0].delta.content
+                    finally:
+                        await stream.close()
+                    return
+
+                async with self._http.stream(
+                    "POST",
+                    f"{self._base_url}/chat/completions",
+                    headers=self._headers,
+                    json={
+                        "model": model,
+                        "messages": _messages(prompt),
+                        "temperature": temperature,
+                        "max_tokens": max_token,
+                        "stream": True,
+                    },
+                    timeout=timeout,
+                ) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            break
+                        choices = json.loads(data).get("choices") or []
+                        delta = (choices[0].get("delta") or {}).get("content") if choices else None
+                        if delta:
+                            yield delta
+            except LLMServiceError:
+                raise
+            except Exception as e:
+                raise LLMServiceError(f"LLM Error: {str(e)}")
+
+    async def aclose(self):
+        await self._http.aclose()
+
+
+# -------------- Per-event-loop singleton --------------#
+
+_clients: dict = {}
+
+
+def get_async_llm_client() -> AsyncLLMClient:
+    """
+    Pooled client for the running event loop.
+
+    httpx connections and asyncio primitives are bound to the loop that
+    created them, so each loop (one per worker in production; one per
+    asyncio.run in scripts/tests) gets its own client.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        # Drop clients of loops that are gone
+        for old_loop in [l for l in _clients if l.is_closed()]:
+            del _clients[old_loop]
+        client = AsyncLLMClient()
+        _clients[loop] = client
+    return client
+
+
+async def close_async_llm_client():
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+# -------------- Async equivalents of groq_client helpers --------------#
+
+async def generate_completion_async(
+        prompt: str,
+        model: str | None = None,
+        temperature: float = 0.2,
+        max_token: int = 512,
+        timeout: float | None = None,
+        use_cache: bool = True,
+        cacheable: bool = True,
+) -> str:
+    model = model or settings.LLM_MODEL
+    cache_key = cache_key_if_enabled(prompt, model, temperature, max_token, use_cache, cacheable)
+    if cache_key:
+        cached = completion_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    answer = await get_async_llm_client().complete(
+        prompt, model=model, temperature=temperature, max_token=max_token, timeout=timeout,
+    )
+    if cache_key:
+        completion_cache.put(cache_key, answer)
+    return answer
+
+
+async def call_llm_async(
+        question: str,
+        context: Optional[str],
+        history: list,
+        low_confidence: bool = False,
+        use_cache: bool = True,
+        intent: Optional[str] = None,
+        timeout: float | None = None,
+) -> str:
+    """Awaitable call_llm: same prompt, does not block the event loop."""
+    return await generate_completion_async(
+        build_chat_prompt(question, context, history, low_confidence, intent),
+        timeout=timeout,
+        use_cache=use_cache,
+        cacheable=not history,
+    )
+
+
+async def stream_llm_async(
+        question: str,
+        context: Optional[str],
+        history: list,
+        low_confidence: bool = False,
+        use_cache: bool = True,
+        intent: Optional[str] = None,
+        timeout: float | None = None,
+) -> AsyncIterator[str]:
+    """Awaitable stream_llm: yields answer deltas (a cache hit arrives as one delta)."""
+    prompt = build_chat_prompt(question, context, history, low_confidence, intent)
+    model, temperature, max_token = settings.LLM_MODEL, 0.2, 512
+    cache_key = cache_key_if_enabled(prompt, model, temperature, max_token, use_cache, cacheable=not history)
+    if cache_key:
+        cached = completion_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+    parts = []
+    async for delta in get_async_llm_client().stream(
+            prompt, model=model, temperature=temperature, max_token=max_token, timeout=timeout,
+    ):
+        parts.append(delta)
+        yield delta
+    # Only a stream that ran to completion is cached
+    if cache_key:
+        completion_cache.put(cache_key, "".join(parts))
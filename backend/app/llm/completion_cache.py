@@ -0,0 +1,123 @@
+"""
+Exact-match LLM completion cache.
+
+/api/ask and /api/chat often send Groq a byte-identical prompt: the same
+FAQ over the same retrieved context, or a client retry. Completions are
+cached under a fingerprint of (model, temperature, max tokens, SHA-256 of
+the final prompt), with an LRU bound and a TTL.
+
+Only prompts that are fully determined by question + context belong here.
+Chat prompts embed the conversation history, so callers only cache them
+when the history section is empty (see call_llm / call_llm_async).
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from app.config import settings
+from app.utils.metrics import CACHE_REQUESTS
+
+
+def prompt_fingerprint(prompt: str, model: str, temperature: float, max_token: int) -> str:
+    """Cache key: model + sampling params + hash of the exact prompt text."""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    return f"{model}|t={temperature:.3f}|max={max_token}|{prompt_hash}"
+
+
+class CompletionCache:
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+
+        # key → (created_at, completion), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and now - item[0] > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                item = None
+
+            if item is None:
+                self.misses += 1
+                CACHE_REQUESTS.inc(cache="completion", result="miss")
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            CACHE_REQUESTS.inc(cache="completion", result="hit")
+            return item[1]
+
+    def put(self, key: str, completion: str) -> None:
+        if not completion:
+            return
+        with self._lock:
+            self._entries[key] = (time.time(), completion)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self.bypassed += 1
+        CACHE_REQUESTS.inc(cache="completion", result="bypass")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": settings.COMPLETION_CACHE_ENABLED,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "bypassed": self.bypassed,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+completion_cache = CompletionCache(
+    max_entries=settings.COMPLETION_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.COMPLETION_CACHE_TTL_SECONDS,
+)
+
+
+def cache_key_if_enabled(
+        prompt: str,
+        model: str,
+        temperature: float,
+        max_token: int,
+        use_cache: bool,
+        cacheable: bool = True,
+) -> str | None:
+    """
+    Fingerprint to use for this call, or None when caching is off/bypassed.
+
+    `cacheable=False` marks prompts that are never cached (they embed chat
+    history); only cacheable calls with use_cache=False count as bypasses.
+    """
+    if not settings.COMPLETION_CACHE_ENABLED or not cacheable:
+        return None
+    if not use_cache:
+        completion_cache.record_bypass()
+        return None
+    return prompt_fingerprint(prompt, model, temperature, max_token)
@@ -1,30 +1,52 @@
 from groq import Groq
-from typing import Optional
+from typing import Iterator, Optional
 from app.config import settings
+from app.llm.completion_cache import cache_key_if_enabled, completion_cache
 
 
 
 #-------------- Client Initialization --------------#
 
-_client = Groq(
-    api_key=settings.GROQ_API_KEY,
-    timeout= 15.0,
-)
+_client = None
+
+
+def _get_client() -> Groq:
+    global _client
+    if _client is None:
+        _client = Groq(
+            api_key=settings.GROQ_API_KEY,
+            base_url=settings.GROQ_BASE_URL or None,
+            timeout= 15.0,
+        )
+    return _client
 
 class LLMServiceError(Exception):
     """Raised when LLM call fails safely"""
 
 def generate_completion(
         prompt:str,
-        model: str = "llama-3.1-8b-instant",
+        model: str | None = None,
         temperature: float = 0.2,
         max_token: int = 512,
+        use_cache: bool = True,
+        cacheable: bool = True,
 ) -> str:
     """ 
     Safe Groq LLM call with timeout and Error Handling is done here..
+
+    Identical (prompt, model, temperature, max_token) calls are answered from
+    the completion cache unless use_cache=False. `model` defaults to
+    settings.LLM_MODEL.
     """
+    model = model or settings.LLM_MODEL
+    cache_key = cache_key_if_enabled(prompt, model, temperature, max_token, use_cache, cacheable)
+    if cache_key:
+        cached = completion_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
     try:
-        response = _client.chat.completions.create(
+        response = _get_client().chat.completions.create(
             model=model,
             messages=[
                 {"role": "system", "content": "You are a helpful AI assistant."},
@@ -33,7 +55,10 @@ def generate_completion(
             temperature=temperature,
             max_tokens=max_token,
         )
-        return response.choices[0].message.content
+        answer = response.choices[0].message.content
+        if cache_key:
+            completion_cache.put(cache_key, answer)
+        return answer
     
     except Exception as e:
         # Handle all errors
@@ -42,30 +67,112 @@ def generate_completion(
         )
 
 
-def call_llm(question: str, context: Optional[str], history: list, low_confidence: bool = False) -> str:
+def stream_completion(
+        prompt: str,
+        model: str | None = None,
+        temperature: float = 0.2,
+        max_token: int = 512,
+) -> Iterator[str]:
+    """
+    Streaming variant of generate_completion: yields content deltas as Groq
+    produces them. Errors (including mid-stream ones) raise LLMServiceError.
+    """
+    model = model or settings.LLM_MODEL
+    try:
+        stream = _get_client().chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": "You are a helpful AI assistant."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_token,
+            stream=True,
+        )
+    except Exception as e:
+        raise LLMServiceError(f"LLM Error: {str(e)}")
+
+    try:
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    except Exception as e:
+        raise LLMServiceError(f"LLM Error: {str(e)}")
+    finally:
+        stream.close()
+
+
+def call_llm(
+        question: str,
+        context: Optional[str],
+        history: list,
+        low_confidence: bool = False,
+        use_cache: bool = True,
+        intent: Optional[str] = None,
+) -> str:
     """
     Format question, context, and history into a prompt and call LLM.
     Designed for chat orchestration with multi-turn conversations.
-    Handles knowledge queries (with context), chitchat, and meta-questions.
+    Handles knowledge queries (with context), chitchat, and meta-questions
+    (`intent` from intent.plan_retrieval).
+
+    The prompt embeds recent history, so it is only cached on a session's first turn.
     """
-    history_text = "\n".join([f"{msg['role']}: {msg['content']}" for msg in history[-3:]]) if history else ""
-    question_lower = question.lower().strip()
-    
+    return generate_completion(
+        prompt=build_chat_prompt(question, context, history, low_confidence, intent),
+        use_cache=use_cache,
+        cacheable=not history,
+    )
+
+
+def stream_llm(
+        question: str,
+        context: Optional[str],
+        history: list,
+        low_confidence: bool = False,
+        use_cache: bool = True,
+        intent: Optional[str] = None,
+) -> Iterator[str]:
+    """Same prompt as call_llm, streamed token by token."""
+    prompt = build_chat_prompt(question, context, history, low_confidence, intent)
+    model, temperature, max_token = settings.LLM_MODEL, 0.2, 512
+    cache_key = cache_key_if_enabled(prompt, model, temperature, max_token, use_cache, cacheable=not history)
+    if cache_key:
+        cached = completion_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+    parts = []
+    for delta in stream_completion(prompt, model=model, temperature=temperature, max_token=max_token):
+        parts.append(delta)
+        yield delta
+    # Only a stream that ran to completion is cached
+    if cache_key:
+        completion_cache.put(cache_key, "".join(parts))
+
+
+def build_chat_prompt(
+        question: str,
+        context: Optional[str],
+        history: list,
+        low_confidence: bool = False,
+        intent: Optional[str] = None,
+) -> str:
+    """
+    Build the chat prompt for the three modes: meta-question (summarize
+    history), chitchat (no context) and knowledge (retrieved context).
+    `intent` is the turn's plan_retrieval intent; "meta" selects the
+    history summary when no context was retrieved.
+    """
+    # History arrives already windowed (rolling summary + recent turns, see history_manager)
+    history_text = "\n".join([f"{msg['role']}: {msg['content']}" for msg in history]) if history else ""
+
     # 💬 Meta-question mode: summarize conversation history
-    meta_patterns = [
-        "what have we discussed",
-        "what did we talk about",
-        "tell me about our conversation",
-        "summarize our chat",
-        "recap of our discussion",
-        "what have you told me",
-        "remind me what we discussed",
-        "our conversation",
-    ]
-    
-    is_meta_question = any(pattern in question_lower for pattern in meta_patterns)
-    
-    if context is None and is_meta_question:
+    if context is None and intent == "meta":
         prompt = f"""You are a helpful AI assistant.
 
 CONVERSATION HISTORY (from this chat session):
@@ -82,7 +189,7 @@ INSTRUCTIONS:
 - Don't make up topics we didn't discuss
 
 Provide a clear summary of our conversation:"""
-        return generate_completion(prompt=prompt)
+        return prompt
     
     # 💬 Chitchat mode: no retrieval, conversational responses
     if context is None:
@@ -102,7 +209,7 @@ INSTRUCTIONS:
 - Don't mention documents or retrieval
 
 Respond to the user:"""
-        return generate_completion(prompt=prompt)
+        return prompt
     
     # 📚 Knowledge mode: use retrieved context
     disclaimer_note = (
@@ -144,5 +251,5 @@ WHAT NOT TO DO:
 
 Answer the current question based on the provided context:{disclaimer_note}"""
     
-    return generate_completion(prompt=prompt)
+    return prompt
 
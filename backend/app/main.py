@@ -4,9 +4,17 @@
 from fastapi import FastAPI
 from app.config import settings
 from app.middleware.cors import setup_cors
+from app.middleware.metrics import setup_metrics
 from app.db.qdrant_collections import create_collections
 from app.db.qdrant_client import get_qdrant_client
 from app.llm.groq_client import generate_completion, LLMServiceError
+from app.llm.async_client import close_async_llm_client
+from app.chat.semantic_cache import semantic_cache
+from app.chat.followup_pool import followup_pool
+from app.llm.completion_cache import completion_cache
+from app.jobs.queue import get_job_queue
+from app.jobs.worker import start_job_workers, stop_job_workers
+from app.ingestion.text_ingest import shutdown_pdf_pool
 
 ################## Importing API routers ##################
 from app.api.upload_admin import route as upload_admin_router
@@ -18,6 +26,7 @@ from app.api.upload_audio import router as upload_audio_router
 from app.api.search_audio import router as search_audio_router
 from app.api.chat import router as chat_router
 from app.api.citations import router as citations_router
+from app.api.jobs import router as jobs_router
 ########################################################
 from app.db.session import engine
 from app.db.base import Base
@@ -39,6 +48,9 @@ app = FastAPI(
 #injecing Cors Middleware
 setup_cors(app)
 
+# Prometheus metrics: request middleware + GET /metrics
+setup_metrics(app)
+
 # Registering API routers 
 app.include_router(upload_admin_router)
 app.include_router(auth_router)
@@ -50,6 +62,7 @@ app.include_router(upload_audio_router)
 app.include_router(search_audio_router)
 app.include_router(chat_router)
 app.include_router(citations_router)
+app.include_router(jobs_router)
 
 #################### Startup Event ####################
 
@@ -60,6 +73,17 @@ def startup_event():
 
     create_collections()
 
+    # Ingestion workers (JOBS_ENABLED); picks up jobs left over from a restart
+    start_job_workers()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Release pooled LLM connections of this worker
+    await close_async_llm_client()
+    stop_job_workers()
+    shutdown_pdf_pool()
+
 
 #################### API ROUTES ####################
 
@@ -85,10 +109,27 @@ def qdrant_health():
         "collections": [c.name for c in collections.collections]
     }
 
+@app.get("/health/cache", tags=["Health"])
+def cache_health():
+    return {
+        "status": "ok",
+        "semantic_cache": semantic_cache.stats(),
+        "completion_cache": completion_cache.stats(),
+        "followup_pool": followup_pool.stats(),
+    }
+
+@app.get("/health/jobs", tags=["Health"])
+def jobs_health():
+    return {
+        "status": "ok",
+        "enabled": settings.JOBS_ENABLED,
+        "jobs": get_job_queue().counts(),
+    }
+
 @app.get("/health/llm", tags=["Health"])
 def llm_health():
     try:
-        reply = generate_completion("Say Hello in 3 languages English,Hindi,Japanese", max_token=50)
+        reply = generate_completion("Say Hello in 3 languages English,Hindi,Japanese", max_token=50, use_cache=False)
         return {
             "status":"ok",
             "reply": reply
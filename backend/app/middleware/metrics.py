@@ -0,0 +1,66 @@
+import time
+
+from fastapi import FastAPI, Response
+from starlette.routing import Match
+
+from app.config import settings
+from app.utils.metrics import REGISTRY, HTTP_REQUESTS, HTTP_SECONDS, HTTP_IN_FLIGHT
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (unlike BaseHTTPMiddleware it does not buffer
+    streaming responses), so SSE chat streams are timed to their last byte.
+    Requests are labelled by route template ("/api/citations/{citation_id}"),
+    never by raw path, to keep label cardinality bounded.
+    """
+
+    def __init__(self, app, fastapi_app: FastAPI):
+        self.app = app
+        self.fastapi_app = fastapi_app
+
+    def _endpoint(self, scope) -> str:
+        for route in self.fastapi_app.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", "unmatched")
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = self._endpoint(scope)
+        if endpoint == settings.METRICS_PATH:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(endpoint=endpoint)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec(endpoint=endpoint)
+            HTTP_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint, method=method)
+            HTTP_REQUESTS.inc(endpoint=endpoint, method=method, status=str(status["code"]))
+
+
+def setup_metrics(app: FastAPI):
+    app.add_middleware(MetricsMiddleware, fastapi_app=app)
+
+    @app.get(settings.METRICS_PATH, tags=["Health"], include_in_schema=False)
+    def metrics():
+        if not settings.METRICS_ENABLED:
+            return Response(status_code=404)
+        return Response(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
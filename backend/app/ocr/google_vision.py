@@ -4,12 +4,16 @@ from typing import List, Dict
 
 client = vision.ImageAnnotatorClient()
 
-def extract_text_from_image(image_url: str) -> List[Dict]:
+def extract_text_from_image(image_url: str | None, image_bytes: bytes | None = None) -> List[Dict]:
     """
-    Returns list of OCR blocks with text + bounding boxes
+    Returns list of OCR blocks with text + bounding boxes.
+    Sends `image_bytes` inline when given (no CDN fetch), else the URL.
     """
     image = vision.Image() # creates an empty Vision API image container
-    image.source.image_uri = image_url # Is URL wali image Vision API ko detect/analyze karne ke liye de rahe hain
+    if image_bytes is not None:
+        image.content = image_bytes
+    else:
+        image.source.image_uri = image_url # Is URL wali image Vision API ko detect/analyze karne ke liye de rahe hain
 
     response =  client.text_detection(image=image)
 
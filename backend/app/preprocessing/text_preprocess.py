@@ -1,5 +1,6 @@
 import re
-from typing import List
+from collections import deque
+from typing import Iterable, Iterator, List, Tuple
 
 ################### Preprocessing functions/methods Utilities ###################
 def basic_clean(text:str)->str:
@@ -80,7 +81,48 @@ def preprocess_text(raw_text: str)->str:
    text = remove_headers_footers(text)
    text = normalize_withespace(text)
    return text
-    
 
-        
-      
\ No newline at end of file
+
+def preprocess_pages(
+      pages: Iterable[Tuple[int, str]],
+      min_repeats: int = 3,
+) -> Iterator[Tuple[int, str]]:
+   """
+    Streaming preprocess_text: (page_number, raw_text) in, cleaned pages out.
+
+    Header/footer removal needs line counts across pages, so they are
+    counted as pages stream past and the last `min_repeats` pages are held
+    back: a header repeated on every page has reached the threshold before
+    the first page is emitted. Only short lines (the only ones that can be
+    dropped) are counted. Pages left empty are skipped.
+    """
+   line_freq = {}
+   window = deque()
+
+   def _emit(page_number, text):
+      kept = []
+      for line in text.splitlines():
+         stripped = line.strip()
+         if line_freq.get(stripped, 0) >= min_repeats and len(stripped) < 80:
+            continue
+         kept.append(line)
+      return page_number, normalize_withespace("\n".join(kept))
+
+   for page_number, raw_text in pages:
+      text = basic_clean(raw_text)
+      for line in text.splitlines():
+         stripped = line.strip()
+         if stripped and len(stripped) < 80:
+            line_freq[stripped] = line_freq.get(stripped, 0) + 1
+      window.append((page_number, text))
+
+      if len(window) > min_repeats:
+         page = _emit(*window.popleft())
+         if page[1]:
+            yield page
+
+   while window:
+      page = _emit(*window.popleft())
+      if page[1]:
+         yield page
+
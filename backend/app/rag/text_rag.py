@@ -43,7 +43,7 @@ Your answer:
 """.strip()
 
 
-def generate_rag_answer(query: str, chunks: List[Dict]) -> Dict:
+def generate_rag_answer(query: str, chunks: List[Dict], use_cache: bool = True) -> Dict:
     if not chunks:
         return {
             "answer": "I don't know based on the provided documents.",
@@ -51,7 +51,7 @@ def generate_rag_answer(query: str, chunks: List[Dict]) -> Dict:
         }
 
     prompt = build_rag_prompt(query, chunks)
-    answer = generate_completion(prompt)
+    answer = generate_completion(prompt, use_cache=use_cache)
 
     citations = []
     for ch in chunks:
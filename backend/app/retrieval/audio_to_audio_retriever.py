@@ -7,16 +7,25 @@ def retrieve_similar_audio(
         audio_url,
         owner_id,
         top_k=5,
+        transcription: dict | None = None,
+        query_vector=None,
 ):
+    """
+    `transcription` / `query_vector` are the per-turn audio analysis
+    (app/chat/media_analysis.py); when given, no ASR / embedding runs here.
+    """
     # transcribe_audio returns dict with 'transcript' key
-    result = transcribe_audio(audio_url)
+    result = transcription or transcribe_audio(audio_url)
     transcript = result.get("transcript", "")
     
     if not transcript or len(transcript.strip()) < 5:
         return []  # Empty or too short transcript
     
-    embedder = HFBgeM3Embedder()
-    vec = embedder.embed_query(transcript)
+    if query_vector is not None:
+        vec = query_vector
+    else:
+        embedder = HFBgeM3Embedder()
+        vec = embedder.embed_query(transcript)
 
     client = get_qdrant_client()
     result = client.query_points(
@@ -8,15 +8,24 @@ def retrieve_image_from_audio(
         audio_url: str,
         owner_id: str,
         top_k=5,
+        transcription: dict | None = None,
+        query_vector=None,
 ) :
+    """
+    `transcription` / `query_vector` are the per-turn audio analysis
+    (app/chat/media_analysis.py); when given, no ASR / embedding runs here.
+    """
     # transcribe_audio returns dict with 'transcript' key
-    result_dict = transcribe_audio(audio_url)
+    result_dict = transcription or transcribe_audio(audio_url)
     transcript = result_dict.get("transcript", "")
     if not transcript or len(transcript.strip()) < 5:
         return []
     
-    embedder = HFBgeM3Embedder()
-    text_vec = embedder.embed_query(transcript)
+    if query_vector is not None:
+        text_vec = query_vector
+    else:
+        embedder = HFBgeM3Embedder()
+        text_vec = embedder.embed_query(transcript)
 
     client = get_qdrant_client()
     result = client.query_points(
@@ -7,16 +7,25 @@ def retrieve_text_from_audio(
         audio_url,
         owner_id,
         top_k=5,
+        transcription: dict | None = None,
+        query_vector=None,
 ):
+    """
+    `transcription` / `query_vector` are the per-turn audio analysis
+    (app/chat/media_analysis.py); when given, no ASR / embedding runs here.
+    """
     # transcribe_audio returns dict with 'transcript' key
-    result = transcribe_audio(audio_url)
-    transcript = result.get("transcript", "")
+    transcription = transcription or transcribe_audio(audio_url)
+    transcript = transcription.get("transcript", "")
     
     if not transcript or len(transcript.strip()) < 5:
         return []  # Empty or too short transcript
     
-    embedder = HFBgeM3Embedder()
-    vec = embedder.embed_query(transcript)
+    if query_vector is not None:
+        vec = query_vector
+    else:
+        embedder = HFBgeM3Embedder()
+        vec = embedder.embed_query(transcript)
 
     client = get_qdrant_client()
     result = client.query_points(
@@ -41,7 +50,7 @@ def retrieve_text_from_audio(
         "filename": "[Uploaded Audio]",
         "page": None,
         "score": 1.0,
-        "timestamps": result.get("segments", []) if isinstance(result, dict) else []
+        "timestamps": transcription.get("segments") or [],
     }
     
     db_results = [
@@ -10,14 +10,23 @@ def retrieve_audio_from_image(
         image_url: str,
         owner_id: str,
         top_k=5,
+        embedding: dict | None = None,
+        ocr_vector=None,
 ):
-    emb  =  embed_image(image_url)
+    """
+    `embedding` / `ocr_vector` are the per-turn image analysis
+    (app/chat/media_analysis.py); when given, no OCR / CLIP / BGE runs here.
+    """
+    emb  =  embedding or embed_image(image_url)
     ocr_text =  emb.get("ocr_text")
     if not ocr_text:
         return []
     
-    text_embedder = HFBgeM3Embedder()
-    text_vec = text_embedder.embed_query(ocr_text)
+    if ocr_vector is not None:
+        text_vec = ocr_vector
+    else:
+        text_embedder = HFBgeM3Embedder()
+        text_vec = text_embedder.embed_query(ocr_text)
 
     client = get_qdrant_client()
     results = client.query_points(
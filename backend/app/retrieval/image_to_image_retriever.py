@@ -10,6 +10,10 @@ _text_embedder = None  # Lazy init to reuse across calls
 _ocr_cache = {}
 MAX_OCR_CACHE = 1000
 
+# Rerank blend: CLIP image similarity vs OCR text similarity (measured by app/eval/retrieval_eval.py)
+IMAGE_SCORE_WEIGHT = 0.75
+OCR_SCORE_WEIGHT = 0.25
+
 
 def _get_text_embedder() -> HFBgeM3Embedder:
     global _text_embedder
@@ -45,10 +49,17 @@ def retrieve_similar_images(
         owner_id: str,
     top_k: int = 5,
     min_score: float | None = None,
+    embedding: dict | None = None,
+    ocr_vector: List[float] | None = None,
         ) -> List[Dict]:
+    """
+    `embedding` / `ocr_vector` are the per-turn image analysis
+    (app/chat/media_analysis.py); when given, no OCR / CLIP / BGE runs for
+    the query image.
+    """
     client  =  get_qdrant_client()
 
-    emb = embed_image(image_url) 
+    emb = embedding or embed_image(image_url) 
 
     if emb["source"] in ["ocr","ocr_fallback"]:
         return []
@@ -96,7 +107,12 @@ def retrieve_similar_images(
     query_ocr = emb.get("ocr_text") or ""
     use_text = _good_ocr(query_ocr)
     text_embedder = _get_text_embedder() if use_text else None
-    query_text_vec = _normalize(text_embedder.embed_query(query_ocr)) if text_embedder else None
+    if not text_embedder:
+        query_text_vec = None
+    elif ocr_vector is not None:
+        query_text_vec = _normalize(ocr_vector)
+    else:
+        query_text_vec = _normalize(text_embedder.embed_query(query_ocr))
 
     reranked = []
     for p in result.points:
@@ -106,7 +122,7 @@ def retrieve_similar_images(
         if text_embedder and _good_ocr(cand_text):
             cand_vec = _embed_cached(cand_text, text_embedder)
             text_score = _cosine(query_text_vec, cand_vec)
-        combined = 0.75 * base_score + 0.25 * text_score if text_score > 0 else base_score
+        combined = IMAGE_SCORE_WEIGHT * base_score + OCR_SCORE_WEIGHT * text_score if text_score > 0 else base_score
 
         reranked.append({
             "id": p.id,
@@ -39,15 +39,24 @@ def retrieve_text_from_image(
         owner_id:str,
     top_k:int =5,
     min_score: float | None = None,
+    embedding: dict | None = None,
+    ocr_vector: List[float] | None = None,
 )-> List[Dict]:
+    """
+    `embedding` / `ocr_vector` are the per-turn image analysis
+    (app/chat/media_analysis.py); when given, no OCR / CLIP / BGE runs here.
+    """
     client = get_qdrant_client()
-    emb =  embed_image(image_url)
+    emb =  embedding or embed_image(image_url)
 
     ocr_text = emb.get("ocr_text")
     if not ocr_text:
         return []
-    text_embedder = _get_text_embedder()
-    query_vector = text_embedder.embed_query(ocr_text)
+    if ocr_vector is not None:
+        query_vector = ocr_vector
+    else:
+        text_embedder = _get_text_embedder()
+        query_vector = text_embedder.embed_query(ocr_text)
 
     owner_filter =  Filter(
         must = [
@@ -0,0 +1,182 @@
+"""
+Neighbour-chunk context expansion.
+
+Chunk ids are deterministic (UUIDv5 of owner_id:filename:page:chunk_index),
+so the ids of a hit's neighbours can be computed without another vector
+search. All neighbour ids for the final hits are fetched in ONE batched
+`client.retrieve` call, and the overlapping windows are stitched back into
+a single passage per page span.
+"""
+
+from typing import Dict, List, Tuple
+from app.db.qdrant_client import get_qdrant_client
+from app.chunking.text_chunker import generate_chunk_id, CHUNK_OVERLAP
+
+COLLECTION = "text_collection"
+
+# Anchor length (chars) used to locate where the next chunk starts inside the previous one
+_ANCHOR_CHARS = 64
+
+
+def _chunk_key(metadata: dict) -> Tuple[str, int, int] | None:
+    filename = metadata.get("filename")
+    page = metadata.get("page")
+    chunk_index = metadata.get("chunk_index")
+    if filename is None or page is None or chunk_index is None:
+        return None
+    return filename, int(page), int(chunk_index)
+
+
+def stitch_chunks(
+        prev_text: str,
+        next_text: str,
+        next_token_count: int | None,
+        overlap: int = CHUNK_OVERLAP,
+) -> str:
+    """
+    Join two consecutive chunks, dropping the region they share.
+
+    Consecutive chunks share `overlap` tokens. `token_count` gives the
+    chars-per-token ratio of the next chunk, which bounds where in the tail of
+    `prev_text` the shared region can start.
+    """
+    if not prev_text:
+        return next_text or ""
+    if not next_text:
+        return prev_text
+
+    token_count = next_token_count or 0
+    if token_count <= 0:
+        return f"{prev_text}\n{next_text}"
+
+    shared_tokens = min(overlap, token_count)
+    chars_per_token = len(next_text) / token_count
+    shared_chars = int(shared_tokens * chars_per_token)
+
+    anchor = next_text[:min(_ANCHOR_CHARS, max(16, shared_chars // 2))]
+    # Look only in the tail where the overlap can actually be (2x slack for tokenizer variance)
+    search_from = max(0, len(prev_text) - 2 * shared_chars - len(anchor))
+    pos = prev_text.find(anchor, search_from)
+    if pos == -1:
+        return f"{prev_text}\n{next_text}"
+
+    return prev_text[:pos] + next_text
+
+
+def expand_with_neighbors(
+        hits: List[Dict],
+        owner_id: str,
+        window: int = 1,
+) -> List[Dict]:
+    """
+    Widen each text hit with its ±`window` neighbour chunks on the same page.
+
+    Hits whose spans touch or overlap on the same page are merged into one
+    passage (keeping the best-ranked hit's score), so the LLM never sees the
+    same text twice.
+
+    Args:
+        hits: Output of retrieve_text_chunks (each has "id", "text", "metadata")
+        owner_id: Owner of the hits; neighbour ids are derived from it
+        window: Number of neighbours to pull on each side (0 disables)
+
+    Returns:
+        New list of hits with stitched "text" and a "chunk_span" [lo, hi]
+    """
+    if window <= 0 or not hits:
+        return hits
+
+    hit_keys = {}
+    wanted_ids = {}
+    for hit in hits:
+        key = _chunk_key(hit.get("metadata") or {})
+        if key is None:
+            continue
+        hit_keys[hit["id"]] = key
+        filename, page, chunk_index = key
+        for idx in range(max(0, chunk_index - window), chunk_index + window + 1):
+            if idx == chunk_index:
+                continue
+            point_id = generate_chunk_id(owner_id=owner_id, filename=filename, page=page, chunk_index=idx)
+            wanted_ids[point_id] = (filename, page, idx)
+
+    # Payloads we already have from the search
+    chunks: Dict[Tuple[str, int, int], dict] = {
+        key: {**(hit.get("metadata") or {}), "text": hit.get("text")}
+        for hit in hits
+        for key in [hit_keys.get(hit["id"])]
+        if key is not None
+    }
+
+    missing = [pid for pid, key in wanted_ids.items() if key not in chunks]
+    if missing:
+        client = get_qdrant_client()
+        points = client.retrieve(
+            collection_name=COLLECTION,
+            ids=missing,
+            with_payload=True,
+            with_vectors=False,
+        )
+        for p in points:
+            payload = p.payload or {}
+            if payload.get("owner_id") != owner_id:
+                continue
+            key = _chunk_key(payload)
+            if key is not None:
+                chunks[key] = payload
+
+    expanded: List[Dict] = []
+    spans: Dict[Tuple[str, int], List[Dict]] = {}  # (filename, page) → emitted items
+
+    for hit in hits:
+        key = hit_keys.get(hit["id"])
+        if key is None:
+            expanded.append(hit)
+            continue
+
+        filename, page, chunk_index = key
+
+        # Grow contiguously outwards; stop at the first missing neighbour
+        lo = chunk_index
+        while lo - 1 >= chunk_index - window and (filename, page, lo - 1) in chunks:
+            lo -= 1
+        hi = chunk_index
+        while hi + 1 <= chunk_index + window and (filename, page, hi + 1) in chunks:
+            hi += 1
+
+        # Merge with every emitted passage on the same page that the span
+        # touches; a hit can bridge two passages ([0,1] + [1,3] + [3,4])
+        page_items = spans.setdefault((filename, page), [])
+        touching = [
+            item for item in page_items
+            if lo <= item["chunk_span"][1] + 1 and hi >= item["chunk_span"][0] - 1
+        ]
+        if not touching:
+            item = {**hit, "chunk_span": [lo, hi]}
+            page_items.append(item)
+            page_items.sort(key=lambda it: it["chunk_span"][0])
+            expanded.append(item)
+            continue
+
+        # The best-ranked passage (emitted first) absorbs the others
+        keep = next(it for it in expanded if any(it is t for t in touching))
+        keep["chunk_span"] = [
+            min([lo] + [it["chunk_span"][0] for it in touching]),
+            max([hi] + [it["chunk_span"][1] for it in touching]),
+        ]
+        absorbed = [it for it in touching if it is not keep]
+        if absorbed:
+            page_items[:] = [it for it in page_items if not any(it is a for a in absorbed)]
+            expanded = [it for it in expanded if not any(it is a for a in absorbed)]
+
+    # Stitch final text once spans are settled
+    for (filename, page), items in spans.items():
+        for item in items:
+            lo, hi = item["chunk_span"]
+            text = ""
+            for idx in range(lo, hi + 1):
+                payload = chunks[(filename, page, idx)]
+                text = stitch_chunks(text, payload.get("text") or "", payload.get("token_count"))
+            item["text"] = text
+
+    return expanded
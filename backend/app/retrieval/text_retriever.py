@@ -70,12 +70,19 @@ from qdrant_client.models import Filter, FieldCondition, MatchValue, Prefetch, S
 from app.db.qdrant_client import get_qdrant_client
 from app.embeddings.base import EmbeddingModel
 from app.embeddings.sparse.tfidf import TfidfSparseEncoder
+from app.retrieval.mmr import mmr_select, DEFAULT_FETCH_MULTIPLIER
+from app.retrieval.neighbor_expansion import expand_with_neighbors
 
 COLLECTION = "text_collection"
 
 # RRF (Reciprocal Rank Fusion) constant
 RRF_K = 60  # Standard RRF constant (higher = more weight to lower ranks)
 
+# Tunables (measured by app/eval/retrieval_eval.py)
+PREFETCH_MULTIPLIER = 2  # hybrid prefetch depth per branch = limit * PREFETCH_MULTIPLIER
+MIN_SCORE_SHORT = 0.25   # queries of <= 2 words
+MIN_SCORE_LONG = 0.28
+
 
 # -------------------------------
 # 🔍 Entity detection helper
@@ -98,6 +105,14 @@ def _normalize_score(score: Any) -> float | None:
     return float(score)
 
 
+def _dense_vector(point) -> List[float] | None:
+    """Pull the named "dense" vector off a point fetched with with_vectors=["dense"]"""
+    vector = point.vector
+    if isinstance(vector, dict):
+        return vector.get("dense")
+    return vector
+
+
 def _reciprocal_rank_fusion(
     dense_results: List[Dict],
     sparse_results: List[Dict],
@@ -230,11 +245,25 @@ def retrieve_text_chunks(
     owner_id: str,
     embedder: EmbeddingModel,
     top_k: int = 5,
+    use_mmr: bool = False,
+    mmr_lambda: float | None = None,
+    expand_neighbors: int = 0,
+    query_vector: List[float] | None = None,
 ) -> List[Dict]:
     """
     Simple hybrid search optimized for multimodal consistency.
     Uses dense vectors with optional sparse boost when available.
     Returns cosine scores (0.2-0.7) consistent with image/audio retrieval.
+
+    When `use_mmr` is set, a wider candidate pool is fetched together with the
+    dense vectors and diversified with MMR so overlapping neighbour chunks do
+    not crowd out the top_k.
+
+    When `expand_neighbors` > 0, each final hit is widened with its ±N
+    neighbour chunks (one batched point lookup, no extra vector search).
+
+    `query_vector` lets callers that already embedded the query (e.g. the chat
+    semantic cache) skip a second embedding pass.
     """
     if not query.strip():
         return []
@@ -251,7 +280,11 @@ def retrieve_text_chunks(
         ]
     )
 
-    dense_vec = embedder.embed_query(query)
+    dense_vec = query_vector if query_vector is not None else embedder.embed_query(query)
+
+    # MMR needs a larger pool plus the dense vectors of every candidate
+    limit = top_k * DEFAULT_FETCH_MULTIPLIER if use_mmr else top_k
+    with_vectors = ["dense"] if use_mmr else False
     
     # Use sparse boost if TF-IDF is fitted, otherwise pure dense
     if tfidf.is_fitted():
@@ -268,20 +301,20 @@ def retrieve_text_chunks(
                 Prefetch(
                     query=dense_vec,
                     using="dense",
-                    limit=top_k * 2,
+                    limit=limit * PREFETCH_MULTIPLIER,
                 ),
                 Prefetch(
                     query=sparse_vec,
                     using="sparse",
-                    limit=top_k * 2,
+                    limit=limit * PREFETCH_MULTIPLIER,
                 ),
             ],
             query=dense_vec,
             using="dense",
             query_filter=owner_filter,
-            limit=top_k,
+            limit=limit,
             with_payload=True,
-            with_vectors=False,
+            with_vectors=with_vectors,
         )
     else:
         # Dense-only fallback
@@ -290,12 +323,13 @@ def retrieve_text_chunks(
             query=dense_vec,
             using="dense",
             query_filter=owner_filter,
-            limit=top_k,
+            limit=limit,
             with_payload=True,
-            with_vectors=False,
+            with_vectors=with_vectors,
         )
 
     hits = []
+    vectors = []
     for point in result.points:
         score = _normalize_score(point.score)
         hits.append({
@@ -304,13 +338,31 @@ def retrieve_text_chunks(
             "text": point.payload.get("text"),
             "metadata": point.payload,
         })
+        if use_mmr:
+            vectors.append(_dense_vector(point))
 
     # Relaxed thresholds - consistent with image/audio retrieval
     # Shorter queries naturally have lower scores
-    MIN_SCORE = 0.25 if len(query.split()) <= 2 else 0.28
+    MIN_SCORE = MIN_SCORE_SHORT if len(query.split()) <= 2 else MIN_SCORE_LONG
     
-    filtered = [h for h in hits if h["score"] is None or h["score"] >= MIN_SCORE]
-    return filtered or hits
+    keep = [i for i, h in enumerate(hits) if h["score"] is None or h["score"] >= MIN_SCORE]
+    keep = keep or list(range(len(hits)))
+
+    if use_mmr and keep and all(vectors[i] is not None for i in keep):
+        picked = mmr_select(
+            dense_vec,
+            [vectors[i] for i in keep],
+            top_k=top_k,
+            lambda_mult=mmr_lambda,
+        )
+        final = [hits[keep[j]] for j in picked]
+    else:
+        final = [hits[i] for i in keep][:top_k]
+
+    if expand_neighbors > 0:
+        final = expand_with_neighbors(final, owner_id, window=expand_neighbors)
+
+    return final
 
 
 # ==========================================
@@ -9,9 +9,13 @@ def retrieve_audio_from_text(
         query: str,
         owner_id:str,
         top_k=5,
+        query_vector=None,
 ):
-    embedder = _embedder or HFBgeM3Embedder()
-    vec = embedder.embed_query(query)
+    if query_vector is None:
+        embedder = _embedder or HFBgeM3Embedder()
+        vec = embedder.embed_query(query)
+    else:
+        vec = query_vector
     client = get_qdrant_client()
     result = client.query_points(
         collection_name=AUDIO_COLLECTION,
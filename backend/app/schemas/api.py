@@ -87,10 +87,13 @@ class ChatResponse(BaseModel):
     - session_id: ID to reuse for multi-turn conversation
     - answer: LLM-generated answer with optional citations [1], [2], etc.
     - citations: List of referenced sources; maps [1] in answer to actual file/page/etc.
+    - degraded_stages: Stages skipped or cut short by the request deadline
+      (e.g. "ocr", "image_to_text", "llm"); empty when the turn ran fully
     """
     session_id: str
     answer: str
     citations: List[Citation] = []
+    degraded_stages: List[str] = []
     
     class Config:
         json_schema_extra = {
@@ -100,7 +103,8 @@ class ChatResponse(BaseModel):
                 "citations": [
                     {"id": 1, "modality": "image", "file_id": "sunset.jpg", "page": None, "timestamp": None},
                     {"id": 2, "modality": "text", "file_id": "physics.pdf", "page": 3, "timestamp": None}
-                ]
+                ],
+                "degraded_stages": []
             }
         }
 
@@ -121,6 +125,40 @@ class EndSessionResponse(BaseModel):
         }
 
 
+class JobStatusResponse(BaseModel):
+    """
+    Status of a background ingestion job (GET /api/jobs/{job_id}).
+    """
+    job_id: str
+    kind: str  # "document" | "audio"
+    status: str  # "queued" | "running" | "succeeded" | "failed"
+    stage: Optional[str] = None  # step currently running (extract, chunk, embed, upsert, transcribe)
+    progress: dict = {}  # pages, chunks, segments, vectors
+    attempts: int
+    max_attempts: int
+    error: Optional[str] = None  # last attempt's error
+    result: Optional[dict] = None  # indexing summary once succeeded
+    created_at: str
+    updated_at: str
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "job_id": "6f1c2a0e-8d4b-4c3e-9a57-2f0e1b7d9c11",
+                "kind": "document",
+                "status": "running",
+                "stage": "embed",
+                "progress": {"pages": 42, "chunks": 180, "vectors": 128},
+                "attempts": 1,
+                "max_attempts": 3,
+                "error": None,
+                "result": None,
+                "created_at": "2026-01-12T10:15:03",
+                "updated_at": "2026-01-12T10:15:41"
+            }
+        }
+
+
 # ============================================================
 # LEGACY REQUEST SCHEMAS
 # ============================================================
@@ -128,4 +166,6 @@ class EndSessionResponse(BaseModel):
 class AskRequest(BaseModel):
     query: str
     owner_id: str
+    # false forces a fresh LLM answer (skips the completion cache)
+    use_cache: bool = True
     
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+Per-request deadline shared by every stage of a chat turn.
+
+One Deadline is created per request (from the X-Request-Timeout header or
+the endpoint's configured budget) and passed down. Each stage asks it for a
+timeout instead of using its own fixed one:
+
+    timeout = deadline.stage_timeout(cap=30, reserve=settings.DEADLINE_LLM_RESERVE_SECONDS)
+    if timeout <= 0:
+        deadline.skip("image_to_text")        # out of time: don't start it
+    ...
+    except asyncio.TimeoutError:
+        deadline.skip("image_to_text")        # started, but cut short
+
+`reserve` keeps time back for later stages (retrieval leaves room for the
+LLM call). Stages that were cut are collected in `degraded_stages` and
+returned to the client.
+"""
+
+import time
+from typing import List, Optional
+
+from app.config import settings
+from app.utils.metrics import DEGRADED_STAGES
+
+
+class Deadline:
+    def __init__(self, budget_seconds: float, clock=time.monotonic):
+        self.budget_seconds = budget_seconds
+        self._clock = clock
+        self.expires_at = clock() + budget_seconds
+        self.degraded_stages: List[str] = []
+
+    @classmethod
+    def from_header(cls, header_value: Optional[str], default_seconds: float) -> "Deadline":
+        """
+        Budget from an X-Request-Timeout header (seconds), falling back to the
+        endpoint default; clamped to DEADLINE_MAX_SECONDS.
+        """
+        budget = default_seconds
+        if header_value:
+            try:
+                budget = float(header_value)
+            except ValueError:
+                pass
+        if budget <= 0:
+            budget = default_seconds
+        return cls(min(budget, settings.DEADLINE_MAX_SECONDS))
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - self._clock())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def stage_timeout(self, cap: Optional[float] = None, reserve: float = 0.0) -> float:
+        """
+        Time a stage may use: what is left after `reserve`, at most `cap`.
+        <= 0 means the stage should be skipped.
+        """
+        budget = self.remaining() - reserve
+        if cap is not None:
+            budget = min(budget, cap)
+        return budget
+
+    def skip(self, stage: str) -> None:
+        """Record a stage that was skipped or cut short."""
+        if stage not in self.degraded_stages:
+            self.degraded_stages.append(stage)
+            DEGRADED_STAGES.inc(stage=stage)
+            print(f"[WARN] Deadline: '{stage}' cut ({self.remaining():.2f}s left of {self.budget_seconds:.1f}s)")
@@ -0,0 +1,302 @@
+"""
+In-process Prometheus metrics (text exposition format, no client library).
+
+Counters, gauges and histograms with labels, rendered at GET /metrics
+(app/middleware/metrics.py). Every update first checks
+settings.METRICS_ENABLED, and timed() hands out a shared no-op context
+manager when metrics are off, so instrumented code costs one attribute
+lookup per call site in that case.
+
+Values are per worker process: scrape each worker (or run one worker per
+container) as usual for multi-process Prometheus setups.
+
+Usage:
+    with timed(STAGE_SECONDS, stage="context_build", modality="text"):
+        ...
+    STAGE_SECONDS.observe(elapsed, stage="retrieval", modality="image")
+    CACHE_REQUESTS.inc(cache="semantic", result="hit")
+"""
+
+import bisect
+import math
+import threading
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from app.config import settings
+
+# Seconds; chat stages range from sub-millisecond cache lookups to LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...], extra: Sequence[Tuple[str, str]] = ()) -> str:
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if not settings.METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{self._labels(k)} {_format_value(v)}" for k, v in self._values.items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if not settings.METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        if not settings.METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{self._labels(k)} {_format_value(v)}" for k, v in self._values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Sequence[str] = (),
+            buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        if not settings.METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # [per-bucket counts (+Inf last), sum, count]
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self._values.get(self._key(labels))
+        return series[2] if series else 0
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, (bucket_counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), bucket_counts):
+                cumulative += n
+                le = self._labels(key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{self._labels(key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        """Reset all values (tests)."""
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+REGISTRY = Registry()
+
+
+# ============================================================
+# TIMING HELPERS
+# ============================================================
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+def timed(histogram: Histogram, **labels):
+    """Context manager observing the block's wall time (no-op when metrics are off)."""
+    if not settings.METRICS_ENABLED:
+        return _NOOP_TIMER
+    return _Timer(histogram, labels)
+
+
+def turn_modality(image=None, audio=None) -> str:
+    """Modality label of a chat/search request from its uploads."""
+    if image and audio:
+        return "image+audio"
+    if image:
+        return "image"
+    if audio:
+        return "audio"
+    return "text"
+
+
+# ============================================================
+# METRICS
+# ============================================================
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "documind_http_requests_total",
+    "HTTP requests by route template, method and status code.",
+    ["endpoint", "method", "status"],
+))
+HTTP_SECONDS = REGISTRY.register(Histogram(
+    "documind_http_request_duration_seconds",
+    "HTTP request latency until the last response byte (streams included).",
+    ["endpoint", "method"],
+))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "documind_http_requests_in_flight",
+    "HTTP requests currently being served.",
+    ["endpoint"],
+))
+
+CHAT_TURNS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "documind_chat_turns_in_flight",
+    "Chat turns currently being processed.",
+    ["endpoint", "modality"],
+))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "documind_stage_duration_seconds",
+    "Chat pipeline stage latency (session, normalize, embed, retrieval, context_build, llm, llm_first_token).",
+    ["stage", "modality"],
+))
+MODEL_SECONDS = REGISTRY.register(Histogram(
+    "documind_model_inference_seconds",
+    "Model inference latency (ocr, clip, asr, bge_m3) by backend.",
+    ["model", "backend"],
+))
+RETRIEVER_SECONDS = REGISTRY.register(Histogram(
+    "documind_retriever_duration_seconds",
+    "Latency of each retriever's vector search.",
+    ["retriever"],
+))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "documind_cache_requests_total",
+    "Cache lookups by cache and result (hit, miss, bypass).",
+    ["cache", "result"],
+))
+RETRIEVAL_SECONDS_SAVED = REGISTRY.register(Counter(
+    "documind_retrieval_seconds_saved_total",
+    "Estimated retrieval time saved by reusing an earlier retrieval (fresh time minus reuse time).",
+    ["cache"],
+))
+PDF_PAGE_SECONDS = REGISTRY.register(Histogram(
+    "documind_pdf_page_extract_seconds",
+    "PDF text extraction time per page, measured in the extracting process (serial or parallel).",
+    ["mode"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+))
+DEGRADED_STAGES = REGISTRY.register(Counter(
+    "documind_deadline_degraded_stages_total",
+    "Stages skipped or cut short because the request deadline ran out.",
+    ["stage"],
+))
@@ -0,0 +1,75 @@
+"""
+Shared tokenizer helpers.
+
+cl100k_base approximates the LLM's tokens for context / history budgets.
+The encoding is loaded once per process, and counts of recurring strings
+(chunks that come back turn after turn) are memoized.
+
+Chunks are cut with the embedding model's own tokenizer (get_chunk_tokenizer),
+so a chunk's stored `token_count` is usually in BGE-M3 (XLM-R) tokens. The
+payload's `token_count_tokenizer` names the tokenizer that produced it; the
+context builder only uses a stored count as the budget cost when it is a
+cl100k count (XLM-R and cl100k differ several-fold on e.g. Devanagari).
+"""
+
+from functools import lru_cache
+
+import tiktoken
+
+from app.config import settings
+
+ENCODING_NAME = "cl100k_base"
+
+# Values of a chunk's `token_count_tokenizer` (and of CHUNK_TOKENIZER)
+CL100K_TOKENIZER = "cl100k"
+BGE_M3_TOKENIZER = "bge-m3"
+
+# Must match HFBgeM3Embedder.MODEL_NAME: chunk token ids are fed to its model as they are
+EMBEDDING_TOKENIZER_NAME = "BAAI/bge-m3"
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name: str = ENCODING_NAME):
+    """Process-wide tiktoken encoding (loading the BPE ranks costs ~100 ms)."""
+    return tiktoken.get_encoding(name)
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    return len(get_encoding().encode(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut `text` to at most `max_tokens` tokens (on a token boundary)."""
+    if max_tokens <= 0 or not text:
+        return ""
+    tokens = get_encoding().encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return get_encoding().decode(tokens[:max_tokens])
+
+
+@lru_cache(maxsize=None)
+def get_chunk_tokenizer():
+    """
+    Fast (Rust) tokenizer of the embedding model, used by the chunker for
+    offset mappings and token ids. None means chunk with cl100k_base:
+    CHUNK_TOKENIZER=cl100k, transformers missing, or no fast tokenizer.
+    """
+    if settings.CHUNK_TOKENIZER != BGE_M3_TOKENIZER:
+        return None
+    try:
+        from transformers import AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(EMBEDDING_TOKENIZER_NAME, cache_dir=settings.MODEL_CACHE_DIR)
+    except Exception as e:
+        print(f"[WARN] Embedding tokenizer unavailable ({e}); chunking with {ENCODING_NAME}")
+        return None
+    # Offset mappings only exist on fast tokenizers
+    if getattr(tokenizer, "is_fast", False) is not True:
+        print(f"[WARN] No fast tokenizer for {EMBEDDING_TOKENIZER_NAME}; chunking with {ENCODING_NAME}")
+        return None
+    return tokenizer
+
@@ -9,6 +9,7 @@ Validates:
 """
 
 from fastapi import HTTPException
+from pathlib import Path
 from typing import Set
 
 
@@ -153,11 +154,38 @@ def validate_document_upload(file_bytes: bytes, content_type: str, filename: str
         filename: Original filename
         
     Returns:
-        dict: {"valid": bool, "message": str}
+        dict: {"valid": bool, "size_mb": float, "filename": str}
         
     Raises:
         HTTPException: If validation fails
     """
+    return _check_document(len(file_bytes), file_bytes[:8], content_type, filename)
+
+
+def validate_document_file(path: Path, content_type: str, filename: str) -> dict:
+    """
+    Validate a document (PDF/DOCX) upload already streamed to disk.
+
+    Same checks as validate_document_upload, but only the file size and its
+    first bytes are read, so large uploads are never held in memory.
+
+    Args:
+        path: Saved upload
+        content_type: MIME type from UploadFile
+        filename: Original filename
+
+    Returns:
+        dict: {"valid": bool, "size_mb": float, "filename": str}
+
+    Raises:
+        HTTPException: If validation fails
+    """
+    with Path(path).open("rb") as f:
+        head = f.read(8)
+    return _check_document(Path(path).stat().st_size, head, content_type, filename)
+
+
+def _check_document(size: int, head: bytes, content_type: str, filename: str) -> dict:
     # Check MIME type
     if content_type not in ALLOWED_DOCUMENT_MIMES:
         raise HTTPException(
@@ -166,21 +194,21 @@ def validate_document_upload(file_bytes: bytes, content_type: str, filename: str
         )
     
     # Check empty file
-    if not file_bytes:
+    if not size:
         raise HTTPException(
             status_code=400,
             detail="Document file is empty"
         )
     
     # Check file size
-    if len(file_bytes) > MAX_PDF_SIZE:
+    if size > MAX_PDF_SIZE:
         raise HTTPException(
             status_code=413,
             detail=f"Document file exceeds maximum size ({MAX_PDF_SIZE / 1024 / 1024:.0f} MB)"
         )
     
     # Check minimum size (at least 1KB for valid document)
-    if len(file_bytes) < 1024:
+    if size < 1024:
         raise HTTPException(
             status_code=400,
             detail="Document file too small (must be at least 1 KB)"
@@ -188,7 +216,7 @@ def validate_document_upload(file_bytes: bytes, content_type: str, filename: str
     
     # Magic byte validation for PDF
     if filename.lower().endswith(".pdf"):
-        if not file_bytes.startswith(b"%PDF"):
+        if not head.startswith(b"%PDF"):
             raise HTTPException(
                 status_code=400,
                 detail="Invalid PDF file (corrupted or not a valid PDF)"
@@ -196,7 +224,7 @@ def validate_document_upload(file_bytes: bytes, content_type: str, filename: str
     
     # Magic byte validation for DOCX (ZIP archive)
     if filename.lower().endswith(".docx"):
-        if not file_bytes.startswith(b"PK\x03\x04"):  # ZIP magic bytes
+        if not head.startswith(b"PK\x03\x04"):  # ZIP magic bytes
             raise HTTPException(
                 status_code=400,
                 detail="Invalid DOCX file (corrupted or not a valid DOCX)"
@@ -204,7 +232,7 @@ def validate_document_upload(file_bytes: bytes, content_type: str, filename: str
     
     return {
         "valid": True,
-        "size_mb": round(len(file_bytes) / 1024 / 1024, 2),
+        "size_mb": round(size / 1024 / 1024, 2),
         "filename": filename
     }
 
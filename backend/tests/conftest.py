@@ -0,0 +1,49 @@
+"""
+Shared pytest fixtures.
+
+`local_qdrant` switches the app to qdrant-client's in-memory store and
+creates the regular collections, so retrieval can be exercised without a
+Qdrant server. `synthetic_corpus` seeds that store with a labelled corpus.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+SYNTHETIC_OWNER_ID = "synthetic-owner"
+
+
+@pytest.fixture
+def local_qdrant(monkeypatch):
+    from app.config import settings
+    from app.db.qdrant_client import get_qdrant_client, reset_qdrant_client
+    from app.db.qdrant_collections import create_collections
+    from app.db.modality_inventory import invalidate_inventory
+
+    # TF-IDF vocabulary path is relative to backend/
+    monkeypatch.chdir(BACKEND_DIR)
+    monkeypatch.setattr(settings, "QDRANT_MODE", "memory")
+    reset_qdrant_client()
+    invalidate_inventory()
+    create_collections()
+
+    yield get_qdrant_client()
+
+    reset_qdrant_client()
+    invalidate_inventory()
+
+
+@pytest.fixture
+def hashing_embedder():
+    from app.eval.synthetic_corpus import HashingEmbedder
+    return HashingEmbedder()
+
+
+@pytest.fixture
+def synthetic_corpus(local_qdrant, hashing_embedder):
+    from app.eval.synthetic_corpus import seed_synthetic_corpus
+    return seed_synthetic_corpus(owner_id=SYNTHETIC_OWNER_ID, embedder=hashing_embedder)
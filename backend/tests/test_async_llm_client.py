@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Tests for the async pooled LLM client (no Groq API needed).
+
+Runs against the local fake LLM server (app/eval/fake_llm_server.py).
+
+Tests:
+- Concurrent call_llm_async calls overlap instead of serializing, and do
+  not stall the event loop
+- LLM_MAX_CONCURRENCY caps in-flight calls
+- Per-call timeout surfaces as LLMServiceError
+- OpenAI-compatible provider: complete + stream
+
+Usage:
+    pytest test_async_llm_client.py -s
+"""
+
+import asyncio
+import gc
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from app.config import settings
+from app.eval.fake_llm_server import FakeLLMServer
+from app.llm.async_client import (
+    AsyncLLMClient,
+    call_llm_async,
+    close_async_llm_client,
+)
+from app.llm.groq_client import LLMServiceError
+
+TOKEN_DELAY = 0.02
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    with FakeLLMServer(token_delay=TOKEN_DELAY) as server:
+        monkeypatch.setattr(settings, "LLM_PROVIDER", "groq")
+        monkeypatch.setattr(settings, "GROQ_BASE_URL", server.base_url)
+        monkeypatch.setattr(settings, "GROQ_API_KEY", "test-key")
+        yield server
+
+
+def test_concurrent_calls_overlap_without_blocking_loop(fake_llm):
+    async def run():
+        single_start = time.perf_counter()
+        await call_llm_async("What is photosynthesis?", None, history=[])
+        single = time.perf_counter() - single_start
+
+        stalls = []
+
+        async def heartbeat():
+            for _ in range(20):
+                start = time.perf_counter()
+                await asyncio.sleep(0.01)
+                stalls.append(time.perf_counter() - start - 0.01)
+
+        start = time.perf_counter()
+        answers, _ = await asyncio.gather(
+            asyncio.gather(*(call_llm_async("q", "ctx", history=[]) for _ in range(8))),
+            heartbeat(),
+        )
+        wall = time.perf_counter() - start
+        await close_async_llm_client()
+        return single, wall, answers, max(stalls)
+
+    # A full gen-2 collection over the test session's heap can take ~0.1 s on
+    # its own; keep it out of the loop-stall measurement
+    gc.collect()
+    gc.freeze()
+    try:
+        single, wall, answers, worst_stall = asyncio.run(run())
+    finally:
+        gc.unfreeze()
+
+    print(f"   1 call: {single * 1000:.0f} ms, 8 concurrent: {wall * 1000:.0f} ms, "
+          f"worst loop stall: {worst_stall * 1000:.0f} ms")
+    assert all(a == fake_llm.answer for a in answers)
+    assert wall < 3 * single
+    assert worst_stall < 0.1
+    assert fake_llm.max_in_flight == 8
+
+
+def test_concurrency_limit(fake_llm):
+    async def run():
+        client = AsyncLLMClient(max_concurrency=2)
+        try:
+            await asyncio.gather(*(client.complete("q") for _ in range(6)))
+        finally:
+            await client.aclose()
+
+    asyncio.run(run())
+    assert fake_llm.max_in_flight == 2
+
+
+def test_timeout_raises_service_error(fake_llm):
+    fake_llm.token_delay = 0.2  # ~4 s for the full answer
+
+    async def run():
+        client = AsyncLLMClient()
+        try:
+            await client.complete("q", timeout=0.3)
+        finally:
+            await client.aclose()
+
+    start = time.perf_counter()
+    with pytest.raises(LLMServiceError):
+        asyncio.run(run())
+    # SDK retries are allowed, but each attempt must respect the timeout
+    assert time.perf_counter() - start < 3.0
+
+
+def test_openai_compatible_provider(fake_llm):
+    async def run():
+        client = AsyncLLMClient(provider="openai", base_url=f"{fake_llm.base_url}/v1", api_key="k")
+        try:
+            answer = await client.complete("q")
+            streamed = [delta async for delta in client.stream("q")]
+        finally:
+            await client.aclose()
+        return answer, streamed
+
+    answer, streamed = asyncio.run(run())
+    assert answer == fake_llm.answer
+    assert len(streamed) > 1 and "".join(streamed) == fake_llm.answer
+    assert fake_llm.requests[-1]["stream"] is True
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Latency tests for streamed chat answers (no Groq API / Qdrant needed).
+
+A local fake LLM server (app/eval/fake_llm_server.py) generates the answer
+at a fixed per-token delay, so time-to-first-token of the streaming path
+can be compared with the blocking path.
+
+Tests:
+- stream_completion yields the same text as generate_completion, with a
+  much earlier first token
+- /api/chat/stream sends citations + first token long before /api/chat
+  returns, and records the streamed answer in session history
+
+Usage:
+    pytest test_chat_streaming.py -s
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.eval.fake_llm_server import FakeLLMServer
+
+TOKEN_DELAY = 0.05
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    from app.llm import groq_client
+
+    with FakeLLMServer(token_delay=TOKEN_DELAY) as server:
+        monkeypatch.setattr(settings, "GROQ_BASE_URL", server.base_url)
+        monkeypatch.setattr(settings, "GROQ_API_KEY", "test-key")
+        monkeypatch.setattr(groq_client, "_client", None)
+        yield server
+    groq_client._client = None
+
+
+def test_stream_completion_first_token_latency(fake_llm):
+    from app.llm.groq_client import generate_completion, stream_completion
+
+    start = time.perf_counter()
+    blocking_answer = generate_completion("What is photosynthesis?")
+    blocking_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    stream = stream_completion("What is photosynthesis?")
+    first = next(stream)
+    ttft_s = time.perf_counter() - start
+    streamed_answer = first + "".join(stream)
+
+    print(f"   blocking: {blocking_s * 1000:.0f} ms, stream TTFT: {ttft_s * 1000:.0f} ms")
+    assert streamed_answer == blocking_answer
+    assert ttft_s < blocking_s / 3
+
+
+async def _asgi_post(app, path: str, data: dict):
+    """POST a form to an ASGI app, returning [(seconds_since_start, body_bytes)]."""
+    request = httpx.Request("POST", f"http://test{path}", data=data, headers={"Authorization": "Bearer x"})
+    body = request.read()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in request.headers.items()],
+        "client": ("127.0.0.1", 1234),
+        "server": ("test", 80),
+    }
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    start = time.perf_counter()
+    chunks = []
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            chunks.append((time.perf_counter() - start, message["body"]))
+
+    await app(scope, receive, send)
+    return chunks
+
+
+def test_chat_stream_endpoint_ttft(fake_llm, monkeypatch):
+    try:
+        from fastapi import FastAPI
+        from app.api import chat as chat_api
+        from app.chat import chat_orchestrator
+        from app.chat import session_store
+        from app.auth.dependencies import get_current_user
+    except Exception as e:  # full model stack (torch, whisper, vision) not installed
+        pytest.skip(f"chat stack unavailable: {e}")
+
+    async def fake_route_query(normalized, deadline=None):
+        return {
+            "text": [{
+                "id": "1",
+                "score": 0.7,
+                "text": "Photosynthesis happens in chloroplasts.",
+                "metadata": {"filename": "bio.pdf", "page": 3},
+            }],
+            "image": [],
+            "audio": [],
+        }
+
+    monkeypatch.setattr(chat_orchestrator, "route_query", fake_route_query)
+    monkeypatch.setattr(settings, "SEMANTIC_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "FOLLOWUP_REUSE_ENABLED", False)
+
+    class _User:
+        id = "stream-user"
+
+    session_store.reset_session_store(session_store.MemorySessionStore(max_sessions=10, ttl_seconds=60))
+    monkeypatch.setattr(settings, "HISTORY_SUMMARY_ENABLED", False)
+
+    app = FastAPI()
+    app.include_router(chat_api.router)
+    app.dependency_overrides[get_current_user] = lambda: _User()
+
+    form = {"message": "Explain how photosynthesis works in plants", "session_id": "stream-test"}
+    blocking = asyncio.run(_asgi_post(app, "/api/chat", form))
+    blocking_s = blocking[-1][0]
+
+    session_store.get_session_store().delete("stream-test")
+    streamed = asyncio.run(_asgi_post(app, "/api/chat/stream", form))
+    payload = b"".join(body for _, body in streamed).decode()
+
+    first_citations = next(t for t, body in streamed if b"event: citations" in body)
+    first_token = next(t for t, body in streamed if b"event: token" in body)
+    print(f"   /api/chat: {blocking_s * 1000:.0f} ms, stream citations: {first_citations * 1000:.0f} ms, "
+          f"TTFT: {first_token * 1000:.0f} ms")
+
+    assert first_citations <= first_token
+    assert first_token < blocking_s / 3
+    assert "event: done" in payload
+    history = session_store.load_session("stream-test")["history"]
+    assert history[-1] == {"role": "assistant", "content": fake_llm.answer}
+    session_store.reset_session_store()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests for the LLM completion cache (no Groq API needed).
+
+Runs against the local fake LLM server (app/eval/fake_llm_server.py).
+
+Tests:
+- Fingerprint changes with model / temperature / max tokens / prompt
+- LRU bound and TTL expiry
+- A repeated first-turn chat prompt is answered without a second LLM request
+- Prompts with history, and use_cache=False calls, always reach the LLM;
+  only the latter count as cache bypasses
+- A completed stream populates the cache for the blocking path
+- The sync and async clients both call settings.LLM_MODEL and share cache entries
+
+Usage:
+    pytest test_completion_cache.py -s
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from app.config import settings
+from app.eval.fake_llm_server import FakeLLMServer
+from app.llm import completion_cache as cc
+from app.llm.async_client import call_llm_async, close_async_llm_client, stream_llm_async
+from app.llm.completion_cache import CompletionCache, prompt_fingerprint
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    with FakeLLMServer(token_delay=0.0) as server:
+        monkeypatch.setattr(settings, "LLM_PROVIDER", "groq")
+        monkeypatch.setattr(settings, "GROQ_BASE_URL", server.base_url)
+        monkeypatch.setattr(settings, "GROQ_API_KEY", "test-key")
+        monkeypatch.setattr(settings, "COMPLETION_CACHE_ENABLED", True)
+        monkeypatch.setattr(cc, "completion_cache", CompletionCache(max_entries=16, ttl_seconds=60))
+        # async_client imported the singleton by name
+        monkeypatch.setattr("app.llm.async_client.completion_cache", cc.completion_cache)
+        yield server
+
+
+def test_fingerprint_covers_sampling_params():
+    base = prompt_fingerprint("prompt", "llama-3.1-8b-instant", 0.2, 512)
+    assert base == prompt_fingerprint("prompt", "llama-3.1-8b-instant", 0.2, 512)
+    assert base != prompt_fingerprint("prompt ", "llama-3.1-8b-instant", 0.2, 512)
+    assert base != prompt_fingerprint("prompt", "llama-3.3-70b-versatile", 0.2, 512)
+    assert base != prompt_fingerprint("prompt", "llama-3.1-8b-instant", 0.7, 512)
+    assert base != prompt_fingerprint("prompt", "llama-3.1-8b-instant", 0.2, 256)
+
+
+def test_lru_and_ttl_bounds():
+    cache = CompletionCache(max_entries=2, ttl_seconds=0.05)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"  # a is now most recently used
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] >= 1
+
+
+def test_repeated_first_turn_prompt_hits_cache(fake_llm):
+    async def run():
+        first = await call_llm_async("What is osmosis?", "[1] Osmosis is ...", history=[])
+        second = await call_llm_async("What is osmosis?", "[1] Osmosis is ...", history=[])
+        await close_async_llm_client()
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    stats = cc.completion_cache.stats()
+    print(f"   completion cache: {stats}")
+    assert first == second == fake_llm.answer
+    assert len(fake_llm.requests) == 1
+    assert stats["hits"] == 1 and stats["hit_rate"] == 0.5
+
+
+def test_history_and_bypass_skip_cache(fake_llm):
+    history = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+
+    async def run():
+        for _ in range(2):
+            await call_llm_async("What is osmosis?", "ctx", history=history)
+        for _ in range(2):
+            await call_llm_async("What is diffusion?", "ctx", history=[], use_cache=False)
+        await close_async_llm_client()
+
+    asyncio.run(run())
+
+    assert len(fake_llm.requests) == 4
+    assert cc.completion_cache.stats()["entries"] == 0
+    # History prompts are never cache-eligible; only explicit opt-outs are bypasses
+    assert cc.completion_cache.stats()["bypassed"] == 2
+
+
+def test_completed_stream_is_cached(fake_llm):
+    async def run():
+        streamed = "".join([d async for d in stream_llm_async("Define pH", "ctx", history=[])])
+        blocking = await call_llm_async("Define pH", "ctx", history=[])
+        await close_async_llm_client()
+        return streamed, blocking
+
+    streamed, blocking = asyncio.run(run())
+
+    assert streamed == blocking == fake_llm.answer
+    assert len(fake_llm.requests) == 1
+
+
+def test_sync_and_async_clients_use_configured_model(fake_llm, monkeypatch):
+    from app.llm import groq_client
+
+    monkeypatch.setattr(settings, "LLM_MODEL", "llama-3.3-70b-versatile")
+    monkeypatch.setattr(groq_client, "completion_cache", cc.completion_cache)
+    monkeypatch.setattr(groq_client, "_client", None)
+
+    async def run():
+        answer = await call_llm_async("What is osmosis?", "ctx", history=[])
+        await close_async_llm_client()
+        return answer
+
+    try:
+        assert asyncio.run(run()) == fake_llm.answer
+        assert groq_client.call_llm("What is osmosis?", "ctx", history=[]) == fake_llm.answer
+        groq_client.generate_completion("Summarise osmosis")
+    finally:
+        groq_client._client = None
+
+    assert [r["model"] for r in fake_llm.requests] == ["llama-3.3-70b-versatile"] * 2
+    assert cc.completion_cache.stats()["hits"] == 1, "sync call should reuse the async call's entry"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
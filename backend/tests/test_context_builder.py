@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Unit tests for token-budgeted context assembly (no API / Qdrant needed).
+
+Tests:
+- The context never exceeds the token budget and only whole sentences are packed
+- Near-duplicate hits are dropped; overlap between neighbouring chunks is sent once
+- Candidates are ranked across modalities; the user's own upload leads
+- tokens_used matches the tokenizer count of the returned context
+- Stored chunk token counts are only trusted when they are cl100k counts
+  (a Devanagari chunk counted in BGE-M3 tokens does not overshoot the budget)
+
+Usage:
+    python test_context_builder.py
+"""
+
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.chat.context_builder import assemble_context, build_context
+from app.utils.tokens import count_tokens
+
+
+_VOCAB = (
+    "energy light cell membrane water carbon oxygen protein enzyme glucose layer signal "
+    "pressure charge field wave mass force heat acid salt gene tissue root leaf stem"
+).split()
+
+
+def _sentences(topic, n):
+    rng = random.Random(topic)
+    return [f"In {topic} the {' '.join(rng.sample(_VOCAB, 6))} matter." for _ in range(n)]
+
+
+def _text_hit(sentences, score, filename="notes.pdf", page=1, chunk_index=0):
+    text = " ".join(sentences)
+    return {
+        "id": f"{filename}-{page}-{chunk_index}",
+        "score": score,
+        "text": text,
+        "metadata": {
+            "filename": filename,
+            "page": page,
+            "chunk_index": chunk_index,
+            "token_count": count_tokens(text),
+            "token_count_tokenizer": "cl100k",
+        },
+    }
+
+
+def test_budget_respected_with_whole_sentences():
+    results = {"text": [
+        _text_hit(_sentences("photosynthesis", 40), 0.8, chunk_index=0),
+        _text_hit(_sentences("respiration", 40), 0.7, chunk_index=5),
+        _text_hit(_sentences("osmosis", 40), 0.6, chunk_index=9),
+    ]}
+
+    packed = assemble_context(results, token_budget=200, max_tokens_per_source=120)
+
+    assert packed["tokens_used"] <= 200, packed["tokens_used"]
+    assert packed["dropped_budget"] >= 1
+    for block in packed["context"].split("\n\n"):
+        assert block.endswith("."), f"block cut mid-sentence: {block[-40:]!r}"
+
+
+def test_duplicates_and_chunk_overlap_dropped():
+    first = _sentences("mitosis", 8)
+    # Next chunk on the page repeats the last 3 sentences (chunk overlap)
+    neighbour = first[-3:] + _sentences("meiosis", 4)
+    results = {
+        "text": [
+            _text_hit(first, 0.9, chunk_index=0),
+            _text_hit(first, 0.89, filename="copy.pdf"),  # same text in another file
+            _text_hit(neighbour, 0.7, chunk_index=1),
+        ],
+    }
+
+    packed = assemble_context(results, token_budget=1000)
+
+    assert packed["dropped_duplicates"] == 1
+    assert len(packed["citations"]) == 2
+    for sentence in first[-3:]:
+        assert packed["context"].count(sentence) == 1, f"overlap sent twice: {sentence}"
+    assert "meiosis" in packed["context"]
+
+
+def test_cross_modal_ranking_and_upload_first():
+    results = {
+        "text": [
+            _text_hit(_sentences("voltage", 2), 0.62, chunk_index=0),
+            _text_hit(_sentences("current", 2), 0.31, chunk_index=3),
+            {"text": "Ohm's law diagram from my notebook.", "filename": "[Uploaded Image]", "page": None, "score": 1.0},
+        ],
+        "image": [{"score": 0.28, "ocr_text": "Circuit diagram with a battery and resistor.", "file_id": "img-1"}],
+        "audio": [{"score": 0.55, "transcript": "Lecture on resistance in series circuits.", "audio_url": "https://cdn/a.mp3"}],
+    }
+
+    _, citations = build_context(results)
+    order = [c["file_id"] for c in citations]
+
+    assert order[0] == "[Uploaded Image]"
+    # Best hit of every modality comes before the weak second text hit
+    assert order.index("notes.pdf") < order.index("img-1")
+    assert order.index("img-1") < len(order) - 1
+    assert order[-1] == "notes.pdf" and citations[-1]["id"] == len(citations)
+    assert [c["modality"] for c in citations].count("audio") == 1
+
+
+def test_tokens_used_is_exact():
+    results = {"text": [_text_hit(_sentences("evaporation", 5), 0.7)]}
+    packed = assemble_context(results)
+    assert packed["tokens_used"] == count_tokens(packed["context"])
+
+
+def test_bge_m3_token_count_not_charged_as_llm_tokens():
+    text = "प्रकाश संश्लेषण में पौधे सूर्य के प्रकाश से भोजन बनाते हैं। " * 6
+    # cl100k spends several byte-level tokens per Devanagari word; XLM-R about one
+    bge_m3_count = count_tokens(text.strip()) // 4
+    hit = {
+        "id": "hindi-1-0",
+        "score": 0.9,
+        "text": text,
+        "metadata": {"filename": "hindi.pdf", "page": 1, "chunk_index": 0,
+                     "token_count": bge_m3_count, "token_count_tokenizer": "bge-m3"},
+    }
+    budget = bge_m3_count * 2
+    assert count_tokens(text.strip()) > budget, "fixture must overshoot in cl100k"
+
+    packed = assemble_context({"text": [hit]}, token_budget=budget, max_tokens_per_source=budget)
+
+    assert packed["context"], "a sentence should still fit"
+    assert packed["tokens_used"] <= budget, packed["tokens_used"]
+    assert count_tokens(packed["context"]) <= budget
+
+    # The same chunk counted in cl100k is taken whole without re-counting
+    hit["metadata"].update(token_count=count_tokens(text.strip()), token_count_tokenizer="cl100k")
+    whole = assemble_context({"text": [hit]}, token_budget=1000)
+    assert whole["context"] == f"[1] {text.strip()}"
+
+
+if __name__ == "__main__":
+    tests = [
+        test_budget_respected_with_whole_sentences,
+        test_duplicates_and_chunk_overlap_dropped,
+        test_cross_modal_ranking_and_upload_first,
+        test_tokens_used_is_exact,
+        test_bge_m3_token_count_not_charged_as_llm_tokens,
+    ]
+    failed = 0
+    for t in tests:
+        try:
+            t()
+            print(f"✅ PASS - {t.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ FAIL - {t.__name__}: {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Request deadline tests (no Groq API / Qdrant needed).
+
+Runs the LLM stages against the local fake LLM server
+(app/eval/fake_llm_server.py).
+
+Tests:
+- Deadline budgets: cap, LLM reserve, header parsing and clamping
+- A slow retriever is cut at the deadline; one with no time left never starts
+- A blocking chat turn past its deadline returns the fallback answer on time,
+  with "llm" in degraded_stages
+- A streamed answer stops at the deadline and reports it in the done event
+
+Usage:
+    pytest test_deadline.py -s
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from app.config import settings
+from app.eval.fake_llm_server import FakeLLMServer
+from app.utils.deadline import Deadline
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _chat_stack():
+    try:
+        from app.chat import chat_orchestrator, router
+        return chat_orchestrator, router
+    except Exception as e:  # full model stack (torch, whisper, vision) not installed
+        pytest.skip(f"chat stack unavailable: {e}")
+
+
+@pytest.fixture
+def fast_deadlines(monkeypatch):
+    monkeypatch.setattr(settings, "DEADLINE_LLM_RESERVE_SECONDS", 0.0)
+    monkeypatch.setattr(settings, "DEADLINE_MIN_LLM_SECONDS", 0.1)
+    monkeypatch.setattr(settings, "SEMANTIC_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "FOLLOWUP_REUSE_ENABLED", False)
+    monkeypatch.setattr(settings, "COMPLETION_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "HISTORY_SUMMARY_ENABLED", False)
+
+
+def test_budget_arithmetic(monkeypatch):
+    clock = FakeClock()
+    deadline = Deadline(10, clock=clock)
+
+    assert deadline.stage_timeout(cap=30, reserve=8) == 2
+    assert deadline.stage_timeout(cap=1) == 1
+    clock.now += 9.5
+    assert deadline.stage_timeout(reserve=1) < 0
+    clock.now += 1
+    assert deadline.expired and deadline.remaining() == 0
+
+    deadline.skip("ocr")
+    deadline.skip("ocr")
+    assert deadline.degraded_stages == ["ocr"]
+
+    monkeypatch.setattr(settings, "DEADLINE_MAX_SECONDS", 60)
+    assert Deadline.from_header("5", 25).budget_seconds == 5
+    assert Deadline.from_header("600", 25).budget_seconds == 60
+    assert Deadline.from_header("soon", 25).budget_seconds == 25
+    assert Deadline.from_header(None, 25).budget_seconds == 25
+
+
+def test_retriever_cut_at_deadline(fast_deadlines):
+    _, router = _chat_stack()
+    started = []
+
+    def slow_retriever(*args, **kwargs):
+        started.append(True)
+        time.sleep(1.0)
+        return [{"id": "late"}]
+
+    async def run():
+        deadline = Deadline(0.2)
+        t0 = time.perf_counter()
+        first = await router._with_timeout(slow_retriever, retriever="image_to_text", deadline=deadline)
+        elapsed = time.perf_counter() - t0
+        second = await router._with_timeout(slow_retriever, retriever="image_to_audio", deadline=deadline)
+        return deadline, first, second, elapsed
+
+    deadline, first, second, elapsed = asyncio.run(run())
+
+    assert first == [] and second == []
+    assert elapsed < 0.5
+    assert len(started) == 1, "retriever started with no time left"
+    assert deadline.degraded_stages == ["image_to_text", "image_to_audio"]
+
+
+def _fake_route_query(delay):
+    async def fake_route_query(normalized, deadline=None):
+        await asyncio.sleep(delay)
+        return {
+            "text": [{
+                "id": "1",
+                "score": 0.7,
+                "text": "Photosynthesis happens in chloroplasts.",
+                "metadata": {"filename": "bio.pdf", "page": 3},
+            }],
+            "image": [],
+            "audio": [],
+        }
+    return fake_route_query
+
+
+@pytest.fixture
+def slow_llm(monkeypatch):
+    from app.chat import session_store
+
+    with FakeLLMServer(token_delay=0.1) as server:  # ~2 s for the full answer
+        monkeypatch.setattr(settings, "LLM_PROVIDER", "groq")
+        monkeypatch.setattr(settings, "GROQ_BASE_URL", server.base_url)
+        monkeypatch.setattr(settings, "GROQ_API_KEY", "test-key")
+        session_store.reset_session_store(session_store.MemorySessionStore(max_sessions=10, ttl_seconds=60))
+        yield server
+        session_store.reset_session_store()
+
+
+def test_blocking_turn_returns_on_time(fast_deadlines, slow_llm, monkeypatch):
+    chat_orchestrator, _ = _chat_stack()
+    from app.llm.async_client import close_async_llm_client
+
+    monkeypatch.setattr(chat_orchestrator, "route_query", _fake_route_query(0.1))
+
+    async def run():
+        t0 = time.perf_counter()
+        response = await chat_orchestrator.run_chat_turn(
+            "owner-1", None, "Explain how photosynthesis works in plants", None, None,
+            deadline=Deadline(0.8),
+        )
+        elapsed = time.perf_counter() - t0
+        await close_async_llm_client()
+        return response, elapsed
+
+    response, elapsed = asyncio.run(run())
+
+    print(f"   turn returned after {elapsed * 1000:.0f} ms (deadline 800 ms)")
+    assert elapsed < 1.2
+    assert response["degraded_stages"] == ["llm"]
+    assert response["answer"] == chat_orchestrator.OUT_OF_TIME_ANSWER
+
+
+def test_stream_stops_at_deadline(fast_deadlines, slow_llm, monkeypatch):
+    chat_orchestrator, _ = _chat_stack()
+    from app.llm.async_client import close_async_llm_client
+
+    monkeypatch.setattr(chat_orchestrator, "route_query", _fake_route_query(0.1))
+
+    async def run():
+        t0 = time.perf_counter()
+        events = await chat_orchestrator.run_chat_turn_stream(
+            "owner-1", None, "Explain how photosynthesis works in plants", None, None,
+            deadline=Deadline(0.8),
+        )
+        collected = [event async for event in events]
+        elapsed = time.perf_counter() - t0
+        await close_async_llm_client()
+        return collected, elapsed
+
+    collected, elapsed = asyncio.run(run())
+
+    tokens = [e["data"]["text"] for e in collected if e["event"] == "token"]
+    done = collected[-1]
+    print(f"   stream stopped after {elapsed * 1000:.0f} ms with {len(tokens)} tokens")
+    assert done["event"] == "done"
+    assert done["data"]["degraded_stages"] == ["llm"]
+    assert tokens and done["data"]["answer"] == "".join(tokens)
+    assert done["data"]["answer"] != slow_llm.answer
+    assert elapsed < 1.2
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
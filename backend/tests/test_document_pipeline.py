@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the streaming document ingestion pipeline (no API / Qdrant server needed).
+
+Tests:
+- Page-by-page ingestion gives the same chunks (ids, text, headers removed) as the whole-document path
+- Extraction runs ahead of the embedder by at most the bounded queue, and overlaps it
+- An embedder failure stops the extraction thread and propagates
+- Documents without text raise NoReadableTextError
+- Uploads are validated from disk (size + magic bytes only)
+
+Usage:
+    python test_document_pipeline.py
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.chunking.text_chunker import build_chunks
+from app.ingestion import document_pipeline
+from app.ingestion.document_pipeline import NoReadableTextError, ingest_document_file
+from app.ingestion.text_ingest import extract_raw_text
+from app.preprocessing.text_preprocess import preprocess_text
+
+BODY = (
+    "Photosynthesis converts light energy into chemical energy stored in glucose. "
+    "Chlorophyll in the thylakoid membranes absorbs red and blue light. "
+)
+
+
+class _RecordingEmbedder:
+    """Fixed-size vectors; records the order of embed calls against extraction."""
+
+    def __init__(self, delay=0.0, fail_on_call=None):
+        self.delay = delay
+        self.fail_on_call = fail_on_call
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.fail_on_call == self.calls:
+            raise RuntimeError("embedding model crashed")
+        time.sleep(self.delay)
+        return [[0.1] * 8 for _ in texts]
+
+
+@pytest.fixture
+def indexed(monkeypatch, local_qdrant):
+    """Capture upserted chunks instead of writing to Qdrant (existing-chunk lookups hit the empty in-memory store)."""
+    chunks = []
+
+    def _index(batch, embedder, dense_vectors=None):
+        assert len(dense_vectors) == len(batch)
+        chunks.extend(batch)
+        return len(batch)
+
+    monkeypatch.setattr(document_pipeline, "index_text_chunks", _index)
+    return chunks
+
+
+def _pdf(path, pages):
+    import fitz
+
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 40), "DocuMind Biology Notes")  # running header
+        box = fitz.Rect(72, 72, 540, 760)
+        page.insert_textbox(box, f"Section {i + 1}. " + BODY * 8, fontsize=9)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_streaming_matches_whole_document(tmp_path, indexed):
+    path = _pdf(tmp_path / "notes.pdf", pages=5)
+    progress = {}
+
+    result = ingest_document_file(
+        path, filename="notes.pdf", owner_id="owner-1", embedder=_RecordingEmbedder(),
+        batch_size=3, progress=lambda stage=None, **counts: progress.update(counts),
+    )
+
+    expected = build_chunks(
+        owner_id="owner-1", filename="notes.pdf",
+        preprocessed_text=preprocess_text(extract_raw_text(path)),
+    )
+    assert [c["id"] for c in indexed] == [c["id"] for c in expected]
+    assert [c["text"] for c in indexed] == [c["text"] for c in expected]
+    assert not any("DocuMind Biology Notes" in c["text"] for c in indexed), "running header not removed"
+
+    assert result["total_chunks"] == result["vectors_inserted"] == len(expected)
+    assert result["pages_in_chunks"] == [1, 2, 3, 4, 5]
+    assert result["sample_chunk"]["id"] == expected[0]["id"]
+    assert progress == {"pages": 5, "chunks": len(expected), "vectors": len(expected), "skipped": 0}
+
+
+def test_extraction_is_bounded_and_overlaps_embedding(tmp_path, monkeypatch, indexed):
+    pages_read = []
+    embedded_after = []
+
+    def _pages(path):
+        for n in range(1, 41):
+            pages_read.append(n)
+            yield n, f"Page {n}. " + BODY
+
+    monkeypatch.setattr(document_pipeline, "iter_pages", _pages)
+    monkeypatch.setattr(document_pipeline.settings, "INGEST_QUEUE_BATCHES", 2)
+
+    class _Slow(_RecordingEmbedder):
+        def embed_documents(self, texts):
+            embedded_after.append(len(pages_read))
+            return super().embed_documents(texts)
+
+    big = tmp_path / "big.pdf"
+    big.write_bytes(b"%PDF-1.4 pages come from the patched iter_pages")
+    result = ingest_document_file(
+        big, filename="big.pdf", owner_id="o", embedder=_Slow(delay=0.02), batch_size=1,
+    )
+    assert result["total_chunks"] == 40
+
+    # One chunk per page: when batch k is embedded, extraction is at most
+    # queue (2) + one batch being put + the preprocessing window (3 pages) ahead
+    lead = [read - k for k, read in enumerate(embedded_after, start=1)]
+    assert max(lead) <= 2 + 1 + 3 + 1, f"extraction ran {max(lead)} pages ahead"
+    assert embedded_after[0] < 40, "embedding should start before extraction has finished"
+
+
+def test_embed_failure_stops_extraction(tmp_path, monkeypatch, indexed):
+    pages_read = []
+
+    def _pages(path):
+        for n in range(1, 1001):
+            pages_read.append(n)
+            yield n, f"Page {n}. " + BODY
+
+    monkeypatch.setattr(document_pipeline, "iter_pages", _pages)
+    big = tmp_path / "big.pdf"
+    big.write_bytes(b"%PDF-1.4 pages come from the patched iter_pages")
+    threads_before = threading.active_count()
+
+    with pytest.raises(RuntimeError, match="embedding model crashed"):
+        ingest_document_file(
+            big, filename="big.pdf", owner_id="o",
+            embedder=_RecordingEmbedder(fail_on_call=3), batch_size=1,
+        )
+
+    assert len(pages_read) < 50, "extraction kept going after the embedder failed"
+    assert threading.active_count() == threads_before
+
+
+def test_no_text_raises(tmp_path, indexed):
+    import fitz
+
+    path = tmp_path / "scan.pdf"
+    doc = fitz.open()
+    doc.new_page()
+    doc.save(path)
+    doc.close()
+
+    with pytest.raises(NoReadableTextError):
+        ingest_document_file(path, filename="scan.pdf", owner_id="o", embedder=_RecordingEmbedder())
+    assert indexed == []
+
+
+def test_validate_document_file_reads_from_disk(tmp_path):
+    from fastapi import HTTPException
+    from app.utils.upload_validation import validate_document_file
+
+    pdf = _pdf(tmp_path / "ok.pdf", pages=1)
+    result = validate_document_file(pdf, "application/pdf", "ok.pdf")
+    assert result["valid"] and result["size_mb"] >= 0
+
+    fake = tmp_path / "fake.pdf"
+    fake.write_bytes(b"not a pdf" * 200)
+    with pytest.raises(HTTPException) as err:
+        validate_document_file(fake, "application/pdf", "fake.pdf")
+    assert err.value.status_code == 400
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
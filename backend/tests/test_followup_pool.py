@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Follow-up context reuse tests (no models, no Qdrant server needed).
+
+Runs chat turns over the synthetic corpus in the in-memory Qdrant store with
+the hashing embedder.
+
+Tests:
+- A follow-up close to the previous question re-ranks the previous pool
+  instead of running the retrievers again; hits and seconds saved are reported
+- "Tell me more" cues reuse the pool whatever their embedding
+- An unrelated question, a low-confidence re-rank, an exhausted pool or a
+  re-indexed corpus all fall back to fresh retrieval
+
+Usage:
+    pytest test_followup_pool.py -s
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from conftest import SYNTHETIC_OWNER_ID
+from app.config import settings
+from app.chat.followup_pool import FollowupPoolCache
+from app.chat.intent import is_followup_cue
+from app.db.corpus_version import bump_corpus_version
+
+
+def test_followup_cues():
+    assert is_followup_cue("Explain more")
+    assert is_followup_cue("can you tell me more?")
+    assert is_followup_cue("please elaborate on that")
+    assert not is_followup_cue("explain the process of photosynthesis")
+    assert not is_followup_cue("what is moreover used for")
+
+
+@pytest.fixture
+def chat_turns(synthetic_corpus, hashing_embedder, monkeypatch):
+    try:
+        from app.chat import chat_orchestrator, router
+    except Exception as e:  # full model stack (torch, whisper, vision) not installed
+        pytest.skip(f"chat stack unavailable: {e}")
+    from app.chat import session_store
+    from app.retrieval import text_to_audio_retriever
+
+    monkeypatch.setattr(router, "get_local_bge_m3_embedder", lambda: hashing_embedder)
+    monkeypatch.setattr(chat_orchestrator, "get_local_bge_m3_embedder", lambda: hashing_embedder)
+    monkeypatch.setattr(text_to_audio_retriever, "_embedder", hashing_embedder)
+    monkeypatch.setattr(settings, "SEMANTIC_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "FOLLOWUP_REUSE_ENABLED", True)
+    monkeypatch.setattr(settings, "HISTORY_SUMMARY_ENABLED", False)
+    session_store.reset_session_store(session_store.MemorySessionStore(max_sessions=10, ttl_seconds=60))
+
+    pool = FollowupPoolCache(threshold=0.8, min_score=0.0, max_reuses=2)
+    monkeypatch.setattr(chat_orchestrator, "followup_pool", pool)
+
+    searches = []
+    real_route_query = chat_orchestrator.route_query
+
+    async def counting_route_query(normalized, deadline=None, skip=frozenset()):
+        searches.append(normalized["text"])
+        return await real_route_query(normalized, deadline=deadline, skip=skip)
+
+    monkeypatch.setattr(chat_orchestrator, "route_query", counting_route_query)
+
+    def ask(message, session_id="s1"):
+        return asyncio.run(chat_orchestrator._prepare_turn(SYNTHETIC_OWNER_ID, session_id, message, None, None))
+
+    yield ask, pool, searches
+    session_store.reset_session_store()
+
+
+def _queries_by_topic(corpus):
+    by_topic = {}
+    for q in corpus["queries"]:
+        by_topic.setdefault(q["topic"], []).append(q["query"])
+    return list(by_topic.values())
+
+
+def test_similar_followup_reuses_pool(chat_turns, synthetic_corpus):
+    ask, pool, searches = chat_turns
+    first_topic, other_topic = _queries_by_topic(synthetic_corpus)[:2]
+    question = first_topic[0]
+
+    first = ask(question)
+    assert len(searches) == 1 and first["citations"]
+
+    followup = ask(question + " in simple words")
+    assert len(searches) == 1, "follow-up searched again"
+    assert followup["followup_reused"] and followup["citations"]
+    scores = [hit["score"] for hit in followup["retrieval_results"]["text"]]
+    assert scores == sorted(scores, reverse=True)
+
+    cue = ask("tell me more")
+    assert len(searches) == 1 and cue["followup_reused"]
+
+    # max_reuses=2: the third follow-up retrieves fresh
+    ask(question + " again")
+    assert len(searches) == 2
+
+    unrelated = ask(other_topic[0])
+    assert len(searches) == 3 and not unrelated["followup_reused"]
+
+    stats = pool.stats()
+    print(f"   {stats}")
+    assert stats["hits"] == 2 and stats["misses"] == 2
+    assert stats["hit_rate"] == 0.5
+    assert stats["seconds_saved"] >= 0
+
+
+def test_fallbacks(chat_turns, synthetic_corpus):
+    ask, pool, searches = chat_turns
+    question = _queries_by_topic(synthetic_corpus)[0][0]
+
+    ask(question)
+    pool.min_score = 1.01  # nothing in the re-ranked pool is good enough
+    low = ask(question + " in simple words")
+    assert len(searches) == 2 and not low["followup_reused"]
+    assert pool.stats()["fallbacks"] == 1
+
+    pool.min_score = 0.0
+    bump_corpus_version(SYNTHETIC_OWNER_ID)  # re-index: the pool is stale
+    ask(question + " in simple words")
+    assert len(searches) == 3
+
+    # A chitchat turn in between keeps the pool
+    ask("thanks a lot")
+    cue = ask("tell me more")
+    assert cue["followup_reused"] and "tell me more" not in searches
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Tests for rolling chat history (no Groq API needed).
+
+Runs the summary refresh against the local fake LLM server
+(app/eval/fake_llm_server.py).
+
+Tests:
+- Only the last HISTORY_RECENT_MESSAGES stay raw; older ones go to the backlog
+- The prompt history window stays within HISTORY_TOKEN_BUDGET even with long pasted text
+- The summary refresh runs in the background and folds the backlog into the summary
+- A summary whose backlog was trimmed meanwhile is discarded (no message counted twice)
+
+Usage:
+    pytest test_history_manager.py -s
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from app.config import settings
+from app.eval.fake_llm_server import FakeLLMServer
+from app.chat import session_store
+from app.chat.history_manager import build_history_window, record_turn, schedule_summary_refresh
+from app.llm.async_client import close_async_llm_client
+from app.utils.tokens import count_tokens
+
+PASTED_OCR = " ".join(f"word{i}" for i in range(2000))
+
+
+@pytest.fixture
+def history_settings(monkeypatch):
+    monkeypatch.setattr(settings, "HISTORY_RECENT_MESSAGES", 4)
+    monkeypatch.setattr(settings, "HISTORY_TOKEN_BUDGET", 300)
+    monkeypatch.setattr(settings, "HISTORY_MESSAGE_MAX_TOKENS", 100)
+    monkeypatch.setattr(settings, "HISTORY_SUMMARY_ENABLED", True)
+    monkeypatch.setattr(settings, "COMPLETION_CACHE_ENABLED", False)
+
+
+def test_recent_window_and_backlog(history_settings):
+    session = {"history": []}
+    for i in range(4):
+        record_turn(session, f"question {i}", f"answer {i}")
+
+    assert [m["content"] for m in session["history"]] == ["question 2", "answer 2", "question 3", "answer 3"]
+    assert [m["content"] for m in session["summary_backlog"]][:2] == ["question 0", "answer 0"]
+
+
+def test_window_within_token_budget(history_settings):
+    session = {"history": [], "summary": "Student asked about osmosis and diffusion."}
+    record_turn(session, PASTED_OCR, "That page describes cell transport.")
+    record_turn(session, PASTED_OCR, "Same page again.")
+    record_turn(session, "what is osmosis?", "Movement of water across a membrane.")
+
+    window = build_history_window(session)
+    total = sum(count_tokens(m["content"]) for m in window)
+
+    print(f"   window: {len(window)} messages, {total} tokens (budget 300)")
+    assert total <= 300
+    assert window[-1]["content"] == "Movement of water across a membrane."
+    assert any(m["role"] == "summary" for m in window)
+    assert all(count_tokens(m["content"]) <= 102 for m in window)  # clipped + ellipsis
+
+
+def test_summary_refreshed_in_background(history_settings, monkeypatch):
+    summary_text = "Student is studying osmosis; asked for definitions."
+    with FakeLLMServer(answer=summary_text, token_delay=0.01) as server:
+        monkeypatch.setattr(settings, "LLM_PROVIDER", "groq")
+        monkeypatch.setattr(settings, "GROQ_BASE_URL", server.base_url)
+        monkeypatch.setattr(settings, "GROQ_API_KEY", "test-key")
+        session_store.reset_session_store(session_store.MemorySessionStore(max_sessions=10, ttl_seconds=60))
+        try:
+            session_id, session = session_store.get_session("owner-1", None)
+            for i in range(3):
+                record_turn(session, f"question {i} about osmosis", f"answer {i}")
+            session_store.save_session(session_id, session)
+
+            async def run():
+                task = schedule_summary_refresh(session_id, session)
+                # Scheduling returns immediately; the turn is not held up
+                assert task is not None and not task.done()
+                assert session.get("summary") is None
+                await task
+                await close_async_llm_client()
+
+            asyncio.run(run())
+
+            stored = session_store.load_session(session_id)
+            assert stored["summary"] == summary_text
+            assert stored["summary_backlog"] == []
+            assert len(server.requests) == 1
+            assert "question 0 about osmosis" in server.requests[0]["messages"][-1]["content"]
+        finally:
+            session_store.reset_session_store()
+
+
+def test_summary_discarded_when_backlog_trimmed(history_settings, monkeypatch):
+    with FakeLLMServer(answer="Student asked about osmosis.", token_delay=0.05) as server:
+        monkeypatch.setattr(settings, "LLM_PROVIDER", "groq")
+        monkeypatch.setattr(settings, "GROQ_BASE_URL", server.base_url)
+        monkeypatch.setattr(settings, "GROQ_API_KEY", "test-key")
+        session_store.reset_session_store(session_store.MemorySessionStore(max_sessions=10, ttl_seconds=60))
+        try:
+            session_id, session = session_store.get_session("owner-1", None)
+            for i in range(3):
+                record_turn(session, f"question {i} about osmosis", f"answer {i}")
+            session_store.save_session(session_id, session)
+
+            async def run():
+                task = schedule_summary_refresh(session_id, session)
+                await asyncio.sleep(0.1)  # summary LLM call in flight
+                # Meanwhile the backlog hits MAX_TURNS and its oldest message is trimmed
+                stored = session_store.load_session(session_id)
+                stored["summary_backlog"] = stored["summary_backlog"][1:]
+                session_store.save_session(session_id, stored)
+                result = await task
+                await close_async_llm_client()
+                return result
+
+            assert asyncio.run(run()) is None
+
+            stored = session_store.load_session(session_id)
+            assert stored.get("summary") is None
+            assert [m["content"] for m in stored["summary_backlog"]] == ["answer 0"]
+        finally:
+            session_store.reset_session_store()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Incremental re-indexing of re-uploaded documents (in-memory Qdrant, no API needed).
+
+Tests:
+- A byte-identical re-upload is skipped without extracting or embedding anything
+- An edited re-upload embeds only changed / new chunks and deletes chunks of removed pages
+- Stale deletes are scoped to the document (other files of the owner are untouched)
+
+Usage:
+    python test_incremental_reindex.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.ingestion.document_pipeline import ingest_document_file
+from app.ingestion.text_indexer import COLLECTION, existing_document_chunks
+
+OWNER = "owner-reindex"
+
+PAGES = {
+    "intro": "Photosynthesis converts light energy into chemical energy in the chloroplast.",
+    "light": "The light reactions split water and release oxygen in the thylakoid membranes.",
+    "light_v2": "The light-dependent reactions split water, release oxygen and make ATP and NADPH.",
+    "calvin": "The Calvin cycle fixes carbon dioxide into sugars in the stroma.",
+}
+
+
+class _CountingEmbedder:
+    def __init__(self, embedder):
+        self._embedder = embedder
+        self.texts = []
+
+    def embed_documents(self, texts):
+        self.texts.extend(texts)
+        return self._embedder.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self._embedder.embed_query(text)
+
+    def dimension(self):
+        return self._embedder.dimension()
+
+
+def _pdf(path, pages):
+    import fitz
+
+    doc = fitz.open()
+    for key in pages:
+        doc.new_page().insert_text((72, 72), PAGES[key])
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def _ingest(path, embedder, filename="biology.pdf"):
+    return ingest_document_file(path, filename=filename, owner_id=OWNER, embedder=embedder)
+
+
+def test_identical_reupload_is_skipped(tmp_path, local_qdrant, hashing_embedder):
+    embedder = _CountingEmbedder(hashing_embedder)
+    path = _pdf(tmp_path / "v1.pdf", ["intro", "light", "calvin"])
+
+    first = _ingest(path, embedder)
+    assert first["chunks_added"] == 3 and first["chunks_skipped"] == 0
+    embedder.texts.clear()
+
+    again = _ingest(path, embedder)
+
+    assert again["status"] == "unchanged"
+    assert again["chunks_skipped"] == 3 and again["vectors_inserted"] == 0
+    assert again["pages_in_chunks"] == [1, 2, 3]
+    assert embedder.texts == []
+
+
+def test_edited_reupload_is_diffed(tmp_path, local_qdrant, hashing_embedder):
+    embedder = _CountingEmbedder(hashing_embedder)
+    _ingest(_pdf(tmp_path / "v1.pdf", ["intro", "light", "calvin"]), embedder)
+    _ingest(_pdf(tmp_path / "other.pdf", ["calvin"]), embedder, filename="other.pdf")
+    embedder.texts.clear()
+
+    # Page 2 edited, page 3 removed
+    result = _ingest(_pdf(tmp_path / "v2.pdf", ["intro", "light_v2"]), embedder)
+
+    assert result["status"] == "success"
+    assert (result["chunks_skipped"], result["chunks_updated"], result["chunks_added"], result["chunks_removed"]) == (1, 1, 0, 1)
+    assert embedder.texts == [PAGES["light_v2"]], "only the edited chunk should be embedded"
+
+    chunks = existing_document_chunks(OWNER, "biology.pdf")
+    assert sorted(p["page"] for p in chunks.values()) == [1, 2]
+    assert len({p["doc_hash"] for p in chunks.values()}) == 1, "every remaining chunk carries the new doc_hash"
+    assert len(existing_document_chunks(OWNER, "other.pdf")) == 1
+
+    points, _ = local_qdrant.scroll(collection_name=COLLECTION, limit=10, with_payload=True)
+    texts = {p.payload["filename"]: [] for p in points}
+    for p in points:
+        texts[p.payload["filename"]].append(p.payload["text"])
+    assert sorted(texts["biology.pdf"]) == sorted([PAGES["intro"], PAGES["light_v2"]])
+
+    # Page 3 comes back: only it is new
+    embedder.texts.clear()
+    result = _ingest(_pdf(tmp_path / "v3.pdf", ["intro", "light_v2", "calvin"]), embedder)
+    assert (result["chunks_skipped"], result["chunks_updated"], result["chunks_added"], result["chunks_removed"]) == (2, 0, 1, 0)
+    assert embedder.texts == [PAGES["calvin"]]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
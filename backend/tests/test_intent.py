@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Unit tests for intent classification + retrieval planning (no models needed).
+
+Tests:
+- "which" / "this" / "history" are not chitchat; whole-message greetings are
+- Meta questions are matched on word boundaries
+- Plain text questions skip the CLIP text→image search unless images are asked for
+- Upload-only turns do not repeat the upload's searches through the text path
+- Embedding prototypes reuse the query vector (HashingEmbedder stand-in)
+- The planned intent, not a phrase list, picks the history-summary prompt
+
+Usage:
+    python test_intent.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.chat.intent import (
+    classify_intent,
+    plan_retrieval,
+    TEXT_TO_TEXT, TEXT_TO_IMAGE, TEXT_TO_AUDIO,
+    IMAGE_TO_IMAGE, IMAGE_TO_TEXT, IMAGE_TO_AUDIO,
+    AUDIO_TO_AUDIO, AUDIO_TO_TEXT, AUDIO_TO_IMAGE,
+)
+from app.config import settings
+from app.eval.synthetic_corpus import HashingEmbedder
+
+
+def _text_turn(message):
+    return {"text": message, "message": message, "image_url": None, "audio_url": None}
+
+
+def test_substrings_are_not_chitchat():
+    for message in [
+        "which enzyme breaks down starch",
+        "explain this",
+        "history of the french revolution",
+        "ohm's law",
+        "hi, what is osmosis?",
+    ]:
+        plan = plan_retrieval(_text_turn(message))
+        assert plan["intent"] not in {"chitchat", "meta"}, f"{message!r} → {plan['intent']}"
+        assert TEXT_TO_TEXT in plan["retrievers"]
+
+
+def test_whole_message_chitchat_and_meta():
+    for message in ["hi", "Hello there!", "thank you so much", "ok bye", "Good morning"]:
+        assert classify_intent(_text_turn(message)) == "chitchat", message
+    for message in ["What have we discussed so far?", "can you summarize our conversation"]:
+        assert classify_intent(_text_turn(message)) == "meta", message
+    assert plan_retrieval(_text_turn("thanks"))["retrievers"] == set()
+
+
+def test_text_question_skips_clip_unless_images_wanted():
+    plan = plan_retrieval(_text_turn("explain the stages of mitosis in detail"))
+    assert plan["retrievers"] == {TEXT_TO_TEXT, TEXT_TO_AUDIO}
+
+    plan = plan_retrieval(_text_turn("show me the diagram of mitosis"))
+    assert TEXT_TO_IMAGE in plan["retrievers"]
+
+
+def test_upload_only_turns_skip_text_path():
+    image_turn = {
+        "text": "Ohm's law V = IR",
+        "message": "",
+        "image_url": "https://cdn/temp/a.png",
+        "audio_url": None,
+        "image_analysis": {"ocr_text": "Ohm's law V = IR"},
+    }
+    assert plan_retrieval(image_turn)["retrievers"] == {IMAGE_TO_IMAGE, IMAGE_TO_TEXT, IMAGE_TO_AUDIO}
+
+    # No OCR text → only the CLIP image search can do anything
+    image_turn["image_analysis"] = {"ocr_text": ""}
+    image_turn["text"] = ""
+    assert plan_retrieval(image_turn)["retrievers"] == {IMAGE_TO_IMAGE}
+
+    audio_turn = {
+        "text": "what is an electric circuit explain",
+        "message": "and the diagram?",
+        "image_url": None,
+        "audio_url": "https://cdn/temp/a.mp3",
+        "audio_analysis": {"transcript": "what is an electric circuit explain"},
+    }
+    retrievers = plan_retrieval(audio_turn)["retrievers"]
+    assert {AUDIO_TO_AUDIO, AUDIO_TO_TEXT, AUDIO_TO_IMAGE} <= retrievers
+    assert {TEXT_TO_TEXT, TEXT_TO_IMAGE} <= retrievers  # typed message still searched
+
+
+def test_prototypes_reuse_query_vector():
+    embedder = HashingEmbedder()
+    message = "good morning how are you doing today"  # not all small-talk words → no pattern match
+    vector = embedder.embed_query(message)
+
+    assert plan_retrieval(_text_turn(message))["intent"] != "chitchat"
+    plan = plan_retrieval(_text_turn(message), query_vector=vector, embedder=embedder)
+    assert plan["intent"] == "chitchat" and plan["reason"].startswith("prototype")
+
+    question = "define mitosis and meiosis please"
+    plan = plan_retrieval(_text_turn(question), query_vector=embedder.embed_query(question), embedder=embedder)
+    assert plan["intent"] != "chitchat"
+
+
+def test_routing_disabled_fans_out():
+    original = settings.INTENT_ROUTING_ENABLED
+    settings.INTENT_ROUTING_ENABLED = False
+    try:
+        plan = plan_retrieval(_text_turn("explain the stages of mitosis in detail"))
+        assert plan["retrievers"] == {TEXT_TO_TEXT, TEXT_TO_IMAGE, TEXT_TO_AUDIO}
+    finally:
+        settings.INTENT_ROUTING_ENABLED = original
+
+
+def test_meta_intent_selects_history_summary_prompt():
+    from app.chat.router import route_query
+    from app.llm.groq_client import build_chat_prompt
+
+    normalized = {**_text_turn("What have we discussed so far?"), "owner_id": "owner-meta"}
+    assert asyncio.run(route_query(normalized)) == {"text": [], "image": [], "audio": []}
+    assert normalized["intent"] == "meta"
+
+    history = [{"role": "user", "content": "What is osmosis?"}]
+    summary_cue = "Summarize what we have discussed"
+    # A prototype-matched meta turn has no fixed phrase in it
+    assert summary_cue in build_chat_prompt("what did I ask you before", None, history, intent="meta")
+    assert summary_cue not in build_chat_prompt("thanks, I enjoyed our conversation", None, history, intent="chitchat")
+    assert summary_cue not in build_chat_prompt("what did I ask you before", "[1] ctx", history, intent="meta")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_substrings_are_not_chitchat,
+        test_whole_message_chitchat_and_meta,
+        test_text_question_skips_clip_unless_images_wanted,
+        test_upload_only_turns_skip_text_path,
+        test_prototypes_reuse_query_vector,
+        test_routing_disabled_fans_out,
+        test_meta_intent_selects_history_summary_prompt,
+    ]
+    failed = 0
+    for t in tests:
+        try:
+            t()
+            print(f"✅ PASS - {t.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ FAIL - {t.__name__}: {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the durable ingestion job queue and worker pool (no API needed).
+
+Tests:
+- enqueue → claim → progress → complete, visible from a second queue on the same file
+- Failed attempts are retried with backoff, then failed for good
+- Non-retryable JobError fails at once and discards the parked file
+- A job whose worker died is claimed again once its lease has expired
+- ... unless that was its last attempt: then it is failed, not handed out again
+- Stage concurrency limits hold across worker threads
+- A job waiting for a stage slot keeps its lease
+- Document job end to end: PDF → chunks → vectors in (in-memory) Qdrant
+
+Usage:
+    python test_job_queue.py
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.jobs.queue import FAILED, QUEUED, RUNNING, SUCCEEDED, SQLiteJobQueue
+from app.jobs.worker import JobError, JobWorkerPool, parse_stage_limits
+
+
+def _queue(tmp_path, lease_seconds=60.0):
+    return SQLiteJobQueue(str(tmp_path / "jobs.db"), lease_seconds=lease_seconds)
+
+
+def test_job_lifecycle_shared_across_workers(tmp_path):
+    queue = _queue(tmp_path)
+    other = _queue(tmp_path)  # a second uvicorn worker on the same file
+
+    job_id = queue.enqueue("document", owner_id="owner-1", payload={"filename": "a.pdf"})
+    assert other.get(job_id)["status"] == QUEUED
+
+    job = other.claim("w1", ["document"])
+    assert job["job_id"] == job_id and job["attempts"] == 1
+    assert queue.claim("w2", ["document"]) is None  # already taken
+
+    assert other.heartbeat(job_id, "w1", stage="embed", chunks=10, vectors=4)
+    assert other.heartbeat(job_id, "w1", vectors=8)
+    assert not queue.heartbeat(job_id, "w2", vectors=99)  # not w2's job
+
+    status = queue.get(job_id)
+    assert status["status"] == RUNNING and status["stage"] == "embed"
+    assert status["progress"] == {"chunks": 10, "vectors": 8}
+
+    assert other.complete(job_id, "w1", {"vectors_inserted": 10})
+    done = queue.get(job_id)
+    assert done["status"] == SUCCEEDED and done["result"] == {"vectors_inserted": 10}
+    assert queue.counts() == {SUCCEEDED: 1}
+    assert [j["job_id"] for j in queue.list_for_owner("owner-1")] == [job_id]
+
+
+def test_retry_with_backoff_then_fail(tmp_path):
+    queue = _queue(tmp_path)
+    calls = []
+
+    def flaky(job, ctx):
+        calls.append(job["attempts"])
+        raise RuntimeError("embedding service unavailable")
+
+    pool = JobWorkerPool(queue, workers=1, retry_base_seconds=0.05, handlers={"document": flaky})
+    job_id = queue.enqueue("document", owner_id="o", payload={}, max_attempts=3)
+
+    assert pool.run_one("w")
+    job = queue.get(job_id)
+    assert job["status"] == QUEUED and "embedding service unavailable" in job["error"]
+    assert not pool.run_one("w"), "retry must wait for its backoff"
+
+    for _ in range(2):
+        time.sleep(0.25)
+        assert pool.run_one("w")
+
+    job = queue.get(job_id)
+    assert calls == [1, 2, 3]
+    assert job["status"] == FAILED and job["attempts"] == 3
+    assert job["available_at"] - job["updated_at"] == pytest.approx(0.0, abs=0.01)
+
+
+def test_non_retryable_error_fails_at_once(tmp_path):
+    queue = _queue(tmp_path)
+    parked = tmp_path / "upload.pdf"
+    parked.write_bytes(b"%PDF-1.4")
+
+    def no_text(job, ctx):
+        raise JobError("No readable text found in document", retryable=False)
+
+    pool = JobWorkerPool(queue, workers=1, handlers={"document": no_text})
+    job_id = queue.enqueue("document", owner_id="o", payload={"path": str(parked)}, max_attempts=3)
+
+    assert pool.run_one("w")
+    job = queue.get(job_id)
+    assert job["status"] == FAILED and job["attempts"] == 1
+    assert "No readable text" in job["error"]
+    assert not parked.exists(), "parked upload should be deleted once the job is final"
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    queue = _queue(tmp_path, lease_seconds=0.1)
+    job_id = queue.enqueue("audio", owner_id="o", payload={})
+
+    assert queue.claim("dead-worker", ["audio"])["job_id"] == job_id
+    assert queue.claim("w2", ["audio"]) is None
+    time.sleep(0.15)
+
+    job = queue.claim("w2", ["audio"])
+    assert job["job_id"] == job_id and job["attempts"] == 2 and job["worker_id"] == "w2"
+    # The dead worker can no longer report or finish the job
+    assert not queue.heartbeat(job_id, "dead-worker", vectors=1)
+    assert not queue.complete(job_id, "dead-worker", {})
+    assert queue.fail(job_id, "dead-worker", "boom", retry_in=1.0) == RUNNING
+    assert queue.complete(job_id, "w2", {"status": "indexed"})
+
+
+def test_abandoned_last_attempt_is_failed(tmp_path):
+    queue = _queue(tmp_path, lease_seconds=0.1)
+    parked = tmp_path / "huge.pdf"
+    parked.write_bytes(b"%PDF-1.4")
+    job_id = queue.enqueue("document", owner_id="o", payload={"path": str(parked)}, max_attempts=2)
+
+    # Two workers in turn die (OOM) while running the job
+    for worker in ("w1", "w2"):
+        assert queue.claim(worker, ["document"])["job_id"] == job_id
+        time.sleep(0.15)
+
+    assert queue.claim("w3", ["document"]) is None
+    job = queue.get(job_id)
+    assert job["status"] == FAILED and job["attempts"] == 2
+    assert "Lease expired" in job["error"] and "2/2" in job["error"]
+    assert job["lease_expires_at"] is None
+    assert not parked.exists(), "parked upload should be deleted once the job is final"
+
+
+def test_stage_limit_across_threads(tmp_path):
+    queue = _queue(tmp_path)
+    active = {"embed": 0, "extract": 0}
+    peak = {"embed": 0, "extract": 0}
+    lock = threading.Lock()
+
+    def busy(name):
+        with lock:
+            active[name] += 1
+            peak[name] = max(peak[name], active[name])
+        time.sleep(0.05)
+        with lock:
+            active[name] -= 1
+
+    def handler(job, ctx):
+        with ctx.stage("extract"):
+            busy("extract")
+        with ctx.stage("embed"):
+            busy("embed")
+        return {}
+
+    limits = parse_stage_limits("extract=3, embed=1")
+    assert limits == {"extract": 3, "embed": 1}
+
+    pool = JobWorkerPool(queue, workers=3, stage_limits=limits, poll_interval=0.01, handlers={"document": handler})
+    job_ids = [queue.enqueue("document", owner_id="o", payload={}) for _ in range(6)]
+    pool.start()
+    try:
+        deadline = time.time() + 5
+        while time.time() < deadline and queue.counts().get(SUCCEEDED, 0) < len(job_ids):
+            time.sleep(0.02)
+    finally:
+        pool.stop()
+
+    assert queue.counts() == {SUCCEEDED: len(job_ids)}
+    assert peak["embed"] == 1, f"embed stage ran {peak['embed']} at once"
+    assert peak["extract"] > 1, "extract stage should overlap across workers"
+
+
+def test_waiting_for_stage_slot_keeps_lease(tmp_path):
+    queue = _queue(tmp_path, lease_seconds=0.2)
+    holding = threading.Event()
+
+    def handler(job, ctx):
+        with ctx.stage("embed"):
+            holding.set()
+            for n in range(6):  # three leases long; the holder renews as it goes
+                time.sleep(0.1)
+                ctx.progress(vectors=n)
+        return {}
+
+    pool = JobWorkerPool(queue, workers=2, stage_limits={"embed": 1}, handlers={"document": handler})
+    job_ids = [queue.enqueue("document", owner_id="o", payload={}) for _ in range(2)]
+
+    first = threading.Thread(target=pool.run_one, args=("w1",))
+    first.start()
+    assert holding.wait(2)
+    second = threading.Thread(target=pool.run_one, args=("w2",))  # blocks on the embed slot
+    second.start()
+
+    time.sleep(0.45)
+    assert queue.claim("w3", ["document"]) is None, "waiting job's lease expired"
+    first.join()
+    second.join()
+    assert [queue.get(j)["status"] for j in job_ids] == [SUCCEEDED, SUCCEEDED]
+    assert [queue.get(j)["attempts"] for j in job_ids] == [1, 1]
+
+
+def test_document_job_end_to_end(tmp_path, monkeypatch, local_qdrant, hashing_embedder):
+    import fitz
+    from app.jobs import handlers
+
+    pdf_path = tmp_path / "photosynthesis.pdf"
+    doc = fitz.open()
+    for i in range(3):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page {i + 1}: chlorophyll absorbs light energy in the leaf. " * 3)
+    doc.save(pdf_path)
+    doc.close()
+
+    monkeypatch.setattr(handlers, "_embedder", hashing_embedder)
+    monkeypatch.setattr(handlers.settings, "JOB_EMBED_BATCH_SIZE", 1)
+
+    queue = _queue(tmp_path)
+    pool = JobWorkerPool(queue, workers=1, stage_limits=parse_stage_limits("embed=1"))
+    job_id = queue.enqueue(
+        handlers.DOCUMENT_JOB,
+        owner_id="owner-1",
+        payload={"path": str(pdf_path), "filename": "photosynthesis.pdf"},
+    )
+
+    assert pool.run_one("w")
+    job = queue.get(job_id)
+    assert job["status"] == SUCCEEDED, job["error"]
+    assert job["progress"]["pages"] == 3
+    assert job["progress"]["vectors"] == job["progress"]["chunks"] == job["result"]["total_chunks"] > 0
+    assert job["result"]["pages_in_chunks"] == [1, 2, 3]
+    assert local_qdrant.count("text_collection").count == job["result"]["vectors_inserted"]
+    assert not pdf_path.exists()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
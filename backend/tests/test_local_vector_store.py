@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Retrieval against the embedded (in-memory) vector store.
+
+Runs with pytest only (uses the fixtures in conftest.py):
+    cd backend && python -m pytest tests/test_local_vector_store.py
+"""
+
+from conftest import SYNTHETIC_OWNER_ID
+
+
+def test_collections_created(local_qdrant):
+    names = {c.name for c in local_qdrant.get_collections().collections}
+    assert {"text_collection", "image_collection", "audio_collection"} <= names
+
+
+def test_text_retrieval_on_synthetic_corpus(synthetic_corpus, hashing_embedder):
+    from app.retrieval.text_retriever import retrieve_text_chunks
+
+    query = synthetic_corpus["queries"][0]
+    hits = retrieve_text_chunks(query["query"], SYNTHETIC_OWNER_ID, hashing_embedder, top_k=5)
+
+    assert hits, "no hits from local store"
+    top_topic = synthetic_corpus["chunk_topics"][str(hits[0]["id"])]
+    assert top_topic == query["topic"]
+
+
+def test_owner_isolation(synthetic_corpus, hashing_embedder):
+    from app.retrieval.text_retriever import retrieve_text_chunks
+
+    query = synthetic_corpus["queries"][0]["query"]
+    assert retrieve_text_chunks(query, "someone-else", hashing_embedder) == []
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Per-turn media analysis memo tests (in-memory Qdrant, no models needed).
+
+Tests:
+- An audio chat turn runs ASR once and embeds the transcript once, even
+  though three audio retrievers and the text path consume it
+- Whisper segments reach the "[Uploaded Audio]" context item
+- An image chat turn runs OCR + CLIP (embed_image) once and embeds the OCR
+  text once across the three image retrievers
+- A failed image analysis is final: route_query does not run OCR / CLIP again
+- Analysis of the in-memory bytes returns without waiting for the CDN upload,
+  whose URL (or failure) is recorded when it finishes
+- A chat turn retrieves and answers before the upload is done, and still
+  saves its temp asset in the session
+
+Usage:
+    pytest test_media_analysis.py -s
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from conftest import SYNTHETIC_OWNER_ID
+
+AUDIO_URL = "https://synthetic.local/uploads/question.mp3"
+IMAGE_URL = "https://synthetic.local/uploads/diagram.png"
+OCR_TEXT = "chlorophyll absorbs sunlight in the chloroplast of the leaf"
+TRANSCRIPT = "explain chlorophyll and sunlight in the leaf"
+SEGMENTS = [{"text": TRANSCRIPT, "start": 0.0, "end": 2.5}]
+
+
+class CountingEmbedder:
+    def __init__(self, inner):
+        self.inner = inner
+        self.queries = []
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return self.inner.embed_query(text)
+
+    def embed_documents(self, texts):
+        return self.inner.embed_documents(texts)
+
+
+def _chat_stack():
+    try:
+        from app.chat import router, media_analysis
+        return router, media_analysis
+    except Exception as e:  # full model stack (torch, whisper, vision) not installed
+        pytest.skip(f"chat stack unavailable: {e}")
+
+
+def test_audio_turn_transcribes_once(synthetic_corpus, hashing_embedder, monkeypatch):
+    router, media_analysis = _chat_stack()
+    from app.retrieval import (
+        audio_to_audio_retriever,
+        audio_to_text_retriever,
+        audio_to_image_retriever,
+        text_to_audio_retriever,
+    )
+
+    asr_calls = []
+
+    def fake_transcribe(audio_url, audio_bytes=None):
+        asr_calls.append(audio_url)
+        return {"transcript": TRANSCRIPT, "segments": SEGMENTS, "source": "local_whisper"}
+
+    embedder = CountingEmbedder(hashing_embedder)
+    for module in (media_analysis, audio_to_audio_retriever, audio_to_text_retriever, audio_to_image_retriever):
+        monkeypatch.setattr(module, "transcribe_audio", fake_transcribe)
+    monkeypatch.setattr(router, "get_local_bge_m3_embedder", lambda: embedder)
+    monkeypatch.setattr(router, "retrieve_images_from_text", lambda *a, **k: [])
+    monkeypatch.setattr(text_to_audio_retriever, "_embedder", embedder)
+
+    # What normalize_chat_input produces for an audio-only turn
+    analysis = media_analysis.analyze_audio(AUDIO_URL)
+    normalized = {
+        "text": analysis["transcript"],
+        "image_url": None,
+        "audio_url": AUDIO_URL,
+        "owner_id": SYNTHETIC_OWNER_ID,
+        "audio_analysis": analysis,
+    }
+
+    results = asyncio.run(router.route_query(normalized))
+
+    assert asr_calls == [AUDIO_URL], f"ASR ran {len(asr_calls)} times"
+    # Audio-only turn: text and audio paths share one embedding of the transcript
+    assert embedder.queries.count(TRANSCRIPT) == 1
+    assert analysis["query_vector"] is not None
+
+    uploaded = [item for item in results["text"] if item.get("filename") == "[Uploaded Audio]"]
+    assert uploaded and uploaded[0]["timestamps"] == SEGMENTS
+    assert results["audio"], "audio→audio retrieval returned nothing"
+
+
+def test_image_turn_analyses_once(synthetic_corpus, hashing_embedder, monkeypatch):
+    router, media_analysis = _chat_stack()
+    from app.eval.synthetic_corpus import HashingEmbedder
+    from app.retrieval import (
+        image_to_image_retriever,
+        image_to_text_retriever,
+        image_to_audio_retriever,
+        text_to_audio_retriever,
+    )
+
+    image_embedder = HashingEmbedder(dim=512)
+    vision_calls = []
+
+    def fake_embed_image(image_url, image_bytes=None):
+        vision_calls.append(image_url)
+        return {
+            "vector": image_embedder.embed_query(OCR_TEXT),
+            "source": "local",
+            "ocr_text": OCR_TEXT,
+            "ocr_blocks": None,
+        }
+
+    embedder = CountingEmbedder(hashing_embedder)
+    for module in (media_analysis, image_to_image_retriever, image_to_text_retriever, image_to_audio_retriever):
+        monkeypatch.setattr(module, "embed_image", fake_embed_image)
+    monkeypatch.setattr(image_to_image_retriever, "_text_embedder", embedder)
+    monkeypatch.setattr(image_to_text_retriever, "_text_embedder", embedder)
+    monkeypatch.setattr(router, "get_local_bge_m3_embedder", lambda: embedder)
+    monkeypatch.setattr(router, "retrieve_images_from_text", lambda *a, **k: [])
+    monkeypatch.setattr(text_to_audio_retriever, "_embedder", embedder)
+
+    analysis = media_analysis.analyze_image(IMAGE_URL)
+    normalized = {
+        "text": analysis["ocr_text"],
+        "image_url": IMAGE_URL,
+        "audio_url": None,
+        "owner_id": SYNTHETIC_OWNER_ID,
+        "image_analysis": analysis,
+    }
+
+    results = asyncio.run(router.route_query(normalized))
+
+    assert vision_calls == [IMAGE_URL], f"embed_image ran {len(vision_calls)} times"
+    assert embedder.queries.count(OCR_TEXT) == 1
+    assert results["image"], "image→image retrieval returned nothing"
+    assert any(item.get("filename") == "[Uploaded Image]" for item in results["text"])
+
+
+def test_failed_image_analysis_is_not_retried(synthetic_corpus, hashing_embedder, monkeypatch):
+    router, media_analysis = _chat_stack()
+    from app.chat import input_normalizer
+    from app.config import settings
+    from app.retrieval import image_to_image_retriever, image_to_text_retriever, image_to_audio_retriever
+
+    vision_calls = []
+
+    def broken_embed_image(image_url, image_bytes=None):
+        vision_calls.append(image_url)
+        raise RuntimeError("OCR model crashed")
+
+    for module in (media_analysis, image_to_image_retriever, image_to_text_retriever, image_to_audio_retriever):
+        monkeypatch.setattr(module, "embed_image", broken_embed_image)
+    monkeypatch.setattr(input_normalizer, "validate_chat_upload", lambda *a: {"valid": True})
+    monkeypatch.setattr(input_normalizer, "upload_temp_image", lambda data, name: IMAGE_URL)
+    monkeypatch.setattr(input_normalizer, "requires_image_url", lambda: False)
+    monkeypatch.setattr(router, "get_local_bge_m3_embedder", lambda: CountingEmbedder(hashing_embedder))
+    monkeypatch.setattr(settings, "INTENT_ROUTING_ENABLED", False)  # legacy fan-out: all image retrievers
+
+    class _Upload:
+        filename = "diagram.png"
+        content_type = "image/png"
+
+        async def read(self):
+            return b"png bytes"
+
+    async def turn():
+        normalized = await input_normalizer.normalize_chat_input(None, _Upload(), None, SYNTHETIC_OWNER_ID)
+        return normalized, await router.route_query(normalized)
+
+    normalized, results = asyncio.run(turn())
+
+    assert vision_calls == [None], f"embed_image ran {len(vision_calls)} times"
+    assert normalized["image_analysis"]["vector"] is None
+    assert results == {"text": [], "image": [], "audio": []}
+
+
+def test_upload_finishes_in_background():
+    _, media_analysis = _chat_stack()
+    seen_urls = []
+
+    def upload():
+        time.sleep(0.4)
+        return "https://cdn.example/temp/chat/a.mp3"
+
+    def analyze(url):
+        seen_urls.append(url)
+        time.sleep(0.1)
+        return {"transcript": "local bytes"}
+
+    async def turn():
+        start = time.perf_counter()
+        pending, analysis, error = await media_analysis.upload_and_analyze(upload, analyze, url_key="audio_url")
+        returned_after = time.perf_counter() - start
+        assert not pending.done() and pending.url is None and "audio_url" not in analysis
+        tracked = []
+        pending.on_done(tracked.append)
+        url = await pending.wait()
+        return returned_after, url, analysis, error, tracked
+
+    returned_after, url, analysis, error, tracked = asyncio.run(turn())
+
+    assert error is None
+    assert seen_urls == [None], "analysis must not wait for the upload URL"
+    assert returned_after < 0.3, f"returned after {returned_after:.2f}s (waited for the upload?)"
+    # URL recorded once the upload is done
+    assert url == analysis["audio_url"] == "https://cdn.example/temp/chat/a.mp3"
+    assert tracked == [url]
+
+    # Remote CLIP needs the URL: upload first, then analyse
+    seen_urls.clear()
+    pending, _, _ = asyncio.run(media_analysis.upload_and_analyze(upload, analyze, needs_url=True))
+    assert pending.done() and seen_urls == [pending.url]
+
+    # Upload failures are recorded on the pending upload, not raised into the turn
+    def broken_upload():
+        raise ConnectionError("CDN down")
+
+    async def failed_upload():
+        pending, analysis, error = await media_analysis.upload_and_analyze(broken_upload, analyze)
+        with pytest.raises(ConnectionError):
+            await pending.wait()
+        return pending, analysis, error
+
+    pending, analysis, error = asyncio.run(failed_upload())
+    assert error is None and analysis["transcript"] == "local bytes"
+    assert pending.url is None and isinstance(pending.error, ConnectionError)
+
+    # Analysis failure is returned; the upload still finishes (and is tracked for cleanup)
+    def broken(url):
+        raise RuntimeError("ASR down")
+
+    async def failed_analysis():
+        pending, analysis, error = await media_analysis.upload_and_analyze(upload, broken)
+        return await pending.wait(), analysis, error
+
+    url, analysis, error = asyncio.run(failed_analysis())
+    assert url and analysis is None and isinstance(error, RuntimeError)
+
+
+def test_chat_turn_tracks_background_upload(monkeypatch):
+    _, media_analysis = _chat_stack()
+    from app.chat import chat_orchestrator, session_store
+    from app.config import settings
+
+    for flag in ("SEMANTIC_CACHE_ENABLED", "FOLLOWUP_REUSE_ENABLED", "HISTORY_SUMMARY_ENABLED", "SPECULATIVE_RETRIEVAL_ENABLED"):
+        monkeypatch.setattr(settings, flag, False)
+    session_store.reset_session_store(session_store.MemorySessionStore(max_sessions=10, ttl_seconds=60))
+    events = []
+
+    def slow_upload():
+        time.sleep(0.3)
+        events.append("uploaded")
+        return IMAGE_URL
+
+    async def fake_normalize(message, image, audio, owner_id, session=None, deadline=None):
+        pending, analysis, _ = await media_analysis.upload_and_analyze(
+            slow_upload, lambda url: {"ocr_text": OCR_TEXT, "vector": [1.0]}, url_key="image_url",
+        )
+        pending.on_done(session["temp_assets"]["images"].append)
+        return {
+            "text": OCR_TEXT, "message": "", "image_url": pending.url, "audio_url": None,
+            "owner_id": owner_id, "audio_analysis": None, "image_analysis": analysis, "uploads": [pending],
+        }
+
+    async def fake_route_query(normalized, deadline=None, skip=frozenset()):
+        events.append("retrieval")
+        return {"text": [], "image": [], "audio": []}
+
+    async def fake_llm(**kwargs):
+        events.append("llm")
+        return "Chlorophyll absorbs light."
+
+    monkeypatch.setattr(chat_orchestrator, "normalize_chat_input", fake_normalize)
+    monkeypatch.setattr(chat_orchestrator, "route_query", fake_route_query)
+    monkeypatch.setattr(chat_orchestrator, "call_llm_async", fake_llm)
+    try:
+        response = asyncio.run(chat_orchestrator.run_chat_turn("owner-1", None, None, "image", None))
+        session = session_store.load_session(response["session_id"])
+    finally:
+        session_store.reset_session_store()
+
+    assert events == ["retrieval", "llm", "uploaded"], "retrieval / LLM waited for the upload"
+    assert session["temp_assets"]["images"] == [IMAGE_URL]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Prometheus metrics tests (no models, no Qdrant server needed).
+
+Tests:
+- Counters / histograms render in the Prometheus text format
+- METRICS_ENABLED=false records nothing and timed() is a shared no-op
+- The middleware labels requests by route template, times streams to the
+  last byte and returns in-flight gauges to zero; GET /metrics serves it all
+- A chat retrieval records per-retriever latency and semantic cache lookups
+
+Usage:
+    pytest test_metrics.py -s
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from conftest import SYNTHETIC_OWNER_ID
+from app.config import settings
+from app.middleware.metrics import setup_metrics
+from app.utils import metrics
+from app.utils.metrics import Counter, Histogram, Registry, timed
+
+
+@pytest.fixture
+def metrics_on(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+    metrics.REGISTRY.clear()
+    yield
+    metrics.REGISTRY.clear()
+
+
+def test_text_format(metrics_on):
+    registry = Registry()
+    requests = registry.register(Counter("demo_requests_total", "Demo requests.", ["path"]))
+    latency = registry.register(Histogram("demo_seconds", "Demo latency.", ["stage"], buckets=(0.1, 1.0)))
+
+    requests.inc(path='/a"b')
+    requests.inc(2, path='/a"b')
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, stage="llm")
+
+    text = registry.render()
+    print(text)
+    assert '# TYPE demo_requests_total counter' in text
+    assert 'demo_requests_total{path="/a\\"b"} 3' in text
+    assert 'demo_seconds_bucket{stage="llm",le="0.1"} 2' in text  # le is inclusive
+    assert 'demo_seconds_bucket{stage="llm",le="1"} 3' in text
+    assert 'demo_seconds_bucket{stage="llm",le="+Inf"} 4' in text
+    assert 'demo_seconds_count{stage="llm"} 4' in text
+    assert 'demo_seconds_sum{stage="llm"} 3.65' in text
+
+
+def test_disabled_is_noop(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_ENABLED", False)
+    histogram = Histogram("noop_seconds", "Noop.", ["stage"])
+    counter = Counter("noop_total", "Noop.")
+
+    assert timed(histogram, stage="x") is timed(histogram, stage="y")
+    with timed(histogram, stage="x"):
+        pass
+    histogram.observe(1.0, stage="x")
+    counter.inc()
+
+    assert histogram.count(stage="x") == 0
+    assert counter.value() == 0
+
+
+def test_middleware_and_endpoint(metrics_on):
+    app = FastAPI()
+    setup_metrics(app)
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: str):
+        return {"id": item_id}
+
+    @app.get("/stream")
+    def stream():
+        async def chunks():
+            for _ in range(3):
+                await asyncio.sleep(0.05)
+                yield b"x"
+        return StreamingResponse(chunks())
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for item in ("a", "b", "c"):
+                assert (await client.get(f"/items/{item}")).status_code == 200
+            assert (await client.get("/stream")).text == "xxx"
+            assert (await client.get("/missing")).status_code == 404
+            return await client.get(settings.METRICS_PATH)
+
+    response = asyncio.run(run())
+
+    assert metrics.HTTP_REQUESTS.value(endpoint="/items/{item_id}", method="GET", status="200") == 3
+    assert metrics.HTTP_REQUESTS.value(endpoint="unmatched", method="GET", status="404") == 1
+    assert metrics.HTTP_IN_FLIGHT.value(endpoint="/stream") == 0
+    stream_seconds = metrics.HTTP_SECONDS._values[("/stream", "GET")][1]
+    assert stream_seconds >= 0.15, "stream not timed to its last byte"
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'documind_http_requests_total{endpoint="/items/{item_id}",method="GET",status="200"} 3' in response.text
+    assert "/metrics" not in response.text  # scrapes are not counted
+
+
+def test_chat_retrieval_metrics(metrics_on, synthetic_corpus, hashing_embedder, monkeypatch):
+    try:
+        from app.chat import router
+    except Exception as e:  # full model stack (torch, whisper, vision) not installed
+        pytest.skip(f"chat stack unavailable: {e}")
+    from app.chat.semantic_cache import SemanticQueryCache
+    from app.retrieval import text_to_audio_retriever
+
+    monkeypatch.setattr(router, "get_local_bge_m3_embedder", lambda: hashing_embedder)
+    monkeypatch.setattr(text_to_audio_retriever, "_embedder", hashing_embedder)
+
+    question = synthetic_corpus["queries"][0]["query"]
+    normalized = {
+        "text": question,
+        "message": question,
+        "image_url": None,
+        "audio_url": None,
+        "owner_id": SYNTHETIC_OWNER_ID,
+    }
+    asyncio.run(router.route_query(normalized))
+
+    assert metrics.RETRIEVER_SECONDS.count(retriever="text_to_text") == 1
+    assert metrics.RETRIEVER_SECONDS.count(retriever="text_to_audio") == 1
+    assert metrics.MODEL_SECONDS.count(model="bge_m3", backend="local") == 1
+
+    cache = SemanticQueryCache(threshold=0.9, ttl_seconds=60, max_entries_per_owner=4)
+    vector = np.ones(8, dtype=np.float32)
+    cache.lookup("owner", vector, corpus_version=0)
+    cache.store("owner", vector, "q", {"text": []}, corpus_version=0)
+    cache.lookup("owner", vector, corpus_version=0)
+    assert metrics.CACHE_REQUESTS.value(cache="semantic", result="miss") == 1
+    assert metrics.CACHE_REQUESTS.value(cache="semantic", result="hit") == 1
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Unit tests for MMR diversification (no API / Qdrant needed).
+
+Tests:
+- Near-duplicate chunks are not selected back-to-back
+- lambda=1.0 falls back to pure relevance order
+- Without an explicit lambda, settings.MMR_LAMBDA is used
+- 50 candidates x 1024 dims selects in under a millisecond
+
+Usage:
+    python test_mmr.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+from app.config import settings
+from app.retrieval.mmr import mmr_select
+
+
+def _unit(v):
+    v = np.asarray(v, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+
+def test_mmr_skips_near_duplicates():
+    """Two overlapping chunks + one distinct chunk → distinct one is picked second."""
+    rng = np.random.default_rng(0)
+    query = _unit(rng.normal(size=64))
+    dup_a = _unit(query + 0.1 * rng.normal(size=64))
+    dup_b = _unit(dup_a + 0.01 * rng.normal(size=64))  # overlap neighbour of dup_a
+    other = _unit(query + 0.6 * rng.normal(size=64))
+
+    picked = mmr_select(query, [dup_a, dup_b, other], top_k=2, lambda_mult=0.5)
+
+    assert picked[0] in (0, 1)
+    assert picked[1] == 2, f"expected distinct chunk second, got {picked}"
+
+
+def test_mmr_pure_relevance():
+    rng = np.random.default_rng(1)
+    query = _unit(rng.normal(size=32))
+    cands = [_unit(query + s * rng.normal(size=32)) for s in (0.1, 0.5, 1.0, 2.0)]
+    relevance_order = list(np.argsort([-float(np.dot(query, c)) for c in cands]))
+
+    picked = mmr_select(query, cands, top_k=4, lambda_mult=1.0)
+
+    assert picked == [int(i) for i in relevance_order]
+
+
+def test_mmr_default_lambda_from_settings():
+    rng = np.random.default_rng(0)
+    query = _unit(rng.normal(size=64))
+    dup_a = _unit(query + 0.1 * rng.normal(size=64))
+    dup_b = _unit(dup_a + 0.01 * rng.normal(size=64))
+    other = _unit(query + 0.6 * rng.normal(size=64))
+
+    original = settings.MMR_LAMBDA
+    try:
+        settings.MMR_LAMBDA = 1.0
+        assert mmr_select(query, [dup_a, dup_b, other], top_k=2) == mmr_select(
+            query, [dup_a, dup_b, other], top_k=2, lambda_mult=1.0
+        )
+        settings.MMR_LAMBDA = 0.5
+        assert mmr_select(query, [dup_a, dup_b, other], top_k=2)[1] == 2
+    finally:
+        settings.MMR_LAMBDA = original
+
+
+def test_mmr_latency_50_candidates():
+    rng = np.random.default_rng(2)
+    query = rng.normal(size=1024).astype(np.float32)
+    cands = rng.normal(size=(50, 1024)).astype(np.float32)
+
+    mmr_select(query, cands, top_k=5)  # warm-up
+
+    runs = 200
+    start = time.perf_counter()
+    for _ in range(runs):
+        mmr_select(query, cands, top_k=5)
+    per_call_ms = (time.perf_counter() - start) / runs * 1000
+
+    print(f"   MMR 50x1024 → top5: {per_call_ms:.3f} ms/call")
+    assert per_call_ms < 1.0, f"MMR too slow: {per_call_ms:.3f} ms"
+
+
+if __name__ == "__main__":
+    tests = [
+        test_mmr_skips_near_duplicates,
+        test_mmr_pure_relevance,
+        test_mmr_default_lambda_from_settings,
+        test_mmr_latency_50_candidates,
+    ]
+    failed = 0
+    for t in tests:
+        try:
+            t()
+            print(f"✅ PASS - {t.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ FAIL - {t.__name__}: {e}")
+    sys.exit(1 if failed else 0)
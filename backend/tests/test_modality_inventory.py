@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Modality inventory tests (in-memory Qdrant, no models needed).
+
+Tests:
+- Counts per collection and source come from Qdrant on first lookup
+- Indexers keep a loaded inventory current without re-counting
+- Unknown counts (Qdrant error) never hide a collection
+- A text-only owner's chat turn skips image/audio searches and CLIP
+
+Usage:
+    pytest test_modality_inventory.py -s
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from conftest import SYNTHETIC_OWNER_ID
+from app.chunking.text_chunker import build_chunks
+from app.db import modality_inventory
+from app.db.modality_inventory import (
+    available_collections,
+    get_modality_inventory,
+    record_points,
+    TEXT_COLLECTION, IMAGE_COLLECTION, AUDIO_COLLECTION,
+)
+from app.ingestion.text_indexer import index_text_chunks
+
+TEXT_ONLY_OWNER = "pdf-only-owner"
+DOCUMENT = (
+    "Photosynthesis converts light energy into chemical energy in the chloroplast. "
+    "Chlorophyll absorbs red and blue light and reflects green light."
+)
+
+
+def _index_text_only_owner(embedder):
+    chunks = build_chunks(owner_id=TEXT_ONLY_OWNER, filename="notes.pdf", preprocessed_text=DOCUMENT)
+    index_text_chunks(chunks, embedder)
+    return len(chunks)
+
+
+def test_counts_by_collection_and_source(synthetic_corpus):
+    counts = get_modality_inventory(SYNTHETIC_OWNER_ID)
+
+    assert counts[AUDIO_COLLECTION] == {"audio": len(synthetic_corpus["audio"])}
+    assert counts[IMAGE_COLLECTION] == {"local": len(synthetic_corpus["images"])}
+    assert counts[TEXT_COLLECTION] == {"text": len(synthetic_corpus["chunk_topics"])}
+    assert available_collections("nobody") == set()
+
+
+def test_indexers_update_loaded_inventory(local_qdrant, hashing_embedder, monkeypatch):
+    n_chunks = _index_text_only_owner(hashing_embedder)
+    assert available_collections(TEXT_ONLY_OWNER) == {TEXT_COLLECTION}
+
+    loads = []
+    original_load = modality_inventory._load
+    monkeypatch.setattr(modality_inventory, "_load", lambda owner: loads.append(owner) or original_load(owner))
+
+    _index_text_only_owner(hashing_embedder)
+    record_points(TEXT_ONLY_OWNER, AUDIO_COLLECTION, "audio")  # what index_audio does after its upsert
+
+    counts = get_modality_inventory(TEXT_ONLY_OWNER)
+    assert counts[TEXT_COLLECTION]["text"] == 2 * n_chunks
+    assert available_collections(TEXT_ONLY_OWNER) == {TEXT_COLLECTION, AUDIO_COLLECTION}
+    assert loads == [], "inventory was re-counted instead of updated in place"
+
+
+def test_count_failure_assumes_everything(local_qdrant, monkeypatch):
+    def broken_count(*args, **kwargs):
+        raise RuntimeError("qdrant unavailable")
+
+    monkeypatch.setattr(local_qdrant, "count", broken_count)
+    assert available_collections(TEXT_ONLY_OWNER) == {TEXT_COLLECTION, IMAGE_COLLECTION, AUDIO_COLLECTION}
+    assert TEXT_ONLY_OWNER not in modality_inventory._inventory  # not cached
+
+
+def test_text_only_owner_skips_other_modalities(local_qdrant, hashing_embedder, monkeypatch):
+    try:
+        from app.chat import router
+    except Exception as e:  # full model stack (torch, whisper, vision) not installed
+        pytest.skip(f"chat stack unavailable: {e}")
+    from app.retrieval import text_to_audio_retriever
+
+    _index_text_only_owner(hashing_embedder)
+
+    def must_not_run(*args, **kwargs):
+        raise AssertionError("searched a collection the owner never populated")
+
+    monkeypatch.setattr(router, "get_local_bge_m3_embedder", lambda: hashing_embedder)
+    monkeypatch.setattr(router, "retrieve_images_from_text", must_not_run)
+    monkeypatch.setattr(router, "retrieve_audio_from_text", must_not_run)
+    monkeypatch.setattr(text_to_audio_retriever, "_embedder", hashing_embedder)
+
+    normalized = {
+        "text": "show me the diagram of chlorophyll absorbing light",
+        "message": "show me the diagram of chlorophyll absorbing light",
+        "image_url": None,
+        "audio_url": None,
+        "owner_id": TEXT_ONLY_OWNER,
+    }
+    results = asyncio.run(router.route_query(normalized))
+
+    assert results["text"], "text retrieval returned nothing"
+    assert results["image"] == [] and results["audio"] == []
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Unit tests for neighbour-chunk expansion (in-memory Qdrant, no API needed).
+
+Tests:
+- The window is clipped at the first / last chunk of a page
+- A hit between two passages bridges them into one (no chunk repeated)
+- Different files and pages are never merged
+- Passages keep the hits' rank order; a merged passage keeps the best hit's place and score
+- Real CHUNK_OVERLAP-overlapping chunks are stitched with the shared region sent once;
+  chunks whose overlap cannot be located are joined with a newline
+
+Usage:
+    python test_neighbor_expansion.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.chunking import text_chunker
+from app.chunking.text_chunker import build_page_chunks, generate_chunk_id
+from app.ingestion.text_indexer import index_text_chunks
+from app.retrieval.neighbor_expansion import expand_with_neighbors, stitch_chunks
+
+OWNER = "owner-neighbours"
+
+
+def _text(filename, page, idx):
+    return f"{filename} page {page} chunk {idx}."
+
+
+def _chunk(filename, page, idx):
+    return {
+        "id": generate_chunk_id(owner_id=OWNER, filename=filename, page=page, chunk_index=idx),
+        "text": _text(filename, page, idx),
+        "metadata": {
+            "owner_id": OWNER,
+            "filename": filename,
+            "page": page,
+            "chunk_index": idx,
+            "source": "pdf",
+        },
+    }
+
+
+def _hit(filename, page, idx, score=1.0):
+    return {**_chunk(filename, page, idx), "score": score}
+
+
+@pytest.fixture
+def pages(local_qdrant, hashing_embedder):
+    """a.pdf: page 1 has chunks 0-4, page 2 chunks 0-1; b.pdf: page 1 chunks 0-2."""
+    chunks = (
+        [_chunk("a.pdf", 1, i) for i in range(5)]
+        + [_chunk("a.pdf", 2, i) for i in range(2)]
+        + [_chunk("b.pdf", 1, i) for i in range(3)]
+    )
+    index_text_chunks(chunks, hashing_embedder)
+    return chunks
+
+
+def _passage(filename, page, lo, hi):
+    return "\n".join(_text(filename, page, i) for i in range(lo, hi + 1))
+
+
+def test_window_is_clipped_at_page_edges(pages):
+    first = expand_with_neighbors([_hit("a.pdf", 1, 0)], OWNER, window=2)
+    last = expand_with_neighbors([_hit("a.pdf", 1, 4)], OWNER, window=2)
+
+    assert first[0]["chunk_span"] == [0, 2]
+    assert first[0]["text"] == _passage("a.pdf", 1, 0, 2)
+    assert last[0]["chunk_span"] == [2, 4]
+    assert last[0]["text"] == _passage("a.pdf", 1, 2, 4)
+
+
+def test_hit_bridges_two_passages(pages):
+    hits = [_hit("a.pdf", 1, 0, 0.9), _hit("a.pdf", 1, 4, 0.8), _hit("a.pdf", 1, 2, 0.7)]
+
+    expanded = expand_with_neighbors(hits, OWNER, window=1)
+
+    assert len(expanded) == 1
+    assert expanded[0]["chunk_span"] == [0, 4]
+    assert expanded[0]["text"] == _passage("a.pdf", 1, 0, 4)
+    assert expanded[0]["text"].count(_text("a.pdf", 1, 3)) == 1
+    assert expanded[0]["score"] == 0.9
+
+
+def test_files_and_pages_stay_apart(pages):
+    hits = [_hit("a.pdf", 1, 1), _hit("a.pdf", 2, 0), _hit("b.pdf", 1, 1)]
+
+    expanded = expand_with_neighbors(hits, OWNER, window=1)
+
+    assert [(e["metadata"]["filename"], e["metadata"]["page"], e["chunk_span"]) for e in expanded] == [
+        ("a.pdf", 1, [0, 2]),
+        ("a.pdf", 2, [0, 1]),
+        ("b.pdf", 1, [0, 2]),
+    ]
+    assert expanded[2]["text"] == _passage("b.pdf", 1, 0, 2)
+
+
+def test_rank_order_is_kept(pages):
+    hits = [
+        _hit("b.pdf", 1, 2, 0.9),
+        _hit("a.pdf", 1, 3, 0.8),
+        _hit("b.pdf", 1, 0, 0.7),  # touches the first passage
+        {"id": "no-metadata", "text": "image caption", "metadata": {}, "score": 0.6},
+    ]
+
+    expanded = expand_with_neighbors(hits, OWNER, window=1)
+
+    assert [(e["metadata"].get("filename"), e.get("chunk_span"), e["score"]) for e in expanded] == [
+        ("b.pdf", [0, 2], 0.9),
+        ("a.pdf", [2, 4], 0.8),
+        (None, None, 0.6),
+    ]
+    assert expand_with_neighbors(hits, OWNER, window=0) is hits
+
+
+def test_overlapping_chunks_are_stitched_once(local_qdrant, hashing_embedder, monkeypatch):
+    monkeypatch.setattr(text_chunker, "get_chunk_tokenizer", lambda: None)  # cl100k windows
+    sentences = [f"Fact {i} concerns sample {i}." for i in range(400)]
+    page_text = " ".join(sentences)
+    chunks = build_page_chunks(owner_id=OWNER, filename="long.pdf", page_number=1, page_text=page_text)
+    assert len(chunks) >= 3 and all(c["metadata"]["token_count"] for c in chunks)
+    index_text_chunks(chunks, hashing_embedder)
+
+    hit = {**chunks[1], "score": 1.0}
+    text = expand_with_neighbors([hit], OWNER, window=1)[0]["text"]
+
+    first, middle, last = (c["text"] for c in chunks[:3])
+    shared = [s for s in sentences if s in first and s in middle]
+    assert shared, "fixture chunks must overlap"
+    for sentence in shared:
+        assert text.count(sentence) == 1, f"overlap sent twice: {sentence}"
+    assert text.startswith(first) and text.endswith(last)
+    assert text in page_text, "stitched passage should be a contiguous slice of the page"
+
+
+def test_stitch_falls_back_when_anchor_not_found():
+    prev = "Osmosis moves water across a membrane."
+    unrelated = "Mitosis splits one nucleus into two."
+
+    assert stitch_chunks(prev, unrelated, next_token_count=8) == f"{prev}\n{unrelated}"
+    assert stitch_chunks(prev, unrelated, next_token_count=None) == f"{prev}\n{unrelated}"
+    assert stitch_chunks("", unrelated, next_token_count=8) == unrelated
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tests for the offline retrieval evaluation harness (app/eval/retrieval_eval.py).
+
+Usage:
+    cd backend && python -m pytest tests/test_retrieval_eval.py
+"""
+
+import math
+
+from app.eval.retrieval_eval import recall_at_k, reciprocal_rank, ndcg_at_k, run_evaluation
+from app.eval.synthetic_corpus import generate_corpus
+
+
+def test_metrics():
+    ranked = [False, True, False, True, False]
+
+    assert recall_at_k(ranked, num_relevant=2, k=5) == 1.0
+    assert recall_at_k(ranked, num_relevant=10, k=5) == 0.4
+    assert reciprocal_rank(ranked) == 0.5
+    assert reciprocal_rank([False] * 3) == 0.0
+
+    dcg = 1 / math.log2(3) + 1 / math.log2(5)
+    ideal = 1 + 1 / math.log2(3)
+    assert math.isclose(ndcg_at_k(ranked, num_relevant=2, k=5), dcg / ideal)
+
+
+def test_harness_reports_every_text_config(monkeypatch, tmp_path):
+    from app.config import settings
+    from conftest import BACKEND_DIR
+
+    monkeypatch.chdir(BACKEND_DIR)
+
+    corpus = generate_corpus(num_docs=2, pages_per_doc=3, sentences_per_page=20, queries_per_topic=1)
+    report = run_evaluation(top_k=3, corpus=corpus)
+
+    assert set(report["text"]) >= {"baseline", "prefetch_x4", "mmr_0.6"}
+    baseline = report["text"]["baseline"]
+    assert baseline["queries"] == len(corpus["queries"])
+    assert 0.0 <= baseline["recall@3"] <= 1.0
+    assert baseline["p95_ms"] >= baseline["p50_ms"]
+
+
+def test_harness_restores_callers_store(local_qdrant, monkeypatch):
+    from app.config import settings
+    from app.db import qdrant_client
+
+    monkeypatch.setattr(settings, "QDRANT_MODE", "local")
+
+    corpus = generate_corpus(num_docs=1, pages_per_doc=2, sentences_per_page=10, queries_per_topic=1)
+    run_evaluation(top_k=3, corpus=corpus)
+
+    assert settings.QDRANT_MODE == "local"
+    assert qdrant_client.get_qdrant_client() is local_qdrant
+    # The eval corpus went to its own store, not the caller's
+    assert local_qdrant.count("text_collection").count == 0
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the chat semantic query cache (no API / Qdrant needed).
+
+Tests:
+- Near-duplicate query above the threshold hits, unrelated query misses
+- Corpus version bump invalidates cached entries
+- Entries expire after the TTL
+- Per-owner size limit evicts the least recently used entry
+- Owners never see each other's entries
+
+Usage:
+    python test_semantic_cache.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+from app.chat.semantic_cache import SemanticQueryCache
+from app.db.corpus_version import get_corpus_version, bump_corpus_version
+
+
+def _vec(seed, dim=64):
+    return np.random.default_rng(seed).normal(size=dim)
+
+
+def test_near_duplicate_hits_and_unrelated_misses():
+    cache = SemanticQueryCache(threshold=0.95, ttl_seconds=60)
+    base = _vec(0)
+    cache.store("owner", base, "what is photosynthesis", {"text": [1]}, corpus_version=0, answer="A")
+
+    paraphrase = base + 0.05 * _vec(1)
+    hit = cache.lookup("owner", paraphrase, corpus_version=0)
+    assert hit is not None and hit["results"] == {"text": [1]} and hit["answer"] == "A"
+
+    assert cache.lookup("owner", _vec(2), corpus_version=0) is None
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_corpus_version_invalidates():
+    owner = "version-owner"
+    cache = SemanticQueryCache(threshold=0.9, ttl_seconds=60)
+    version = get_corpus_version(owner)
+    cache.store(owner, _vec(3), "q", {"text": []}, corpus_version=version)
+
+    assert cache.lookup(owner, _vec(3), corpus_version=version) is not None
+    new_version = bump_corpus_version(owner)
+    assert new_version == version + 1
+    assert cache.lookup(owner, _vec(3), corpus_version=new_version) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_ttl_expiry():
+    cache = SemanticQueryCache(threshold=0.9, ttl_seconds=0.05)
+    cache.store("owner", _vec(4), "q", {}, corpus_version=0)
+    time.sleep(0.1)
+    assert cache.lookup("owner", _vec(4), corpus_version=0) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_size_limit_evicts_lru():
+    cache = SemanticQueryCache(threshold=0.99, ttl_seconds=60, max_entries_per_owner=2)
+    cache.store("owner", _vec(10), "a", {"q": "a"}, corpus_version=0)
+    cache.store("owner", _vec(11), "b", {"q": "b"}, corpus_version=0)
+    assert cache.lookup("owner", _vec(10), corpus_version=0) is not None  # "a" recently used
+    cache.store("owner", _vec(12), "c", {"q": "c"}, corpus_version=0)
+
+    assert cache.lookup("owner", _vec(11), corpus_version=0) is None      # "b" evicted
+    assert cache.lookup("owner", _vec(10), corpus_version=0) is not None
+    assert cache.lookup("owner", _vec(12), corpus_version=0) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_owner_isolation():
+    cache = SemanticQueryCache(threshold=0.9, ttl_seconds=60)
+    cache.store("alice", _vec(20), "q", {"text": ["alice-only"]}, corpus_version=0)
+    assert cache.lookup("bob", _vec(20), corpus_version=0) is None
+
+
+if __name__ == "__main__":
+    tests = [
+        test_near_duplicate_hits_and_unrelated_misses,
+        test_corpus_version_invalidates,
+        test_ttl_expiry,
+        test_size_limit_evicts_lru,
+        test_owner_isolation,
+    ]
+    failed = 0
+    for t in tests:
+        try:
+            t()
+            print(f"✅ PASS - {t.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ FAIL - {t.__name__}: {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the chat session store (no API / Redis needed).
+
+Tests:
+- Memory backend evicts least-recently-used sessions and runs the eviction hook
+- Memory backend expires idle sessions
+- Two SQLite stores on one file (= two workers) see each other's sessions
+- Expired SQLite sessions are cleaned up exactly once across workers
+- Redis sessions idle past the TTL are not served (or revived) before the key's
+  native expiry fires, and are cleaned up through the eviction hook
+- Sessions round-trip through the compressed serialization
+- get_session / save_session / cleanup_session against a swapped-in store
+- A backend missing part of the interface fails at construction
+
+Usage:
+    python test_session_store.py
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.chat import session_store
+from app.chat.session_store import (
+    MemorySessionStore,
+    RedisSessionStore,
+    SQLiteSessionStore,
+    dumps_session,
+    loads_session,
+)
+
+
+def _session(owner_id="owner-1", turns=0):
+    history = []
+    for i in range(turns):
+        history.append({"role": "user", "content": f"question {i} about photosynthesis"})
+        history.append({"role": "assistant", "content": f"answer {i} " + "chlorophyll absorbs light. " * 20})
+    return {
+        "owner_id": owner_id,
+        "history": history,
+        "citations": [{"id": 1, "source": "text", "score": 0.82}],
+        "temp_assets": {"images": ["https://cdn.example/temp/a.png"], "audio": []},
+    }
+
+
+def test_memory_lru_eviction_runs_hook():
+    evicted = []
+    store = MemorySessionStore(max_sessions=2, ttl_seconds=60, on_evict=lambda sid, s: evicted.append(sid))
+
+    store.save("a", _session())
+    store.save("b", _session())
+    assert store.load("a") is not None  # a is now most recently used
+    store.save("c", _session())
+
+    assert evicted == ["b"], f"expected LRU session 'b' evicted, got {evicted}"
+    assert store.load("b") is None
+    assert len(store) == 2
+
+
+def test_memory_ttl_expiry():
+    evicted = []
+    store = MemorySessionStore(max_sessions=10, ttl_seconds=0.05, on_evict=lambda sid, s: evicted.append(sid))
+
+    store.save("idle", _session())
+    time.sleep(0.1)
+
+    assert store.load("idle") is None
+    assert evicted == ["idle"]
+
+
+def test_serialization_roundtrip_is_compact():
+    session = _session(turns=7)
+    blob = dumps_session(session)
+
+    assert loads_session(blob) == session
+    import json
+    pretty = json.dumps(session, indent=2).encode()
+    print(f"   session: {len(pretty)} B pretty JSON → {len(blob)} B stored")
+    assert len(blob) < len(pretty) / 2
+
+
+def test_sqlite_shared_between_workers():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "sessions.db")
+        worker_a = SQLiteSessionStore(path, ttl_seconds=60)
+        worker_b = SQLiteSessionStore(path, ttl_seconds=60)
+
+        session = _session()
+        worker_a.save("s1", session)
+        assert worker_b.load("s1") == session
+
+        # Mutations only become visible after save
+        loaded = worker_b.load("s1")
+        loaded["history"].append({"role": "user", "content": "hi"})
+        worker_b.save("s1", loaded)
+        assert worker_a.load("s1")["history"][-1]["content"] == "hi"
+
+        assert worker_a.delete("s1") == loaded
+        assert worker_b.load("s1") is None
+
+        worker_a.close()
+        worker_b.close()
+
+
+def test_sqlite_expired_sessions_cleaned_up_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "sessions.db")
+        evicted = []
+        hook = lambda sid, s: evicted.append((sid, s["temp_assets"]["images"]))
+        worker_a = SQLiteSessionStore(path, ttl_seconds=0.05, on_evict=hook, sweep_interval=0)
+        worker_b = SQLiteSessionStore(path, ttl_seconds=0.05, on_evict=hook, sweep_interval=0)
+
+        worker_a.save("old", _session())
+        time.sleep(0.1)
+
+        assert worker_b.load("old") is None
+        worker_a.save("fresh", _session())  # triggers a sweep on the other worker too
+
+        assert evicted == [("old", ["https://cdn.example/temp/a.png"])]
+        assert worker_b.load("fresh") is not None
+
+        worker_a.close()
+        worker_b.close()
+
+
+class _FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+
+class _FakeRedis:
+    """The handful of Redis commands RedisSessionStore uses; key expiry never fires."""
+
+    def __init__(self):
+        self.strings = {}
+        self.zsets = {}
+
+    def get(self, key):
+        return self.strings.get(key)
+
+    def set(self, key, value, ex=None):
+        self.strings[key] = value
+
+    def delete(self, key):
+        return int(self.strings.pop(key, None) is not None)
+
+    def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def zrem(self, key, member):
+        return int(self.zsets.get(key, {}).pop(member, None) is not None)
+
+    def zscore(self, key, member):
+        return self.zsets.get(key, {}).get(member)
+
+    def zrangebyscore(self, key, low, high):
+        return [m for m, score in self.zsets.get(key, {}).items() if score <= high]
+
+    def pipeline(self):
+        redis, calls = self, []
+
+        class _Pipeline:
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: calls.append((name, args, kwargs))
+
+            def execute(self):
+                return [getattr(redis, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+        return _Pipeline()
+
+
+def test_redis_idle_ttl_checked_on_load():
+    fake_redis = _FakeRedis()
+    fake_module = type(sys)("redis")
+    fake_module.Redis = type("Redis", (), {"from_url": staticmethod(lambda url: fake_redis)})
+    clock = _FakeClock(1_000.0)
+    original_redis, original_time = sys.modules.get("redis"), session_store.time
+    sys.modules["redis"], session_store.time = fake_module, clock
+    try:
+        evicted = []
+        store = RedisSessionStore(
+            "redis://test", ttl_seconds=60, sweep_interval=3600,
+            on_evict=lambda sid, s: evicted.append((sid, s["temp_assets"]["images"])),
+        )
+        store.save("idle", _session())
+
+        clock.now += 30
+        assert store.load("idle") is not None
+
+        clock.now += 31  # 61 s since the save; the key's native TTL is 2*60+3600 s
+        assert store.load("idle") is None
+        assert evicted == [("idle", ["https://cdn.example/temp/a.png"])]
+        assert store.load("idle") is None and len(evicted) == 1
+        # Deleted, so a later save cannot revive the expired session
+        assert fake_redis.get(store._key("idle")) is None
+    finally:
+        session_store.time = original_time
+        if original_redis is None:
+            sys.modules.pop("redis", None)
+        else:
+            sys.modules["redis"] = original_redis
+
+
+def test_module_api_with_swapped_store():
+    cleaned = []
+    original_cleanup = session_store.cleanup_temp_assets
+    session_store.cleanup_temp_assets = lambda s: cleaned.append(s["owner_id"])
+    session_store.reset_session_store(MemorySessionStore(max_sessions=10, ttl_seconds=60))
+    try:
+        session_id, session = session_store.get_session("owner-1", None)
+        session["history"].append({"role": "user", "content": "hello"})
+        session_store.save_session(session_id, session)
+
+        same_id, same = session_store.get_session("owner-1", session_id)
+        assert same_id == session_id and same["history"][0]["content"] == "hello"
+        assert session_store.load_session(session_id) is same
+
+        session_store.cleanup_session(session_id)
+        assert cleaned == ["owner-1"]
+        assert session_store.load_session(session_id) is None
+    finally:
+        session_store.cleanup_temp_assets = original_cleanup
+        session_store.reset_session_store()
+
+
+def test_incomplete_backend_fails_at_construction():
+    class NoDeleteStore(session_store.SessionStore):
+        def load(self, session_id):
+            return None
+
+        def save(self, session_id, session):
+            pass
+
+    try:
+        NoDeleteStore(ttl_seconds=60)
+    except TypeError as e:
+        assert "delete" in str(e)
+    else:
+        raise AssertionError("a store without delete() must not be constructible")
+
+
+if __name__ == "__main__":
+    tests = [
+        test_memory_lru_eviction_runs_hook,
+        test_memory_ttl_expiry,
+        test_serialization_roundtrip_is_compact,
+        test_sqlite_shared_between_workers,
+        test_sqlite_expired_sessions_cleaned_up_once,
+        test_redis_idle_ttl_checked_on_load,
+        test_module_api_with_swapped_store,
+        test_incomplete_backend_fails_at_construction,
+    ]
+    failed = 0
+    for t in tests:
+        try:
+            t()
+            print(f"✅ PASS - {t.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ FAIL - {t.__name__}: {e}")
+    sys.exit(1 if failed else 0)
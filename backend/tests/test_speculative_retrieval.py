@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Speculative retrieval tests (no models, no Qdrant server needed).
+
+Tests:
+- With typed text + an upload, the typed-text search starts before OCR / ASR
+  finish, and the upload searches run afterwards without the text path
+- The merged results keep the typed-text hits first
+- A failed upload validation cancels the speculative search, and so do an
+  empty normalized input and a failing upload search
+- route_query(skip=...) drops the skipped retrievers and never embeds the
+  query when the text path is skipped
+
+Usage:
+    pytest test_speculative_retrieval.py -s
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+from fastapi import HTTPException
+
+from conftest import SYNTHETIC_OWNER_ID
+from app.config import settings
+
+
+def _chat_stack():
+    try:
+        from app.chat import chat_orchestrator, router
+        return chat_orchestrator, router
+    except Exception as e:  # full model stack (torch, whisper, vision) not installed
+        pytest.skip(f"chat stack unavailable: {e}")
+
+
+@pytest.fixture
+def memory_sessions(monkeypatch):
+    from app.chat import session_store
+
+    monkeypatch.setattr(settings, "SPECULATIVE_RETRIEVAL_ENABLED", True)
+    monkeypatch.setattr(settings, "HISTORY_SUMMARY_ENABLED", False)
+    session_store.reset_session_store(session_store.MemorySessionStore(max_sessions=10, ttl_seconds=60))
+    yield
+    session_store.reset_session_store()
+
+
+def _hit(hit_id, text):
+    return {"id": hit_id, "score": 0.8, "text": text, "metadata": {"filename": "notes.pdf", "page": 1}}
+
+
+def test_typed_text_searched_during_ocr(memory_sessions, monkeypatch):
+    chat_orchestrator, _ = _chat_stack()
+    events = []
+
+    async def slow_normalize(message, image, audio, owner_id, session=None, deadline=None):
+        events.append(("ocr_start", time.perf_counter()))
+        await asyncio.sleep(0.3)
+        events.append(("ocr_done", time.perf_counter()))
+        return {
+            "text": f"{message} Ohm's law V = IR",
+            "message": message,
+            "image_url": "https://cdn/temp/a.png",
+            "audio_url": None,
+            "owner_id": owner_id,
+            "audio_analysis": None,
+            "image_analysis": {"ocr_text": "Ohm's law V = IR"},
+        }
+
+    async def fake_route_query(normalized, deadline=None, skip=frozenset()):
+        events.append(("route", time.perf_counter(), normalized["image_url"], set(skip)))
+        await asyncio.sleep(0.1)
+        if normalized["image_url"]:
+            return {"text": [_hit("ocr", "V = IR relates voltage and current.")], "image": [], "audio": []}
+        return {"text": [_hit("typed", "Resistance is measured in ohms.")], "image": [], "audio": []}
+
+    monkeypatch.setattr(chat_orchestrator, "normalize_chat_input", slow_normalize)
+    monkeypatch.setattr(chat_orchestrator, "route_query", fake_route_query)
+
+    turn = asyncio.run(chat_orchestrator._prepare_turn("owner-1", None, "explain this formula", "image", None))
+
+    routes = [e for e in events if e[0] == "route"]
+    ocr_done = next(e[1] for e in events if e[0] == "ocr_done")
+    typed, upload = routes
+    assert typed[2] is None and typed[1] < ocr_done, "typed-text search waited for OCR"
+    assert upload[2] == "https://cdn/temp/a.png" and upload[1] >= ocr_done
+    assert upload[3] == set(chat_orchestrator.TEXT_RETRIEVERS)
+
+    assert [hit["id"] for hit in turn["retrieval_results"]["text"]] == ["typed", "ocr"]
+    assert turn["citations"]
+
+
+def test_validation_error_cancels_speculation(memory_sessions, monkeypatch):
+    chat_orchestrator, _ = _chat_stack()
+    cancelled = []
+
+    async def rejecting_normalize(message, image, audio, owner_id, session=None, deadline=None):
+        await asyncio.sleep(0.05)
+        raise HTTPException(status_code=415, detail="Unsupported image type")
+
+    async def fake_route_query(normalized, deadline=None, skip=frozenset()):
+        try:
+            await asyncio.sleep(1.0)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return {"text": [], "image": [], "audio": []}
+
+    monkeypatch.setattr(chat_orchestrator, "normalize_chat_input", rejecting_normalize)
+    monkeypatch.setattr(chat_orchestrator, "route_query", fake_route_query)
+
+    async def run():
+        with pytest.raises(HTTPException):
+            await chat_orchestrator._prepare_turn("owner-1", None, "what is this", "image", None)
+        await asyncio.sleep(0)  # let the cancellation land
+
+    asyncio.run(run())
+    assert cancelled == [True]
+
+
+def test_unconsumed_speculation_is_cancelled(memory_sessions, monkeypatch):
+    chat_orchestrator, _ = _chat_stack()
+    cancelled = []
+
+    def normalize_to(text):
+        async def fake_normalize(message, image, audio, owner_id, session=None, deadline=None):
+            await asyncio.sleep(0.05)
+            return {
+                "text": text, "message": message, "image_url": "https://cdn/temp/a.png", "audio_url": None,
+                "owner_id": owner_id, "audio_analysis": None, "image_analysis": {"ocr_text": text},
+            }
+        return fake_normalize
+
+    async def fake_route_query(normalized, deadline=None, skip=frozenset()):
+        if skip:
+            raise RuntimeError("upload search failed")
+        try:
+            await asyncio.sleep(1.0)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return {"text": [], "image": [], "audio": []}
+
+    monkeypatch.setattr(chat_orchestrator, "route_query", fake_route_query)
+
+    async def run(text):
+        # Checked inside the loop: asyncio.run() would cancel a leaked task on exit anyway
+        monkeypatch.setattr(chat_orchestrator, "normalize_chat_input", normalize_to(text))
+        try:
+            turn = await chat_orchestrator._prepare_turn("owner-1", None, "what is this", "image", None)
+        except RuntimeError as e:
+            turn = e
+        await asyncio.sleep(0)  # let the cancellation land
+        return turn, list(cancelled)
+
+    turn, seen = asyncio.run(run(""))
+    assert turn["answer"] and seen == [True]
+
+    error, seen = asyncio.run(run("what is this Ohm's law"))
+    assert "upload search failed" in str(error) and seen == [True, True]
+
+
+def test_route_query_skip(synthetic_corpus, hashing_embedder, monkeypatch):
+    _, router = _chat_stack()
+    from app.retrieval import text_to_audio_retriever
+
+    embedded = []
+
+    class CountingEmbedder:
+        def embed_query(self, text):
+            embedded.append(text)
+            return hashing_embedder.embed_query(text)
+
+        def __getattr__(self, name):
+            return getattr(hashing_embedder, name)
+
+    monkeypatch.setattr(router, "get_local_bge_m3_embedder", lambda: CountingEmbedder())
+    monkeypatch.setattr(text_to_audio_retriever, "_embedder", hashing_embedder)
+
+    question = synthetic_corpus["queries"][0]["query"]
+    normalized = router.typed_text_query(question, SYNTHETIC_OWNER_ID)
+
+    full = asyncio.run(router.route_query(normalized))
+    assert full["text"] and embedded == [question]
+
+    embedded.clear()
+    skipped = asyncio.run(router.route_query(normalized, skip=router.TEXT_RETRIEVERS))
+    assert skipped == {"text": [], "image": [], "audio": []}
+    assert embedded == []
+
+    merged = router.merge_retrieval_results(full, {"text": [{"id": "x"}], "image": [], "audio": []})
+    assert merged["text"] == full["text"] + [{"id": "x"}]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-s", "-q"]))
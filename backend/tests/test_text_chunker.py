@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the tokenizer-aligned chunker (no model download needed).
+
+A whitespace "fast tokenizer" with offset mappings stands in for BGE-M3's.
+
+Tests:
+- Each page is tokenized once; windows are slices of the page cut by offsets (no decode)
+- Windows keep CHUNK_SIZE / CHUNK_OVERLAP in tokenizer tokens and carry their token ids
+- token_ids reach the embedder (embed_token_ids) but never the Qdrant payload
+- CHUNK_TOKENIZER=cl100k keeps the tiktoken chunker
+
+Usage:
+    python test_text_chunker.py
+"""
+
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.chunking import text_chunker
+from app.chunking.text_chunker import build_page_chunks, chunk_page_text
+from app.ingestion import document_pipeline
+
+
+class _WhitespaceFastTokenizer:
+    """Word-level tokenizer with the transformers fast-tokenizer call signature."""
+
+    is_fast = True
+
+    def __init__(self):
+        self.calls = 0
+        self.vocab = {}
+
+    def __call__(self, text, add_special_tokens=True, return_offsets_mapping=False, **kwargs):
+        self.calls += 1
+        assert not add_special_tokens
+        ids, offsets = [], []
+        for match in re.finditer(r"\S+", text):
+            ids.append(self.vocab.setdefault(match.group(), len(self.vocab) + 5))
+            offsets.append((match.start(), match.end()))
+        return {"input_ids": ids, "offset_mapping": offsets}
+
+
+@pytest.fixture
+def tokenizer(monkeypatch):
+    tok = _WhitespaceFastTokenizer()
+    monkeypatch.setattr(text_chunker, "get_chunk_tokenizer", lambda: tok)
+    return tok
+
+
+PAGE = "  ".join(f"word{i}" for i in range(1, 26)) + "\n"
+
+
+def test_windows_are_offset_slices(tokenizer):
+    chunks = chunk_page_text(PAGE, page_number=4, chunk_size=10, overlap=3)
+
+    assert tokenizer.calls == 1, "page should be tokenized exactly once"
+    assert [c["token_count"] for c in chunks] == [10, 10, 10, 4]
+    assert chunks[0]["text"] == "  ".join(f"word{i}" for i in range(1, 11))
+    assert chunks[1]["text"].startswith("word8  word9  word10  word11")
+    assert chunks[-1]["text"] == "word22  word23  word24  word25"
+    for chunk in chunks:
+        assert chunk["text"] in PAGE, "chunk text must be a slice of the page"
+        assert len(chunk["token_ids"]) == chunk["token_count"]
+        assert chunk["tokenizer"] == "bge-m3"
+    # consecutive windows share `overlap` token ids
+    assert chunks[0]["token_ids"][-3:] == chunks[1]["token_ids"][:3]
+
+
+def test_token_ids_go_to_embedder_not_payload(tokenizer):
+    chunks = build_page_chunks(owner_id="o", filename="notes.pdf", page_number=1, page_text=PAGE)
+    assert all("token_ids" in c and "token_ids" not in c["metadata"] for c in chunks)
+    assert all(c["metadata"]["token_count_tokenizer"] == "bge-m3" for c in chunks)
+
+    class _Embedder:
+        def embed_token_ids(self, token_ids):
+            self.seen = token_ids
+            return [[1.0] for _ in token_ids]
+
+        def embed_documents(self, texts):
+            raise AssertionError("chunks with token ids must not be re-tokenized")
+
+    embedder = _Embedder()
+    assert document_pipeline._embed_batch(embedder, chunks) == [[1.0]] * len(chunks)
+    assert embedder.seen == [c["token_ids"] for c in chunks]
+
+
+def test_cl100k_setting_keeps_tiktoken_chunker(monkeypatch):
+    from app.config import settings
+    from app.utils import tokens
+
+    monkeypatch.setattr(settings, "CHUNK_TOKENIZER", "cl100k")
+    tokens.get_chunk_tokenizer.cache_clear()
+    try:
+        assert tokens.get_chunk_tokenizer() is None
+        chunks = chunk_page_text("Chlorophyll absorbs red and blue light.", page_number=1)
+        assert len(chunks) == 1 and "token_ids" not in chunks[0]
+        assert chunks[0]["tokenizer"] == "cl100k"
+        assert chunks[0]["text"] == "Chlorophyll absorbs red and blue light."
+    finally:
+        tokens.get_chunk_tokenizer.cache_clear()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-s", "-q"]))